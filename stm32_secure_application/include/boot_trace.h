@@ -0,0 +1,117 @@
+/**
+ * ============================================================================
+ * BOOT TRACE - Horodatage DWT CYCCNT des étapes du boot
+ * ============================================================================
+ * Mailbox en RAM .noinit (0x20000000, 128 bytes, région NOINIT des deux
+ * linker scripts): le bootloader la remet à zéro et démarre CYCCNT, puis
+ * l'application y ajoute ses étapes sur la même base de temps.
+ *
+ * Chaque marque enregistre la FIN d'une étape. Lecture sur l'hôte:
+ *   st-flash read ram.bin 0x20000000 128 / commande UART "TRACE"
+ *   python3 tools/boot_trace.py ram.bin
+ *
+ * Fichier identique dans stm32_secure_bootloader/include et
+ * stm32_secure_application/include (layout décodé par tools/boot_trace.py)
+ * ============================================================================
+ */
+
+#ifndef BOOT_TRACE_H
+#define BOOT_TRACE_H
+
+#include "stm32f1xx_hal.h"
+
+#define BOOT_TRACE_ADDR     0x20000000U
+#define BOOT_TRACE_MAGIC    0x43525442U  // "BTRC"
+#define BOOT_TRACE_VERSION  1
+#define BOOT_TRACE_MAX      14
+
+#define BOOT_TRACE_NOINIT __attribute__((section(".noinit")))
+
+// Profil de boot (-DBOOT_PROFILE, envs *_production de platformio.ini)
+#define BOOT_PROFILE_DIAGNOSTIC 0  // LED bloquante: 2111 ms avant le saut, 606 ms avant READY
+#define BOOT_PROFILE_PRODUCTION 1  // LED non bloquante: saut et READY dès l'init terminée
+#ifndef BOOT_PROFILE
+#define BOOT_PROFILE BOOT_PROFILE_DIAGNOSTIC
+#endif
+
+// Délais bloquants du profil diagnostic (relus par tools/boot_timing.py).
+// HAL_Delay(n) attend n + 1 ms: splash 905 ms, confirmation 1206 ms, app 606 ms
+#define BOOT_SPLASH_ON_MS      100  // LED allumée
+#define BOOT_SPLASH_BLINKS     2
+#define BOOT_SPLASH_BLINK_MS   100  // Allumée / éteinte
+#define BOOT_SPLASH_PAUSE_MS   500
+#define BOOT_OK_BLINKS         3    // Confirmation avant le saut (application diagnostic)
+#define BOOT_OK_BLINK_MS       200
+#define BOOT_OK_PAUSE_MS       200
+#define APP_BLINKS             3    // Démarrage de l'application, avant READY
+#define APP_BLINK_MS           100
+
+typedef enum {
+    // Bootloader
+    BOOT_STAGE_RESET      = 0,   // Entrée de main, CYCCNT démarré
+    BOOT_STAGE_HAL_INIT   = 1,
+    BOOT_STAGE_CLOCK_GPIO = 2,   // SystemClock_Config + GPIO_Init
+    BOOT_STAGE_SPLASH     = 3,   // LED + HAL_Delay avant la vérification
+    BOOT_STAGE_CHECKS     = 4,   // Magic, taille, stack pointer
+    BOOT_STAGE_CRC        = 5,
+    BOOT_STAGE_SHA256     = 6,
+    BOOT_STAGE_OK_BLINK   = 7,   // LED_Blink(BOOT_OK_BLINKS) + HAL_Delay(BOOT_OK_PAUSE_MS)
+    BOOT_STAGE_JUMP       = 8,   // Désactivation IRQ/SysTick, VTOR
+    // Application
+    APP_STAGE_ENTRY       = 16,  // Entrée de main de l'application
+    APP_STAGE_REINIT      = 17,  // System_FullReinit
+    APP_STAGE_INIT        = 18,  // HAL_Init + horloge + périphériques
+    APP_STAGE_BLINK       = 19,  // 3 blinks de démarrage
+    APP_STAGE_READY       = 20,  // "READY" envoyé
+} BootStage_t;
+
+typedef struct {
+    uint32_t cycles;             // DWT->CYCCNT à la fin de l'étape
+    uint32_t stage;              // BootStage_t
+} BootStamp_t;
+
+typedef struct {
+    uint32_t magic;              // BOOT_TRACE_MAGIC
+    uint16_t version;            // BOOT_TRACE_VERSION
+    uint16_t count;              // Marques valides dans stamps[]
+    uint32_t clock_hz;           // SystemCoreClock à la dernière marque
+    uint32_t reserved;
+    BootStamp_t stamps[BOOT_TRACE_MAX];
+} BootTrace_t;
+
+extern volatile BootTrace_t boot_trace;  // Défini BOOT_TRACE_NOINIT dans main.c
+
+static inline void boot_trace_start(void) {
+    CoreDebug->DEMCR |= CoreDebug_DEMCR_TRCENA_Msk;
+    DWT->CYCCNT = 0;
+    DWT->CTRL |= DWT_CTRL_CYCCNTENA_Msk;
+    
+    boot_trace.magic = BOOT_TRACE_MAGIC;
+    boot_trace.version = BOOT_TRACE_VERSION;
+    boot_trace.count = 0;
+    boot_trace.clock_hz = SystemCoreClock;
+    boot_trace.reserved = 0;
+}
+
+// Application: continue la trace du bootloader, ou en démarre une si elle
+// a été lancée seule (debugger) ou après un power-on (RAM aléatoire)
+static inline void boot_trace_resume(void) {
+    if (boot_trace.magic != BOOT_TRACE_MAGIC || boot_trace.version != BOOT_TRACE_VERSION ||
+        boot_trace.count > BOOT_TRACE_MAX || !(DWT->CTRL & DWT_CTRL_CYCCNTENA_Msk)) {
+        boot_trace_start();
+    }
+}
+
+static inline void boot_trace_stamp(BootStage_t stage) {
+    uint32_t cycles = DWT->CYCCNT;
+    uint16_t n = boot_trace.count;
+    
+    if (n < BOOT_TRACE_MAX) {
+        boot_trace.stamps[n].cycles = cycles;
+        boot_trace.stamps[n].stage = stage;
+        boot_trace.count = n + 1;
+    }
+    boot_trace.clock_hz = SystemCoreClock;
+}
+
+#endif // BOOT_TRACE_H
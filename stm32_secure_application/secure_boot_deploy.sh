@@ -176,12 +176,26 @@ flash_application() {
         exit 1
     fi
     
+    # Pages modifiées uniquement (relecture APP_DUMP ou dernier flash connu)
+    if [ -z "$FULL_FLASH" ] && { [ -n "$APP_DUMP" ] || [ -f ".pio/last_flashed.bin" ]; }; then
+        print_step "Flash @ 0x08002000 (pages modifiées)..."
+        if python3 tools/flash_planner.py firmware_signed.bin \
+            ${APP_DUMP:+--current "$APP_DUMP"} --execute; then
+            print_success "Application flashée"
+            return
+        fi
+        print_error "Échec flash application"
+        exit 1
+    fi
+    
     print_step "Flash @ 0x08002000..."
     st-flash write firmware_signed.bin 0x08002000
     
     if [ $? -eq 0 ]; then
+        mkdir -p .pio && cp firmware_signed.bin .pio/last_flashed.bin
         print_success "Application flashée"
     else
+        rm -f .pio/last_flashed.bin
         print_error "Échec flash application"
         exit 1
     fi
@@ -195,6 +209,7 @@ erase_flash() {
     print_header "EFFACEMENT FLASH"
     
     print_step "Effacement en cours..."
+    rm -f "$APPLICATION_DIR/.pio/last_flashed.bin"  # Référence du flash planner périmée
     st-flash erase
     
     if [ $? -eq 0 ]; then
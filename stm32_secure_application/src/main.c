@@ -10,6 +10,7 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <ctype.h>
+#include "boot_trace.h"
 
 /* ============================================================================
    HANDLES & BUFFERS
@@ -48,6 +49,9 @@ typedef struct {
 
 volatile DeviceState_t device = {.temperature = 25.0f};
 
+// Étapes du boot (bootloader puis application), relue par la commande TRACE
+volatile BootTrace_t boot_trace BOOT_TRACE_NOINIT;
+
 /* ============================================================================
    PROTOTYPES
    ============================================================================ */
@@ -63,6 +67,7 @@ void checkDMABuffer(void);
 void processChar(uint8_t c);
 void processCommand(char *cmd);
 void sendResponse(const char *msg);
+void sendBootTrace(void);
 void updateADC(void);
 void setPWM(uint8_t duty);
 static void trim(char *s);
@@ -76,8 +81,13 @@ int extractJsonInt(const char *json, const char *key, int *out);
    MAIN
    ============================================================================ */
 int main(void) {
+    // Continue la trace DWT du bootloader (CYCCNT tourne toujours)
+    boot_trace_resume();
+    boot_trace_stamp(APP_STAGE_ENTRY);
+    
     // 🔥 CRITIQUE: Reset système AVANT HAL
     System_FullReinit();
+    boot_trace_stamp(APP_STAGE_REINIT);
     
     // Init HAL
     HAL_Init();
@@ -87,17 +97,27 @@ int main(void) {
     USART2_Init();
     ADC1_Init();
     TIM2_PWM_Init();
+    boot_trace_stamp(APP_STAGE_INIT);
     
+#if BOOT_PROFILE == BOOT_PROFILE_DIAGNOSTIC
     // 3 blinks = app démarre
-    for(int i = 0; i < 3; i++) {
+    for(int i = 0; i < APP_BLINKS; i++) {
         HAL_GPIO_WritePin(GPIOC, GPIO_PIN_13, GPIO_PIN_RESET);
-        HAL_Delay(100);
+        HAL_Delay(APP_BLINK_MS);
         HAL_GPIO_WritePin(GPIOC, GPIO_PIN_13, GPIO_PIN_SET);
-        HAL_Delay(100);
+        HAL_Delay(APP_BLINK_MS);
     }
+#else
+    // Mêmes 3 blinks, rythmés par HAL_GetTick dans la boucle principale
+    HAL_GPIO_WritePin(GPIOC, GPIO_PIN_13, GPIO_PIN_SET);
+    uint8_t startup_toggles = 2 * APP_BLINKS;
+    uint32_t last_toggle = HAL_GetTick();
+#endif
+    boot_trace_stamp(APP_STAGE_BLINK);
     
     // Message de bienvenue
     sendResponse("READY\r\n");
+    boot_trace_stamp(APP_STAGE_READY);
     
     // Démarre DMA
     HAL_UART_Receive_DMA(&huart2, uart_rx_buffer, UART_RX_BUFFER_SIZE);
@@ -109,6 +129,14 @@ int main(void) {
     while(1) {
         checkDMABuffer();
         
+#if BOOT_PROFILE == BOOT_PROFILE_PRODUCTION
+        if (startup_toggles && HAL_GetTick() - last_toggle >= APP_BLINK_MS) {
+            HAL_GPIO_TogglePin(GPIOC, GPIO_PIN_13);
+            startup_toggles--;
+            last_toggle = HAL_GetTick();
+        }
+#endif
+        
         // Update ADC toutes les 100ms
         if (HAL_GetTick() - last_adc > 100) {
             updateADC();
@@ -369,6 +397,9 @@ void processCommand(char *cmd) {
     if (!strcmp(cmd, "PING")) {
         sendResponse("PONG\r\n");
     }
+    else if (!strcmp(cmd, "TRACE")) {
+        sendBootTrace();
+    }
     else if (!strcmp(cmd, "STATUS")) {
         snprintf(resp, sizeof(resp),
             "STATUS: OK | LED:%s | UP:%lus | V:%.2fV | PWM:%u%%\r\n",
@@ -419,6 +450,26 @@ void processCommand(char *cmd) {
     }
 }
 
+/* ============================================================================
+   BOOT TRACE (mailbox en hex, décodée par tools/boot_trace.py)
+   ============================================================================ */
+void sendBootTrace(void) {
+    static const char hex[] = "0123456789ABCDEF";
+    char resp[6 + 2 * sizeof(BootTrace_t) + 3];
+    const volatile uint8_t *raw = (const volatile uint8_t *)&boot_trace;
+    char *p = resp;
+    
+    memcpy(p, "TRACE:", 6);
+    p += 6;
+    for (uint32_t i = 0; i < sizeof(BootTrace_t); i++) {
+        *p++ = hex[raw[i] >> 4];
+        *p++ = hex[raw[i] & 0x0F];
+    }
+    memcpy(p, "\r\n", 3);
+    
+    sendResponse(resp);
+}
+
 /* ============================================================================
    UART TX
    ============================================================================ */
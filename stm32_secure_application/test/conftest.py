@@ -3,9 +3,22 @@ Configuration pytest pour tests application
 Fixtures réutilisables
 """
 
+import random
+import sys
+from pathlib import Path
+
 import pytest
 
 
+# tools/ (firmware_signer, ...) importable depuis les tests
+TOOLS_DIR = Path(__file__).parent.parent / 'tools'
+if str(TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOLS_DIR))
+
+import signature_backend  # noqa: E402
+from boot_trace import encode_trace  # noqa: E402
+
+
 # ============================================================================
 # Fixture: Constantes Application
 # ============================================================================
@@ -153,6 +166,80 @@ def memory_regions():
     }
 
 
+# ============================================================================
+# Fixture: Dump RAM synthétique avec trace de boot
+# ============================================================================
+
+# Boot actuel (profil diagnostic, HSI 8 MHz, firmware ~20KB):
+# (étape BootStage_t, cycles DWT depuis la marque précédente)
+BOOT_TRACE_STAGES = [
+    (0, 0),            # reset
+    (1, 9_600),        # hal_init
+    (2, 2_400),        # clock_gpio
+    (3, 8_000_000),    # splash: 100 + 2×(100+100) + 500 ms
+    (4, 80),           # checks
+    (5, 1_150_000),    # crc32 logiciel bit à bit
+    (6, 1_900_000),    # sha256
+    (7, 11_200_000),   # ok_blink: 3×(200+200) + 200 ms
+    (8, 240),          # jump
+    (16, 60),          # app_entry
+    (17, 320),         # app_reinit
+    (18, 14_000),      # app_init
+    (19, 4_800_000),   # app_blink: 3×(100+100) ms
+    (20, 1_800),       # app_ready
+]
+
+
+@pytest.fixture
+def boot_trace_dump():
+    """
+    Relecture des 20KB de RAM (st-flash read ram.bin 0x20000000 20480)
+    avec la mailbox boot_trace du boot de BOOT_TRACE_STAGES
+    
+    Usage:
+        def test_trace(boot_trace_dump):
+            trace = boot_trace.trace_from_dump(boot_trace_dump)
+    """
+    stamps, cycles = [], 1_234  # CYCCNT démarré juste avant la 1re marque
+    for stage, delta in BOOT_TRACE_STAGES:
+        cycles += delta
+        stamps.append((stage, cycles))
+    
+    ram = bytearray(random.Random(0x20000000).randbytes(20 * 1024))
+    ram[:128] = encode_trace(stamps, clock_hz=8_000_000)
+    return bytes(ram)
+
+
+# ============================================================================
+# Fixture: Signature Ed25519
+# ============================================================================
+
+@pytest.fixture
+def ed25519_signing(monkeypatch):
+    """
+    Rend la signature Ed25519 disponible pour le test
+    
+    Avec 'cryptography' installé, rien n'est changé: le test passe par le
+    chemin par défaut (OpenSSL). Sans, le moteur python (pas à temps
+    constant) est autorisé via FIRMWARE_INSECURE_PYTHON_SIGNING=1, pour ce
+    test seulement; la variable est héritée par les process du pool.
+    
+    Usage:
+        @pytest.mark.usefixtures('ed25519_signing')
+        def test_signed(firmware):
+            firmware_image.build_package(firmware, signing_key=seed)
+    """
+    if signature_backend.ENGINE == 'python':
+        monkeypatch.setenv(signature_backend.INSECURE_SIGNING_ENV_VAR, '1')
+
+
+@pytest.fixture
+def python_signing(monkeypatch):
+    """Force le moteur python pour signer (implémentation de référence)"""
+    monkeypatch.setattr(signature_backend, 'ENGINE', 'python')
+    monkeypatch.setenv(signature_backend.INSECURE_SIGNING_ENV_VAR, '1')
+
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
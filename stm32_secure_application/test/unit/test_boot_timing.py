@@ -0,0 +1,154 @@
+"""
+Tests Unitaires - Modèle de temps de boot (tools/boot_timing.py)
+Budget reset → READY du profil production, délais vérifiés contre boot_trace.h
+"""
+
+import re
+from pathlib import Path
+
+import pytest
+
+import boot_timing
+import boot_trace
+import firmware_image
+from firmware_image import (
+    BOOT_PROFILE_DIAGNOSTIC, BOOT_PROFILE_PRODUCTION, CRC_MODE_IEEE, CRC_MODE_STM32,
+    MAX_FIRMWARE_SIZE,
+)
+
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+BOOTLOADER_DIR = PROJECT_DIR.parent / 'stm32_secure_bootloader'
+
+
+HEADERS = [
+    PROJECT_DIR / 'include' / 'boot_trace.h',
+    BOOTLOADER_DIR / 'include' / 'boot_trace.h',
+]
+
+
+def timings(**kwargs):
+    return boot_trace.stage_timings(boot_timing.boot_model(**kwargs))
+
+
+@pytest.mark.unit
+class TestHeaderDelays:
+    """Tests que le modèle suit les délais déclarés dans boot_trace.h"""
+    
+    @pytest.mark.parametrize('header', HEADERS, ids=['application', 'bootloader'])
+    def test_diagnostic_delays(self, header):
+        """Test: constantes du header == délais du profil diagnostic"""
+        delays = boot_timing.header_delays(header.read_text())
+        
+        assert delays == {**boot_timing.BOOTLOADER_DELAYS_MS[BOOT_PROFILE_DIAGNOSTIC],
+                          **boot_timing.APPLICATION_DELAYS_MS[BOOT_PROFILE_DIAGNOSTIC]}
+    
+    def test_hal_delay_extra_tick(self):
+        """Test: un tick de plus par HAL_Delay, pas de pause après le dernier blink"""
+        values = dict.fromkeys(boot_timing.DELAY_CONSTANTS, 0)
+        values.update(BOOT_SPLASH_BLINKS=1, BOOT_OK_BLINKS=2, APP_BLINKS=1)
+        header = '\n'.join(f'#define {name} {value}' for name, value in values.items())
+        
+        assert boot_timing.header_delays(header) == {'splash': 3, 'ok_blink': 4, 'app_blink': 2}
+    
+    def test_missing_constant(self):
+        """Test: une constante renommée échoue au lieu de donner 0 ms"""
+        source = HEADERS[0].read_text().replace('BOOT_SPLASH_PAUSE_MS', 'BOOT_SPLASH_WAIT_MS')
+        
+        with pytest.raises(ValueError, match='BOOT_SPLASH_PAUSE_MS'):
+            boot_timing.header_delays(source)
+    
+    @pytest.mark.parametrize('project_dir', [PROJECT_DIR, BOOTLOADER_DIR],
+                             ids=['application', 'bootloader'])
+    def test_main_uses_constants(self, project_dir):
+        """Test: aucun délai littéral avant la boucle principale de main()"""
+        source = (project_dir / 'src' / 'main.c').read_text()
+        body = source[source.index('int main(void)'):]
+        body = body[:re.search(r'^\s*while\s*\(1\)', body, re.MULTILINE).start()]
+        
+        assert not re.findall(r'\b(?:HAL_Delay|LED_Blink)\(\d', body)
+
+
+@pytest.mark.unit
+class TestBootBudget:
+    """Tests du budget SLA reset → READY"""
+    
+    def test_production_within_budget(self):
+        """Test: production, firmware de 48KB, CRC matériel sous BOOT_BUDGET_MS"""
+        result = timings(firmware_size=MAX_FIRMWARE_SIZE,
+                         bootloader_profile=BOOT_PROFILE_PRODUCTION,
+                         app_profile=BOOT_PROFILE_PRODUCTION, crc_mode=CRC_MODE_STM32)
+        
+        assert boot_trace.check_budgets(result, {'total': boot_timing.BOOT_BUDGET_MS}) == []
+    
+    def test_production_has_no_cosmetic_delay(self):
+        """Test: aucune étape LED dans le profil production"""
+        result = {timing.name: timing.ms for timing in timings(
+            bootloader_profile=BOOT_PROFILE_PRODUCTION, app_profile=BOOT_PROFILE_PRODUCTION)}
+        
+        assert result['splash'] == result['ok_blink'] == result['app_blink'] == 0
+    
+    def test_diagnostic_exceeds_budget(self):
+        """Test: le profil diagnostic dépasse le budget de plus de 2 s"""
+        total = boot_trace.total_ms(timings(crc_mode=CRC_MODE_STM32))
+        assert total > boot_timing.BOOT_BUDGET_MS + 2000
+    
+    def test_software_crc_exceeds_budget(self):
+        """Test: en production, le CRC logiciel seul fait sortir du budget"""
+        result = timings(bootloader_profile=BOOT_PROFILE_PRODUCTION,
+                         app_profile=BOOT_PROFILE_PRODUCTION, crc_mode=CRC_MODE_IEEE)
+        
+        (name, _, _), = boot_trace.check_budgets(result, {'total': boot_timing.BOOT_BUDGET_MS})
+        assert name == 'total'
+    
+    def test_production_app_on_diagnostic_bootloader(self):
+        """Test: le blink de confirmation disparaît, le splash reste"""
+        result = {timing.name: timing.ms for timing in timings(
+            bootloader_profile=BOOT_PROFILE_DIAGNOSTIC, app_profile=BOOT_PROFILE_PRODUCTION)}
+        
+        assert result['ok_blink'] == 0
+        assert result['splash'] == pytest.approx(905)
+    
+    def test_decodable_trace(self):
+        """Test que la trace modèle passe par l'encodage de la mailbox"""
+        trace = boot_timing.boot_model()
+        stamps = [tuple(stamp) for stamp in trace.stamps]
+        
+        assert boot_trace.parse_trace(boot_trace.encode_trace(stamps)) == trace
+    
+    def test_unknown_crc_mode(self):
+        """Test d'un mode CRC inconnu"""
+        with pytest.raises(ValueError):
+            boot_timing.boot_model(crc_mode=0x7F)
+
+
+@pytest.mark.unit
+class TestCli:
+    """Tests de la ligne de commande"""
+    
+    def test_default_is_production_budget(self, capsys):
+        """Test: défaut = production, 48KB, CRC matériel, dans le budget"""
+        assert boot_timing.main(['--budget', str(boot_timing.BOOT_BUDGET_MS)]) == 0
+        assert 'application production' in capsys.readouterr().out
+    
+    def test_signed_package(self, tmp_path, capsys):
+        """Test d'un package signé: profil et mode CRC lus dans reserved"""
+        firmware = b'\x00\x50\x00\x20\x01\x21\x00\x08' + bytes(4096)
+        package, metadata_json = firmware_image.build_package(
+            firmware, crc_mode=CRC_MODE_STM32, boot_profile=BOOT_PROFILE_PRODUCTION)
+        path = tmp_path / 'firmware_signed.bin'
+        path.write_bytes(package)
+        
+        assert boot_timing.main([str(path), '--budget', '50']) == 0
+        out = capsys.readouterr().out
+        assert f"{len(firmware)} bytes, CRC stm32" in out
+        assert f"application {metadata_json['boot_profile']}" in out
+    
+    def test_budget_exceeded(self, capsys):
+        """Test: code de retour 1 au-delà du budget"""
+        assert boot_timing.main(['--profile', 'diagnostic', '--budget', '300']) == 1
+        assert 'Budget exceeded: total' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
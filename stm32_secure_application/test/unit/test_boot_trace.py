@@ -0,0 +1,208 @@
+"""
+Tests Unitaires - Décodeur de trace de boot (tools/boot_trace.py)
+Mailbox DWT CYCCNT de include/boot_trace.h, dump RAM et rapport UART
+"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+import boot_trace
+from conftest import BOOT_TRACE_STAGES
+
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+HEADERS = [
+    PROJECT_DIR / 'include' / 'boot_trace.h',
+    PROJECT_DIR.parent / 'stm32_secure_bootloader' / 'include' / 'boot_trace.h',
+]
+
+
+@pytest.mark.unit
+class TestMailbox:
+    """Tests du format BootTrace_t"""
+    
+    def test_roundtrip(self):
+        """Test encode_trace → parse_trace"""
+        stamps = [(0, 100), (1, 900), (16, 5000)]
+        trace = boot_trace.parse_trace(boot_trace.encode_trace(stamps, clock_hz=72_000_000))
+        
+        assert trace.clock_hz == 72_000_000
+        assert [tuple(stamp) for stamp in trace.stamps] == stamps
+    
+    def test_size(self):
+        """Test que la mailbox tient dans la région NOINIT de 128 bytes"""
+        assert boot_trace.BOOT_TRACE_SIZE == 128
+        assert len(boot_trace.encode_trace([])) == 128
+    
+    @pytest.mark.parametrize('header', HEADERS, ids=['application', 'bootloader'])
+    def test_matches_c_header(self, header):
+        """Test que boot_trace.h (les deux copies) == constantes du décodeur"""
+        source = header.read_text()
+        
+        assert int(re.search(r'BOOT_TRACE_MAGIC\s+(0x[0-9A-F]+)U', source).group(1), 16) == \
+            boot_trace.BOOT_TRACE_MAGIC
+        assert int(re.search(r'BOOT_TRACE_MAX\s+(\d+)', source).group(1)) == boot_trace.BOOT_TRACE_MAX
+        
+        stages = {int(value): name for name, value in
+                  re.findall(r'(?:BOOT|APP)_STAGE_(\w+)\s*=\s*(\d+)', source)}
+        assert set(stages) == set(boot_trace.STAGES)
+    
+    def test_headers_identical(self):
+        """Test que bootloader et application partagent le même layout"""
+        assert HEADERS[0].read_text() == HEADERS[1].read_text()
+    
+    def test_bad_magic(self):
+        """Test d'une RAM sans trace (power-on, application lancée seule)"""
+        with pytest.raises(boot_trace.BootTraceError, match='no boot trace'):
+            boot_trace.parse_trace(b'\x00' * 128)
+    
+    def test_corrupted_count(self):
+        """Test d'un compteur de marques > BOOT_TRACE_MAX"""
+        trace = bytearray(boot_trace.encode_trace([]))
+        trace[6] = boot_trace.BOOT_TRACE_MAX + 1
+        
+        with pytest.raises(boot_trace.BootTraceError, match='count'):
+            boot_trace.parse_trace(bytes(trace))
+    
+    def test_too_many_stamps(self):
+        """Test que encode_trace refuse plus de BOOT_TRACE_MAX marques"""
+        with pytest.raises(boot_trace.BootTraceError):
+            boot_trace.encode_trace([(0, 0)] * (boot_trace.BOOT_TRACE_MAX + 1))
+
+
+@pytest.mark.unit
+class TestSources:
+    """Tests des sources de relecture (dump RAM, rapport UART)"""
+    
+    def test_full_ram_dump(self, boot_trace_dump):
+        """Test d'une relecture des 20KB de RAM depuis 0x20000000"""
+        trace = boot_trace.trace_from_dump(boot_trace_dump)
+        assert [stamp.stage for stamp in trace.stamps] == [stage for stage, _ in BOOT_TRACE_STAGES]
+    
+    def test_dump_base_address(self, boot_trace_dump):
+        """Test d'un dump commençant avant la mailbox (--base)"""
+        dump = b'\xAA' * 64 + boot_trace_dump
+        trace = boot_trace.trace_from_dump(dump, base=0x20000000 - 64)
+        
+        assert len(trace.stamps) == len(BOOT_TRACE_STAGES)
+    
+    def test_dump_too_short(self):
+        """Test d'un dump tronqué"""
+        with pytest.raises(boot_trace.BootTraceError, match='too short'):
+            boot_trace.trace_from_dump(b'\x00' * 100)
+    
+    def test_uart_report(self, boot_trace_dump):
+        """Test de la réponse à la commande TRACE au milieu du log série"""
+        log = ("READY\r\nPONG\r\n"
+               f"TRACE:{boot_trace_dump[:128].hex().upper()}\r\n"
+               "UP:5s V:3.30 PWM:0\r\n")
+        trace = boot_trace.trace_from_uart(log)
+        
+        assert trace == boot_trace.trace_from_dump(boot_trace_dump)
+    
+    def test_uart_without_trace(self):
+        """Test d'un log série sans ligne TRACE:"""
+        with pytest.raises(boot_trace.BootTraceError):
+            boot_trace.trace_from_uart("READY\r\nPONG\r\n")
+
+
+@pytest.mark.unit
+class TestTimings:
+    """Tests de la décomposition par étape"""
+    
+    def test_stage_durations(self, boot_trace_dump):
+        """Test: durée = cycles depuis la marque précédente / horloge"""
+        timings = boot_trace.stage_timings(boot_trace.trace_from_dump(boot_trace_dump))
+        by_name = {timing.name: timing for timing in timings}
+        
+        assert timings[0].name == 'reset' and timings[0].cycles == 0
+        assert by_name['splash'].ms == pytest.approx(1000.0)
+        assert by_name['ok_blink'].ms == pytest.approx(1400.0)
+        assert by_name['app_blink'].start_ms == pytest.approx(
+            sum(delta for _, delta in BOOT_TRACE_STAGES[:12]) / 8000)
+    
+    def test_cyccnt_wraparound(self):
+        """Test d'un CYCCNT repassé par zéro pendant une étape"""
+        trace = boot_trace.parse_trace(boot_trace.encode_trace(
+            [(0, 0xFFFFFF00), (1, 0x00000100)], clock_hz=8_000_000))
+        
+        assert boot_trace.stage_timings(trace)[1].cycles == 0x200
+    
+    def test_clock_override(self, boot_trace_dump):
+        """Test de --clock (trace relue sur un device à 72 MHz)"""
+        trace = boot_trace.trace_from_dump(boot_trace_dump)
+        timings = boot_trace.stage_timings(trace, clock_hz=72_000_000)
+        
+        assert boot_trace.total_ms(timings) == pytest.approx(
+            boot_trace.total_ms(boot_trace.stage_timings(trace)) / 9)
+
+
+@pytest.mark.unit
+class TestBudgets:
+    """Tests des budgets de boot (régression sur la trace synthétique)"""
+    
+    @pytest.fixture
+    def timings(self, boot_trace_dump):
+        return boot_trace.stage_timings(boot_trace.trace_from_dump(boot_trace_dump))
+    
+    def test_within_budget(self, timings):
+        """Test: CRC et SHA-256 de la trace synthétique sous 400 ms"""
+        assert boot_trace.check_budgets(timings, {'crc32': 200, 'sha256': 400}) == []
+    
+    def test_cosmetic_delays_dominate(self, timings):
+        """Test: les délais LED pèsent plus que toute la vérification"""
+        by_name = {timing.name: timing.ms for timing in timings}
+        cosmetic = by_name['splash'] + by_name['ok_blink'] + by_name['app_blink']
+        
+        assert cosmetic > 0.8 * boot_trace.total_ms(timings)
+    
+    def test_exceeded(self, timings):
+        """Test d'un budget total dépassé"""
+        (name, ms, budget), = boot_trace.check_budgets(timings, {'total': 1000})
+        assert name == 'total' and ms > budget
+    
+    def test_missing_stage(self, timings):
+        """Test qu'une étape budgétée absente de la trace est un échec"""
+        assert boot_trace.check_budgets(timings[:5], {'sha256': 400}) == [('sha256', None, 400)]
+
+
+@pytest.mark.unit
+class TestCli:
+    """Tests de la ligne de commande"""
+    
+    def test_dump_report(self, boot_trace_dump, tmp_path, capsys):
+        """Test: dump RAM → tableau et JSON"""
+        dump = tmp_path / 'ram.bin'
+        dump.write_bytes(boot_trace_dump)
+        output = tmp_path / 'trace.json'
+        
+        assert boot_trace.main([str(dump), '-o', str(output)]) == 0
+        report = json.loads(output.read_text())
+        
+        assert report['clock_hz'] == 8_000_000
+        assert [stage['name'] for stage in report['stages']][-1] == 'app_ready'
+        assert 'sha256' in capsys.readouterr().out
+    
+    def test_budget_exit_code(self, boot_trace_dump, tmp_path, capsys):
+        """Test: code de retour 1 si un budget est dépassé"""
+        log = tmp_path / 'uart.log'
+        log.write_text(f"TRACE:{boot_trace_dump[:128].hex()}\n")
+        
+        assert boot_trace.main([str(log), '--uart', '--budget', 'sha256=400']) == 0
+        assert boot_trace.main([str(log), '--uart', '--budget', 'total=2000']) == 1
+        assert 'Budget exceeded: total' in capsys.readouterr().out
+    
+    def test_no_trace(self, tmp_path, capsys):
+        """Test d'un dump sans mailbox"""
+        dump = tmp_path / 'ram.bin'
+        dump.write_bytes(b'\xFF' * 256)
+        
+        assert boot_trace.main([str(dump)]) == 1
+        assert 'no boot trace' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,167 @@
+"""
+Tests Unitaires - Packages delta (tools/delta_package.py)
+Diff par page de 1KB entre deux packages signés et applicateur de référence
+"""
+
+import os
+import struct
+
+import pytest
+
+import delta_package
+import firmware_image
+import firmware_signer
+import signature_backend
+from delta_package import DeltaError
+
+
+def signed(firmware, version="1.0.0", timestamp=1700000000, **options):
+    return firmware_image.FirmwareImage(firmware, version, timestamp, **options).package()
+
+
+@pytest.fixture
+def firmware_v1():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(16 * 1024)
+
+
+@pytest.fixture
+def firmware_v2(firmware_v1):
+    # Une page de code modifiée
+    firmware = bytearray(firmware_v1)
+    firmware[5 * 1024 + 10:5 * 1024 + 20] = os.urandom(10)
+    return bytes(firmware)
+
+
+@pytest.mark.unit
+class TestDiff:
+    """Tests du calcul des pages modifiées"""
+    
+    def test_diff_pages(self, firmware_v1, firmware_v2):
+        """Test: page de code modifiée + page des métadonnées"""
+        pages = delta_package.diff_pages(signed(firmware_v1), signed(firmware_v2, "1.0.1"))
+        assert pages == [5, 48]
+    
+    def test_identical_packages(self, firmware_v1):
+        """Test d'un delta vide entre deux packages identiques"""
+        package = signed(firmware_v1)
+        delta = delta_package.create_delta(package, package)
+        
+        header, entries = delta_package.parse_delta(delta)
+        assert header.count == 0 and entries == []
+        assert delta_package.apply_delta(package, delta) == package
+    
+    def test_delta_size_scales_with_change(self, firmware_v1, firmware_v2):
+        """Test que le delta est proportionnel au nombre de pages modifiées"""
+        old, new = signed(firmware_v1), signed(firmware_v2, "1.0.1")
+        delta = delta_package.create_delta(old, new)
+        
+        # 1 page de code + la dernière page (partielle) du package
+        last_page = len(new) - 48 * 1024
+        assert len(delta) == (delta_package.DELTA_HEADER_SIZE + 2 * delta_package.DELTA_ENTRY_SIZE
+                              + 1024 + last_page + 32)
+        assert len(delta) < len(new) / 20
+    
+    @pytest.mark.parametrize('container', ['compressed', 'sparse'])
+    def test_containers_diffed_on_flash_image(self, firmware_v1, firmware_v2, container):
+        """Test: base et cible compressées / sparse comparées sur le package plat"""
+        flat = delta_package.diff_pages(signed(firmware_v1), signed(firmware_v2, "1.0.1"))
+        pages = delta_package.diff_pages(signed(firmware_v1, **{container: True}),
+                                         signed(firmware_v2, "1.0.1", **{container: True}))
+        assert pages == flat == [5, 48]
+    
+    def test_truncated_container_refused(self, firmware_v1):
+        """Test qu'un package compressé tronqué lève DeltaError"""
+        package = signed(firmware_v1, compressed=True)
+        
+        with pytest.raises(DeltaError, match="flash image"):
+            delta_package.diff_pages(package, package[:len(package) // 2])
+    
+    def test_invalid_target_refused(self, firmware_v1):
+        """Test qu'un delta vers un package invalide n'est pas créé"""
+        package = signed(firmware_v1)
+        corrupted = bytearray(package)
+        corrupted[100] ^= 0xFF
+        
+        with pytest.raises(DeltaError):
+            delta_package.create_delta(package, corrupted)
+
+
+@pytest.mark.unit
+class TestApply:
+    """Tests de l'applicateur de référence"""
+    
+    def test_roundtrip(self, firmware_v1, firmware_v2):
+        """Test que base + delta == cible"""
+        old, new = signed(firmware_v1), signed(firmware_v2, "1.0.1")
+        assert delta_package.apply_delta(old, delta_package.create_delta(old, new)) == new
+    
+    def test_roundtrip_with_growth_and_page_table(self, firmware_v1):
+        """Test d'une cible plus grande que la base (table de hash par page ajoutée)"""
+        old = signed(firmware_v1)
+        new = signed(firmware_v1 + os.urandom(3000), "1.1.0", page_hashes=True)
+        assert len(new) > len(old)
+        
+        assert delta_package.apply_delta(old, delta_package.create_delta(old, new)) == new
+    
+    @pytest.mark.parametrize('container', ['compressed', 'sparse'])
+    def test_roundtrip_from_containers(self, firmware_v1, firmware_v2, container):
+        """Test: delta entre conteneurs == delta entre packages plats, cible plate"""
+        old, new = signed(firmware_v1), signed(firmware_v2, "1.0.1")
+        delta = delta_package.create_delta(signed(firmware_v1, **{container: True}),
+                                           signed(firmware_v2, "1.0.1", **{container: True}))
+        
+        assert delta == delta_package.create_delta(old, new)
+        assert delta_package.apply_delta(signed(firmware_v1, **{container: True}), delta) == new
+    
+    def test_wrong_base_rejected(self, firmware_v1, firmware_v2):
+        """Test qu'un delta appliqué sur une autre base est refusé"""
+        old, new = signed(firmware_v1), signed(firmware_v2, "1.0.1")
+        delta = delta_package.create_delta(old, new)
+        
+        with pytest.raises(DeltaError, match="base package"):
+            delta_package.apply_delta(new, delta)
+    
+    def test_corrupted_delta_rejected(self, firmware_v1, firmware_v2):
+        """Test qu'un delta corrompu est refusé avant toute écriture"""
+        old, new = signed(firmware_v1), signed(firmware_v2, "1.0.1")
+        delta = bytearray(delta_package.create_delta(old, new))
+        delta[delta_package.DELTA_HEADER_SIZE + 10] ^= 0xFF
+        
+        with pytest.raises(DeltaError, match="checksum"):
+            delta_package.apply_delta(old, delta)
+    
+    @pytest.mark.usefixtures('ed25519_signing')
+    def test_ed25519_target_needs_public_key(self, firmware_v1, firmware_v2):
+        """Test qu'une cible Ed25519 n'est acceptée qu'avec la clé publique"""
+        seed = bytes(range(32))
+        public_key = signature_backend.signing_key(seed).public_key
+        old = signed(firmware_v1, signing_key=seed)
+        new = signed(firmware_v2, "1.0.1", signing_key=seed)
+        
+        with pytest.raises(DeltaError, match="NOT VERIFIED"):
+            delta_package.create_delta(old, new)
+        
+        delta = delta_package.create_delta(old, new, public_key=public_key)
+        with pytest.raises(DeltaError, match="NOT VERIFIED"):
+            delta_package.apply_delta(old, delta)
+        assert delta_package.apply_delta(old, delta, public_key) == new
+    
+    def test_cli_diff_and_apply(self, firmware_v1, firmware_v2, tmp_path, capsys):
+        """Test des sous-commandes diff / apply"""
+        old_path, new_path = tmp_path / 'v1_signed.bin', tmp_path / 'v2_signed.bin'
+        old_path.write_bytes(signed(firmware_v1))
+        new_path.write_bytes(signed(firmware_v2, "1.0.1"))
+        delta_path = tmp_path / 'v2.delta'
+        rebuilt_path = tmp_path / 'rebuilt_signed.bin'
+        
+        assert firmware_signer.main(['diff', str(old_path), str(new_path), '-o', str(delta_path)]) == 0
+        assert 'Pages changed: 2/49' in capsys.readouterr().out
+        
+        assert firmware_signer.main(['apply', str(old_path), str(delta_path), '-o', str(rebuilt_path)]) == 0
+        assert rebuilt_path.read_bytes() == new_path.read_bytes()
+        
+        assert firmware_signer.main(['apply', str(new_path), str(delta_path), '-o', str(rebuilt_path)]) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,419 @@
+"""
+Tests Unitaires - Bibliothèque firmware (tools/firmware_image.py)
+Backends CRC32, pipeline de digests, lecteur zero-copy, API objet
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+import pytest
+
+import firmware_image
+
+
+@pytest.mark.unit
+class TestCRC32Backends:
+    """Tests des backends CRC32 (zlib, slice8, table, bitwise)"""
+    
+    @pytest.mark.parametrize('backend', list(firmware_image.CRC32_BACKENDS))
+    def test_ieee_vector(self, backend):
+        """Test avec vecteur IEEE 802.3 standard"""
+        assert firmware_image.calculate_crc32(b'123456789', backend=backend) == 0xCBF43926
+    
+    @pytest.mark.parametrize('backend', list(firmware_image.CRC32_BACKENDS))
+    def test_empty(self, backend):
+        """Test avec données vides (comme Calculate_CRC32(data, 0))"""
+        assert firmware_image.calculate_crc32(b'', backend=backend) == 0
+    
+    @pytest.mark.parametrize('length', [1, 7, 8, 9, 63, 64, 1000, 4099])
+    def test_backends_match_reference(self, length):
+        """Test que tous les backends == référence bit à bit"""
+        data = os.urandom(length)
+        reference = firmware_image.crc32_bitwise(data)
+        
+        for name, func in firmware_image.CRC32_BACKENDS.items():
+            assert func(data) == reference, name
+    
+    @pytest.mark.parametrize('backend', list(firmware_image.CRC32_BACKENDS))
+    def test_incremental(self, backend):
+        """Test du calcul par morceaux (convention zlib.crc32)"""
+        data = os.urandom(3001)
+        crc = 0
+        for i in range(0, len(data), 500):
+            crc = firmware_image.calculate_crc32(data[i:i + 500], crc, backend=backend)
+        
+        assert crc == zlib.crc32(data)
+    
+    def test_accepts_memoryview(self):
+        """Test avec memoryview et bytearray"""
+        data = bytearray(os.urandom(777))
+        expected = zlib.crc32(data)
+        
+        for func in firmware_image.CRC32_BACKENDS.values():
+            assert func(memoryview(data)) == expected
+            assert func(data) == expected
+    
+    def test_firmware_size(self):
+        """Test avec un firmware 48KB padé à 0xFF"""
+        data = os.urandom(16 * 1024) + b'\xFF' * (32 * 1024)
+        assert firmware_image.crc32_slice8(data) == zlib.crc32(data)
+
+
+@pytest.mark.unit
+class TestCRC32SelfTest:
+    """Tests de l'auto-test au chargement"""
+    
+    def test_all_backends_pass(self):
+        """Test que l'auto-test valide tous les backends"""
+        results = firmware_image.crc32_self_test()
+        assert all(results.values()), results
+    
+    def test_default_backend_selected(self):
+        """Test que le backend par défaut est le plus rapide valide"""
+        assert firmware_image.CRC32_DEFAULT_BACKEND == 'zlib'
+    
+    def test_broken_backend_detected(self, monkeypatch):
+        """Test qu'un backend faux est détecté et écarté"""
+        broken = dict(firmware_image.CRC32_BACKENDS)
+        broken['zlib'] = lambda data, crc=0: 0x12345678
+        monkeypatch.setattr(firmware_image, 'CRC32_BACKENDS', broken)
+        
+        assert firmware_image.crc32_self_test()['zlib'] is False
+        assert firmware_image._select_crc32_backend() == 'slice8'
+
+
+@pytest.mark.unit
+class TestCRC32Stm32:
+    """Tests du CRC de l'unité CRC matérielle (crc_mode = stm32)"""
+    
+    def test_reference_vector(self):
+        """Test: mot 0x12345678 → 0xDF8A8A2B (valeur du manuel de référence)"""
+        word = struct.pack('<I', 0x12345678)
+        assert firmware_image.crc32_stm32(word) == 0xDF8A8A2B
+        assert firmware_image.crc32_stm32_bitwise(word) == 0xDF8A8A2B
+    
+    @pytest.mark.parametrize('length', [0, 1, 2, 3, 4, 5, 63, 1001, 4099])
+    def test_matches_reference(self, length):
+        """Test que la version zlib == référence bit à bit (bytes, memoryview)"""
+        data = os.urandom(length)
+        reference = firmware_image.crc32_stm32_bitwise(data)
+        
+        assert firmware_image.crc32_stm32(data) == reference
+        assert firmware_image.crc32_stm32(memoryview(data)) == reference
+    
+    def test_tail_padded_with_ff(self):
+        """Test qu'un tail de 1-3 bytes est complété par 0xFF"""
+        data = os.urandom(9)
+        assert firmware_image.crc32_stm32(data) == firmware_image.crc32_stm32(data + b'\xFF' * 3)
+
+
+@pytest.mark.unit
+class TestDigestPipeline:
+    """Tests du pipeline CRC32 + SHA-256 + signature en une passe"""
+    
+    @pytest.mark.parametrize('chunk_size', [1, 63, 64, 4096, 1 << 20])
+    def test_matches_separate_passes(self, chunk_size):
+        """Test que le pipeline == CRC32, SHA-256 et signature séparés"""
+        data = os.urandom(10000)
+        digests = firmware_image.compute_digests(data, chunk_size=chunk_size)
+        
+        assert digests.size == len(data)
+        assert digests.crc32 == zlib.crc32(data)
+        assert digests.sha256 == hashlib.sha256(data).digest()
+        assert digests.signature == firmware_image.create_signature(data)
+    
+    def test_empty(self):
+        """Test avec firmware vide"""
+        digests = firmware_image.compute_digests(b'')
+        assert digests.crc32 == 0
+        assert digests.sha256 == hashlib.sha256(b'').digest()
+    
+    @pytest.mark.parametrize('chunk_size', [1, 3, 5, 64, 1 << 20])
+    def test_stm32_crc_any_chunking(self, chunk_size):
+        """Test du CRC stm32 par morceaux non multiples de 4 (mot à cheval)"""
+        data = os.urandom(10001)
+        digests = firmware_image.compute_digests(data, chunk_size=chunk_size,
+                                                 crc_mode=firmware_image.CRC_MODE_STM32)
+        
+        assert digests.crc32 == firmware_image.crc32_stm32_bitwise(data)
+        assert digests.sha256 == hashlib.sha256(data).digest()
+    
+    def test_unknown_crc_mode(self):
+        """Test qu'un mode CRC inconnu est refusé"""
+        with pytest.raises(ValueError):
+            firmware_image.DigestPipeline(crc_mode=7)
+    
+    def test_metadata_bytes_unchanged(self):
+        """Test que FirmwareMetadata_t est identique à l'ancien calcul"""
+        data = os.urandom(16748)
+        metadata, crc32, sha256, timestamp = firmware_image.create_metadata(
+            data, "1.2.3", timestamp=1766493266)
+        
+        expected = struct.pack(
+            '<I I I I 32s I 44s',
+            0xDEADBEEF, 0x00010203, len(data),
+            firmware_image.crc32_bitwise(data),
+            hashlib.sha256(data).digest(),
+            1766493266, b'\x00' * 44)
+        
+        assert metadata == expected
+        assert len(metadata) == firmware_image.METADATA_SIZE == 96
+
+
+@pytest.mark.unit
+class TestSignedPackage:
+    """Tests du lecteur zero-copy SignedPackage (mmap + memoryview)"""
+    
+    @pytest.fixture
+    def signed_path(self, tmp_path):
+        firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(4000)
+        package, _ = firmware_image.build_package(firmware, "1.0.0")
+        path = tmp_path / 'fw_signed.bin'
+        path.write_bytes(package)
+        return path, firmware, package
+    
+    def test_regions(self, signed_path):
+        """Test que chaque région correspond au layout du package"""
+        path, firmware, package = signed_path
+        
+        with firmware_image.SignedPackage.open(str(path)) as signed:
+            assert signed.firmware == firmware
+            assert signed.firmware_region == package[:48 * 1024]
+            assert signed.metadata == package[48 * 1024:48 * 1024 + 96]
+            assert signed.signature == firmware_image.create_signature(firmware)
+            assert bytes(signed.reference_hash[:32]) == hashlib.sha256(firmware).digest()
+            assert signed.metadata_fields.size == len(firmware)
+    
+    def test_views_are_zero_copy(self, signed_path):
+        """Test que les vues pointent dans le mmap (aucune copie)"""
+        path, _, _ = signed_path
+        
+        with firmware_image.SignedPackage.open(str(path)) as signed:
+            for view in (signed.firmware, signed.metadata, signed.signature, signed.reference_hash):
+                assert isinstance(view.obj, mmap.mmap)
+    
+    def test_close_releases_views(self, signed_path):
+        """Test que close() libère les vues puis le mmap"""
+        path, _, _ = signed_path
+        
+        signed = firmware_image.SignedPackage.open(str(path))
+        firmware = signed.firmware
+        signed.close()
+        
+        with pytest.raises(ValueError):
+            bytes(firmware)
+    
+    def test_empty_file(self, tmp_path):
+        """Test avec un fichier vide (mmap impossible)"""
+        path = tmp_path / 'empty.bin'
+        path.write_bytes(b'')
+        
+        with firmware_image.SignedPackage.open(str(path)) as signed:
+            assert len(signed) == 0
+            assert signed.metadata_fields is None
+            assert signed.firmware is None
+    
+    def test_check_package_accepts_reader(self, signed_path):
+        """Test que check_package fonctionne sur le reader et sur des bytes"""
+        path, _, package = signed_path
+        
+        with firmware_image.SignedPackage.open(str(path)) as signed:
+            assert firmware_image.check_package(signed)['valid']
+        assert firmware_image.check_package(package)['valid']
+
+
+
+@pytest.mark.unit
+class TestCheckPackage:
+    """Tests de check_package (statuts par vérification)"""
+    
+    @pytest.fixture
+    def package(self):
+        firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(3000)
+        package, _ = firmware_image.build_package(firmware, "1.4.2")
+        return package
+    
+    def test_check_valid_package(self, package):
+        """Test d'un package valide: tous les statuts à 'ok' (pas de table de pages)"""
+        result = firmware_image.check_package(package)
+        
+        assert result['valid']
+        assert result['checks'].pop('pages') == 'skipped'
+        assert set(result['checks'].values()) == {'ok'}
+        assert result['version'] == '1.4.2'
+    
+    def test_check_bad_magic(self, package):
+        """Test d'un magic invalide: les vérifications suivantes sont sautées"""
+        package = bytearray(package)
+        package[firmware_image.METADATA_OFFSET] ^= 0xFF
+        
+        result = firmware_image.check_package(bytes(package))
+        
+        assert not result['valid']
+        assert result['checks']['magic'] == 'fail'
+        assert result['checks']['crc32'] == 'skipped'
+        assert result['error'].startswith('INVALID MAGIC')
+    
+    def test_check_corrupted_firmware(self, package):
+        """Test d'un firmware corrompu: CRC, SHA et signature en échec"""
+        package = bytearray(package)
+        package[10] ^= 0x01
+        
+        result = firmware_image.check_package(bytes(package))
+        
+        assert result['checks']['crc32'] == 'fail'
+        assert result['checks']['sha256'] == 'fail'
+        assert result['checks']['signature'] == 'fail'
+        assert result['error'].startswith('CRC32 MISMATCH')
+    
+    def test_check_stm32_crc_mode(self):
+        """Test d'un package crc_mode = stm32: CRC recalculé selon reserved[3]"""
+        firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(3001)
+        package, metadata_json = firmware_image.build_package(
+            firmware, crc_mode=firmware_image.CRC_MODE_STM32)
+        
+        metadata = firmware_image.parse_metadata(package[firmware_image.METADATA_OFFSET:])
+        assert firmware_image.parse_reserved(metadata.reserved).crc_mode == 1
+        assert metadata.crc32 == firmware_image.crc32_stm32(firmware)
+        assert metadata_json['crc_mode'] == 'stm32'
+        
+        result = firmware_image.check_package(package)
+        assert result['valid']
+        assert result['crc_mode'] == 'stm32'
+    
+    def test_check_unknown_crc_mode(self, package):
+        """Test d'un crc_mode inconnu: échec du CRC sans calcul"""
+        package = bytearray(package)
+        package[firmware_image.METADATA_OFFSET + 52 + 3] = 0x7F  # reserved[3]
+        
+        result = firmware_image.check_package(bytes(package))
+        
+        assert result['checks']['crc32'] == 'fail'
+        assert result['error'].startswith('UNSUPPORTED CRC MODE')
+    
+    def test_boot_profile_recorded(self):
+        """Test du profil de boot production dans reserved[41]"""
+        firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(3001)
+        package, metadata_json = firmware_image.build_package(
+            firmware, boot_profile=firmware_image.BOOT_PROFILE_PRODUCTION)
+        
+        assert package[firmware_image.METADATA_OFFSET + 52 + 41] == 1
+        assert metadata_json['boot_profile'] == 'production'
+        
+        result = firmware_image.check_package(package)
+        assert result['valid']
+        assert result['boot_profile'] == 'production'
+    
+    def test_check_unknown_boot_profile(self, package):
+        """Test qu'un profil inconnu est signalé sans invalider le package"""
+        package = bytearray(package)
+        package[firmware_image.METADATA_OFFSET + 52 + 41] = 0x7F  # reserved[41]
+        
+        result = firmware_image.check_package(bytes(package))
+        assert result['boot_profile'] == '127'
+        assert result['checks']['crc32'] == 'ok'
+    
+    def test_check_truncated(self):
+        """Test d'un fichier trop court"""
+        result = firmware_image.check_package(b'\x00' * 100)
+        assert result['checks']['package'] == 'fail'
+
+
+@pytest.mark.unit
+class TestFirmwareImage:
+    """Tests de l'API objet FirmwareImage (digests paresseux, en cache)"""
+    
+    @pytest.fixture
+    def data(self):
+        return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(2000)
+    
+    def test_slots(self, data):
+        """Test que l'objet est compact (__slots__, pas de __dict__)"""
+        image = firmware_image.FirmwareImage(data)
+        assert not hasattr(image, '__dict__')
+    
+    def test_digests_lazy_and_cached(self, data, monkeypatch):
+        """Test que les digests sont calculés une seule fois, au premier accès"""
+        calls = []
+        original = firmware_image.compute_digests
+        monkeypatch.setattr(firmware_image, 'compute_digests',
+                            lambda d, **kwargs: calls.append(1) or original(d, **kwargs))
+        
+        image = firmware_image.FirmwareImage(data)
+        assert calls == []
+        
+        assert image.crc32 == zlib.crc32(data)
+        assert image.sha256 == hashlib.sha256(data).digest()
+        image.package()
+        assert calls == [1]
+    
+    def test_package_reproducible(self, data):
+        """Test que le timestamp est figé: package() est stable"""
+        image = firmware_image.FirmwareImage(data, "1.2.3")
+        assert image.package() == image.package()
+        
+        fixed = firmware_image.FirmwareImage(data, "1.2.3", timestamp=1000)
+        assert fixed.timestamp == 1000
+        assert fixed.package() == firmware_image.build_package(data, "1.2.3", 1000)[0]
+    
+    def test_too_large(self):
+        """Test qu'un firmware > 48KB est refusé"""
+        with pytest.raises(ValueError):
+            firmware_image.FirmwareImage(b'\x00' * (48 * 1024 + 1))
+    
+    def test_invalid_version(self, data):
+        """Test qu'une version mal formée est refusée"""
+        with pytest.raises((ValueError, IndexError)):
+            firmware_image.FirmwareImage(data, "1.x")
+    
+    def test_write(self, data, tmp_path):
+        """Test de l'écriture du package et des fichiers annexes"""
+        image = firmware_image.FirmwareImage(data, "3.1.4")
+        json_path, hash_path = image.write(str(tmp_path / 'fw_signed.bin'))
+        
+        assert (tmp_path / 'fw_signed.bin').read_bytes() == image.package()
+        assert json_path == str(tmp_path / 'fw_signed_metadata.json')
+        assert open(hash_path).read() == image.sha256.hex()
+
+
+@pytest.mark.unit
+class TestSignedFirmware:
+    """Tests de l'API objet SignedFirmware"""
+    
+    @pytest.fixture
+    def image(self):
+        return firmware_image.FirmwareImage(os.urandom(3000), "2.5.0", timestamp=1234)
+    
+    def test_in_memory(self, image):
+        """Test d'un package en mémoire (FirmwareImage.sign)"""
+        with image.sign() as signed:
+            assert signed.valid
+            assert signed.version == '2.5.0'
+            assert signed.size == 3000
+            assert signed.timestamp == 1234
+            assert signed.firmware == image.data
+    
+    def test_open_file(self, image, tmp_path):
+        """Test d'un package lu depuis un fichier"""
+        path = tmp_path / 'fw_signed.bin'
+        image.write(str(path))
+        
+        with firmware_image.SignedFirmware.open(str(path)) as signed:
+            assert signed.verify() is signed.verify()
+            assert signed.valid
+    
+    def test_corrupted(self, image):
+        """Test d'un package corrompu"""
+        package = bytearray(image.package())
+        package[5] ^= 0x80
+        
+        with firmware_image.SignedFirmware.from_bytes(bytes(package)) as signed:
+            assert not signed.valid
+            assert signed.verify()['checks']['sha256'] == 'fail'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,250 @@
+"""
+Tests Unitaires - Outil de signature (tools/firmware_signer.py)
+Packaging, vérification, modes --batch et verify-many
+"""
+
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+
+import pytest
+
+import firmware_signer
+
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+
+
+@pytest.mark.unit
+class TestPackageAndVerify:
+    """Tests de package_firmware / verify_firmware"""
+    
+    @pytest.fixture
+    def firmware_bin(self, tmp_path):
+        path = tmp_path / 'firmware.bin'
+        path.write_bytes(struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(5000))
+        return path
+    
+    def test_package_layout(self, firmware_bin, tmp_path):
+        """Test du layout [Firmware 48KB][Metadata][Signature][Reference Hash]"""
+        output = tmp_path / 'firmware_signed.bin'
+        assert firmware_signer.package_firmware(str(firmware_bin), str(output), "1.0.0")
+        
+        package = output.read_bytes()
+        assert len(package) == firmware_signer.PACKAGE_SIZE == 49568
+        
+        magic, = struct.unpack_from('<I', package, firmware_signer.METADATA_OFFSET)
+        assert magic == 0xDEADBEEF
+    
+    def test_roundtrip(self, firmware_bin, tmp_path):
+        """Test signature puis vérification"""
+        output = tmp_path / 'firmware_signed.bin'
+        firmware_signer.package_firmware(str(firmware_bin), str(output), "2.0.1")
+        
+        assert firmware_signer.verify_firmware(str(output))
+    
+    def test_tampered_firmware_rejected(self, firmware_bin, tmp_path):
+        """Test qu'un firmware modifié après signature est rejeté"""
+        output = tmp_path / 'firmware_signed.bin'
+        firmware_signer.package_firmware(str(firmware_bin), str(output), "1.0.0")
+        
+        package = bytearray(output.read_bytes())
+        package[100] ^= 0x01
+        output.write_bytes(package)
+        
+        assert not firmware_signer.verify_firmware(str(output))
+    
+    def test_cli_crc_mode_stm32(self, firmware_bin, tmp_path, capsys):
+        """Test de --crc-mode stm32: CRC de l'unité CRC matérielle dans les métadonnées"""
+        output = tmp_path / 'firmware_signed.bin'
+        assert firmware_signer.main([str(firmware_bin), '-o', str(output), '--crc-mode', 'stm32',
+                                     '--no-cache']) == 0
+        
+        signed = firmware_signer.SignedFirmware.from_bytes(output.read_bytes())
+        assert signed.metadata.crc32 == firmware_signer.crc32_stm32(firmware_bin.read_bytes())
+        
+        assert firmware_signer.main([str(output), '--verify']) == 0
+        assert 'stm32' in capsys.readouterr().out
+    
+    def test_cli_boot_profile_production(self, firmware_bin, tmp_path, capsys):
+        """Test de --boot-profile production: profil enregistré dans reserved[41]"""
+        output = tmp_path / 'firmware_signed.bin'
+        assert firmware_signer.main([str(firmware_bin), '-o', str(output), '--boot-profile',
+                                     'production', '--no-cache']) == 0
+        
+        signed = firmware_signer.SignedFirmware.from_bytes(output.read_bytes())
+        assert firmware_signer.parse_reserved(signed.metadata.reserved).boot_profile == 1
+        assert 'Boot:      production' in capsys.readouterr().out
+    
+    def test_committed_package_verifies(self):
+        """Test que le firmware_signed.bin du dépôt est valide"""
+        assert firmware_signer.verify_firmware(str(PROJECT_DIR / 'firmware_signed.bin'))
+
+
+@pytest.mark.unit
+class TestBatchSigning:
+    """Tests du mode --batch (manifeste JSON/CSV, ProcessPoolExecutor)"""
+    
+    @pytest.fixture
+    def manifest_dir(self, tmp_path):
+        for i in range(6):
+            (tmp_path / f'fw{i}.bin').write_bytes(os.urandom(1000 + i * 997))
+        return tmp_path
+    
+    def test_load_json_manifest(self, manifest_dir):
+        """Test du chargement JSON (chemins relatifs au manifeste)"""
+        manifest = manifest_dir / 'batch.json'
+        manifest.write_text(json.dumps({'entries': [
+            {'input': 'fw0.bin', 'output': 'fw0_signed.bin', 'version': '1.2.3'},
+            {'input': 'fw1.bin', 'output': 'fw1_signed.bin'},
+        ]}))
+        
+        entries = firmware_signer.load_batch_manifest(str(manifest))
+        
+        assert entries[0]['input'] == str(manifest_dir / 'fw0.bin')
+        assert entries[0]['version'] == '1.2.3'
+        assert entries[1]['version'] == '1.0.0'
+    
+    def test_load_csv_manifest(self, manifest_dir):
+        """Test du chargement CSV"""
+        manifest = manifest_dir / 'batch.csv'
+        manifest.write_text('input,output,version\nfw0.bin,out0.bin,2.0.0\n')
+        
+        entries = firmware_signer.load_batch_manifest(str(manifest))
+        
+        assert entries == [{
+            'input': str(manifest_dir / 'fw0.bin'),
+            'output': str(manifest_dir / 'out0.bin'),
+            'version': '2.0.0',
+        }]
+    
+    def test_manifest_missing_field(self, manifest_dir):
+        """Test qu'une entrée sans 'output' est refusée"""
+        manifest = manifest_dir / 'batch.json'
+        manifest.write_text(json.dumps([{'input': 'fw0.bin'}]))
+        
+        with pytest.raises(ValueError):
+            firmware_signer.load_batch_manifest(str(manifest))
+    
+    @pytest.mark.parametrize('jobs', [1, 3])
+    def test_batch_matches_single_signing(self, manifest_dir, jobs):
+        """Test que le lot produit des packages vérifiables, dans l'ordre"""
+        entries = [{'input': str(manifest_dir / f'fw{i}.bin'),
+                    'output': str(manifest_dir / f'fw{i}_signed.bin'),
+                    'version': f'1.{i}.0'} for i in range(6)]
+        
+        results = firmware_signer.sign_batch(entries, jobs=jobs)
+        
+        assert [r['input'] for r in results] == [e['input'] for e in entries]
+        for entry, result in zip(entries, results):
+            firmware = open(entry['input'], 'rb').read()
+            assert result['status'] == 'ok'
+            assert result['size'] == len(firmware)
+            assert result['sha256'] == hashlib.sha256(firmware).hexdigest()
+            assert result['elapsed_ms'] >= 0
+            assert firmware_signer.verify_firmware(entry['output'])
+    
+    def test_run_batch_report(self, manifest_dir):
+        """Test du manifeste de résultats consolidé (avec une entrée en erreur)"""
+        manifest = manifest_dir / 'batch.json'
+        manifest.write_text(json.dumps([
+            {'input': 'fw0.bin', 'output': 'fw0_signed.bin'},
+            {'input': 'missing.bin', 'output': 'missing_signed.bin'},
+        ]))
+        
+        assert not firmware_signer.run_batch(str(manifest), jobs=2)
+        
+        report = json.loads((manifest_dir / 'batch_results.json').read_text())
+        assert report['total'] == 2
+        assert report['succeeded'] == 1
+        assert report['results'][1]['status'] == 'error'
+        assert 'FileNotFoundError' in report['results'][1]['error']
+
+    
+    @pytest.mark.parametrize('layout', ['--page-hashes', '--sparse', '--compress'])
+    def test_cli_batch_layout_options(self, manifest_dir, layout):
+        """Test que --batch applique les options de layout à chaque entrée"""
+        manifest = manifest_dir / 'batch.json'
+        manifest.write_text(json.dumps([
+            {'input': f'fw{i}.bin', 'output': f'fw{i}_signed.bin'} for i in range(3)]))
+        
+        assert firmware_signer.main(['--batch', str(manifest), '-j', '2', layout,
+                                     '--crc-mode', 'stm32', '--boot-profile', 'production']) == 0
+        
+        for i in range(3):
+            result = firmware_signer.check_package((manifest_dir / f'fw{i}_signed.bin').read_bytes())
+            assert result['valid']
+            assert result['crc_mode'] == 'stm32'
+            assert result['boot_profile'] == 'production'
+            assert {'--page-hashes': 'pages', '--sparse': 'sparse',
+                    '--compress': 'compressed'}[layout] in result
+
+@pytest.mark.unit
+class TestVerifyMany:
+    """Tests de la sous-commande verify-many"""
+    
+    @pytest.fixture
+    def package(self):
+        firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(3000)
+        package, _ = firmware_signer.build_package(firmware, "1.4.2")
+        return package
+    
+    def test_collect_files(self, tmp_path, package):
+        """Test de la résolution dossiers / globs / fichiers"""
+        (tmp_path / 'a' / 'b').mkdir(parents=True)
+        (tmp_path / 'a' / 'x_signed.bin').write_bytes(package)
+        (tmp_path / 'a' / 'b' / 'y_signed.bin').write_bytes(package)
+        (tmp_path / 'a' / 'firmware.bin').write_bytes(b'raw')
+        
+        from_dir = firmware_signer.collect_signed_files([str(tmp_path / 'a')])
+        from_glob = firmware_signer.collect_signed_files([str(tmp_path / '**' / 'y_*.bin')])
+        
+        assert sorted(os.path.basename(p) for p in from_dir) == ['x_signed.bin', 'y_signed.bin']
+        assert [os.path.basename(p) for p in from_glob] == ['y_signed.bin']
+    
+    def test_verify_many_report(self, tmp_path, package):
+        """Test du rapport JSON lines + résumé final"""
+        for i in range(5):
+            (tmp_path / f'fw{i}_signed.bin').write_bytes(package)
+        corrupted = bytearray(package)
+        corrupted[0] ^= 0xFF
+        (tmp_path / 'bad_signed.bin').write_bytes(bytes(corrupted))
+        report = tmp_path / 'report.jsonl'
+        
+        status = firmware_signer.main(['verify-many', str(tmp_path), '-j', '2', '-o', str(report)])
+        
+        lines = [json.loads(line) for line in report.read_text().splitlines()]
+        summary = lines[-1]['summary']
+        
+        assert status == 1
+        assert len(lines) == 7
+        assert summary['total'] == 6
+        assert summary['passed'] == 5
+        assert summary['failures_by_check']['crc32'] == 1
+        assert all('elapsed_ms' in line for line in lines[:-1])
+    
+    def test_bad_key_file(self, tmp_path, package, capsys):
+        """Test: clé illisible ou invalide → message [!] et code 1, sans traceback"""
+        (tmp_path / 'fw_signed.bin').write_bytes(package)
+        key = tmp_path / 'key.pub'
+        key.write_text('not a key\n')
+        
+        for option, path in (('--public-key', key), ('--mac-key', tmp_path / 'missing')):
+            assert firmware_signer.main(['verify-many', str(tmp_path), option, str(path)]) == 1
+            assert capsys.readouterr().out.startswith('[!] ')
+    
+    def test_unexpected_error_reported_per_file(self, tmp_path, package, monkeypatch):
+        """Test: une exception inattendue sur un fichier n'interrompt pas le balayage"""
+        def broken_open(path, *args):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(firmware_signer.SignedFirmware, 'open', broken_open)
+        
+        result = firmware_signer.verify_package_file(str(tmp_path / 'fw_signed.bin'))
+        assert not result['valid']
+        assert result['error'] == 'RuntimeError: boom'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
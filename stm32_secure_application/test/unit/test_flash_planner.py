@@ -0,0 +1,149 @@
+"""
+Tests Unitaires - Planificateur de flash (tools/flash_planner.py)
+Seules les pages modifiées sont reprogrammées
+"""
+
+import os
+import stat
+import struct
+from pathlib import Path
+
+import pytest
+
+import firmware_image
+import flash_planner
+
+
+PROJECT_DIR = Path(__file__).parent.parent.parent
+
+
+def signed(firmware, version="1.0.0"):
+    return firmware_image.FirmwareImage(firmware, version, 1700000000).package()
+
+
+@pytest.fixture
+def firmware():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(12 * 1024)
+
+
+@pytest.mark.unit
+class TestPlanFlash:
+    """Tests du calcul des plages à écrire"""
+    
+    def test_unknown_content_full_write(self, firmware):
+        """Test: sans contenu actuel, une seule plage couvre tout le package"""
+        package = signed(firmware)
+        writes = flash_planner.plan_flash(package)
+        
+        assert writes == [flash_planner.FlashWrite(0x08002000, 0, len(package), 0, 49)]
+    
+    def test_identical_image_nothing_to_write(self, firmware):
+        """Test qu'un package déjà flashé ne génère aucune écriture"""
+        package = signed(firmware)
+        assert flash_planner.plan_flash(package, package) == []
+    
+    def test_changed_pages_only(self, firmware):
+        """Test: une page de code + la page des métadonnées (partielle)"""
+        old = signed(firmware)
+        updated = bytearray(firmware)
+        updated[3 * 1024 + 5] ^= 0xFF
+        new = signed(bytes(updated), "1.0.1")
+        
+        writes = flash_planner.plan_flash(new, old)
+        
+        assert [(w.address, w.length) for w in writes] == [
+            (0x08002000 + 3 * 1024, 1024),
+            (0x08002000 + 48 * 1024, len(new) - 48 * 1024),
+        ]
+    
+    def test_adjacent_pages_merged(self, firmware):
+        """Test que les pages consécutives forment une seule plage, et max_gap"""
+        old = signed(firmware)
+        updated = bytearray(firmware)
+        for page in (2, 3, 6):
+            updated[page * 1024] ^= 0xFF
+        new = signed(bytes(updated))  # Même version/timestamp: métadonnées ≠ (CRC/SHA)
+        
+        assert [(w.first_page, w.page_count) for w in flash_planner.plan_flash(new, old)] == [
+            (2, 2), (6, 1), (48, 1)]
+        assert [(w.first_page, w.page_count) for w in flash_planner.plan_flash(new, old, max_gap=2)] == [
+            (2, 5), (48, 1)]
+    
+    def test_short_dump_rewrites_unknown_pages(self, firmware):
+        """Test avec app_dump.bin (relecture de 16 bytes): pages non relues réécrites"""
+        package = signed(firmware)
+        dump = (PROJECT_DIR / 'app_dump.bin').read_bytes()
+        assert len(dump) == 16
+        
+        writes = flash_planner.plan_flash(package, dump)
+        assert sum(w.page_count for w in writes) == 49
+    
+    def test_unaligned_address_rejected(self, firmware):
+        """Test qu'une adresse hors limite de page est refusée"""
+        with pytest.raises(ValueError):
+            flash_planner.plan_flash(signed(firmware), address=0x08002100)
+
+
+@pytest.mark.unit
+class TestExecutePlan:
+    """Tests de l'écriture du plan et de l'exécution (st-flash simulé)"""
+    
+    @pytest.fixture
+    def fake_st_flash(self, tmp_path):
+        """st-flash simulé: `write FILE ADDR` écrit dans une flash fichier"""
+        flash = tmp_path / 'flash.bin'
+        flash.write_bytes(b'\xFF' * 64 * 1024)
+        script = tmp_path / 'st-flash'
+        script.write_text(
+            '#!/usr/bin/env python3\n'
+            'import sys\n'
+            f'flash = open({str(flash)!r}, "r+b")\n'
+            'flash.seek(int(sys.argv[3], 0) - 0x08000000)\n'
+            'flash.write(open(sys.argv[2], "rb").read())\n'
+            f'open({str(tmp_path / "calls.log")!r}, "a").write(sys.argv[3] + "\\n")\n'
+        )
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        return script, flash
+    
+    def test_incremental_flash(self, firmware, tmp_path, fake_st_flash, capsys):
+        """Test: premier flash complet, puis seules les pages modifiées"""
+        script, flash = fake_st_flash
+        last_flashed = tmp_path / 'last_flashed.bin'
+        common = ['--st-flash', str(script), '--last-flashed', str(last_flashed),
+                  '-o', str(tmp_path / 'plan'), '--execute']
+        
+        v1 = tmp_path / 'v1_signed.bin'
+        v1.write_bytes(signed(firmware))
+        assert flash_planner.main([str(v1)] + common) == 0
+        assert last_flashed.read_bytes() == v1.read_bytes()
+        
+        updated = bytearray(firmware)
+        updated[7 * 1024] ^= 0xFF
+        v2 = tmp_path / 'v2_signed.bin'
+        v2.write_bytes(signed(bytes(updated), "1.0.1"))
+        
+        (tmp_path / 'calls.log').unlink()
+        assert flash_planner.main([str(v2)] + common) == 0
+        assert 'Pages to write: 2/49 in 2 range(s)' in capsys.readouterr().out
+        assert (tmp_path / 'calls.log').read_text().split() == ['0x08003C00', '0x0800E000']
+        
+        # La flash simulée contient exactement le nouveau package
+        package = v2.read_bytes()
+        assert flash.read_bytes()[0x2000:0x2000 + len(package)] == package
+    
+    def test_failed_flash_drops_reference(self, firmware, tmp_path):
+        """Test qu'un échec de st-flash invalide la référence"""
+        image = tmp_path / 'firmware_signed.bin'
+        image.write_bytes(signed(firmware))
+        last_flashed = tmp_path / 'last_flashed.bin'
+        last_flashed.write_bytes(b'\x00' * 100)
+        
+        commands = flash_planner.write_plan(image.read_bytes(), flash_planner.plan_flash(image.read_bytes()),
+                                            tmp_path / 'plan', st_flash='false')
+        
+        assert not flash_planner.execute_plan(commands, str(image), str(last_flashed))
+        assert not last_flashed.exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,162 @@
+"""
+Tests Unitaires - Compression LZ (tools/lz_codec.py) et packages compressés
+Round-trip, décodage en flux à RAM bornée, détection des flux invalides
+"""
+
+import os
+import struct
+
+import pytest
+
+import firmware_image
+import firmware_signer
+import lz_codec
+from lz_codec import LzDecoder, LzError
+
+
+@pytest.fixture
+def firmware():
+    # Code peu compressible + zone répétitive (tables, padding)
+    return (struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(4 * 1024)
+            + bytes(range(256)) * 32 + b'\x00' * 2048)
+
+
+@pytest.mark.unit
+class TestCodec:
+    """Tests du codec LZSS"""
+    
+    @pytest.mark.parametrize('data', [b'', b'A', b'AB' * 700, bytes(range(256)) * 8])
+    def test_roundtrip(self, data):
+        """Test: décompresse exactement ce qui a été compressé"""
+        payload = lz_codec.compress(data)
+        assert lz_codec.decompress(payload, len(data)) == data
+    
+    def test_roundtrip_params(self, firmware):
+        """Test: autres tailles de fenêtre / lookahead"""
+        payload = lz_codec.compress(firmware, 8, 5)
+        assert lz_codec.decompress(payload, len(firmware), 8, 5) == firmware
+    
+    @pytest.mark.parametrize('window_bits', lz_codec.WINDOW_BITS_RANGE)
+    @pytest.mark.parametrize('lookahead_bits', lz_codec.LOOKAHEAD_BITS_RANGE)
+    def test_roundtrip_all_params(self, window_bits, lookahead_bits):
+        """Test: toutes les paires acceptées, copie finale à chaque alignement de bits"""
+        for shift in range(8):
+            # Chaque littéral (9 bits) décale la copie finale d'un bit
+            data = bytes(range(0x80, 0x80 + shift)) + bytes(range(32)) * 4 + b'ABCD' * 24
+            payload = lz_codec.compress(data, window_bits, lookahead_bits)
+            assert lz_codec.decompress(payload, len(data), window_bits, lookahead_bits) == data
+    
+    def test_compresses_repetitive_data(self):
+        """Test: données répétitives nettement réduites"""
+        data = b'\xFF' * 8192
+        assert len(lz_codec.compress(data)) < len(data) // 4
+    
+    def test_streaming_one_byte_chunks(self, firmware):
+        """Test: flux consommé octet par octet (UART)"""
+        payload = lz_codec.compress(firmware)
+        decoder = LzDecoder(len(firmware))
+        
+        out = b''.join(decoder.feed(payload[i:i + 1]) for i in range(len(payload)))
+        
+        assert decoder.done
+        assert out == firmware
+    
+    def test_decoder_ram_bound(self):
+        """Test: état du décodeur = fenêtre 1KB + quelques mots (20KB de SRAM)"""
+        decoder = LzDecoder(48 * 1024)
+        assert decoder.ram_bytes <= 1024 + 64
+    
+    def test_truncated_stream(self, firmware):
+        """Test: flux tronqué détecté"""
+        payload = lz_codec.compress(firmware)
+        with pytest.raises(LzError, match='truncated'):
+            lz_codec.decompress(payload[:len(payload) // 2], len(firmware))
+    
+    def test_trailing_data(self, firmware):
+        """Test: données après la fin du flux refusées"""
+        payload = lz_codec.compress(firmware)
+        with pytest.raises(LzError, match='trailing'):
+            lz_codec.decompress(payload + b'\x00\x00', len(firmware))
+    
+    def test_backref_before_start(self):
+        """Test: copie depuis avant le début du flux refusée"""
+        with pytest.raises(LzError, match='before start'):
+            lz_codec.decompress(b'\x00\x00\x00', 16)
+    
+    def test_invalid_params(self):
+        """Test: paramètres hors plage refusés"""
+        with pytest.raises(ValueError):
+            lz_codec.compress(b'data', window_bits=16)
+
+
+@pytest.mark.unit
+class TestCompressedPackage:
+    """Tests du package compressé (firmware_signer --compress)"""
+    
+    def test_compressed_package_valid(self, firmware):
+        """Test: package compressé vérifié après expansion"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0", compressed=True)
+        
+        assert firmware_image.is_compressed_package(package)
+        assert len(package) < firmware_image.PACKAGE_SIZE
+        
+        result = firmware_image.check_package(package)
+        assert result['valid'], result['error']
+        assert result['compressed']
+    
+    def test_metadata_flag_and_stored_size(self, firmware):
+        """Test: flag compressé et taille stockée dans les métadonnées"""
+        image = firmware_image.FirmwareImage(firmware, "1.0.0", 1700000000, compressed=True)
+        package = image.package()
+        
+        metadata = firmware_image.parse_metadata(package)
+        reserved = firmware_image.parse_reserved(metadata.reserved)
+        
+        assert metadata.size == len(firmware)
+        assert reserved.flags & firmware_image.FLAG_COMPRESSED
+        assert reserved.stored_size == len(package) - firmware_image.COMPRESSED_HEADER_SIZE
+        assert image.metadata_json()['compressed']['stored_size'] == reserved.stored_size
+    
+    def test_expand_matches_flat_package(self, firmware):
+        """Test: l'expansion redonne exactement le package plat"""
+        flat = firmware_image.FirmwareImage(firmware, "1.0.0", 1700000000).package()
+        compressed = firmware_image.FirmwareImage(firmware, "1.0.0", 1700000000,
+                                                  compressed=True).package()
+        
+        assert firmware_image.expand_package(compressed) == flat
+    
+    def test_expand_with_page_hashes(self, firmware):
+        """Test: table de hash par page conservée après expansion"""
+        image = firmware_image.FirmwareImage(firmware, "1.0.0", page_hashes=True, compressed=True)
+        flat = firmware_image.expand_package(image.package())
+        
+        result = firmware_image.check_package(flat)
+        assert result['valid'], result['error']
+        assert result['pages'] == image.metadata_json()['page_hashes']['pages']
+    
+    def test_corrupted_payload_detected(self, firmware):
+        """Test: payload corrompu refusé (décompression ou hash)"""
+        package = bytearray(firmware_image.build_package(firmware, "1.0.0", compressed=True)[0])
+        package[firmware_image.COMPRESSED_HEADER_SIZE + 100] ^= 0x10
+        
+        result = firmware_image.check_package(bytes(package))
+        assert not result['valid']
+    
+    def test_cli_compress_and_expand(self, firmware, tmp_path, capsys):
+        """Test: --compress puis sous-commande expand"""
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware)
+        compressed_path = tmp_path / 'firmware_signed.lz.bin'
+        flat_path = tmp_path / 'firmware_signed.bin'
+        
+        assert firmware_signer.main([str(firmware_path), '-o', str(compressed_path), '--compress']) == 0
+        assert firmware_signer.main(['--verify', str(compressed_path)]) == 0
+        assert firmware_signer.main(['expand', str(compressed_path), '-o', str(flat_path)]) == 0
+        
+        assert len(flat_path.read_bytes()) == firmware_image.PACKAGE_SIZE
+        assert firmware_signer.main(['expand', str(flat_path), '-o', str(tmp_path / 'x.bin')]) == 1
+        assert 'Not a compressed or sparse package' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
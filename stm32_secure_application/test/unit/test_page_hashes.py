@@ -0,0 +1,198 @@
+"""
+Tests Unitaires - Table de hash par page (tools/page_hashes.py)
+Arbre de Merkle, package --page-hashes, arrêt à la première page corrompue
+"""
+
+import hashlib
+import os
+import struct
+
+import pytest
+
+import firmware_image
+import firmware_signer
+import page_hashes
+
+
+@pytest.fixture
+def firmware():
+    # 5.5 pages: la dernière page est partielle
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(5 * 1024 + 504)
+
+
+@pytest.mark.unit
+class TestMerkleTree:
+    """Tests des feuilles et de la racine"""
+    
+    def test_leaves_per_page(self, firmware):
+        """Test d'une feuille par page de 1KB (dernière page partielle comprise)"""
+        leaves = page_hashes.hash_pages(firmware)
+        
+        assert len(leaves) == page_hashes.page_count(len(firmware)) == 6
+        assert leaves[5] == hashlib.sha256(b'\x00' + firmware[5 * 1024:]).digest()
+    
+    def test_root_known_shapes(self):
+        """Test de la racine pour 1, 2 et 3 feuilles (nœud impair remonté)"""
+        a, b, c = (hashlib.sha256(x).digest() for x in (b'a', b'b', b'c'))
+        ab = hashlib.sha256(b'\x01' + a + b).digest()
+        
+        assert page_hashes.merkle_root([a]) == a
+        assert page_hashes.merkle_root([a, b]) == ab
+        assert page_hashes.merkle_root([a, b, c]) == hashlib.sha256(b'\x01' + ab + c).digest()
+    
+    def test_root_changes_with_any_page(self, firmware):
+        """Test qu'un octet modifié dans n'importe quelle page change la racine"""
+        root = page_hashes.merkle_root(page_hashes.hash_pages(firmware))
+        
+        for offset in (0, 1023, 1024, len(firmware) - 1):
+            corrupted = bytearray(firmware)
+            corrupted[offset] ^= 0x01
+            assert page_hashes.merkle_root(page_hashes.hash_pages(corrupted)) != root
+    
+    def test_table_roundtrip(self, firmware):
+        """Test de la sérialisation de la table"""
+        leaves = page_hashes.hash_pages(firmware)
+        table = page_hashes.pack_page_table(leaves)
+        
+        assert len(table) == page_hashes.page_table_size(len(leaves))
+        assert page_hashes.parse_page_table(table) == (1024, leaves)
+        assert page_hashes.parse_page_table(table[:-1]) is None
+        assert page_hashes.parse_page_table(b'\xFF' * len(table)) is None
+
+
+@pytest.mark.unit
+class TestPageVerification:
+    """Tests de l'arrêt anticipé et de la re-vérification partielle"""
+    
+    def test_first_bad_page(self, firmware):
+        """Test que la première page corrompue est signalée"""
+        leaves = page_hashes.hash_pages(firmware)
+        corrupted = bytearray(firmware)
+        corrupted[3 * 1024 + 7] ^= 0xFF
+        corrupted[4 * 1024] ^= 0xFF
+        
+        assert page_hashes.first_bad_page(firmware, leaves) is None
+        assert page_hashes.first_bad_page(corrupted, leaves) == 3
+        assert page_hashes.first_bad_page(corrupted, leaves, pages=[4, 0]) == 4
+        assert page_hashes.first_bad_page(corrupted, leaves, pages=[0, 1]) is None
+    
+    def test_truncated_image_detected(self, firmware):
+        """Test qu'une image tronquée échoue sur la dernière page"""
+        leaves = page_hashes.hash_pages(firmware)
+        assert page_hashes.first_bad_page(firmware[:-1], leaves) == 5
+    
+    def test_changed_pages(self, firmware):
+        """Test du diff de deux tables"""
+        updated = bytearray(firmware)
+        updated[2 * 1024] ^= 0xFF
+        updated += b'\x00' * 1024
+        
+        old = page_hashes.hash_pages(firmware)
+        new = page_hashes.hash_pages(updated)
+        assert page_hashes.changed_pages(old, new) == [2, 5, 6]
+
+
+@pytest.mark.unit
+class TestPageHashPackage:
+    """Tests du package signé avec table de hash par page"""
+    
+    @pytest.fixture
+    def image(self, firmware):
+        return firmware_image.FirmwareImage(firmware, "2.0.0", page_hashes=True)
+    
+    def test_package_layout(self, image):
+        """Test: racine dans reserved, table après le Reference Hash"""
+        package = image.package()
+        
+        assert len(package) == image.package_size == firmware_image.PACKAGE_SIZE + 8 + 6 * 32
+        
+        with firmware_image.SignedPackage.from_buffer(package) as signed:
+            reserved = signed.reserved_fields
+            assert reserved.flags & firmware_image.FLAG_PAGE_HASHES
+            assert reserved.page_root == image.page_root
+            assert signed.page_table == (1024, image.page_leaves)
+        
+        assert image.metadata_json()['page_hashes']['pages'] == 6
+    
+    def test_default_package_unchanged(self, firmware):
+        """Test que sans option le package garde le layout historique"""
+        package, _ = firmware_image.build_package(firmware, "2.0.0")
+        
+        assert len(package) == firmware_image.PACKAGE_SIZE
+        assert package[firmware_image.METADATA_OFFSET + 52:firmware_image.SIGNATURE_OFFSET] == b'\x00' * 44
+    
+    def test_check_package_with_pages(self, image):
+        """Test que check_package vérifie les pages"""
+        result = firmware_image.check_package(image.package())
+        
+        assert result['valid']
+        assert result['checks']['pages'] == 'ok'
+        assert result['pages'] == 6
+    
+    def test_corrupt_page_stops_early(self, image):
+        """Test de l'arrêt à la première page corrompue (CRC / SHA non calculés)"""
+        package = bytearray(image.package())
+        package[2 * 1024 + 100] ^= 0xFF
+        
+        result = firmware_image.check_package(package)
+        
+        assert not result['valid']
+        assert result['bad_page'] == 2
+        assert result['checks']['pages'] == 'fail'
+        assert result['checks']['crc32'] == result['checks']['sha256'] == 'skipped'
+    
+    def test_tampered_table_rejected(self, image):
+        """Test qu'une table qui ne correspond pas à la racine est refusée"""
+        package = bytearray(image.package())
+        package[firmware_image.PACKAGE_SIZE + 8] ^= 0xFF
+        
+        result = firmware_image.check_package(package)
+        assert result['checks']['pages'] == 'fail'
+        assert result['error'] == 'PAGE TABLE MISMATCH'
+    
+    def test_wrong_page_size_rejected(self, firmware):
+        """Test qu'une table découpée autrement qu'en pages de flash de 1KB est refusée"""
+        # Firmware d'une demi-page: même feuille et même racine avec des pages de 512 bytes
+        image = firmware_image.FirmwareImage(firmware[:500], "2.0.0", page_hashes=True)
+        package = bytearray(image.package())
+        struct.pack_into('<H', package, firmware_image.PACKAGE_SIZE + 4, 512)
+        
+        result = firmware_image.check_package(package)
+        assert result['checks']['pages'] == 'fail'
+        assert result['error'] == 'PAGE TABLE PAGE SIZE 512 (expected 1024)'
+        
+        with firmware_image.SignedFirmware.from_bytes(package) as signed:
+            with pytest.raises(ValueError):
+                signed.verify_pages()
+    
+    def test_missing_table_rejected(self, image):
+        """Test qu'un package annonçant une table absente est refusé"""
+        result = firmware_image.check_package(image.package()[:firmware_image.PACKAGE_SIZE])
+        assert result['error'] == 'PAGE TABLE MISSING'
+    
+    def test_signed_firmware_verify_pages(self, image):
+        """Test de la re-vérification de pages choisies"""
+        package = bytearray(image.package())
+        package[4 * 1024] ^= 0xFF
+        
+        with firmware_image.SignedFirmware.from_bytes(package) as signed:
+            assert signed.verify_pages([0, 1, 2]) is None
+            assert signed.verify_pages([1, 4]) == 4
+        
+        with firmware_image.SignedFirmware.from_bytes(firmware_image.build_package(b'\x00' * 8)[0]) as plain:
+            with pytest.raises(ValueError):
+                plain.verify_pages()
+    
+    def test_cli_page_hashes(self, firmware, tmp_path, capsys):
+        """Test de l'option --page-hashes puis --verify"""
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware)
+        output = tmp_path / 'firmware_signed.bin'
+        
+        assert firmware_signer.main([str(firmware_path), '-o', str(output), '--page-hashes']) == 0
+        assert firmware_signer.main(['--verify', str(output)]) == 0
+        assert 'Page hashes OK: 6 pages' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,231 @@
+"""
+Tests Unitaires - Script post-build (tools/post_build.py)
+Signature dans le process PlatformIO, attente du .bin sans délai fixe
+"""
+
+import builtins
+import importlib.util
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import firmware_image
+import signature_backend
+
+
+TOOLS_DIR = Path(__file__).parent.parent.parent / 'tools'
+
+
+class FakePlatform:
+    def __init__(self, toolchain_dir):
+        self.toolchain_dir = toolchain_dir
+    
+    def get_package_dir(self, name):
+        return self.toolchain_dir
+
+
+class FakeEnv(dict):
+    """Remplace l'environnement SCons de PlatformIO"""
+    
+    def __init__(self, toolchain_dir, **values):
+        super().__init__(**values)
+        self.platform = FakePlatform(toolchain_dir)
+        self.post_actions = []
+    
+    def PioPlatform(self):
+        return self.platform
+    
+    def AddPostAction(self, target, action):
+        self.post_actions.append((target, action))
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Projet PlatformIO minimal avec un faux arm-none-eabi-objcopy"""
+    build_dir = tmp_path / '.pio' / 'build' / 'application'
+    build_dir.mkdir(parents=True)
+    toolchain_bin = tmp_path / 'toolchain' / 'bin'
+    toolchain_bin.mkdir(parents=True)
+    
+    # objcopy -O binary <elf> <bin>: ici une simple copie
+    objcopy = toolchain_bin / 'arm-none-eabi-objcopy'
+    objcopy.write_text('#!/bin/sh\ncp "$3" "$4"\n')
+    objcopy.chmod(objcopy.stat().st_mode | stat.S_IEXEC)
+    
+    elf = build_dir / 'firmware.elf'
+    elf.write_bytes(b'\x00\x50\x00\x20\x01\x21\x00\x08' + os.urandom(3000))
+    
+    env = FakeEnv(str(tmp_path / 'toolchain'),
+                  PROJECT_DIR=str(tmp_path), BUILD_DIR=str(build_dir),
+                  PROGNAME='firmware', PIOENV='application')
+    return env, elf
+
+
+@pytest.fixture
+def post_build(project, monkeypatch):
+    """Charge post_build.py comme le ferait PlatformIO (Import("env"))"""
+    env, _ = project
+    
+    def fake_import(name):
+        sys._getframe(1).f_globals[name] = env
+    
+    monkeypatch.setattr(builtins, 'Import', fake_import, raising=False)
+    monkeypatch.syspath_prepend(str(TOOLS_DIR))
+    
+    spec = importlib.util.spec_from_file_location('post_build', TOOLS_DIR / 'post_build.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.unit
+class TestWaitForFile:
+    """Tests de l'attente du firmware.bin (condition réelle, pas de sleep fixe)"""
+    
+    def test_ready_file_returns_immediately(self, post_build, tmp_path):
+        """Test qu'un fichier déjà complet est accepté sans attendre"""
+        path = tmp_path / 'firmware.bin'
+        path.write_bytes(b'\xAA' * 100)
+        
+        start = time.perf_counter()
+        assert post_build.wait_for_file(str(path)) == 100
+        assert time.perf_counter() - start < 0.05
+    
+    def test_missing_file_times_out(self, post_build, tmp_path):
+        """Test qu'un fichier absent renvoie None après le délai"""
+        assert post_build.wait_for_file(str(tmp_path / 'absent.bin'), timeout=0.05) is None
+    
+    def test_stale_file_rejected(self, post_build, tmp_path):
+        """Test qu'un .bin plus ancien que l'ELF n'est pas signé"""
+        path = tmp_path / 'firmware.bin'
+        path.write_bytes(b'\xAA' * 100)
+        
+        assert post_build.wait_for_file(str(path), newer_than=time.time() + 60, timeout=0.05) is None
+    
+    def test_empty_file_rejected(self, post_build, tmp_path):
+        """Test qu'un fichier vide (en cours d'écriture) n'est pas accepté"""
+        path = tmp_path / 'firmware.bin'
+        path.write_bytes(b'')
+        
+        assert post_build.wait_for_file(str(path), timeout=0.05) is None
+
+
+@pytest.mark.unit
+class TestSignCallback:
+    """Tests du callback post-build complet"""
+    
+    def test_registers_post_action(self, post_build, project):
+        """Test que le callback est enregistré sur l'ELF"""
+        env, _ = project
+        assert env.post_actions == [("$BUILD_DIR/${PROGNAME}.elf", post_build.sign_firmware_callback)]
+    
+    def test_signs_in_process(self, post_build, project, capsys, monkeypatch):
+        """Test de la signature sans sous-process Python, avec timings"""
+        env, elf = project
+        monkeypatch.setenv('FIRMWARE_VERSION', '1.2.3')
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        
+        out = capsys.readouterr().out
+        signed = Path(env['PROJECT_DIR']) / 'firmware_signed.bin'
+        
+        with firmware_image.SignedFirmware.open(str(signed)) as firmware:
+            assert firmware.valid
+            assert firmware.version == '1.2.3'
+            assert firmware.firmware == elf.read_bytes()
+        
+        assert 'SIGNATURE RÉUSSIE' in out
+        assert 'objcopy' in out and 'signature' in out and 'total' in out
+    
+    def test_unchanged_binary_hits_cache(self, post_build, project, capsys, monkeypatch):
+        """Test qu'un rebuild sans changement reprend le package du cache"""
+        env, elf = project
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        signed = Path(env['PROJECT_DIR']) / 'firmware_signed.bin'
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        first = signed.read_bytes()
+        assert 'signature (cache)' not in capsys.readouterr().out
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        assert 'signature (cache)' in capsys.readouterr().out
+        assert signed.read_bytes() == first
+        assert (Path(env['PROJECT_DIR']) / '.pio' / 'signing_cache').is_dir()
+    
+    @pytest.mark.parametrize('define', [('BOOT_PROFILE', 1), 'BOOT_PROFILE=1'])
+    def test_boot_profile_from_build_flags(self, post_build, project, capsys, monkeypatch, define):
+        """Test que -DBOOT_PROFILE=1 (env *_production) est enregistré dans le package"""
+        env, elf = project
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        env['CPPDEFINES'] = ['STM32F103xB', define]
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        
+        signed = Path(env['PROJECT_DIR']) / 'firmware_signed.bin'
+        with firmware_image.SignedFirmware.open(str(signed)) as firmware:
+            assert firmware.verify()['boot_profile'] == 'production'
+        assert 'Boot:      production' in capsys.readouterr().out
+    
+    def test_mac_key_and_crc_mode_from_environment(self, post_build, project, tmp_path, capsys,
+                                                   monkeypatch):
+        """Test que $FIRMWARE_MAC_KEY et $FIRMWARE_CRC_MODE sont appliqués comme par le signeur"""
+        env, elf = project
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        monkeypatch.delenv(signature_backend.SIGNING_KEY_ENV_VAR, raising=False)
+        key = signature_backend.write_mac_key(str(tmp_path / 'mac_key'))
+        monkeypatch.setenv(signature_backend.MAC_KEY_ENV_VAR, str(tmp_path / 'mac_key'))
+        monkeypatch.setenv(firmware_image.CRC_MODE_ENV_VAR, 'stm32')
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        
+        signed = Path(env['PROJECT_DIR']) / 'firmware_signed.bin'
+        with firmware_image.SignedFirmware.open(str(signed), mac_key=key) as firmware:
+            result = firmware.verify()
+            assert result['valid']
+            assert result['crc_mode'] == 'stm32'
+            assert result['signature_type'] == 'hmac-sha256'
+        out = capsys.readouterr().out
+        assert f'MAC key:   id {key.key_id}' in out
+        assert '(stm32)' in out
+    
+    def test_crc_mode_change_misses_cache(self, post_build, project, capsys, monkeypatch):
+        """Test qu'un autre $FIRMWARE_CRC_MODE ne reprend pas le package du cache"""
+        env, elf = project
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        capsys.readouterr()
+        
+        monkeypatch.setenv(firmware_image.CRC_MODE_ENV_VAR, 'stm32')
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        
+        assert 'signature (cache)' not in capsys.readouterr().out
+        signed = Path(env['PROJECT_DIR']) / 'firmware_signed.bin'
+        with firmware_image.SignedFirmware.open(str(signed)) as firmware:
+            assert firmware.verify()['crc_mode'] == 'stm32'
+    
+    def test_unknown_crc_mode(self, post_build, project, capsys, monkeypatch):
+        """Test qu'un $FIRMWARE_CRC_MODE inconnu bloque la signature"""
+        env, elf = project
+        monkeypatch.delenv('FIRMWARE_SIGN_CACHE', raising=False)
+        monkeypatch.setenv(firmware_image.CRC_MODE_ENV_VAR, 'crc16')
+        
+        post_build.sign_firmware_callback(None, [str(elf)], env)
+        
+        out = capsys.readouterr().out
+        assert "unknown CRC mode 'crc16'" in out
+        assert not (Path(env['PROJECT_DIR']) / 'firmware_signed.bin').exists()
+    
+    def test_boot_profile_default(self, post_build, project):
+        """Test: sans CPPDEFINES BOOT_PROFILE, profil diagnostic"""
+        env, _ = project
+        assert post_build.build_boot_profile(env) == firmware_image.BOOT_PROFILE_DIAGNOSTIC
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
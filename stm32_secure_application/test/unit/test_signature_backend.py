@@ -0,0 +1,369 @@
+"""
+Tests Unitaires - Signature Ed25519 / HMAC (tools/signature_backend.py)
+Vecteurs RFC 8032 et RFC 4231, lots, cache des clés et vérification des packages
+"""
+
+import hmac
+import os
+import stat
+import struct
+
+import pytest
+
+import firmware_image
+import firmware_signer
+import signature_backend
+from signature_backend import SIG_TYPE_ED25519, SIG_TYPE_HMAC_SHA256, SignatureError
+
+# RFC 8032 §7.1, tests 1 et 2: (graine, clé publique, message, signature)
+RFC8032_VECTORS = [
+    ('9d61b19deffd5a60ba844af492ec2cc44449c5697b326919703bac031cae7f60',
+     'd75a980182b10ab7d54bfed3c964073a0ee172f3daa62325af021a68f707511a',
+     '',
+     'e5564300c360ac729086e2cc806e828a84877f1eb8e5d974d873e065224901555'
+     'fb8821590a33bacc61e39701cf9b46bd25bf5f0595bbe24655141438e7a100b'),
+    ('4ccd089b28ff96da9db6c346ec114e0f5b8a319f35aba624da8cf6ed4fb8a6fb',
+     '3d4017c3e843895a92b70aa74d1b7ebc9c982ccf2ec4968cc0cd55f12af4660c',
+     '72',
+     '92a009a9f0d4cab8720e820b5f642540a2b27b5416503f8fb3762223ebdb69da'
+     '085ac1e43e15996e458f3613d0f11d8c387b2eaeb4302aeeb00d291612bb0c00'),
+]
+
+SEED = bytes(range(32))
+
+
+@pytest.fixture
+def key():
+    return signature_backend.signing_key(SEED)
+
+
+@pytest.fixture
+def firmware():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(8 * 1024)
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+@pytest.mark.usefixtures('ed25519_signing')
+class TestEd25519:
+    """Tests du moteur Ed25519"""
+    
+    @pytest.mark.parametrize('seed,public_key,message,signature', RFC8032_VECTORS)
+    def test_rfc8032_vectors(self, seed, public_key, message, signature):
+        """Test: clé publique et signature identiques à la RFC 8032"""
+        key = signature_backend.signing_key(bytes.fromhex(seed))
+        
+        assert key.public_key.hex() == public_key
+        assert key.sign(bytes.fromhex(message)).hex() == signature
+        assert signature_backend.verify_key(bytes.fromhex(public_key)).verify(
+            bytes.fromhex(message), bytes.fromhex(signature))
+    
+    @pytest.mark.parametrize('seed,public_key,message,signature', RFC8032_VECTORS)
+    def test_python_engine_vectors(self, python_signing, seed, public_key, message, signature):
+        """Test: moteur python de référence (FIRMWARE_INSECURE_PYTHON_SIGNING=1) conforme à la RFC 8032"""
+        key = signature_backend.SigningKey(bytes.fromhex(seed))
+        
+        assert key.public_key.hex() == public_key
+        assert key.sign(bytes.fromhex(message)).hex() == signature
+    
+    def test_tampered_message(self, key):
+        """Test: message modifié refusé"""
+        signature = key.sign(b'metadata')
+        assert not signature_backend.verify_key(key.public_key).verify(b'metadatA', signature)
+    
+    def test_tampered_signature(self, key):
+        """Test: R ou S modifié refusé"""
+        verifier = signature_backend.verify_key(key.public_key)
+        signature = bytearray(key.sign(b'metadata'))
+        
+        for index in (0, 40):
+            forged = bytearray(signature)
+            forged[index] ^= 0x01
+            assert not verifier.verify(b'metadata', bytes(forged))
+    
+    def test_non_canonical_s(self, key):
+        """Test: S >= L refusé (malléabilité)"""
+        signature = key.sign(b'metadata')
+        s = int.from_bytes(signature[32:], 'little') + signature_backend._L
+        forged = signature[:32] + s.to_bytes(32, 'little')
+        
+        assert not signature_backend.verify_key(key.public_key).verify(b'metadata', forged)
+    
+    def test_invalid_public_key(self):
+        """Test: clé publique hors courbe ou de mauvaise taille"""
+        with pytest.raises(SignatureError):
+            signature_backend.verify_key(b'\x02' + b'\x00' * 30 + b'\x80' * 1)
+        with pytest.raises(SignatureError):
+            signature_backend.verify_key(b'\x00' * 31)
+    
+    def test_keys_cached(self):
+        """Test: clés parsées une seule fois"""
+        assert signature_backend.signing_key(SEED) is signature_backend.signing_key(SEED)
+        
+        public_key = signature_backend.signing_key(SEED).public_key
+        assert signature_backend.verify_key(public_key) is signature_backend.verify_key(public_key)
+
+    
+    def test_signing_requires_cryptography(self, monkeypatch, tmp_path, capsys):
+        """Test: sans 'cryptography', signer échoue clairement, vérifier reste possible"""
+        seed, public_key, message, signature = RFC8032_VECTORS[1]
+        monkeypatch.setattr(signature_backend, 'ENGINE', 'python')
+        monkeypatch.delenv(signature_backend.INSECURE_SIGNING_ENV_VAR, raising=False)
+        
+        with pytest.raises(SignatureError, match="requires the 'cryptography' package"):
+            signature_backend.SigningKey(bytes.fromhex(seed))
+        assert signature_backend.VerifyKey(bytes.fromhex(public_key)).verify(
+            bytes.fromhex(message), bytes.fromhex(signature))
+        
+        path = tmp_path / 'signing_key'
+        assert firmware_signer.main(['keygen', '-o', str(path)]) == 1
+        assert "requires the 'cryptography' package" in capsys.readouterr().out
+        assert not path.exists()
+
+@pytest.mark.unit
+@pytest.mark.crypto
+@pytest.mark.usefixtures('ed25519_signing')
+class TestBatch:
+    """Tests des API par lot"""
+    
+    def test_sign_batch_matches_single(self, key):
+        """Test: sign_batch produit les mêmes signatures (Ed25519 déterministe)"""
+        messages = [bytes([i]) * 96 for i in range(8)]
+        
+        assert signature_backend.sign_batch(SEED, messages) == [key.sign(m) for m in messages]
+    
+    def test_verify_batch_mixed(self, key):
+        """Test: plusieurs clés, une signature invalide, une clé invalide"""
+        other = signature_backend.signing_key(bytes(32))
+        messages = [b'a', b'b', b'c', b'd']
+        items = [
+            (key.public_key, messages[0], key.sign(messages[0])),
+            (other.public_key, messages[1], other.sign(messages[1])),
+            (key.public_key, messages[2], other.sign(messages[2])),  # Mauvaise clé
+            (b'\x00' * 32, messages[3], key.sign(messages[3])),  # Clé invalide
+        ]
+        
+        assert signature_backend.verify_batch(items) == [True, True, False, False]
+    
+    def test_verify_batch_empty(self):
+        """Test: lot vide"""
+        assert signature_backend.verify_batch([]) == []
+
+
+@pytest.mark.unit
+@pytest.mark.usefixtures('ed25519_signing')
+class TestKeyFiles:
+    """Tests des fichiers de clés"""
+    
+    def test_write_and_load_keypair(self, tmp_path):
+        """Test: graine privée (0600) et clé publique en hex"""
+        path = tmp_path / 'signing_key'
+        key = signature_backend.write_keypair(str(path), SEED)
+        
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert signature_backend.load_signing_key(str(path)) is key
+        assert signature_backend.load_key_file(f"{path}.pub") == key.public_key
+    
+    def test_raw_key_file(self, tmp_path):
+        """Test: clé binaire brute de 32 bytes acceptée"""
+        path = tmp_path / 'key.bin'
+        path.write_bytes(SEED)
+        assert signature_backend.load_key_file(str(path)) == SEED
+    
+    def test_invalid_key_file(self, tmp_path):
+        """Test: fichier de clé invalide refusé"""
+        path = tmp_path / 'key.txt'
+        path.write_text('not a key\n')
+        with pytest.raises(SignatureError):
+            signature_backend.load_key_file(str(path))
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+@pytest.mark.usefixtures('ed25519_signing')
+class TestSignedPackages:
+    """Tests des packages signés en Ed25519"""
+    
+    def test_package_verified_with_public_key(self, key, firmware):
+        """Test: signature des métadonnées vérifiée avec la clé publique"""
+        image = firmware_image.FirmwareImage(firmware, "1.0.0", signing_key=SEED)
+        package = image.package()
+        
+        reserved = firmware_image.parse_reserved(firmware_image.parse_metadata(
+            package, firmware_image.METADATA_OFFSET).reserved)
+        assert reserved.sig_type == SIG_TYPE_ED25519
+        assert image.metadata_json()['signature_type'] == 'ed25519'
+        assert image.metadata_json()['public_key'] == key.public_key.hex()
+        
+        result = firmware_image.check_package(package, key.public_key)
+        assert result['valid'], result['error']
+        assert result['checks']['signature'] == 'ok'
+    
+    def test_without_public_key_unverified(self, firmware):
+        """Test: sans clé publique, la signature n'est pas vérifiée et le package refusé"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0", signing_key=SEED)
+        
+        result = firmware_image.check_package(package)
+        assert result['checks']['signature'] == 'unverified'
+        assert result['signature_type'] == 'ed25519'
+        assert not result['valid']
+        assert result['error'].startswith('SIGNATURE NOT VERIFIED')
+    
+    def test_tampered_package_without_key_refused(self, firmware):
+        """Test: firmware modifié puis re-signé par une autre clé, vérifié sans clé"""
+        tampered = bytearray(firmware)
+        tampered[100] ^= 0xFF
+        forged, _ = firmware_image.build_package(bytes(tampered), "1.0.0",
+                                                 signing_key=bytes(32))
+        
+        result = firmware_image.check_package(forged)
+        assert result['checks']['sha256'] == 'ok'  # Digests recalculés par le faussaire
+        assert not result['valid']
+        assert not firmware_image.SignedFirmware.from_bytes(forged).valid
+        
+        summary = firmware_signer.summarize_verification([result], 1.0)
+        assert summary['failed'] == 1
+        assert summary['failures_by_check'] == {'signature': 1}
+    
+    def test_wrong_public_key(self, firmware):
+        """Test: clé publique d'une autre paire refusée"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0", signing_key=SEED)
+        other = signature_backend.signing_key(bytes(32))
+        
+        result = firmware_image.check_package(package, other.public_key)
+        assert not result['valid']
+        assert result['error'] == "SIGNATURE MISMATCH"
+    
+    def test_version_change_detected(self, key, firmware):
+        """Test: version modifiée (anti-rollback) invalide la signature"""
+        package = bytearray(firmware_image.build_package(firmware, "2.0.0", signing_key=SEED)[0])
+        struct.pack_into('<I', package, firmware_image.METADATA_OFFSET + 4,
+                         firmware_image.parse_version("1.0.0"))
+        
+        result = firmware_image.check_package(bytes(package), key.public_key)
+        assert result['checks']['signature'] == 'fail'
+    
+    def test_downgrade_to_placeholder_refused(self, key, firmware):
+        """Test: package double SHA-256 refusé quand une clé publique est fournie"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0")
+        
+        result = firmware_image.check_package(package, key.public_key)
+        assert not result['valid']
+        assert 'ED25519 SIGNATURE REQUIRED' in result['error']
+    
+    def test_compressed_package(self, key, firmware):
+        """Test: la signature survit à la compression (métadonnées restaurées)"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0", compressed=True,
+                                                  signing_key=SEED)
+        
+        result = firmware_image.check_package(package, key.public_key)
+        assert result['valid'], result['error']
+    
+    def test_cli_keygen_sign_verify(self, firmware, tmp_path, capsys):
+        """Test: keygen, --signing-key puis --verify --public-key"""
+        key_path = tmp_path / 'signing_key'
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware)
+        signed_path = tmp_path / 'firmware_signed.bin'
+        
+        assert firmware_signer.main(['keygen', '-o', str(key_path)]) == 0
+        assert firmware_signer.main(['keygen', '-o', str(key_path)]) == 1
+        assert firmware_signer.main([str(firmware_path), '-o', str(signed_path),
+                                     '--signing-key', str(key_path)]) == 0
+        capsys.readouterr()
+        
+        assert firmware_signer.main(['--verify', str(signed_path),
+                                     '--public-key', f"{key_path}.pub"]) == 0
+        assert 'Signature OK (ed25519)' in capsys.readouterr().out
+        
+        assert firmware_signer.main(['--verify', str(signed_path)]) == 1
+        assert 'NOT verified' in capsys.readouterr().out
+
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestHmac:
+    """Tests du mode MAC HMAC-SHA256 (états ipad/opad précalculés)"""
+    
+    def test_rfc4231_vector(self):
+        """Test: RFC 4231 cas 2 (clé 'Jefe')"""
+        tag = signature_backend.mac_key(b'Jefe').mac(b'what do ya want for nothing?')
+        assert tag.hex() == ('5bdcc146bf60754e6a042426089575c7'
+                             '5a003f089d2739839dec58b964ec3843')
+    
+    @pytest.mark.parametrize('key_len', [1, 32, 64, 65, 200])
+    def test_matches_stdlib(self, key_len):
+        """Test: identique à hmac.new (clé courte, bloc exact, clé hashée)"""
+        key = os.urandom(key_len)
+        messages = [b'', b'a', os.urandom(96), os.urandom(1000)]
+        
+        expected = [hmac.new(key, m, 'sha256').digest() for m in messages]
+        assert signature_backend.mac_batch(key, messages) == expected
+        assert [signature_backend.mac_key(key).mac(m) for m in messages] == expected
+    
+    def test_key_cached_and_id(self):
+        """Test: clé précalculée une fois, identifiant sans la clé"""
+        key = signature_backend.mac_key(SEED)
+        assert signature_backend.mac_key(SEED) is key
+        assert SEED.hex()[:16] not in key.key_id
+        assert signature_backend.mac_key(bytes(32)).key_id != key.key_id
+    
+    def test_empty_key_refused(self):
+        """Test: clé vide refusée"""
+        with pytest.raises(SignatureError):
+            signature_backend.mac_key(b'')
+    
+    def test_package_mac(self, firmware):
+        """Test: MAC des métadonnées vérifié avec la clé, refusé avec une autre"""
+        package, metadata_json = firmware_image.build_package(firmware, "1.0.0", mac_key=SEED)
+        
+        reserved = firmware_image.parse_reserved(firmware_image.parse_metadata(
+            package, firmware_image.METADATA_OFFSET).reserved)
+        assert reserved.sig_type == SIG_TYPE_HMAC_SHA256
+        assert metadata_json['signature_type'] == 'hmac-sha256'
+        assert metadata_json['mac_key_id'] == signature_backend.mac_key(SEED).key_id
+        
+        assert firmware_image.check_package(package, mac_key=SEED)['valid']
+        assert firmware_image.check_package(package)['checks']['signature'] == 'unverified'
+        assert not firmware_image.check_package(package)['valid']
+        
+        result = firmware_image.check_package(package, mac_key=bytes(32))
+        assert result['error'] == "MAC MISMATCH"
+    
+    def test_downgrade_refused(self, firmware):
+        """Test: package non MAC refusé quand une clé MAC est fournie"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0")
+        
+        result = firmware_image.check_package(package, mac_key=SEED)
+        assert not result['valid']
+        assert 'HMAC-SHA256 MAC REQUIRED' in result['error']
+    
+    def test_signing_and_mac_keys_exclusive(self, firmware):
+        """Test: Ed25519 et HMAC ne se combinent pas"""
+        with pytest.raises(ValueError):
+            firmware_image.FirmwareImage(firmware, signing_key=SEED, mac_key=SEED)
+    
+    def test_cli_mac_sign_verify(self, firmware, tmp_path, capsys):
+        """Test: keygen --mac, --mac-key puis --verify --mac-key"""
+        key_path = tmp_path / 'mac_key'
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware)
+        signed_path = tmp_path / 'firmware_signed.bin'
+        
+        assert firmware_signer.main(['keygen', '--mac', '-o', str(key_path)]) == 0
+        assert stat.S_IMODE(os.stat(key_path).st_mode) == 0o600
+        assert not (tmp_path / 'mac_key.pub').exists()
+        assert firmware_signer.main([str(firmware_path), '-o', str(signed_path),
+                                     '--mac-key', str(key_path)]) == 0
+        capsys.readouterr()
+        
+        assert firmware_signer.main(['--verify', str(signed_path), '--mac-key', str(key_path)]) == 0
+        assert 'Signature OK (hmac-sha256)' in capsys.readouterr().out
+        
+        assert firmware_signer.main(['--verify', str(signed_path)]) == 1
+        assert 'NOT verified (no --mac-key)' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
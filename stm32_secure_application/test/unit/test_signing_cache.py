@@ -0,0 +1,286 @@
+"""
+Tests Unitaires - Cache de signature (tools/signing_cache.py)
+Clés adressées par contenu, hits reproductibles, éviction LRU
+"""
+
+import hashlib
+import os
+import time
+
+import pytest
+
+import firmware_image
+import firmware_signer
+import signature_backend
+from signing_cache import CACHE_ENV_VAR, SigningCache, cache_key
+
+
+@pytest.fixture
+def firmware_data():
+    return b'\x00\x50\x00\x20\x01\x21\x00\x08' + os.urandom(4000)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SigningCache(tmp_path / 'cache')
+
+
+@pytest.mark.unit
+class TestCacheKey:
+    """Tests de la clé (SHA-256 firmware, version, profil)"""
+    
+    def test_key_depends_on_every_field(self, firmware_data):
+        """Test qu'un changement de contenu, version ou profil change la clé"""
+        sha = firmware_image.calculate_sha256(firmware_data)
+        base = cache_key(sha, '1.0.0')
+        
+        assert cache_key(sha.hex(), '1.0.0') == base
+        assert cache_key(firmware_image.calculate_sha256(firmware_data + b'\x00'), '1.0.0') != base
+        assert cache_key(sha, '1.0.1') != base
+        assert cache_key(sha, '1.0.0', profile='other') != base
+    
+    def test_invalid_version_rejected(self, firmware_data):
+        """Test qu'une version mal formée n'est pas mise en cache"""
+        with pytest.raises(ValueError):
+            cache_key(firmware_image.calculate_sha256(firmware_data), '1.x.0')
+
+
+@pytest.mark.unit
+class TestSigningCache:
+    """Tests des hits / misses"""
+    
+    def test_miss_then_hit(self, cache, firmware_data):
+        """Test qu'un second build renvoie le package identique (timestamp compris)"""
+        package, metadata_json, hit = cache.build(firmware_data, '1.2.3')
+        assert not hit
+        
+        cached_package, cached_json, hit = cache.build(firmware_data, '1.2.3')
+        assert hit
+        assert cached_package == package
+        assert cached_json == metadata_json
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+        assert firmware_image.check_package(cached_package)['valid']
+    
+    def test_version_change_misses(self, cache, firmware_data):
+        """Test qu'une nouvelle version re-signe le firmware"""
+        cache.build(firmware_data, '1.0.0')
+        package, _, hit = cache.build(firmware_data, '2.0.0')
+        
+        assert not hit
+        assert firmware_image.SignedFirmware.from_bytes(package).version == '2.0.0'
+    
+    @pytest.mark.usefixtures('ed25519_signing')
+    def test_signing_key_change_misses(self, cache, firmware_data):
+        """Test qu'un package Ed25519 est indexé par clé publique"""
+        first, _, _ = cache.build(firmware_data, '1.0.0', signing_key=bytes(32))
+        _, _, hit = cache.build(firmware_data, '1.0.0', signing_key=bytes(range(32)))
+        assert not hit
+        
+        package, _, hit = cache.build(firmware_data, '1.0.0', signing_key=bytes(32))
+        assert hit
+        assert package == first
+    
+    def test_mac_key_change_misses(self, cache, firmware_data):
+        """Test qu'un package HMAC est indexé par identifiant de clé"""
+        first, _, _ = cache.build(firmware_data, '1.0.0', mac_key=bytes(32))
+        _, _, hit = cache.build(firmware_data, '1.0.0', mac_key=bytes(range(32)))
+        assert not hit
+        
+        package, _, hit = cache.build(firmware_data, '1.0.0', mac_key=bytes(32))
+        assert hit
+        assert package == first
+        assert firmware_image.check_package(package, mac_key=bytes(32))['valid']
+    
+    def test_crc_mode_change_misses(self, cache, firmware_data):
+        """Test qu'un package crc_mode = stm32 a sa propre entrée"""
+        cache.build(firmware_data, '1.0.0')
+        package, metadata_json, hit = cache.build(firmware_data, '1.0.0',
+                                                  crc_mode=firmware_image.CRC_MODE_STM32)
+        
+        assert not hit
+        assert metadata_json['crc_mode'] == 'stm32'
+        assert firmware_image.check_package(package)['crc_mode'] == 'stm32'
+    
+    def test_boot_profile_change_misses(self, cache, firmware_data):
+        """Test qu'un package signé en production a sa propre entrée"""
+        cache.build(firmware_data, '1.0.0')
+        package, metadata_json, hit = cache.build(firmware_data, '1.0.0',
+                                                  boot_profile=firmware_image.BOOT_PROFILE_PRODUCTION)
+        
+        assert not hit
+        assert metadata_json['boot_profile'] == 'production'
+        assert firmware_image.check_package(package)['boot_profile'] == 'production'
+    
+    def test_truncated_entry_ignored(self, cache, firmware_data):
+        """Test qu'une entrée corrompue est traitée comme un miss"""
+        cache.build(firmware_data, '1.0.0')
+        package_path, _ = cache._paths(cache.key(firmware_data, '1.0.0'))
+        package_path.write_bytes(b'\xFF' * 100)
+        
+        package, _, hit = cache.build(firmware_data, '1.0.0')
+        assert not hit
+        assert len(package) == firmware_image.PACKAGE_SIZE
+    
+    def test_mismatched_entry_removed(self, cache, firmware_data):
+        """Test qu'une entrée signée pour un autre firmware est supprimée (miss)"""
+        key = cache.key(firmware_data, '1.0.0')
+        other = firmware_data[:-4] + b'\x00\x01\x02\x03'
+        image = firmware_image.FirmwareImage(other, '1.0.0')
+        cache.put(key, image.package(), image.metadata_json())
+        
+        package, metadata_json, hit = cache.build(firmware_data, '1.0.0')
+        assert not hit
+        assert metadata_json['sha256'] == hashlib.sha256(firmware_data).hexdigest()
+        assert firmware_image.check_package(package)['valid']
+        assert cache.get(key, firmware_data) is not None  # Entrée remplacée
+    
+    def test_json_mismatch_removed(self, cache, firmware_data):
+        """Test qu'un JSON qui ne correspond pas au package est un miss"""
+        cache.build(firmware_data, '1.0.0')
+        key = cache.key(firmware_data, '1.0.0')
+        package, metadata_json = cache.get(key)
+        cache.put(key, package, dict(metadata_json, sha256='00' * 32))
+        
+        assert cache.get(key, firmware_data) is None
+        assert cache.get(key) is None  # Supprimée
+    
+    @pytest.mark.parametrize('offset', [100, firmware_image.SIGNATURE_OFFSET + 1,
+                                        firmware_image.REFERENCE_HASH_OFFSET + 40])
+    def test_tampered_package_removed(self, cache, firmware_data, offset):
+        """Test: firmware, signature ou Reference Hash modifié dans l'entrée → miss"""
+        package, _, _ = cache.build(firmware_data, '1.0.0')
+        key = cache.key(firmware_data, '1.0.0')
+        package_path, _ = cache._paths(key)
+        tampered = bytearray(package)
+        tampered[offset] ^= 0xFF
+        package_path.write_bytes(tampered)
+        
+        rebuilt, _, hit = cache.build(firmware_data, '1.0.0')
+        assert not hit
+        assert rebuilt[:len(firmware_data)] == firmware_data
+        assert firmware_image.check_package(rebuilt)['valid']
+    
+    @pytest.mark.usefixtures('ed25519_signing')
+    def test_ed25519_hit_verified_with_public_key(self, cache, firmware_data):
+        """Test: signature Ed25519 d'une entrée vérifiée avec la clé publique"""
+        seed = bytes(range(32))
+        cache.build(firmware_data, '1.0.0', signing_key=seed)
+        assert cache.build(firmware_data, '1.0.0', signing_key=seed)[2]
+        
+        key = cache.key(firmware_data, '1.0.0',
+                        public_key=signature_backend.signing_key(seed).public_key)
+        package_path, _ = cache._paths(key)
+        forged = bytearray(package_path.read_bytes())
+        forged[firmware_image.SIGNATURE_OFFSET] ^= 0x01
+        package_path.write_bytes(forged)
+        
+        assert not cache.build(firmware_data, '1.0.0', signing_key=seed)[2]
+    
+    def test_compressed_and_sparse_hits_checked(self, cache, firmware_data):
+        """Test: métadonnées lues dans les packages compressés et sparse"""
+        for options in ({'compressed': True}, {'sparse': True}):
+            cache.build(firmware_data, '1.0.0', **options)
+            assert cache.build(firmware_data, '1.0.0', **options)[2]
+    
+    def test_sign_file_writes_sidecars(self, cache, firmware_data, tmp_path):
+        """Test que sign_file produit les mêmes fichiers qu'une signature directe"""
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware_data)
+        output = tmp_path / 'firmware_signed.bin'
+        
+        assert not cache.sign_file(str(firmware_path), str(output), '1.0.0')
+        first = output.read_bytes()
+        
+        output.unlink()
+        assert cache.sign_file(str(firmware_path), str(output), '1.0.0')
+        assert output.read_bytes() == first
+        
+        json_path, hash_path = firmware_image.sidecar_paths(str(output))
+        assert os.path.exists(json_path) and os.path.exists(hash_path)
+
+
+@pytest.mark.unit
+class TestEviction:
+    """Tests de l'éviction par âge et par taille (LRU)"""
+    
+    def _fill(self, cache, count):
+        keys = []
+        for i in range(count):
+            data = bytes([i]) * 1000
+            cache.build(data, '1.0.0')
+            keys.append(cache.key(data, '1.0.0'))
+        return keys
+    
+    def _age(self, cache, key, seconds):
+        stamp = time.time() - seconds
+        for path in cache._paths(key):
+            os.utime(path, (stamp, stamp))
+    
+    def test_prune_by_age(self, cache):
+        """Test que les entrées sans hit depuis max_age sont supprimées"""
+        keys = self._fill(cache, 3)
+        self._age(cache, keys[0], cache.max_age + 60)
+        
+        assert cache.prune() == 1
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[1]) is not None
+    
+    def test_prune_lru_by_size(self, cache):
+        """Test que les entrées les moins récemment utilisées partent en premier"""
+        keys = self._fill(cache, 4)
+        for age, key in zip((40, 30, 20, 10), keys):
+            self._age(cache, key, age)
+        
+        cache.get(keys[0])  # Hit: keys[0] devient la plus récente
+        entry_size = cache.size() // 4
+        cache.max_bytes = 2 * entry_size
+        
+        assert cache.prune() == 2
+        remaining = {key for _, _, key in cache.entries()}
+        assert remaining == {keys[0], keys[3]}
+    
+    def test_clear(self, cache):
+        """Test de la remise à zéro du cache"""
+        self._fill(cache, 2)
+        cache.clear()
+        assert cache.entries() == []
+
+
+@pytest.mark.unit
+class TestCacheCli:
+    """Tests des options --cache-dir / --no-cache"""
+    
+    def test_cli_cache_hit(self, tmp_path, firmware_data, capsys, monkeypatch):
+        """Test qu'un second appel CLI sert le package depuis le cache"""
+        monkeypatch.delenv(CACHE_ENV_VAR, raising=False)
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware_data)
+        output = tmp_path / 'firmware_signed.bin'
+        args = [str(firmware_path), '-o', str(output), '--cache-dir', str(tmp_path / 'cache')]
+        
+        assert firmware_signer.main(args) == 0
+        first = output.read_bytes()
+        assert 'cache hit' not in capsys.readouterr().out
+        
+        assert firmware_signer.main(args) == 0
+        assert 'cache hit' in capsys.readouterr().out
+        assert output.read_bytes() == first
+        
+        assert firmware_signer.main(args + ['--no-cache']) == 0
+        assert 'cache hit' not in capsys.readouterr().out
+    
+    def test_batch_uses_cache(self, tmp_path, firmware_data):
+        """Test que le mode --batch rapporte les hits du cache"""
+        (tmp_path / 'a.bin').write_bytes(firmware_data)
+        entries = [{'input': str(tmp_path / 'a.bin'), 'output': str(tmp_path / f'a{i}_signed.bin'),
+                    'version': '1.0.0'} for i in range(2)]
+        
+        results = firmware_signer.sign_batch(entries, jobs=1, cache_dir=str(tmp_path / 'cache'))
+        
+        assert [r['cache'] for r in results] == ['miss', 'hit']
+        assert (tmp_path / 'a0_signed.bin').read_bytes() == (tmp_path / 'a1_signed.bin').read_bytes()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,188 @@
+"""
+Tests Unitaires - Packages sparse (tools/sparse_image.py)
+Table de segments sans bourrage 0xFF et expansion vers le package plat
+"""
+
+import os
+import struct
+
+import pytest
+
+import firmware_image
+import firmware_signer
+import flash_planner
+import sparse_image
+from sparse_image import SparseError
+
+
+@pytest.fixture
+def firmware():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(16 * 1024)
+
+
+@pytest.fixture
+def flat(firmware):
+    return firmware_image.FirmwareImage(firmware, "1.0.0", 1700000000).package()
+
+
+@pytest.mark.unit
+class TestSegments:
+    """Tests de la découpe en segments"""
+    
+    def test_padding_dropped(self, firmware, flat):
+        """Test: firmware + bloc metadata/signature, le bourrage disparaît"""
+        segments = sparse_image.find_segments(flat)
+        
+        assert len(segments) == 2
+        assert segments[0][0] == 0
+        assert segments[0][1] >= len(firmware)
+        assert segments[1] == (firmware_image.METADATA_OFFSET,
+                               firmware_image.PACKAGE_SIZE - firmware_image.METADATA_OFFSET)
+    
+    def test_short_runs_kept(self):
+        """Test: une courte suite de 0xFF reste dans le segment"""
+        image = b'\x01' * 64 + b'\xFF' * 8 + b'\x02' * 64
+        assert sparse_image.find_segments(image) == [(0, len(image))]
+    
+    def test_gap_bounds_aligned(self):
+        """Test: bornes des trous alignées sur 4 bytes"""
+        image = b'\x01' * 5 + b'\xFF' * 100 + b'\x02' * 7
+        for offset, length in sparse_image.find_segments(image):
+            assert offset % 4 == 0
+    
+    def test_all_erased(self):
+        """Test: image entièrement effacée → aucun segment"""
+        image = b'\xFF' * 4096
+        sparse = sparse_image.create_sparse(image)
+        
+        assert sparse_image.parse_sparse(sparse)[0].count == 0
+        assert sparse_image.expand_sparse(sparse) == image
+    
+    @pytest.mark.parametrize('image', [b'', b'\x00', b'\xFF' * 40 + b'\x00', b'\x00' + b'\xFF' * 40])
+    def test_roundtrip_edges(self, image):
+        """Test: bords (vide, trou au début / à la fin)"""
+        assert sparse_image.expand_sparse(sparse_image.create_sparse(image)) == image
+
+
+@pytest.mark.unit
+class TestSparseContainer:
+    """Tests du conteneur sparse"""
+    
+    def test_roundtrip(self, flat):
+        """Test: l'expansion redonne exactement le package plat"""
+        sparse = sparse_image.create_sparse(flat)
+        
+        assert len(sparse) < len(flat) // 2
+        assert sparse_image.expand_sparse(sparse) == flat
+    
+    def test_corrupted_data(self, flat):
+        """Test: données corrompues détectées par le SHA-256 final"""
+        sparse = bytearray(sparse_image.create_sparse(flat))
+        sparse[200] ^= 0x01
+        
+        with pytest.raises(SparseError, match='SHA-256'):
+            sparse_image.expand_sparse(bytes(sparse))
+    
+    def test_truncated(self, flat):
+        """Test: image sparse tronquée refusée"""
+        sparse = sparse_image.create_sparse(flat)
+        with pytest.raises(SparseError):
+            sparse_image.expand_sparse(sparse[:len(sparse) // 2])
+    
+    def test_overlapping_segments(self):
+        """Test: segments qui se chevauchent refusés"""
+        body = struct.pack(sparse_image.SPARSE_HEADER, sparse_image.SPARSE_MAGIC, 1, 2, 16)
+        body += struct.pack('<II', 0, 8) + struct.pack('<II', 4, 4) + b'\x00' * 12
+        
+        with pytest.raises(SparseError, match='invalid segment 1'):
+            sparse_image.parse_sparse(body + b'\x00' * 32)
+
+    
+    def test_oversized_image_rejected(self):
+        """Test: image_size au-delà de la zone applicative refusée avant allocation"""
+        body = struct.pack(sparse_image.SPARSE_HEADER, sparse_image.SPARSE_MAGIC, 1, 0, 0xFFFFFFFF)
+        
+        with pytest.raises(SparseError, match='image too large'):
+            sparse_image.expand_sparse(body + b'\x00' * 32)
+        with pytest.raises(SparseError, match='image too large'):
+            sparse_image.create_sparse(bytes(sparse_image.SPARSE_MAX_IMAGE_SIZE + 1))
+    
+    def test_segment_past_image_rejected(self):
+        """Test: segment qui déborde de image_size refusé"""
+        body = struct.pack(sparse_image.SPARSE_HEADER, sparse_image.SPARSE_MAGIC, 1, 1, 16)
+        body += struct.pack('<II', 12, 8) + b'\x00' * 8
+        
+        with pytest.raises(SparseError, match='invalid segment 0'):
+            sparse_image.parse_sparse(body + b'\x00' * 32)
+
+@pytest.mark.unit
+class TestSparsePackage:
+    """Tests du package sparse signé (firmware_signer --sparse)"""
+    
+    def test_check_package(self, firmware):
+        """Test: package sparse vérifié sur son image plate"""
+        package, metadata_json = firmware_image.build_package(firmware, "1.0.0", sparse=True)
+        
+        assert firmware_image.is_sparse_package(package)
+        assert metadata_json['total_size'] == len(package)
+        assert metadata_json['sparse']['image_size'] == firmware_image.PACKAGE_SIZE
+        
+        result = firmware_image.check_package(package)
+        assert result['valid'], result['error']
+        assert result['sparse']
+    
+    def test_sparse_with_page_hashes(self, firmware):
+        """Test: la table de hash par page suit le package"""
+        image = firmware_image.FirmwareImage(firmware, "1.0.0", page_hashes=True, sparse=True)
+        flat = firmware_image.expand_package(image.package())
+        
+        assert firmware_image.check_package(flat)['pages'] == 17
+    
+    def test_corrupted_sparse_package(self, firmware):
+        """Test: package sparse corrompu refusé"""
+        package, _ = firmware_image.build_package(firmware, "1.0.0", sparse=True)
+        package = bytearray(package)
+        package[100] ^= 0x01
+        
+        result = firmware_image.check_package(bytes(package))
+        assert not result['valid']
+        assert result['checks']['package'] == 'fail'
+        assert 'SPARSE EXPANSION FAILED' in result['error']
+    
+    def test_signed_firmware_reads_sparse(self, firmware):
+        """Test: SignedFirmware lit un package sparse comme le package plat"""
+        package, _ = firmware_image.build_package(firmware, "1.2.3", sparse=True)
+        
+        signed = firmware_image.SignedFirmware.from_bytes(package)
+        assert signed.version == "1.2.3"
+        assert bytes(signed.firmware) == firmware
+        assert signed.verify()['sparse']
+    
+    def test_compressed_and_sparse_exclusive(self, firmware):
+        """Test: --compress et --sparse ne se combinent pas"""
+        with pytest.raises(ValueError):
+            firmware_image.FirmwareImage(firmware, compressed=True, sparse=True)
+    
+    def test_cli_sparse_and_expand(self, firmware, tmp_path):
+        """Test: --sparse, --verify puis expand"""
+        firmware_path = tmp_path / 'firmware.bin'
+        firmware_path.write_bytes(firmware)
+        sparse_path = tmp_path / 'firmware_signed.sparse.bin'
+        flat_path = tmp_path / 'firmware_signed.bin'
+        
+        assert firmware_signer.main([str(firmware_path), '-o', str(sparse_path), '--sparse']) == 0
+        assert firmware_signer.main(['--verify', str(sparse_path)]) == 0
+        assert firmware_signer.main(['expand', str(sparse_path), '-o', str(flat_path)]) == 0
+        
+        assert len(sparse_path.read_bytes()) < len(firmware) + 1024
+        assert len(flat_path.read_bytes()) == firmware_image.PACKAGE_SIZE
+    
+    def test_planner_skips_erased_pages(self, flat):
+        """Test: flash effacée → ni le bourrage ni les pages 0xFF ne sont écrits"""
+        writes = flash_planner.plan_flash(flat, erased=True)
+        
+        assert sum(write.page_count for write in writes) == 17 + 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
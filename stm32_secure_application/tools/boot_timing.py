@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+BOOT TIMING - Modèle du temps reset → READY par profil de boot
+============================================================================
+
+Estime, sans carte, la trace de boot (tools/boot_trace.py) qu'enregistrerait
+le device pour un firmware donné:
+
+    - délais bloquants (HAL_Delay, LED_Blink) de include/boot_trace.h, selon le
+      profil de compilation (-DBOOT_PROFILE) du bootloader et de
+      l'application; le bootloader diagnostic saute aussi son blink de
+      confirmation si l'application est signée en production (reserved[41])
+    - CRC32 et SHA-256 de Verify_Firmware, proportionnels à la taille du
+      firmware, selon le mode CRC (reserved[3])
+    - étapes d'init fixes (HAL, horloge, périphériques)
+
+Le résultat est une BootTrace: mêmes stage_timings / check_budgets que
+pour une trace relue sur le device. BOOT_BUDGET_MS est le budget SLA du
+profil production (firmware de taille maximale, unité CRC matérielle).
+
+Usage:
+    python3 tools/boot_timing.py --size 49152 --crc-mode stm32 --profile production
+    python3 tools/boot_timing.py firmware_signed.bin --budget 300
+============================================================================
+"""
+
+import argparse
+import re
+import sys
+
+from boot_trace import (
+    BOOT_TRACE_VERSION, DEFAULT_CLOCK_HZ, STAGES, BootStamp, BootTrace, check_budgets,
+    stage_timings, total_ms,
+)
+from firmware_image import (
+    BOOT_PROFILE_DIAGNOSTIC, BOOT_PROFILE_NAMES, BOOT_PROFILE_PRODUCTION, CRC_MODE_IEEE,
+    CRC_MODE_NAMES, CRC_MODE_STM32, MAX_FIRMWARE_SIZE, SignedFirmware, parse_reserved,
+)
+
+__all__ = [
+    'BOOT_BUDGET_MS', 'HAL_DELAY_EXTRA_MS', 'BOOTLOADER_DELAYS_MS', 'APPLICATION_DELAYS_MS',
+    'STAGE_CYCLES', 'CRC_CYCLES_PER_BYTE', 'SHA256_CYCLES_PER_BYTE',
+    'DELAY_CONSTANTS', 'boot_model', 'header_delays',
+]
+
+# ============================================================================
+# MODÈLE (Cortex-M3 sur HSI 8 MHz, flash sans wait state)
+# ============================================================================
+
+# Reset → READY, profil production, firmware de MAX_FIRMWARE_SIZE, CRC matériel
+BOOT_BUDGET_MS = 300
+
+# HAL_Delay(n) attend n + 1 ticks (durée minimale garantie, stm32f1xx_hal.c)
+HAL_DELAY_EXTRA_MS = 1
+
+# Délais bloquants par étape (fin de l'étape = boot_trace_stamp), vérifiés
+# contre les constantes de include/boot_trace.h par header_delays()
+BOOTLOADER_DELAYS_MS = {
+    BOOT_PROFILE_DIAGNOSTIC: {'splash': 905, 'ok_blink': 1206},
+    BOOT_PROFILE_PRODUCTION: {},
+}
+APPLICATION_DELAYS_MS = {
+    BOOT_PROFILE_DIAGNOSTIC: {'app_blink': 606},
+    BOOT_PROFILE_PRODUCTION: {},
+}
+
+# Étapes sans délai ni calcul proportionnel à la taille (cycles CYCCNT)
+STAGE_CYCLES = {
+    'reset': 0,
+    'hal_init': 9_600,
+    'clock_gpio': 2_400,
+    'splash': 0,
+    'checks': 80,
+    'ok_blink': 0,
+    'jump': 240,
+    'app_entry': 60,
+    'app_reinit': 320,
+    'app_init': 14_000,
+    'app_blink': 0,
+    'app_ready': 1_800,  # "READY\r\n" sur l'UART
+}
+
+# Calculate_CRC32: 8 décalages par byte; Calculate_CRC32_HW: un mot par écriture DR
+CRC_CYCLES_PER_BYTE = {
+    CRC_MODE_IEEE: 50,
+    CRC_MODE_STM32: 2,
+}
+SHA256_CYCLES_PER_BYTE = 40
+
+
+def boot_model(firmware_size=MAX_FIRMWARE_SIZE, bootloader_profile=BOOT_PROFILE_DIAGNOSTIC,
+               app_profile=BOOT_PROFILE_DIAGNOSTIC, crc_mode=CRC_MODE_IEEE,
+               clock_hz=DEFAULT_CLOCK_HZ):
+    """
+    Trace de boot estimée (BootTrace, une marque par étape)
+    
+    app_profile est à la fois le profil de compilation de l'application et
+    celui enregistré dans ses métadonnées (reserved[41]).
+    """
+    if crc_mode not in CRC_CYCLES_PER_BYTE:
+        raise ValueError(f"unknown CRC mode: {crc_mode}")
+    
+    delays = dict(BOOTLOADER_DELAYS_MS[bootloader_profile])
+    if app_profile == BOOT_PROFILE_PRODUCTION:
+        delays.pop('ok_blink', None)
+    delays.update(APPLICATION_DELAYS_MS[app_profile])
+    
+    stage_cycles = dict(STAGE_CYCLES)
+    stage_cycles['crc32'] = firmware_size * CRC_CYCLES_PER_BYTE[crc_mode]
+    stage_cycles['sha256'] = firmware_size * SHA256_CYCLES_PER_BYTE
+    
+    stamps = []
+    cycles = 0
+    for stage, name in STAGES.items():
+        cycles += stage_cycles[name] + delays.get(name, 0) * clock_hz // 1000
+        stamps.append(BootStamp(stage, cycles))
+    
+    return BootTrace(BOOT_TRACE_VERSION, clock_hz, stamps)
+
+# ============================================================================
+# DÉLAIS DE include/boot_trace.h
+# ============================================================================
+
+# Constantes du profil diagnostic lues par header_delays()
+DELAY_CONSTANTS = (
+    'BOOT_SPLASH_ON_MS', 'BOOT_SPLASH_BLINKS', 'BOOT_SPLASH_BLINK_MS', 'BOOT_SPLASH_PAUSE_MS',
+    'BOOT_OK_BLINKS', 'BOOT_OK_BLINK_MS', 'BOOT_OK_PAUSE_MS',
+    'APP_BLINKS', 'APP_BLINK_MS',
+)
+
+
+def _hal_delay_ms(ms):
+    return ms + HAL_DELAY_EXTRA_MS
+
+
+def _led_blink_ms(count, on_ms, off_ms):
+    # LED_Blink: pas de HAL_Delay(off_ms) après le dernier blink
+    return count * _hal_delay_ms(on_ms) + max(count - 1, 0) * _hal_delay_ms(off_ms)
+
+
+def header_delays(header_source):
+    """
+    Délais bloquants (ms) du profil diagnostic, par étape
+    
+    header_source: texte de include/boot_trace.h. Les main.c appellent
+    HAL_Delay / LED_Blink avec ces constantes; ValueError si l'une d'elles
+    manque (renommée, valeur non décimale).
+    """
+    values = {name: int(value) for name, value in
+              re.findall(r'^#define\s+(\w+)\s+(\d+)\b', header_source, re.MULTILINE)}
+    missing = [name for name in DELAY_CONSTANTS if name not in values]
+    if missing:
+        raise ValueError(f"boot_trace.h: missing delay constants: {', '.join(missing)}")
+    
+    blink = values['BOOT_SPLASH_BLINK_MS']
+    splash = (_hal_delay_ms(values['BOOT_SPLASH_ON_MS'])
+              + _led_blink_ms(values['BOOT_SPLASH_BLINKS'], blink, blink)
+              + _hal_delay_ms(values['BOOT_SPLASH_PAUSE_MS']))
+    
+    blink = values['BOOT_OK_BLINK_MS']
+    ok_blink = (_led_blink_ms(values['BOOT_OK_BLINKS'], blink, blink)
+                + _hal_delay_ms(values['BOOT_OK_PAUSE_MS']))
+    
+    # Boucle de l'application: LED allumée puis éteinte, HAL_Delay à chaque fois
+    app_blink = values['APP_BLINKS'] * 2 * _hal_delay_ms(values['APP_BLINK_MS'])
+    
+    return {'splash': splash, 'ok_blink': ok_blink, 'app_blink': app_blink}
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    profiles = {name: profile for profile, name in BOOT_PROFILE_NAMES.items()}
+    crc_modes = {name: mode for mode, name in CRC_MODE_NAMES.items()}
+    
+    parser = argparse.ArgumentParser(
+        description='Estimate the reset-to-READY boot time for a boot profile and firmware size'
+    )
+    
+    parser.add_argument(
+        'package',
+        nargs='?',
+        help='Signed package: size, CRC mode and boot profile read from its metadata'
+    )
+    
+    parser.add_argument(
+        '--size',
+        type=int,
+        default=MAX_FIRMWARE_SIZE,
+        help=f'Firmware size in bytes (default: {MAX_FIRMWARE_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--crc-mode',
+        choices=list(crc_modes),
+        default=CRC_MODE_NAMES[CRC_MODE_STM32],
+        help='Metadata CRC32 checked by the bootloader (default: stm32)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        choices=list(profiles),
+        default=BOOT_PROFILE_NAMES[BOOT_PROFILE_PRODUCTION],
+        help='Application boot profile (default: production)'
+    )
+    
+    parser.add_argument(
+        '--bootloader-profile',
+        choices=list(profiles),
+        default=None,
+        help='Bootloader boot profile (default: same as --profile)'
+    )
+    
+    parser.add_argument(
+        '--clock',
+        type=int,
+        default=DEFAULT_CLOCK_HZ,
+        help=f'Core clock in Hz (default: {DEFAULT_CLOCK_HZ})'
+    )
+    
+    parser.add_argument(
+        '--budget',
+        type=float,
+        default=None,
+        metavar='MS',
+        help=f'Fail if reset-to-READY exceeds MS milliseconds (SLA: {BOOT_BUDGET_MS} ms in production)'
+    )
+    
+    args = parser.parse_args(argv)
+    size, crc_mode, app_profile = args.size, crc_modes[args.crc_mode], profiles[args.profile]
+    
+    if args.package:
+        try:
+            with SignedFirmware.open(args.package) as signed:
+                metadata = signed.metadata
+                if metadata is None:
+                    raise ValueError("truncated package")
+                reserved = parse_reserved(metadata.reserved)
+                size, crc_mode, app_profile = metadata.size, reserved.crc_mode, reserved.boot_profile
+        except (OSError, ValueError) as e:
+            print(f"[!] {e}")
+            return 1
+        if crc_mode not in CRC_MODE_NAMES or app_profile not in BOOT_PROFILE_NAMES:
+            print(f"[!] Unsupported metadata (crc_mode {crc_mode}, boot_profile {app_profile})")
+            return 1
+    
+    bootloader_profile = profiles[args.bootloader_profile] if args.bootloader_profile else app_profile
+    timings = stage_timings(boot_model(size, bootloader_profile, app_profile, crc_mode, args.clock))
+    
+    print(f"[+] Boot model: {size} bytes, CRC {CRC_MODE_NAMES[crc_mode]}, "
+          f"bootloader {BOOT_PROFILE_NAMES[bootloader_profile]}, "
+          f"application {BOOT_PROFILE_NAMES[app_profile]} @ {args.clock / 1e6:g} MHz")
+    for timing in timings:
+        print(f"    {timing.name:<11} {timing.start_ms:>9.2f} {timing.ms:>9.2f}")
+    print(f"    {'total':<11} {'':>9} {total_ms(timings):>9.2f}")
+    
+    if args.budget is not None:
+        for name, ms, budget in check_budgets(timings, {'total': args.budget}):
+            print(f"[!] Budget exceeded: {name} {ms:.2f} ms > {budget:g} ms")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
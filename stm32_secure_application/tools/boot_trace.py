@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+BOOT TRACE - Décodage de la mailbox DWT CYCCNT (include/boot_trace.h)
+============================================================================
+
+Le bootloader puis l'application horodatent la fin de chaque étape du boot
+(DWT->CYCCNT) dans une mailbox de 128 bytes en RAM .noinit (0x20000000).
+Ce décodeur transforme une relecture de cette mailbox en latence par étape:
+
+    - dump RAM:     st-flash read ram.bin 0x20000000 128
+                    (ou toute la RAM: --base 0x20000000 est le défaut)
+    - rapport UART: réponse "TRACE:<hex>" à la commande TRACE de l'application
+
+Des budgets (--budget sha256=40 --budget total=2000, en ms) rendent la
+sortie utilisable en CI: code de retour 1 si un budget est dépassé.
+
+Usage:
+    python3 tools/boot_trace.py ram.bin
+    python3 tools/boot_trace.py uart.log --uart --budget total=2500 -o trace.json
+============================================================================
+"""
+
+import argparse
+import json
+import re
+import struct
+import sys
+from collections import namedtuple
+
+__all__ = [
+    'BOOT_TRACE_ADDR', 'BOOT_TRACE_MAGIC', 'BOOT_TRACE_VERSION', 'BOOT_TRACE_MAX',
+    'BOOT_TRACE_SIZE', 'RAM_ORIGIN', 'DEFAULT_CLOCK_HZ', 'STAGES',
+    'BootTraceError', 'BootStamp', 'BootTrace', 'StageTiming',
+    'encode_trace', 'parse_trace', 'trace_from_dump', 'trace_from_uart',
+    'stage_timings', 'total_ms', 'check_budgets',
+]
+
+# ============================================================================
+# CONSTANTES (include/boot_trace.h)
+# ============================================================================
+
+BOOT_TRACE_ADDR = 0x20000000  # Région NOINIT des linker scripts
+BOOT_TRACE_MAGIC = 0x43525442  # "BTRC"
+BOOT_TRACE_VERSION = 1
+BOOT_TRACE_MAX = 14
+
+RAM_ORIGIN = 0x20000000
+DEFAULT_CLOCK_HZ = 8_000_000  # HSI, sans PLL (SystemClock_Config)
+
+HEADER_FORMAT = '<I H H I I'  # magic, version, count, clock_hz, reserved
+STAMP_FORMAT = '<I I'  # cycles, stage
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+STAMP_SIZE = struct.calcsize(STAMP_FORMAT)
+BOOT_TRACE_SIZE = HEADER_SIZE + BOOT_TRACE_MAX * STAMP_SIZE  # 128
+
+CYCCNT_MASK = 0xFFFFFFFF  # Compteur 32 bits: repasse à 0 après ~9 min à 8 MHz
+
+# BootStage_t → nom (chaque marque = fin de l'étape)
+STAGES = {
+    0: 'reset',
+    1: 'hal_init',
+    2: 'clock_gpio',
+    3: 'splash',
+    4: 'checks',
+    5: 'crc32',
+    6: 'sha256',
+    7: 'ok_blink',
+    8: 'jump',
+    16: 'app_entry',
+    17: 'app_reinit',
+    18: 'app_init',
+    19: 'app_blink',
+    20: 'app_ready',
+}
+
+_UART_LINE = re.compile(r'TRACE:(?P<hex>[0-9A-Fa-f]+)')
+
+
+class BootTraceError(ValueError):
+    """Mailbox absente, corrompue ou d'une version inconnue"""
+
+
+BootStamp = namedtuple('BootStamp', ['stage', 'cycles'])
+BootTrace = namedtuple('BootTrace', ['version', 'clock_hz', 'stamps'])
+
+# Durée d'une étape: depuis la marque précédente jusqu'à la sienne
+StageTiming = namedtuple('StageTiming', ['stage', 'name', 'cycles', 'start_ms', 'ms'])
+
+# ============================================================================
+# ENCODAGE / DÉCODAGE
+# ============================================================================
+
+def encode_trace(stamps, clock_hz=DEFAULT_CLOCK_HZ):
+    """
+    Mailbox BootTrace_t de 128 bytes (dumps synthétiques pour les tests)
+    
+    stamps: [(stage, cycles), ...] dans l'ordre d'écriture
+    """
+    if len(stamps) > BOOT_TRACE_MAX:
+        raise BootTraceError(f"too many stamps: {len(stamps)} > {BOOT_TRACE_MAX}")
+    
+    trace = bytearray(BOOT_TRACE_SIZE)
+    struct.pack_into(HEADER_FORMAT, trace, 0, BOOT_TRACE_MAGIC, BOOT_TRACE_VERSION,
+                     len(stamps), clock_hz, 0)
+    for index, (stage, cycles) in enumerate(stamps):
+        struct.pack_into(STAMP_FORMAT, trace, HEADER_SIZE + index * STAMP_SIZE,
+                         cycles & CYCCNT_MASK, stage)
+    return bytes(trace)
+
+
+def parse_trace(data, offset=0):
+    """Mailbox (bytes / memoryview) → BootTrace"""
+    if len(data) - offset < BOOT_TRACE_SIZE:
+        raise BootTraceError(f"dump too short: {len(data) - offset} < {BOOT_TRACE_SIZE} bytes")
+    
+    magic, version, count, clock_hz, _ = struct.unpack_from(HEADER_FORMAT, data, offset)
+    if magic != BOOT_TRACE_MAGIC:
+        raise BootTraceError(f"no boot trace (magic 0x{magic:08X})")
+    if version != BOOT_TRACE_VERSION:
+        raise BootTraceError(f"unsupported boot trace version: {version}")
+    if count > BOOT_TRACE_MAX:
+        raise BootTraceError(f"corrupted stamp count: {count}")
+    
+    stamps = [BootStamp(stage, cycles) for cycles, stage in struct.iter_unpack(
+        STAMP_FORMAT, data[offset + HEADER_SIZE:offset + HEADER_SIZE + count * STAMP_SIZE])]
+    return BootTrace(version, clock_hz, stamps)
+
+
+def trace_from_dump(dump, base=RAM_ORIGIN):
+    """Relecture RAM commençant à l'adresse `base` → BootTrace"""
+    offset = BOOT_TRACE_ADDR - base
+    if offset < 0:
+        raise BootTraceError(f"dump starts after the mailbox (base 0x{base:08X})")
+    return parse_trace(dump, offset)
+
+
+def trace_from_uart(text):
+    """Sortie série contenant une ligne "TRACE:<hex>" (la dernière l'emporte)"""
+    matches = _UART_LINE.findall(text)
+    if not matches:
+        raise BootTraceError("no TRACE: line in the UART report")
+    return parse_trace(bytes.fromhex(matches[-1]))
+
+# ============================================================================
+# ANALYSE
+# ============================================================================
+
+def stage_timings(trace, clock_hz=None):
+    """
+    BootTrace → [StageTiming] (une entrée par marque)
+    
+    La marque BOOT_STAGE_RESET sert d'origine; le passage à zéro de CYCCNT
+    est absorbé par l'arithmétique modulo 2^32. `clock_hz` remplace
+    l'horloge enregistrée (0 si la trace n'a jamais été horodatée).
+    """
+    clock_hz = clock_hz or trace.clock_hz or DEFAULT_CLOCK_HZ
+    timings = []
+    elapsed = 0
+    previous = trace.stamps[0].cycles if trace.stamps else 0
+    
+    for stamp in trace.stamps:
+        cycles = (stamp.cycles - previous) & CYCCNT_MASK
+        timings.append(StageTiming(stamp.stage, STAGES.get(stamp.stage, f'stage_{stamp.stage}'),
+                                   cycles, elapsed * 1000 / clock_hz, cycles * 1000 / clock_hz))
+        elapsed += cycles
+        previous = stamp.cycles
+    
+    return timings
+
+
+def total_ms(timings):
+    return sum(timing.ms for timing in timings)
+
+
+def check_budgets(timings, budgets):
+    """
+    Budgets {étape ou 'total': ms max} → [(nom, ms mesurées, budget)] dépassés
+    
+    Une étape budgétée absente de la trace compte comme un dépassement
+    (le boot s'est arrêté avant, ou l'instrumentation a disparu).
+    """
+    measured = {timing.name: timing.ms for timing in timings}
+    measured['total'] = total_ms(timings)
+    
+    exceeded = []
+    for name, budget in budgets.items():
+        ms = measured.get(name)
+        if ms is None or ms > budget:
+            exceeded.append((name, ms, budget))
+    return exceeded
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _budget(text):
+    name, _, ms = text.partition('=')
+    if not name or not ms:
+        raise argparse.ArgumentTypeError(f"expected STAGE=MS, got {text!r}")
+    return name, float(ms)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Decode the boot trace mailbox (DWT cycle stamps) into per-stage latency'
+    )
+    
+    parser.add_argument(
+        'input',
+        help='RAM dump (.bin) or, with --uart, a serial log holding the TRACE: line'
+    )
+    
+    parser.add_argument(
+        '--uart',
+        action='store_true',
+        help='Input is the UART report of the TRACE command'
+    )
+    
+    parser.add_argument(
+        '--base',
+        type=lambda value: int(value, 0),
+        default=RAM_ORIGIN,
+        help=f'Address of the first byte of the RAM dump (default: 0x{RAM_ORIGIN:08X})'
+    )
+    
+    parser.add_argument(
+        '--clock',
+        type=int,
+        default=None,
+        help='Core clock in Hz (default: value recorded by the device)'
+    )
+    
+    parser.add_argument(
+        '--budget',
+        type=_budget,
+        action='append',
+        default=[],
+        metavar='STAGE=MS',
+        help='Fail if a stage (or "total") takes longer than MS milliseconds (repeatable)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the breakdown to a JSON file'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        if args.uart:
+            with open(args.input, errors='replace') as f:
+                trace = trace_from_uart(f.read())
+        else:
+            with open(args.input, 'rb') as f:
+                trace = trace_from_dump(f.read(), args.base)
+    except (OSError, BootTraceError) as e:
+        print(f"[!] {e}")
+        return 1
+    
+    timings = stage_timings(trace, args.clock)
+    total = total_ms(timings)
+    
+    print(f"[+] Boot trace: {len(timings)} stamp(s) @ {(args.clock or trace.clock_hz) / 1e6:g} MHz")
+    print(f"    {'stage':<11} {'start ms':>9} {'ms':>9} {'cycles':>10}")
+    for timing in timings:
+        print(f"    {timing.name:<11} {timing.start_ms:>9.2f} {timing.ms:>9.2f} {timing.cycles:>10}")
+    print(f"    {'total':<11} {'':>9} {total:>9.2f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'clock_hz': args.clock or trace.clock_hz,
+                'total_ms': total,
+                'stages': [timing._asdict() for timing in timings],
+            }, f, indent=4)
+        print(f"[+] Breakdown saved: {args.output}")
+    
+    exceeded = check_budgets(timings, dict(args.budget))
+    for name, ms, budget in exceeded:
+        measured = 'missing' if ms is None else f"{ms:.2f} ms"
+        print(f"[!] Budget exceeded: {name} {measured} > {budget:g} ms")
+    
+    return 1 if exceeded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
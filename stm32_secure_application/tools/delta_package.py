@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+DELTA PACKAGE - Mise à jour par pages entre deux firmwares signés
+============================================================================
+
+Un package delta ne contient que les pages de flash (1KB) qui diffèrent
+entre le package signé installé (base) et le nouveau (cible). Le package
+est flashé à 0x08002000, aligné sur une page: chaque entrée du delta est
+donc exactement une page à effacer / reprogrammer.
+
+Format (little-endian):
+    [En-tête 84B]
+        magic 'FWDL' u32, format u16, page_size u16,
+        base_sha256[32], target_sha256[32],
+        base_size u32, target_size u32, count u16, (libre) u16
+    [count × (page_index u16, length u16, data[length])]
+    [SHA-256 de tout ce qui précède (32B)]
+
+L'applicateur de référence vérifie le SHA-256 du delta, celui de la base,
+reconstruit la cible puis vérifie son SHA-256 et le package signé
+(check_package) avant de la retourner.
+
+Le diff porte sur l'image flashée: un package compressé ou sparse (base
+ou cible) est d'abord développé en package plat (expand_package), et
+apply_delta retourne toujours le package plat.
+
+Usage:
+    delta = create_delta(old_package, new_package)
+    new_package = apply_delta(old_package, delta)
+============================================================================
+"""
+
+import hashlib
+import struct
+from collections import namedtuple
+
+from firmware_image import check_package, expand_package, is_compressed_package, is_sparse_package
+from page_hashes import FLASH_PAGE_SIZE, page_count
+
+__all__ = [
+    'DELTA_MAGIC', 'DELTA_FORMAT_VERSION', 'DELTA_HEADER', 'DELTA_HEADER_SIZE',
+    'DELTA_ENTRY', 'DELTA_ENTRY_SIZE', 'DeltaError', 'DeltaHeader',
+    'flash_image', 'diff_pages', 'create_delta', 'parse_delta', 'apply_delta',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+DELTA_MAGIC = 0x4C445746  # 'FWDL' (little-endian)
+DELTA_FORMAT_VERSION = 1
+DELTA_HEADER = '<I H H 32s 32s I I H 2x'
+DELTA_HEADER_SIZE = struct.calcsize(DELTA_HEADER)  # 84 bytes
+DELTA_ENTRY = '<H H'  # page_index, length
+DELTA_ENTRY_SIZE = struct.calcsize(DELTA_ENTRY)
+DELTA_DIGEST_SIZE = 32
+
+DeltaHeader = namedtuple(
+    'DeltaHeader',
+    ['magic', 'format', 'page_size', 'base_sha256', 'target_sha256',
+     'base_size', 'target_size', 'count'])
+
+
+class DeltaError(ValueError):
+    """Delta invalide, corrompu ou appliqué sur la mauvaise base"""
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+def flash_image(package):
+    """
+    Package tel qu'il est flashé à 0x08002000
+    
+    Un package compressé ou sparse est développé en package plat; un
+    package plat est retourné tel quel. Lève DeltaError si le conteneur
+    est tronqué ou invalide.
+    """
+    if not (is_compressed_package(package) or is_sparse_package(package)):
+        return package
+    
+    try:
+        return expand_package(package)
+    except ValueError as e:
+        raise DeltaError(f"cannot expand package to its flash image: {e}") from e
+
+
+def diff_pages(base, target, page_size=FLASH_PAGE_SIZE):
+    """
+    Index des pages de `target` qui diffèrent de `base`
+    
+    Les deux côtés sont comparés sur leur image flashée (flash_image).
+    Une page de la cible au-delà de la fin de la base est toujours
+    considérée comme modifiée.
+    """
+    base = memoryview(flash_image(base)).cast('B')
+    target = memoryview(flash_image(target)).cast('B')
+    
+    return [
+        index for index in range(page_count(len(target), page_size))
+        if base[index * page_size:(index + 1) * page_size]
+        != target[index * page_size:(index + 1) * page_size]
+    ]
+
+
+def create_delta(base, target, page_size=FLASH_PAGE_SIZE, public_key=None, mac_key=None):
+    """
+    Construit le delta base → cible (deux packages signés)
+    
+    La cible doit être un package signé valide: un delta ne doit jamais
+    produire une image que le bootloader refuserait. Une cible signée
+    Ed25519 / HMAC exige la clé correspondante (public_key / mac_key).
+    """
+    result = check_package(target, public_key, mac_key)
+    if not result['valid']:
+        raise DeltaError(f"target package is not valid: {result['error']}")
+    
+    base = flash_image(base)
+    target_view = memoryview(flash_image(target)).cast('B')
+    pages = diff_pages(base, target_view, page_size)
+    
+    parts = [struct.pack(
+        DELTA_HEADER, DELTA_MAGIC, DELTA_FORMAT_VERSION, page_size,
+        hashlib.sha256(base).digest(), hashlib.sha256(target_view).digest(),
+        len(base), len(target_view), len(pages))]
+    
+    for index in pages:
+        page = target_view[index * page_size:(index + 1) * page_size]
+        parts.append(struct.pack(DELTA_ENTRY, index, len(page)))
+        parts.append(bytes(page))
+    
+    body = b''.join(parts)
+    return body + hashlib.sha256(body).digest()
+
+# ============================================================================
+# APPLICATION (référence)
+# ============================================================================
+
+def parse_delta(delta):
+    """
+    Vérifie l'intégrité du delta et le découpe
+    
+    Retourne (DeltaHeader, [(page_index, memoryview des données)]).
+    """
+    delta = memoryview(delta).cast('B')
+    
+    if len(delta) < DELTA_HEADER_SIZE + DELTA_DIGEST_SIZE:
+        raise DeltaError(f"truncated delta: {len(delta)} bytes")
+    
+    body = delta[:-DELTA_DIGEST_SIZE]
+    if hashlib.sha256(body).digest() != delta[-DELTA_DIGEST_SIZE:]:
+        raise DeltaError("delta checksum mismatch")
+    
+    header = DeltaHeader(*struct.unpack_from(DELTA_HEADER, body))
+    if header.magic != DELTA_MAGIC:
+        raise DeltaError(f"invalid delta magic: 0x{header.magic:08X}")
+    if header.format != DELTA_FORMAT_VERSION:
+        raise DeltaError(f"unsupported delta format: {header.format}")
+    
+    entries = []
+    offset = DELTA_HEADER_SIZE
+    for _ in range(header.count):
+        if offset + DELTA_ENTRY_SIZE > len(body):
+            raise DeltaError("truncated delta entry")
+        
+        index, length = struct.unpack_from(DELTA_ENTRY, body, offset)
+        offset += DELTA_ENTRY_SIZE
+        start = index * header.page_size
+        
+        if (length > header.page_size or offset + length > len(body)
+                or start + length > header.target_size):
+            raise DeltaError(f"invalid delta entry for page {index}")
+        
+        entries.append((index, body[offset:offset + length]))
+        offset += length
+    
+    if offset != len(body):
+        raise DeltaError("trailing data in delta")
+    
+    return header, entries
+
+
+def apply_delta(base, delta, public_key=None, mac_key=None):
+    """
+    Reconstruit le package cible (plat) à partir de la base et du delta
+    
+    Lève DeltaError si le delta est corrompu, ne correspond pas à la base,
+    ou si la cible reconstruite n'est pas le package signé attendu
+    (signature Ed25519 / HMAC vérifiée avec public_key / mac_key).
+    """
+    header, entries = parse_delta(delta)
+    base = flash_image(base)
+    
+    if len(base) != header.base_size or hashlib.sha256(base).digest() != header.base_sha256:
+        raise DeltaError("base package does not match the delta")
+    
+    # Pages non couvertes par la base: flash effacée (0xFF)
+    target = bytearray(base[:header.target_size])
+    target.extend(b'\xFF' * (header.target_size - len(target)))
+    
+    for index, data in entries:
+        start = index * header.page_size
+        target[start:start + len(data)] = data
+    
+    if hashlib.sha256(target).digest() != header.target_sha256:
+        raise DeltaError("reconstructed package does not match target SHA-256")
+    
+    result = check_package(target, public_key, mac_key)
+    if not result['valid']:
+        raise DeltaError(f"reconstructed package is not valid: {result['error']}")
+    
+    return bytes(target)
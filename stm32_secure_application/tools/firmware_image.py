@@ -0,0 +1,1350 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FIRMWARE IMAGE - Bibliothèque de packaging / vérification du firmware STM32
+============================================================================
+
+API importable (sans print ni sous-process) utilisée par firmware_signer.py,
+post_build.py et les tests:
+
+    image = FirmwareImage.from_file('firmware.bin', version='1.2.0')
+    image.crc32, image.sha256            # calculés à la demande, une passe
+    image.write('firmware_signed.bin')   # package + _metadata.json + .sha256
+
+    with SignedFirmware.open('firmware_signed.bin') as signed:
+        signed.verify()['valid']
+
+Layout du package signé (flashé à 0x08002000):
+    [Firmware 48KB] [Metadata 96B] [Signature 256B] [Reference Hash 64B]
+    [Table de hash par page (optionnelle, voir page_hashes.py)]
+
+Package compressé (transfert UART / OTA, voir lz_codec.py):
+    [Metadata 96B] [Signature 256B] [Reference Hash 64B] [Firmware LZ] [Table]
+
+Package sparse (stockage / copies, voir sparse_image.py):
+    package plat sans ses zones 0xFF (table de segments + données)
+============================================================================
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import namedtuple
+from pathlib import Path
+
+from lz_codec import DEFAULT_LOOKAHEAD_BITS, DEFAULT_WINDOW_BITS, compress, decompress
+from page_hashes import (
+    FLASH_PAGE_SIZE, first_bad_page, hash_pages, merkle_root, pack_page_table,
+    page_count, page_table_size, parse_page_table,
+)
+from signature_backend import (
+    ED25519_SIGNATURE_SIZE, HMAC_SIZE, SIG_TYPE_DOUBLE_SHA256, SIG_TYPE_ED25519,
+    SIG_TYPE_HMAC_SHA256, SIG_TYPE_NAMES, mac_key as _mac_key, signing_key as _signing_key,
+    verify_key,
+)
+from sparse_image import create_sparse, expand_sparse, is_sparse, parse_sparse
+
+__all__ = [
+    'FIRMWARE_MAGIC', 'MAX_FIRMWARE_SIZE', 'METADATA_FORMAT', 'METADATA_SIZE',
+    'SIGNATURE_SIZE', 'REFERENCE_HASH_SIZE', 'METADATA_OFFSET', 'SIGNATURE_OFFSET',
+    'REFERENCE_HASH_OFFSET', 'PACKAGE_SIZE',
+    'RESERVED_FORMAT', 'FLAG_PAGE_HASHES', 'FLAG_COMPRESSED', 'ReservedFields', 'pack_reserved',
+    'parse_reserved', 'replace_reserved',
+    'BOOT_PROFILE_DIAGNOSTIC', 'BOOT_PROFILE_PRODUCTION', 'BOOT_PROFILE_NAMES',
+    'CRC32_BACKENDS', 'CRC32_DEFAULT_BACKEND', 'crc32_bitwise', 'crc32_table',
+    'crc32_slice8', 'crc32_zlib', 'crc32_self_test', 'calculate_crc32',
+    'CRC_MODE_IEEE', 'CRC_MODE_STM32', 'CRC_MODE_NAMES', 'CRC_MODE_ENV_VAR', 'CRC32_STM32_INIT',
+    'crc32_stm32', 'crc32_stm32_bitwise',
+    'calculate_sha256', 'DigestPipeline', 'FirmwareDigests', 'compute_digests',
+    'parse_version', 'format_version', 'create_metadata', 'create_signature',
+    'sign_metadata', 'verify_metadata_signature', 'mac_metadata', 'verify_metadata_mac',
+    'FirmwareMetadata', 'parse_metadata', 'SignedPackage',
+    'COMPRESSED_HEADER_SIZE', 'is_compressed_package', 'compress_package', 'expand_package',
+    'is_sparse_package', 'sparse_package',
+    'sidecar_paths', 'write_package_files',
+    'VERIFY_CHECKS', 'check_package',
+    'FirmwareImage', 'SignedFirmware', 'build_package',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+FIRMWARE_MAGIC = 0xDEADBEEF
+MAX_FIRMWARE_SIZE = 48 * 1024  # 48KB
+METADATA_FORMAT = '<I I I I 32s I 44s'
+METADATA_SIZE = struct.calcsize(METADATA_FORMAT)  # 96 bytes
+SIGNATURE_SIZE = 256  # bytes (pour RSA-2048 ou placeholder)
+REFERENCE_HASH_SIZE = 64  # SHA-256 + 32 bytes de padding
+
+# Offsets dans le package signé
+METADATA_OFFSET = MAX_FIRMWARE_SIZE
+SIGNATURE_OFFSET = METADATA_OFFSET + METADATA_SIZE
+REFERENCE_HASH_OFFSET = SIGNATURE_OFFSET + SIGNATURE_SIZE
+PACKAGE_SIZE = REFERENCE_HASH_OFFSET + REFERENCE_HASH_SIZE  # 49568 bytes
+
+# Champ reserved[44] des métadonnées
+# flags, sig_type, crc_mode, taille stockée, racine des pages, params LZ, profil de boot
+RESERVED_FORMAT = '<H B B I 32s B B 2x'
+FLAG_PAGE_HASHES = 0x0001  # Table de hash par page ajoutée après le package
+FLAG_COMPRESSED = 0x0002  # Firmware compressé (LZ), stored_size = taille compressée
+
+# Profil de boot de l'application (reserved[41], BOOT_PROFILE de include/boot_trace.h)
+BOOT_PROFILE_DIAGNOSTIC = 0  # Splash, blinks et pauses LED bloquants
+BOOT_PROFILE_PRODUCTION = 1  # Aucune pause: saut dès la vérification terminée
+BOOT_PROFILE_NAMES = {
+    BOOT_PROFILE_DIAGNOSTIC: 'diagnostic',
+    BOOT_PROFILE_PRODUCTION: 'production',
+}
+
+# Package compressé: métadonnées en tête, puis flux LZ
+COMPRESSED_HEADER_SIZE = METADATA_SIZE + SIGNATURE_SIZE + REFERENCE_HASH_SIZE  # 416 bytes
+
+# ============================================================================
+# CRC32 (polynomial IEEE 802.3, réfléchi - identique à Calculate_CRC32 du bootloader)
+# ============================================================================
+
+CRC32_POLY = 0xEDB88320
+CRC32_CHECK_VECTOR = b'123456789'
+CRC32_CHECK_VALUE = 0xCBF43926
+
+
+def _build_crc32_tables():
+    """Construit les tables slice-by-8 (la table 0 est la table classique 256 entrées)"""
+    table0 = []
+    for n in range(256):
+        crc = n
+        for _ in range(8):
+            crc = (crc >> 1) ^ CRC32_POLY if crc & 1 else crc >> 1
+        table0.append(crc)
+    
+    tables = [table0]
+    for _ in range(7):
+        prev = tables[-1]
+        tables.append([(c >> 8) ^ table0[c & 0xFF] for c in prev])
+    
+    return tuple(tuple(t) for t in tables)
+
+
+_CRC32_TABLES = _build_crc32_tables()
+_CRC32_TABLE = _CRC32_TABLES[0]
+
+
+def crc32_bitwise(data, crc=0):
+    """
+    CRC32 bit à bit - implémentation de référence
+    
+    Traduction directe de Calculate_CRC32 (bootloader lib/crypto/crc32.c).
+    Très lente (8 itérations par byte), gardée pour l'auto-test.
+    
+    `crc` est le CRC d'un bloc précédent (même convention que zlib.crc32),
+    ce qui permet de calculer le CRC par morceaux.
+    """
+    crc ^= 0xFFFFFFFF
+    
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ CRC32_POLY
+            else:
+                crc >>= 1
+    
+    return (~crc) & 0xFFFFFFFF
+
+
+def crc32_table(data, crc=0):
+    """CRC32 avec table 256 entrées (un lookup par byte)"""
+    table = _CRC32_TABLE
+    crc ^= 0xFFFFFFFF
+    
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    
+    return crc ^ 0xFFFFFFFF
+
+
+def crc32_slice8(data, crc=0):
+    """CRC32 slice-by-8 (8 lookups indépendants par mot de 64 bits)"""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _CRC32_TABLES
+    data = memoryview(data).cast('B')
+    crc ^= 0xFFFFFFFF
+    
+    aligned = len(data) - (len(data) % 8)
+    words = data[:aligned].cast('Q') if aligned else ()
+    
+    for word in words:
+        # cast('Q') lit en ordre natif (little-endian sur x86/ARM);
+        # sur un hôte big-endian l'auto-test écarte ce backend
+        low = (word & 0xFFFFFFFF) ^ crc
+        high = word >> 32
+        crc = (t7[low & 0xFF] ^ t6[(low >> 8) & 0xFF] ^
+               t5[(low >> 16) & 0xFF] ^ t4[low >> 24] ^
+               t3[high & 0xFF] ^ t2[(high >> 8) & 0xFF] ^
+               t1[(high >> 16) & 0xFF] ^ t0[high >> 24])
+    
+    for byte in data[aligned:]:
+        crc = (crc >> 8) ^ t0[(crc ^ byte) & 0xFF]
+    
+    return crc ^ 0xFFFFFFFF
+
+
+def crc32_zlib(data, crc=0):
+    """CRC32 via zlib (implémentation C, chemin rapide)"""
+    return zlib.crc32(data, crc) & 0xFFFFFFFF
+
+
+# Backends disponibles, du plus rapide au plus lent
+CRC32_BACKENDS = {
+    'zlib': crc32_zlib,
+    'slice8': crc32_slice8,
+    'table': crc32_table,
+    'bitwise': crc32_bitwise,
+}
+
+
+def crc32_self_test():
+    """
+    Vérifie que tous les backends donnent le même résultat
+    
+    Contrôles:
+        - vecteur IEEE '123456789' → 0xCBF43926
+        - résultat identique à la référence bit à bit (= Calculate_CRC32 C)
+          sur des longueurs non multiples de 8 et en mode incrémental
+    
+    Retourne un dict {nom_backend: bool}
+    """
+    sample = bytes(range(256)) * 2 + b'\xFF' * 13
+    reference = crc32_bitwise(sample)
+    results = {}
+    
+    for name, func in CRC32_BACKENDS.items():
+        try:
+            ok = (func(CRC32_CHECK_VECTOR) == CRC32_CHECK_VALUE and
+                  func(b'') == 0 and
+                  func(sample) == reference and
+                  func(sample[300:], func(sample[:300])) == reference)
+        except Exception:
+            ok = False
+        results[name] = ok
+    
+    return results
+
+
+def _select_crc32_backend():
+    """Auto-test au chargement: garde le backend le plus rapide qui est correct"""
+    results = crc32_self_test()
+    
+    if not results['bitwise']:
+        raise RuntimeError("CRC32 self-test failed: reference implementation is broken")
+    
+    for name in CRC32_BACKENDS:
+        if results[name]:
+            return name
+
+
+CRC32_DEFAULT_BACKEND = _select_crc32_backend()
+
+
+def calculate_crc32(data, crc=0, backend=None):
+    """
+    Calcule le CRC32 (polynomial IEEE 802.3)
+    
+    Args:
+        data:    bytes / bytearray / memoryview
+        crc:     CRC du bloc précédent (calcul par morceaux)
+        backend: 'zlib', 'slice8', 'table' ou 'bitwise' (défaut: auto-test)
+    
+    Voir crc32_stm32 pour le mode CRC_MODE_STM32.
+    """
+    func = CRC32_BACKENDS[backend or CRC32_DEFAULT_BACKEND]
+    return func(data, crc)
+
+# ============================================================================
+# CRC32 STM32 (unité CRC matérielle: CRC-32/MPEG-2 par mots de 32 bits)
+# ============================================================================
+
+# Mode de checksum des métadonnées (reserved.crc_mode)
+CRC_MODE_IEEE = 0   # Calculate_CRC32 logiciel du bootloader (= zlib.crc32)
+CRC_MODE_STM32 = 1  # Unité CRC du STM32 (Calculate_CRC32_HW)
+
+CRC_MODE_NAMES = {
+    CRC_MODE_IEEE: 'ieee',
+    CRC_MODE_STM32: 'stm32',
+}
+CRC_MODE_ENV_VAR = 'FIRMWARE_CRC_MODE'  # Nom de CRC_MODE_NAMES, signature post-build
+
+CRC32_STM32_POLY = 0x04C11DB7
+CRC32_STM32_INIT = 0xFFFFFFFF  # CRC->DR après CRC->CR = RESET
+CRC32_STM32_PAD = b'\xFF'  # Mot final incomplet complété comme la flash effacée
+
+_BITREV8 = bytes(int(f'{n:08b}'[::-1], 2) for n in range(256))
+_WORD_TYPECODE = next(code for code in 'IL' if array(code).itemsize == 4)
+
+
+def _bitrev32(value):
+    return int(f'{value:032b}'[::-1], 2)
+
+
+def _stm32_padded(data):
+    """Complète un tail de 1-3 bytes par 0xFF (mot entier, comme la flash)"""
+    tail = -len(data) % 4
+    return bytes(data) + CRC32_STM32_PAD * tail if tail else data
+
+
+def crc32_stm32_bitwise(data, crc=CRC32_STM32_INIT):
+    """
+    CRC de l'unité CRC STM32 - implémentation de référence
+    
+    Traduction directe du matériel: chaque mot est lu en little-endian
+    (CRC->DR = *(uint32_t *)addr) puis décalé MSB d'abord, polynôme
+    0x04C11DB7, registre initialisé à 0xFFFFFFFF, pas de XOR final.
+    """
+    data = _stm32_padded(data)
+    for (word,) in struct.iter_unpack('<I', data):
+        crc ^= word
+        for _ in range(32):
+            if crc & 0x80000000:
+                crc = ((crc << 1) ^ CRC32_STM32_POLY) & 0xFFFFFFFF
+            else:
+                crc = (crc << 1) & 0xFFFFFFFF
+    return crc
+
+
+def crc32_stm32(data, crc=CRC32_STM32_INIT):
+    """
+    CRC de l'unité CRC STM32 (même résultat que crc32_stm32_bitwise)
+    
+    Inverser l'ordre des bytes de chaque mot (array.byteswap) puis les bits
+    de chaque byte (translate) ramène le CRC MSB d'abord au CRC réfléchi de
+    zlib.crc32, registre inversé bit à bit: tout le calcul reste en C.
+    
+    Calcul par morceaux: `crc` est le résultat du morceau précédent, qui
+    doit faire un multiple de 4 bytes (seul le dernier est complété par 0xFF).
+    """
+    words = array(_WORD_TYPECODE)
+    words.frombytes(_stm32_padded(data))  # array(code, memoryview) itérerait byte par byte
+    if sys.byteorder == 'little':
+        words.byteswap()  # Mot little-endian lu en flash → bytes MSB d'abord
+    
+    register = zlib.crc32(words.tobytes().translate(_BITREV8), ~_bitrev32(crc) & 0xFFFFFFFF)
+    return _bitrev32(~register & 0xFFFFFFFF)
+
+# ============================================================================
+# SHA-256
+# ============================================================================
+
+def calculate_sha256(data):
+    """Calcule le SHA-256"""
+    return hashlib.sha256(data).digest()
+
+# ============================================================================
+# PIPELINE DE DIGESTS (une seule passe)
+# ============================================================================
+
+DIGEST_CHUNK_SIZE = 16 * 1024  # Tient en cache L1/L2 entre CRC et SHA
+
+FirmwareDigests = namedtuple('FirmwareDigests', ['size', 'crc32', 'sha256', 'signature'])
+
+
+class DigestPipeline:
+    """
+    Calcule CRC32, SHA-256 et signature en une seule passe
+    
+    Chaque morceau est donné au CRC32 puis au SHA-256 pendant qu'il est
+    encore en cache. La signature (double SHA-256) réutilise le SHA-256
+    du flux: seul le second hash (32 bytes) reste à calculer.
+    
+    En mode CRC_MODE_STM32, le CRC avance par mots entiers: les 1-3 bytes
+    d'un mot à cheval sur deux morceaux attendent le morceau suivant.
+    
+    Usage:
+        pipeline = DigestPipeline()
+        for chunk in chunks:
+            pipeline.update(chunk)
+        digests = pipeline.finalize()
+    """
+    
+    def __init__(self, crc_backend=None, crc_mode=CRC_MODE_IEEE):
+        if crc_mode not in CRC_MODE_NAMES:
+            raise ValueError(f"unknown CRC mode: {crc_mode}")
+        
+        self._crc_func = CRC32_BACKENDS[crc_backend or CRC32_DEFAULT_BACKEND]
+        self._crc_mode = crc_mode
+        self._crc = CRC32_STM32_INIT if crc_mode == CRC_MODE_STM32 else 0
+        self._crc_tail = b''  # Mode STM32: début d'un mot incomplet
+        self._sha256 = hashlib.sha256()
+        self._size = 0
+    
+    def update(self, chunk):
+        if self._crc_mode == CRC_MODE_STM32:
+            self._update_words(chunk)
+        else:
+            self._crc = self._crc_func(chunk, self._crc)
+        self._sha256.update(chunk)
+        self._size += len(chunk)
+    
+    def _update_words(self, chunk):
+        with memoryview(chunk) as raw, raw.cast('B') as view:
+            start = 0
+            if self._crc_tail:
+                start = min(4 - len(self._crc_tail), len(view))
+                self._crc_tail += bytes(view[:start])
+                if len(self._crc_tail) < 4:
+                    return
+                self._crc = crc32_stm32(self._crc_tail, self._crc)
+            
+            end = start + (len(view) - start) // 4 * 4
+            if end > start:
+                self._crc = crc32_stm32(view[start:end], self._crc)
+            self._crc_tail = bytes(view[end:])
+    
+    def finalize(self):
+        sha256 = self._sha256.digest()
+        crc = self._crc
+        if self._crc_tail:
+            crc = crc32_stm32(self._crc_tail, crc)  # Complété par 0xFF
+        return FirmwareDigests(
+            size=self._size,
+            crc32=crc,
+            sha256=sha256,
+            signature=create_signature(sha256=sha256),
+        )
+
+
+def compute_digests(firmware_data, chunk_size=DIGEST_CHUNK_SIZE, crc_backend=None,
+                    crc_mode=CRC_MODE_IEEE):
+    """Calcule tous les digests du firmware en une passe sur un memoryview"""
+    pipeline = DigestPipeline(crc_backend, crc_mode)
+    
+    with memoryview(firmware_data) as raw, raw.cast('B') as view:
+        for offset in range(0, len(view), chunk_size):
+            with view[offset:offset + chunk_size] as chunk:
+                pipeline.update(chunk)
+    
+    return pipeline.finalize()
+
+# ============================================================================
+# METADATA
+# ============================================================================
+
+def parse_version(version):
+    """Parse "1.2.3" → 0x00010203"""
+    version_parts = version.split('.')
+    return (int(version_parts[0]) << 16) | \
+           (int(version_parts[1]) << 8) | \
+           int(version_parts[2])
+
+
+def format_version(version_int):
+    """0x00010203 → 1.2.3"""
+    return f"{(version_int >> 16) & 0xFF}.{(version_int >> 8) & 0xFF}.{version_int & 0xFF}"
+
+
+ReservedFields = namedtuple('ReservedFields',
+                            ['flags', 'sig_type', 'crc_mode', 'stored_size', 'page_root', 'lz_params',
+                             'boot_profile'])
+
+
+def pack_reserved(flags=0, stored_size=0, page_root=b'', lz_params=0, sig_type=SIG_TYPE_DOUBLE_SHA256,
+                  crc_mode=CRC_MODE_IEEE, boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+    """
+    Construit le champ reserved[44] (zéros si aucune option)
+    
+    lz_params: (window_bits << 4) | lookahead_bits si FLAG_COMPRESSED
+    sig_type: moteur de signature (voir signature_backend.py)
+    crc_mode: algorithme du champ crc32 (reserved[3], lu par le bootloader)
+    boot_profile: profil de boot de l'application (reserved[41])
+    """
+    return struct.pack(RESERVED_FORMAT, flags, sig_type, crc_mode, stored_size, page_root, lz_params,
+                       boot_profile)
+
+
+def parse_reserved(reserved):
+    return ReservedFields(*struct.unpack(RESERVED_FORMAT, reserved))
+
+
+def replace_reserved(metadata, **changes):
+    """Copie de la FirmwareMetadata_t packée avec des champs reserved modifiés"""
+    fields = parse_metadata(metadata)
+    reserved = parse_reserved(fields.reserved)._replace(**changes)
+    return struct.pack(METADATA_FORMAT, *fields._replace(reserved=pack_reserved(**reserved._asdict())))
+
+
+def create_metadata(firmware_data, version="1.0.0", digests=None, timestamp=None, reserved=None):
+    """
+    Crée la structure de métadonnées (96 bytes)
+    
+    `digests` (FirmwareDigests) évite de re-hasher le firmware s'il a déjà
+    été passé dans le pipeline. `timestamp` force l'horodatage.
+    `reserved` (44 bytes, voir pack_reserved) porte les options du package.
+    
+    typedef struct {
+        uint32_t magic;              // FIRMWARE_MAGIC
+        uint32_t version;            // Version (ex: 0x00010000 = v1.0.0)
+        uint32_t size;               // Taille
+        uint32_t crc32;              // CRC32
+        uint8_t  sha256[32];         // SHA-256
+        uint32_t timestamp;          // Unix timestamp
+        uint8_t  reserved[44];       // flags, type de signature, racine des pages...
+    } FirmwareMetadata_t;
+    """
+    
+    # Parse version (ex: "1.2.3" → 0x00010203)
+    version_int = parse_version(version)
+    
+    # Calcule CRC32 et SHA-256 (une seule passe), CRC selon reserved.crc_mode
+    if digests is None:
+        crc_mode = parse_reserved(reserved).crc_mode if reserved else CRC_MODE_IEEE
+        digests = compute_digests(firmware_data, crc_mode=crc_mode)
+    crc32 = digests.crc32
+    sha256 = digests.sha256
+    
+    # Timestamp actuel
+    if timestamp is None:
+        timestamp = int(time.time())
+    
+    # Pack la structure (little-endian)
+    metadata = struct.pack(
+        METADATA_FORMAT,
+        FIRMWARE_MAGIC,      # magic
+        version_int,         # version
+        digests.size,        # size
+        crc32,               # crc32
+        sha256,              # sha256[32]
+        timestamp,           # timestamp
+        reserved or pack_reserved()  # reserved
+    )
+    
+    return metadata, crc32, sha256, timestamp
+
+# ============================================================================
+# SIGNATURE (placeholder double SHA-256 ou Ed25519)
+# ============================================================================
+
+def create_signature(firmware_data=None, sha256=None):
+    """
+    Crée une signature "placeholder" pour démo
+    
+    Si `sha256` (digest du firmware) est fourni, le premier hash est évité.
+    
+    En production:
+        1. Utiliser RSA-2048 ou ECDSA-256
+        2. Signer avec clé privée
+        3. Stocker uniquement la clé publique dans le STM32
+    
+    Pour démo:
+        - Double SHA-256 comme "signature"
+    """
+    
+    # Double hash comme signature simplifiée
+    hash1 = sha256 if sha256 is not None else hashlib.sha256(firmware_data).digest()
+    hash2 = hashlib.sha256(hash1).digest()
+    
+    # Pad à 256 bytes (taille RSA-2048)
+    signature = hash2 + (b'\x00' * (SIGNATURE_SIZE - len(hash2)))
+    
+    return signature
+
+
+def sign_metadata(metadata, key):
+    """
+    Slot Signature[256] Ed25519: signature des 96 bytes de métadonnées + zéros
+    
+    `key`: graine de 32 bytes ou SigningKey (parsée une fois, en cache).
+    """
+    signature = _signing_key(key).sign(metadata)
+    return signature + b'\x00' * (SIGNATURE_SIZE - len(signature))
+
+
+def verify_metadata_signature(metadata, signature, public_key):
+    """True si le slot Signature[256] est une signature Ed25519 valide des métadonnées"""
+    signature = bytes(signature)
+    if any(signature[ED25519_SIGNATURE_SIZE:]):
+        return False
+    return verify_key(public_key).verify(metadata, signature[:ED25519_SIGNATURE_SIZE])
+
+
+def mac_metadata(metadata, key):
+    """
+    Slot Signature[256] HMAC-SHA256: MAC des 96 bytes de métadonnées + zéros
+    
+    `key`: clé symétrique (bytes) ou MacKey (états ipad/opad en cache).
+    """
+    tag = _mac_key(key).mac(metadata)
+    return tag + b'\x00' * (SIGNATURE_SIZE - len(tag))
+
+
+def verify_metadata_mac(metadata, signature, key):
+    """True si le slot Signature[256] est le HMAC-SHA256 des métadonnées"""
+    signature = bytes(signature)
+    if any(signature[HMAC_SIZE:]):
+        return False
+    return _mac_key(key).verify(metadata, signature[:HMAC_SIZE])
+
+# ============================================================================
+# LECTEUR DE PACKAGE SIGNÉ (mmap, zero-copy)
+# ============================================================================
+
+FirmwareMetadata = namedtuple(
+    'FirmwareMetadata', ['magic', 'version', 'size', 'crc32', 'sha256', 'timestamp', 'reserved'])
+
+
+def parse_metadata(buffer, offset=0):
+    """Parse FirmwareMetadata_t depuis n'importe quel buffer (bytes, mmap, memoryview)"""
+    return FirmwareMetadata(*struct.unpack_from(METADATA_FORMAT, buffer, offset))
+
+
+class SignedPackage:
+    """
+    Lecteur zero-copy d'un package signé
+    
+    Le fichier est projeté en mémoire (mmap, lecture seule) et chaque
+    région est exposée comme memoryview: aucune copie, et la mémoire
+    résidente ne dépend que des pages réellement lues.
+    
+    Usage:
+        with SignedPackage.open('firmware_signed.bin') as package:
+            package.metadata_fields.size
+            hashlib.sha256(package.firmware)
+    
+    Les vues sont libérées par close(): ne pas les conserver après.
+    """
+    
+    def __init__(self, buffer, file=None, mapping=None):
+        self._file = file
+        self._mapping = mapping
+        self._views = []
+        
+        self.data = self._view(buffer)
+        self.firmware_region = self._view(self.data[0:MAX_FIRMWARE_SIZE])
+        self.metadata = self._view(self.data[METADATA_OFFSET:SIGNATURE_OFFSET])
+        self.signature = self._view(self.data[SIGNATURE_OFFSET:REFERENCE_HASH_OFFSET])
+        self.reference_hash = self._view(self.data[REFERENCE_HASH_OFFSET:PACKAGE_SIZE])
+        self.trailer = self._view(self.data[PACKAGE_SIZE:])
+        
+        self.metadata_fields = None
+        self.reserved_fields = None
+        if len(self.metadata) == METADATA_SIZE:
+            self.metadata_fields = parse_metadata(self.metadata)
+            self.reserved_fields = parse_reserved(self.metadata_fields.reserved)
+    
+    @classmethod
+    def open(cls, path):
+        """Projette un fichier en mémoire (mmap lecture seule)"""
+        file = open(path, 'rb')
+        try:
+            if os.fstat(file.fileno()).st_size == 0:
+                # mmap refuse les fichiers vides
+                return cls(b'', file=file)
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            file.close()
+            raise
+        return cls(mapping, file=file, mapping=mapping)
+    
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Enveloppe un buffer déjà en mémoire (bytes, bytearray, memoryview)"""
+        return cls(buffer)
+    
+    def _view(self, buffer):
+        view = memoryview(buffer)
+        if view.format != 'B':
+            view = view.cast('B')
+        self._views.append(view)
+        return view
+    
+    @property
+    def firmware(self):
+        """Firmware utile (taille des métadonnées), ou None si la taille est invalide"""
+        fields = self.metadata_fields
+        if fields is None or not 0 < fields.size <= MAX_FIRMWARE_SIZE:
+            return None
+        return self._view(self.firmware_region[0:fields.size])
+    
+    @property
+    def page_table(self):
+        """(page_size, [feuilles]) si le package annonce une table de hash par page, sinon None"""
+        if self.reserved_fields is None or not self.reserved_fields.flags & FLAG_PAGE_HASHES:
+            return None
+        return parse_page_table(self.trailer)
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def close(self):
+        # Les memoryviews doivent être libérées avant de fermer le mmap
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+# ============================================================================
+# PACKAGE COMPRESSÉ (LZ)
+# ============================================================================
+
+def is_compressed_package(buffer):
+    """True si le buffer commence par des métadonnées marquées FLAG_COMPRESSED"""
+    if len(buffer) < METADATA_SIZE:
+        return False
+    fields = parse_metadata(buffer)
+    return fields.magic == FIRMWARE_MAGIC and bool(parse_reserved(fields.reserved).flags & FLAG_COMPRESSED)
+
+
+def compress_package(package, window_bits=DEFAULT_WINDOW_BITS, lookahead_bits=DEFAULT_LOOKAHEAD_BITS):
+    """
+    Package plat → package compressé
+    
+    Seul le firmware utile est compressé (le bourrage 0xFF disparaît); CRC32
+    et SHA-256 restent ceux du firmware décompressé.
+    """
+    with SignedPackage.from_buffer(package) as flat:
+        if flat.firmware is None:
+            raise ValueError("cannot compress an invalid package")
+        
+        payload = compress(flat.firmware, window_bits, lookahead_bits)
+        metadata = replace_reserved(
+            flat.metadata,
+            flags=flat.reserved_fields.flags | FLAG_COMPRESSED,
+            stored_size=len(payload),
+            lz_params=(window_bits << 4) | lookahead_bits,
+        )
+        return metadata + flat.signature + flat.reference_hash + payload + flat.trailer
+
+
+def expand_package(package):
+    """
+    Package compressé ou sparse → package plat (flashable à 0x08002000)
+    
+    Lève ValueError (LzError, SparseError) si le flux est tronqué ou invalide.
+    """
+    if is_sparse_package(package):
+        return expand_sparse(package)
+    
+    view = memoryview(package).cast('B')
+    fields = parse_metadata(view)
+    reserved = parse_reserved(fields.reserved)
+    
+    if not 0 < fields.size <= MAX_FIRMWARE_SIZE:
+        raise ValueError(f"invalid firmware size: {fields.size}")
+    
+    payload_end = COMPRESSED_HEADER_SIZE + reserved.stored_size
+    if len(view) < payload_end:
+        raise ValueError(f"truncated compressed package: {len(view)} bytes < {payload_end}")
+    
+    firmware = decompress(view[COMPRESSED_HEADER_SIZE:payload_end], fields.size,
+                          reserved.lz_params >> 4, reserved.lz_params & 0x0F)
+    metadata = replace_reserved(
+        view[:METADATA_SIZE],
+        flags=reserved.flags & ~FLAG_COMPRESSED, stored_size=0, lz_params=0,
+    )
+    
+    return (firmware + b'\xFF' * (MAX_FIRMWARE_SIZE - len(firmware)) + metadata
+            + view[METADATA_SIZE:COMPRESSED_HEADER_SIZE] + view[payload_end:])
+
+# ============================================================================
+# PACKAGE SPARSE (sans bourrage 0xFF)
+# ============================================================================
+
+def is_sparse_package(buffer):
+    """True si le buffer est une image sparse (voir sparse_image.py)"""
+    return is_sparse(buffer)
+
+
+def sparse_package(package):
+    """
+    Package plat → package sparse
+    
+    Le bourrage 0xFF après le firmware (et tout autre trou effacé) n'est
+    plus stocké; expand_package() redonne le package plat à l'identique.
+    """
+    if is_compressed_package(package) or is_sparse_package(package):
+        raise ValueError("sparse packages are built from a flat package")
+    return create_sparse(package)
+
+# ============================================================================
+# FICHIERS DE SORTIE
+# ============================================================================
+
+def sidecar_paths(output_path):
+    """Chemins des fichiers annexes: (xxx_metadata.json, xxx.sha256)"""
+    output = Path(output_path)
+    stem = output.stem if output.suffix == '.bin' else output.name
+    return (str(output.with_name(stem + '_metadata.json')),
+            str(output.with_name(stem + '.sha256')))
+
+
+def write_package_files(output_path, final_package, metadata_json):
+    """Écrit le package, le JSON de métadonnées et le .sha256"""
+    json_path, hash_path = sidecar_paths(output_path)
+    
+    with open(output_path, 'wb') as f:
+        f.write(final_package)
+    
+    with open(json_path, 'w') as f:
+        json.dump(metadata_json, f, indent=4)
+    
+    with open(hash_path, 'w') as f:
+        f.write(metadata_json['sha256'])
+    
+    return json_path, hash_path
+
+# ============================================================================
+# VÉRIFICATION
+# ============================================================================
+
+VERIFY_CHECKS = ('package', 'magic', 'size', 'pages', 'crc32', 'sha256', 'signature')
+
+
+def check_package(package, public_key=None, mac_key=None):
+    """
+    Vérifie un package signé (sans affichage)
+    
+    `package` est un SignedPackage ou un buffer (bytes, mmap, memoryview).
+    
+    Retourne un dict:
+        valid:   True si toutes les vérifications passent
+        checks:  {nom: 'ok' | 'fail' | 'skipped' | 'unverified'} dans l'ordre VERIFY_CHECKS
+        error:   message de la première vérification en échec
+        version, size, timestamp, crc32, sha256: valeurs des métadonnées
+    
+    CRC32, SHA-256 et signature sont calculés ensemble (une passe), donc
+    les trois statuts sont toujours renseignés dès que la taille est valide.
+    
+    Si le package a une table de hash par page, elle est vérifiée d'abord:
+    la vérification s'arrête à la première page corrompue (bad_page) sans
+    hasher le reste du firmware.
+    
+    Un package compressé est décompressé puis vérifié (compressed=True);
+    un package sparse est développé puis vérifié (sparse=True).
+    
+    La signature est vérifiée selon metadata.reserved.sig_type
+    (signature_type). Une signature Ed25519 demande `public_key` (32 bytes
+    ou VerifyKey); sans clé, la signature est 'unverified' et le package
+    n'est PAS valide (il a pu être re-signé). Avec une clé, un package non
+    signé en Ed25519 est refusé (pas de repli possible). Un MAC HMAC-SHA256
+    demande de même `mac_key` (bytes ou MacKey).
+    
+    Le CRC32 est recalculé selon metadata.reserved.crc_mode (crc_mode).
+    """
+    result = {
+        'valid': False,
+        'checks': {name: 'skipped' for name in VERIFY_CHECKS},
+        'error': None,
+    }
+    checks = result['checks']
+    
+    def fail(check, message, status='fail'):
+        checks[check] = status
+        if result['error'] is None:
+            result['error'] = message
+    
+    if not isinstance(package, SignedPackage):
+        with SignedPackage.from_buffer(package) as wrapped:
+            return check_package(wrapped, public_key, mac_key)
+    
+    # Package compressé: vérifié sur le firmware décompressé
+    if is_compressed_package(package.data):
+        try:
+            flat = expand_package(package.data)
+        except ValueError as e:
+            fail('package', f"DECOMPRESSION FAILED: {e}")
+            return result
+        
+        result = check_package(flat, public_key, mac_key)
+        result['compressed'] = True
+        return result
+    
+    # Package sparse: vérifié sur l'image plate
+    if is_sparse_package(package.data):
+        try:
+            flat = expand_package(package.data)
+        except ValueError as e:
+            fail('package', f"SPARSE EXPANSION FAILED: {e}")
+            return result
+        
+        result = check_package(flat, public_key, mac_key)
+        result['sparse'] = True
+        return result
+    
+    if len(package) < PACKAGE_SIZE:
+        fail('package', f"TRUNCATED PACKAGE: {len(package)} bytes (expected {PACKAGE_SIZE})")
+        return result
+    
+    checks['package'] = 'ok'
+    
+    # Parse metadata (directement dans le mmap)
+    magic, version, size, crc32_stored, sha256_stored, timestamp, _ = package.metadata_fields
+    
+    # Vérifie magic
+    if magic != FIRMWARE_MAGIC:
+        fail('magic', f"INVALID MAGIC: 0x{magic:08X} (expected 0x{FIRMWARE_MAGIC:08X})")
+        return result
+    
+    checks['magic'] = 'ok'
+    result.update(
+        version=format_version(version),
+        size=size,
+        timestamp=timestamp,
+        crc32=f"0x{crc32_stored:08X}",
+        sha256=sha256_stored.hex(),
+    )
+    
+    # Vérifie taille
+    if size == 0 or size > MAX_FIRMWARE_SIZE:
+        fail('size', f"INVALID SIZE: {size} bytes")
+        return result
+    
+    checks['size'] = 'ok'
+    
+    # Table de hash par page (optionnelle): arrêt à la première page corrompue
+    if package.reserved_fields.flags & FLAG_PAGE_HASHES:
+        table = package.page_table
+        if table is None:
+            fail('pages', "PAGE TABLE MISSING")
+            return result
+        
+        page_size, leaves = table
+        if page_size != FLASH_PAGE_SIZE:
+            # Le bootloader efface / vérifie par pages de flash de 1KB
+            fail('pages', f"PAGE TABLE PAGE SIZE {page_size} (expected {FLASH_PAGE_SIZE})")
+            return result
+        if (len(leaves) != page_count(size, page_size)
+                or merkle_root(leaves) != package.reserved_fields.page_root):
+            fail('pages', "PAGE TABLE MISMATCH")
+            return result
+        
+        bad_page = first_bad_page(package.firmware, leaves, page_size=page_size)
+        if bad_page is not None:
+            fail('pages', f"PAGE {bad_page} CORRUPTED (offset 0x{bad_page * page_size:04X})")
+            result['bad_page'] = bad_page
+            return result
+        
+        checks['pages'] = 'ok'
+        result['pages'] = len(leaves)
+    
+    crc_mode = package.reserved_fields.crc_mode
+    if crc_mode not in CRC_MODE_NAMES:
+        fail('crc32', f"UNSUPPORTED CRC MODE: {crc_mode}")
+        return result
+    result['crc_mode'] = CRC_MODE_NAMES[crc_mode]
+    boot_profile = package.reserved_fields.boot_profile
+    result['boot_profile'] = BOOT_PROFILE_NAMES.get(boot_profile, str(boot_profile))
+    
+    # Une seule passe: CRC32 + SHA-256 + signature (sur la vue, sans copie)
+    digests = compute_digests(package.firmware, crc_mode=crc_mode)
+    
+    if digests.crc32 == crc32_stored:
+        checks['crc32'] = 'ok'
+    else:
+        fail('crc32', f"CRC32 MISMATCH: 0x{digests.crc32:08X} != 0x{crc32_stored:08X}")
+        result['crc32_calculated'] = f"0x{digests.crc32:08X}"
+    
+    if digests.sha256 == sha256_stored:
+        checks['sha256'] = 'ok'
+    else:
+        fail('sha256', "SHA-256 MISMATCH")
+        result['sha256_calculated'] = digests.sha256.hex()
+    
+    sig_type = package.reserved_fields.sig_type
+    result['signature_type'] = SIG_TYPE_NAMES.get(sig_type, f"unknown ({sig_type})")
+    
+    if public_key is not None and sig_type != SIG_TYPE_ED25519:
+        # Clé publique fournie: pas de repli sur le placeholder falsifiable
+        fail('signature', f"ED25519 SIGNATURE REQUIRED (got {result['signature_type']})")
+    elif mac_key is not None and sig_type != SIG_TYPE_HMAC_SHA256:
+        fail('signature', f"HMAC-SHA256 MAC REQUIRED (got {result['signature_type']})")
+    elif sig_type == SIG_TYPE_DOUBLE_SHA256:
+        if digests.signature == package.signature:
+            checks['signature'] = 'ok'
+        else:
+            fail('signature', "SIGNATURE MISMATCH")
+    elif sig_type == SIG_TYPE_ED25519:
+        if public_key is None:
+            fail('signature', "SIGNATURE NOT VERIFIED: ed25519 public key required", 'unverified')
+        elif verify_metadata_signature(package.metadata, package.signature, public_key):
+            checks['signature'] = 'ok'
+        else:
+            fail('signature', "SIGNATURE MISMATCH")
+    elif sig_type == SIG_TYPE_HMAC_SHA256:
+        if mac_key is None:
+            fail('signature', "SIGNATURE NOT VERIFIED: hmac-sha256 key required", 'unverified')
+        elif verify_metadata_mac(package.metadata, package.signature, mac_key):
+            checks['signature'] = 'ok'
+        else:
+            fail('signature', "MAC MISMATCH")
+    else:
+        fail('signature', f"UNSUPPORTED SIGNATURE TYPE: {sig_type}")
+    
+    result['valid'] = result['error'] is None
+    return result
+
+
+# ============================================================================
+# API OBJET: FirmwareImage / SignedFirmware
+# ============================================================================
+
+class FirmwareImage:
+    """
+    Firmware brut à signer
+    
+    Les digests (CRC32, SHA-256, signature) sont calculés au premier accès,
+    en une seule passe, puis gardés en cache. Le timestamp est figé au
+    premier calcul des métadonnées pour que package() soit reproductible.
+    
+    page_hashes=True ajoute la table de hash par page (1KB) après le
+    package et sa racine de Merkle dans les métadonnées.
+    compressed=True produit le package compressé (LZ) au lieu du package plat.
+    sparse=True produit le package sparse (sans le bourrage 0xFF).
+    signing_key (graine de 32 bytes ou SigningKey) signe les métadonnées en
+    Ed25519 au lieu du placeholder double SHA-256; mac_key (clé symétrique
+    ou MacKey) les authentifie en HMAC-SHA256.
+    crc_mode=CRC_MODE_STM32 stocke le CRC de l'unité CRC matérielle
+    (crc32_stm32) au lieu du CRC32 IEEE logiciel. boot_profile enregistre le
+    profil de compilation de l'application (BOOT_PROFILE_PRODUCTION: le
+    bootloader saute sans blink de confirmation).
+    """
+    
+    __slots__ = ('data', 'version', 'page_hashes', 'compressed', 'sparse', 'signing_key',
+                 'mac_key', 'crc_mode', 'boot_profile', '_timestamp', '_digests', '_metadata',
+                 '_page_leaves', '_package')
+    
+    def __init__(self, data, version="1.0.0", timestamp=None, page_hashes=False, compressed=False,
+                 sparse=False, signing_key=None, mac_key=None, crc_mode=CRC_MODE_IEEE,
+                 boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+        if len(data) > MAX_FIRMWARE_SIZE:
+            raise ValueError(f"Firmware too large ({len(data)} bytes > {MAX_FIRMWARE_SIZE} bytes)")
+        if compressed and sparse:
+            raise ValueError("compressed and sparse packages are mutually exclusive")
+        if signing_key is not None and mac_key is not None:
+            raise ValueError("signing_key and mac_key are mutually exclusive")
+        if crc_mode not in CRC_MODE_NAMES:
+            raise ValueError(f"unknown CRC mode: {crc_mode}")
+        if boot_profile not in BOOT_PROFILE_NAMES:
+            raise ValueError(f"unknown boot profile: {boot_profile}")
+        
+        parse_version(version)  # Valide le format "X.Y.Z"
+        
+        self.data = bytes(data)
+        self.version = version
+        self.page_hashes = page_hashes
+        self.compressed = compressed
+        self.sparse = sparse
+        self.signing_key = None if signing_key is None else _signing_key(signing_key)
+        self.mac_key = None if mac_key is None else _mac_key(mac_key)
+        self.crc_mode = crc_mode
+        self.boot_profile = boot_profile
+        self._timestamp = timestamp
+        self._digests = None
+        self._metadata = None
+        self._page_leaves = None
+        self._package = None
+    
+    @classmethod
+    def from_file(cls, path, version="1.0.0", timestamp=None, page_hashes=False, compressed=False,
+                  sparse=False, signing_key=None, mac_key=None, crc_mode=CRC_MODE_IEEE,
+                  boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+        with open(path, 'rb') as f:
+            return cls(f.read(), version, timestamp, page_hashes, compressed, sparse, signing_key,
+                       mac_key, crc_mode, boot_profile)
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __repr__(self):
+        return f"FirmwareImage(size={len(self.data)}, version={self.version!r})"
+    
+    @property
+    def digests(self):
+        if self._digests is None:
+            self._digests = compute_digests(self.data, crc_mode=self.crc_mode)
+        return self._digests
+    
+    @property
+    def crc32(self):
+        return self.digests.crc32
+    
+    @property
+    def sha256(self):
+        return self.digests.sha256
+    
+    @property
+    def sig_type(self):
+        if self.signing_key is not None:
+            return SIG_TYPE_ED25519
+        if self.mac_key is not None:
+            return SIG_TYPE_HMAC_SHA256
+        return SIG_TYPE_DOUBLE_SHA256
+    
+    @property
+    def signature(self):
+        """Slot Signature[256]: double SHA-256 (démo), Ed25519 ou HMAC des métadonnées"""
+        if self.signing_key is not None:
+            return sign_metadata(self.metadata, self.signing_key)
+        if self.mac_key is not None:
+            return mac_metadata(self.metadata, self.mac_key)
+        return self.digests.signature
+    
+    @property
+    def page_leaves(self):
+        """Hash de chaque page de 1KB (None sans page_hashes)"""
+        if self.page_hashes and self._page_leaves is None:
+            self._page_leaves = hash_pages(self.data)
+        return self._page_leaves
+    
+    @property
+    def page_root(self):
+        leaves = self.page_leaves
+        return None if leaves is None else merkle_root(leaves)
+    
+    @property
+    def reserved(self):
+        """Champ reserved[44] des métadonnées"""
+        if not self.page_hashes:
+            return pack_reserved(sig_type=self.sig_type, crc_mode=self.crc_mode,
+                                 boot_profile=self.boot_profile)
+        return pack_reserved(FLAG_PAGE_HASHES, page_root=self.page_root, sig_type=self.sig_type,
+                             crc_mode=self.crc_mode, boot_profile=self.boot_profile)
+    
+    @property
+    def metadata(self):
+        """FirmwareMetadata_t packée (96 bytes)"""
+        if self._metadata is None:
+            self._metadata, _, _, self._timestamp = create_metadata(
+                self.data, self.version, self.digests, self._timestamp, self.reserved)
+        return self._metadata
+    
+    @property
+    def timestamp(self):
+        self.metadata
+        return self._timestamp
+    
+    def package(self):
+        """Package complet: [Firmware 48KB] [Metadata] [Signature] [Reference Hash] [Pages]"""
+        if self._package is not None:
+            return self._package
+        
+        firmware_padded = self.data + (b'\xFF' * (MAX_FIRMWARE_SIZE - len(self.data)))
+        reference_hash = self.sha256 + (b'\x00' * (REFERENCE_HASH_SIZE - len(self.sha256)))
+        package = firmware_padded + self.metadata + self.signature + reference_hash
+        
+        if self.page_hashes:
+            package += pack_page_table(self.page_leaves)
+        if self.compressed:
+            package = compress_package(package)
+        if self.sparse:
+            package = sparse_package(package)
+        
+        self._package = package
+        return package
+    
+    @property
+    def package_size(self):
+        if self.compressed or self.sparse:
+            return len(self.package())
+        if not self.page_hashes:
+            return PACKAGE_SIZE
+        return PACKAGE_SIZE + page_table_size(len(self.page_leaves))
+    
+    def metadata_json(self):
+        """Métadonnées lisibles (contenu de xxx_metadata.json)"""
+        metadata_json = {
+            "magic": f"0x{FIRMWARE_MAGIC:08X}",
+            "version": self.version,
+            "size": len(self.data),
+            "crc32": f"0x{self.crc32:08X}",
+            "crc_mode": CRC_MODE_NAMES[self.crc_mode],
+            "boot_profile": BOOT_PROFILE_NAMES[self.boot_profile],
+            "sha256": self.sha256.hex(),
+            "timestamp": self.timestamp,
+            "timestamp_human": time.ctime(self.timestamp),
+            "signature_type": SIG_TYPE_NAMES[self.sig_type],
+            "total_size": self.package_size
+        }
+        
+        if self.signing_key is not None:
+            metadata_json["public_key"] = self.signing_key.public_key.hex()
+        if self.mac_key is not None:
+            metadata_json["mac_key_id"] = self.mac_key.key_id
+        
+        if self.page_hashes:
+            metadata_json["page_hashes"] = {
+                "page_size": FLASH_PAGE_SIZE,
+                "pages": len(self.page_leaves),
+                "root": self.page_root.hex(),
+            }
+        if self.compressed:
+            reserved = parse_reserved(parse_metadata(self.package()).reserved)
+            metadata_json["compressed"] = {
+                "codec": "lzss",
+                "window_bits": reserved.lz_params >> 4,
+                "lookahead_bits": reserved.lz_params & 0x0F,
+                "stored_size": reserved.stored_size,
+            }
+        if self.sparse:
+            header, segments = parse_sparse(self.package())
+            metadata_json["sparse"] = {
+                "image_size": header.image_size,
+                "segments": [[offset, len(data)] for offset, data in segments],
+            }
+        return metadata_json
+    
+    def write(self, output_path):
+        """Écrit le package et ses fichiers annexes; retourne (json_path, hash_path)"""
+        return write_package_files(output_path, self.package(), self.metadata_json())
+    
+    def sign(self):
+        """Retourne le SignedFirmware correspondant (en mémoire)"""
+        return SignedFirmware.from_bytes(self.package())
+
+
+class SignedFirmware:
+    """
+    Package signé, lu sans copie (SignedPackage) et vérifié à la demande
+    
+    Usage:
+        with SignedFirmware.open('firmware_signed.bin') as signed:
+            if signed.valid:
+                print(signed.version, signed.size)
+    """
+    
+    __slots__ = ('_package', '_result', '_sparse', '_public_key', '_mac_key')
+    
+    def __init__(self, package, public_key=None, mac_key=None):
+        if not isinstance(package, SignedPackage):
+            package = SignedPackage.from_buffer(package)
+        self._sparse = False
+        
+        # Package sparse: lu via son image plate (check_package signale un sparse invalide)
+        if is_sparse_package(package.data):
+            try:
+                flat = expand_package(package.data)
+            except ValueError:
+                pass
+            else:
+                package.close()
+                package = SignedPackage.from_buffer(flat)
+                self._sparse = True
+        
+        self._package = package
+        self._public_key = public_key
+        self._mac_key = mac_key
+        self._result = None
+    
+    @classmethod
+    def open(cls, path, public_key=None, mac_key=None):
+        return cls(SignedPackage.open(path), public_key, mac_key)
+    
+    @classmethod
+    def from_bytes(cls, data, public_key=None, mac_key=None):
+        return cls(SignedPackage.from_buffer(data), public_key, mac_key)
+    
+    def __repr__(self):
+        fields = self.metadata
+        if fields is None:
+            return f"SignedFirmware(size={len(self._package)}, truncated)"
+        return f"SignedFirmware(version={self.version!r}, size={fields.size})"
+    
+    @property
+    def package(self):
+        return self._package
+    
+    @property
+    def compressed(self):
+        return is_compressed_package(self._package.data)
+    
+    @property
+    def metadata(self):
+        """FirmwareMetadata (namedtuple) ou None si le package est tronqué"""
+        if self.compressed:
+            return parse_metadata(self._package.data)
+        return self._package.metadata_fields
+    
+    @property
+    def version(self):
+        return format_version(self.metadata.version)
+    
+    @property
+    def size(self):
+        return self.metadata.size
+    
+    @property
+    def timestamp(self):
+        return self.metadata.timestamp
+    
+    @property
+    def firmware(self):
+        """Firmware utile (décompressé en mémoire pour un package compressé)"""
+        if self.compressed:
+            return memoryview(expand_package(self._package.data))[:self.size]
+        return self._package.firmware
+    
+    def verify(self):
+        """Résultat de check_package (calculé une fois, puis en cache)"""
+        if self._result is None:
+            self._result = check_package(self._package, self._public_key, self._mac_key)
+            if self._sparse:
+                self._result['sparse'] = True
+        return self._result
+    
+    @property
+    def valid(self):
+        return self.verify()['valid']
+    
+    def verify_pages(self, pages=None):
+        """
+        Re-vérifie seulement certaines pages (toutes si None) via la table
+        
+        Retourne l'index de la première page corrompue, ou None. Lève
+        ValueError si le package n'a pas de table de hash par page, ou si
+        elle n'est pas découpée en pages de flash.
+        """
+        table = self._package.page_table
+        if table is None:
+            raise ValueError("package has no page hash table")
+        
+        page_size, leaves = table
+        if page_size != FLASH_PAGE_SIZE:
+            raise ValueError(f"page hash table page size {page_size} != {FLASH_PAGE_SIZE}")
+        return first_bad_page(self.firmware, leaves, pages, page_size)
+    
+    def close(self):
+        self._package.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_package(firmware_data, version="1.0.0", timestamp=None, page_hashes=False,
+                  compressed=False, sparse=False, signing_key=None, mac_key=None,
+                  crc_mode=CRC_MODE_IEEE, boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+    """
+    Construit le package signé en mémoire (sans I/O ni affichage)
+    
+    Retourne (final_package, metadata_json)
+    """
+    image = FirmwareImage(firmware_data, version, timestamp, page_hashes, compressed, sparse,
+                          signing_key, mac_key, crc_mode, boot_profile)
+    return image.package(), image.metadata_json()
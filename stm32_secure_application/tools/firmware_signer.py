@@ -4,8 +4,28 @@
 FIRMWARE SIGNER - Outil pour Signer et Packager le Firmware STM32
 ============================================================================
 
+CLI au-dessus de la bibliothèque firmware_image.py (toute la logique de
+packaging / vérification y est, importable sans sous-process).
+
 Usage:
     python firmware_signer.py firmware.bin -o firmware_signed.bin
+    python firmware_signer.py --verify firmware_signed.bin
+    python firmware_signer.py --batch manifest.json -j 8
+    python firmware_signer.py firmware.bin --cache-dir ~/.cache/fw_sign
+    python firmware_signer.py verify-many artifacts/ -o report.jsonl
+    python firmware_signer.py diff v1_signed.bin v2_signed.bin -o v1_to_v2.delta
+    python firmware_signer.py apply v1_signed.bin v1_to_v2.delta -o v2_signed.bin
+    python firmware_signer.py firmware.bin --compress -o firmware_signed.lz.bin
+    python firmware_signer.py expand firmware_signed.lz.bin -o firmware_signed.bin
+    python firmware_signer.py firmware.bin --sparse -o firmware_signed.sparse.bin
+    python firmware_signer.py keygen -o signing_key
+    python firmware_signer.py firmware.bin --signing-key signing_key
+    python firmware_signer.py --verify firmware_signed.bin --public-key signing_key.pub
+    python firmware_signer.py keygen --mac -o mac_key
+    python firmware_signer.py firmware.bin --mac-key mac_key
+    python firmware_signer.py --verify firmware_signed.bin --mac-key mac_key
+    python firmware_signer.py firmware.bin --crc-mode stm32
+    python firmware_signer.py firmware.bin --boot-profile production
 
 Génère:
     - firmware_signed.bin : Firmware + Metadata + Signature
@@ -17,280 +37,733 @@ Exemple:
 ============================================================================
 """
 
-import hashlib
-import struct
-import time
 import argparse
+import csv
+import glob
 import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+# API réexportée: `from firmware_signer import calculate_crc32` reste valide
+from firmware_image import *  # noqa: F401,F403
+from firmware_image import (
+    BOOT_PROFILE_DIAGNOSTIC, BOOT_PROFILE_NAMES, CRC_MODE_IEEE, CRC_MODE_NAMES, MAX_FIRMWARE_SIZE,
+    VERIFY_CHECKS, FirmwareImage, SignedFirmware, check_package,
+    expand_package, is_compressed_package, is_sparse_package, write_package_files,
+)
+from delta_package import DeltaError, apply_delta, create_delta, parse_delta
+from signature_backend import (
+    ENGINE, MAC_KEY_ENV_VAR, PUBLIC_KEY_ENV_VAR, SIG_TYPE_HMAC_SHA256, SIG_TYPE_NAMES,
+    SIGNING_KEY_ENV_VAR, SignatureError, load_key_file, load_mac_key, load_signing_key, write_keypair, write_mac_key,
+)
+from signing_cache import CACHE_ENV_VAR, SigningCache
+
 # ============================================================================
-# CONSTANTES
+# PACKAGER
 # ============================================================================
 
-FIRMWARE_MAGIC = 0xDEADBEEF
-MAX_FIRMWARE_SIZE = 48 * 1024  # 48KB
-METADATA_SIZE = 128  # bytes
-SIGNATURE_SIZE = 256  # bytes (pour RSA-2048 ou placeholder)
+def package_firmware(firmware_path, output_path, version="1.0.0", cache=None, page_hashes=False,
+                     compressed=False, sparse=False, signing_key=None, mac_key=None,
+                     crc_mode=CRC_MODE_IEEE, boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+    """
+    Package le firmware avec métadonnées et signature
+    
+    Layout final:
+    [Firmware 48KB] [Metadata 96B] [Signature 256B] [Reference Hash 64B]
+    
+    cache: SigningCache optionnel; un firmware déjà signé n'est pas re-signé
+    page_hashes: ajoute la table de hash par page de 1KB (vérification partielle)
+    compressed: firmware compressé LZ (metadata en tête, voir compress_package)
+    sparse: package sans le bourrage 0xFF (table de segments, voir sparse_package)
+    signing_key: SigningKey Ed25519 (sinon placeholder double SHA-256)
+    mac_key: MacKey HMAC-SHA256 (clé symétrique partagée avec le device)
+    crc_mode: CRC_MODE_STM32 pour le CRC de l'unité CRC matérielle du bootloader
+    boot_profile: profil de compilation de l'application (-DBOOT_PROFILE)
+    """
+    
+    print(f"[+] Reading firmware: {firmware_path}")
+    
+    # Lit le firmware
+    with open(firmware_path, 'rb') as f:
+        firmware_data = f.read()
+    
+    # Vérifie la taille
+    if len(firmware_data) > MAX_FIRMWARE_SIZE:
+        print(f"[!] ERROR: Firmware too large ({len(firmware_data)} bytes > {MAX_FIRMWARE_SIZE} bytes)")
+        return False
+    
+    print(f"[+] Firmware size: {len(firmware_data)} bytes")
+    
+    # Métadonnées + signature
+    print(f"[+] Creating metadata and signature (version {version})...")
+    if cache is not None:
+        final_package, metadata_json, hit = cache.build(firmware_data, version, page_hashes,
+                                                     compressed, sparse, signing_key, mac_key,
+                                                     crc_mode, boot_profile)
+        if hit:
+            print(f"[+] Signing cache hit: {cache.root}")
+    else:
+        image = FirmwareImage(firmware_data, version, page_hashes=page_hashes,
+                              compressed=compressed, sparse=sparse, signing_key=signing_key,
+                              mac_key=mac_key, crc_mode=crc_mode, boot_profile=boot_profile)
+        final_package, metadata_json = image.package(), image.metadata_json()
+    
+    print(f"    CRC32:     {metadata_json['crc32']} ({metadata_json['crc_mode']})")
+    print(f"    SHA-256:   {metadata_json['sha256']}")
+    print(f"    Timestamp: {metadata_json['timestamp']} ({time.ctime(metadata_json['timestamp'])})")
+    print(f"    Signature: {metadata_json['signature_type']}")
+    print(f"    Boot:      {metadata_json['boot_profile']}")
+    if signing_key is not None:
+        print(f"    Public key: {metadata_json['public_key']} (engine: {ENGINE})")
+    if mac_key is not None:
+        print(f"    MAC key:   id {metadata_json['mac_key_id']}")
+    if page_hashes:
+        print(f"    Pages:     {metadata_json['page_hashes']['pages']} × 1KB, "
+              f"root {metadata_json['page_hashes']['root'][:16]}...")
+    if compressed:
+        stored_size = metadata_json['compressed']['stored_size']
+        print(f"    LZ:        {len(firmware_data)} → {stored_size} bytes "
+              f"({100 * stored_size / max(len(firmware_data), 1):.1f}%)")
+    if sparse:
+        segments = metadata_json['sparse']['segments']
+        print(f"    Sparse:    {len(segments)} segment(s), "
+              f"{sum(length for _, length in segments)}/{metadata_json['sparse']['image_size']} bytes stored")
+    
+    # Écrit le package et les fichiers annexes
+    print(f"[+] Writing signed firmware: {output_path}")
+    json_path, hash_path = write_package_files(output_path, final_package, metadata_json)
+    
+    print(f"[+] Metadata saved: {json_path}")
+    print(f"[+] SHA-256 saved: {hash_path}")
+    
+    print(f"\n[✓] Firmware signed successfully!")
+    print(f"    Total size: {metadata_json['total_size']} bytes")
+    if compressed or sparse:
+        print(f"    Expand before flashing (firmware_signer.py expand)")
+    else:
+        print(f"    Ready to flash at 0x08002000")
+    
+    return True
 
 # ============================================================================
-# CRC32
+# SIGNATURE PAR LOT (--batch)
 # ============================================================================
 
-def calculate_crc32(data):
-    """Calcule le CRC32 (polynomial IEEE 802.3)"""
-    crc = 0xFFFFFFFF
+def load_batch_manifest(manifest_path):
+    """
+    Charge un manifeste de signature par lot (JSON ou CSV)
     
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 1:
-                crc = (crc >> 1) ^ 0xEDB88320
-            else:
-                crc >>= 1
+    JSON: [{"input": "a.bin", "output": "a_signed.bin", "version": "1.0.0"}, ...]
+          (ou {"entries": [...]})
+    CSV:  en-tête input,output,version
     
-    return (~crc) & 0xFFFFFFFF
+    Les chemins relatifs sont résolus depuis le dossier du manifeste.
+    """
+    manifest = Path(manifest_path)
+    
+    with open(manifest, newline='') as f:
+        if manifest.suffix.lower() == '.csv':
+            rows = list(csv.DictReader(f))
+        else:
+            rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows['entries']
+    
+    entries = []
+    for index, row in enumerate(rows):
+        if not row.get('input') or not row.get('output'):
+            raise ValueError(f"{manifest}: entry {index} needs 'input' and 'output'")
+        
+        entries.append({
+            'input': str(manifest.parent / row['input']),
+            'output': str(manifest.parent / row['output']),
+            'version': (row.get('version') or '1.0.0').strip(),
+        })
+    
+    return entries
 
-# ============================================================================
-# SHA-256
-# ============================================================================
 
-def calculate_sha256(data):
-    """Calcule le SHA-256"""
-    return hashlib.sha256(data).digest()
+def sign_batch_entry(entry, cache_dir=None, key_path=None, mac_key_path=None, **image_options):
+    """
+    Signe une entrée du lot (exécuté dans un process du pool)
+    
+    La clé est parsée une fois par process (cache de signature_backend):
+    pour une clé MAC, les états ipad/opad sont réutilisés par toutes les
+    entrées du process. `image_options` (page_hashes, compressed, sparse,
+    crc_mode, boot_profile) s'appliquent à toutes les entrées du lot.
+    """
+    start = time.perf_counter()
+    result = dict(entry)
+    
+    try:
+        with open(entry['input'], 'rb') as f:
+            firmware_data = f.read()
+        
+        signing_key = load_signing_key(key_path) if key_path else None
+        mac_key = load_mac_key(mac_key_path) if mac_key_path else None
+        
+        if cache_dir:
+            final_package, metadata_json, hit = SigningCache(cache_dir).build(
+                firmware_data, entry['version'], signing_key=signing_key, mac_key=mac_key,
+                **image_options)
+            result['cache'] = 'hit' if hit else 'miss'
+        else:
+            image = FirmwareImage(firmware_data, entry['version'], signing_key=signing_key,
+                                  mac_key=mac_key, **image_options)
+            final_package, metadata_json = image.package(), image.metadata_json()
+        
+        write_package_files(entry['output'], final_package, metadata_json)
+        
+        result.update(
+            status='ok',
+            size=metadata_json['size'],
+            total_size=metadata_json['total_size'],
+            crc32=metadata_json['crc32'],
+            sha256=metadata_json['sha256'],
+            timestamp=metadata_json['timestamp'],
+        )
+    except Exception as e:
+        result.update(status='error', error=f"{type(e).__name__}: {e}")
+    
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
 
-# ============================================================================
-# METADATA
-# ============================================================================
 
-def create_metadata(firmware_data, version="1.0.0"):
+def sign_batch(entries, jobs=None, cache_dir=None, key_path=None, mac_key_path=None,
+               **image_options):
     """
-    Crée la structure de métadonnées (128 bytes)
-    
-    typedef struct {
-        uint32_t magic;              // FIRMWARE_MAGIC
-        uint32_t version;            // Version (ex: 0x00010000 = v1.0.0)
-        uint32_t size;               // Taille
-        uint32_t crc32;              // CRC32
-        uint8_t  sha256[32];         // SHA-256
-        uint32_t timestamp;          // Unix timestamp
-        uint8_t  reserved[44];       // Padding
-    } FirmwareMetadata_t;
+    Signe toutes les entrées sur un ProcessPoolExecutor
+    
+    Retourne la liste des résultats dans l'ordre du manifeste.
     """
+    jobs = jobs or os.cpu_count() or 1
+    sign_entry = partial(sign_batch_entry, cache_dir=cache_dir, key_path=key_path,
+                         mac_key_path=mac_key_path, **image_options)
     
-    # Parse version (ex: "1.2.3" → 0x00010203)
-    version_parts = version.split('.')
-    version_int = (int(version_parts[0]) << 16) | \
-                  (int(version_parts[1]) << 8) | \
-                  int(version_parts[2])
+    if jobs == 1 or len(entries) <= 1:
+        return [sign_entry(entry) for entry in entries]
     
-    # Calcule CRC32 et SHA-256
-    crc32 = calculate_crc32(firmware_data)
-    sha256 = calculate_sha256(firmware_data)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(entries))) as pool:
+        return list(pool.map(sign_entry, entries, chunksize=max(1, len(entries) // (jobs * 4))))
+
+
+def run_batch(manifest_path, results_path=None, jobs=None, cache_dir=None, key_path=None,
+              mac_key_path=None, **image_options):
+    """
+    Mode --batch: signe le manifeste et écrit le manifeste de résultats
     
-    # Timestamp actuel
-    timestamp = int(time.time())
+    `image_options` reprend les options de layout de la ligne de commande
+    (--page-hashes, --compress, --sparse, --crc-mode, --boot-profile).
+    """
     
-    # Pack la structure (little-endian)
-    metadata = struct.pack(
-        '<I I I I 32s I 44s',
-        FIRMWARE_MAGIC,      # magic
-        version_int,         # version
-        len(firmware_data),  # size
-        crc32,               # crc32
-        sha256,              # sha256[32]
-        timestamp,           # timestamp
-        b'\x00' * 44         # reserved
-    )
+    entries = load_batch_manifest(manifest_path)
+    jobs = jobs or os.cpu_count() or 1
+    
+    print(f"[+] Batch signing: {len(entries)} entries, {jobs} workers")
+    
+    start = time.perf_counter()
+    results = sign_batch(entries, jobs, cache_dir, key_path, mac_key_path, **image_options)
+    total_time = time.perf_counter() - start
     
-    return metadata, crc32, sha256, timestamp
+    failed = [r for r in results if r['status'] != 'ok']
+    for r in failed:
+        print(f"[!] {r['input']}: {r['error']}")
+    
+    if results_path is None:
+        manifest = Path(manifest_path)
+        results_path = str(manifest.with_name(manifest.stem + '_results.json'))
+    
+    report = {
+        "manifest": str(manifest_path),
+        "jobs": jobs,
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "total_time_s": round(total_time, 3),
+        "images_per_s": round(len(results) / total_time, 1) if total_time else None,
+        "results": results,
+    }
+    
+    with open(results_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    
+    print(f"[+] Results saved: {results_path}")
+    print(f"\n[{'✓' if not failed else '!'}] {report['succeeded']}/{report['total']} signed "
+          f"in {total_time:.2f}s")
+    
+    return not failed
 
 # ============================================================================
-# SIGNATURE (Placeholder pour démo)
+# VÉRIFICATION
 # ============================================================================
 
-def create_signature(firmware_data):
-    """
-    Crée une signature "placeholder" pour démo
+def verify_firmware(signed_firmware_path, public_key=None, mac_key=None):
+    """Vérifie un firmware signé (public_key: clé Ed25519 de 32 bytes, mac_key: clé HMAC)"""
     
-    En production:
-        1. Utiliser RSA-2048 ou ECDSA-256
-        2. Signer avec clé privée
-        3. Stocker uniquement la clé publique dans le STM32
+    print(f"[+] Verifying firmware: {signed_firmware_path}")
     
-    Pour démo:
-        - Double SHA-256 comme "signature"
-    """
+    with SignedFirmware.open(signed_firmware_path, public_key, mac_key) as signed:
+        result = signed.verify()
+    checks = result['checks']
+    
+    # Affiche les vérifications dans l'ordre, jusqu'au premier échec
+    messages = {
+        'magic': lambda: "Magic OK",
+        'pages': lambda: f"Page hashes OK: {result['pages']} pages",
+        'crc32': lambda: f"CRC32 OK: {result['crc32']} ({result['crc_mode']})",
+        'sha256': lambda: f"SHA-256 OK: {result['sha256']}",
+        'signature': lambda: f"Signature OK ({result['signature_type']})",
+    }
     
-    # Double hash comme signature simplifiée
-    hash1 = hashlib.sha256(firmware_data).digest()
-    hash2 = hashlib.sha256(hash1).digest()
+    for name in VERIFY_CHECKS:
+        if checks[name] == 'fail':
+            print(f"[!] {result['error']}")
+            if name == 'sha256':
+                print(f"    Calculated: {result['sha256_calculated']}")
+                print(f"    Stored:     {result['sha256']}")
+            return False
+        if checks[name] == 'ok' and name in messages:
+            print(f"[✓] {messages[name]()}")
+    
+    if checks['signature'] == 'unverified':
+        option = '--mac-key' if result['signature_type'] == SIG_TYPE_NAMES[SIG_TYPE_HMAC_SHA256] else '--public-key'
+        print(f"[!] {result['signature_type']} signature NOT verified (no {option})")
+        return False
+    if result.get('compressed'):
+        print(f"[✓] LZ package expanded")
+    if result.get('sparse'):
+        print(f"[✓] Sparse package expanded")
     
-    # Pad à 256 bytes (taille RSA-2048)
-    signature = hash2 + (b'\x00' * (SIGNATURE_SIZE - len(hash2)))
+    print(f"\n[✓✓✓] Firmware verification PASSED!")
+    print(f"      Version: {result['version']}")
+    print(f"      Size: {result['size']} bytes")
+    print(f"      Timestamp: {time.ctime(result['timestamp'])}")
     
-    return signature
+    return True
 
 # ============================================================================
-# PACKAGER
+# VÉRIFICATION EN MASSE (verify-many)
 # ============================================================================
 
-def package_firmware(firmware_path, output_path, version="1.0.0"):
+VERIFY_MANY_PATTERN = '*signed*.bin'
+
+
+def collect_signed_files(paths, pattern=VERIFY_MANY_PATTERN):
     """
-    Package le firmware avec métadonnées et signature
+    Résout les arguments de verify-many en liste de fichiers
     
-    Layout final:
-    [Firmware] [Metadata 128B] [Signature 256B] [Reference Hash 32B]
+    - dossier: parcours récursif filtré par `pattern`
+    - glob ('store/**/*.bin'): expansion récursive
+    - fichier: pris tel quel
     """
+    files = []
     
-    print(f"[+] Reading firmware: {firmware_path}")
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(str(p) for p in Path(path).rglob(pattern) if p.is_file()))
+        elif any(c in path for c in '*?['):
+            files.extend(sorted(p for p in glob.glob(path, recursive=True) if os.path.isfile(p)))
+        else:
+            files.append(path)
     
-    # Lit le firmware
-    with open(firmware_path, 'rb') as f:
-        firmware_data = f.read()
+    return files
+
+
+def verify_package_file(path, public_key=None, mac_key=None):
+    """
+    Vérifie un fichier (exécuté dans un process du pool), résultat JSON-sérialisable
     
-    # Vérifie la taille
-    if len(firmware_data) > MAX_FIRMWARE_SIZE:
-        print(f"[!] ERROR: Firmware too large ({len(firmware_data)} bytes > {MAX_FIRMWARE_SIZE} bytes)")
-        return False
+    Toute exception est rapportée comme un fichier en échec: un fichier
+    illisible ou inattendu n'interrompt pas le balayage.
+    """
+    start = time.perf_counter()
     
-    print(f"[+] Firmware size: {len(firmware_data)} bytes")
+    try:
+        with SignedFirmware.open(path, public_key, mac_key) as signed:
+            result = signed.verify()
+    except Exception as e:
+        result = {'valid': False, 'checks': {}, 'error': f"{type(e).__name__}: {e}"}
     
-    # Pad le firmware à 48KB
-    firmware_padded = firmware_data + (b'\xFF' * (MAX_FIRMWARE_SIZE - len(firmware_data)))
+    result = {'path': path, **result}
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def verify_many(files, jobs=None, public_key=None, mac_key=None):
+    """Vérifie les fichiers en parallèle; génère les résultats dans l'ordre"""
+    jobs = jobs or os.cpu_count() or 1
+    verify_file = partial(verify_package_file, public_key=public_key, mac_key=mac_key)
     
-    # Crée les métadonnées
-    print(f"[+] Creating metadata (version {version})...")
-    metadata, crc32, sha256, timestamp = create_metadata(firmware_data, version)
+    if jobs == 1 or len(files) <= 1:
+        yield from map(verify_file, files)
+        return
     
-    print(f"    CRC32:     0x{crc32:08X}")
-    print(f"    SHA-256:   {sha256.hex()}")
-    print(f"    Timestamp: {timestamp} ({time.ctime(timestamp)})")
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(verify_file, files, chunksize=16)
+
+
+def summarize_verification(results, elapsed):
+    """Résumé final: totaux et nombre d'échecs par vérification"""
+    summary = {
+        'total': 0,
+        'passed': 0,
+        'failed': 0,
+        'failures_by_check': {},
+        'elapsed_s': round(elapsed, 3),
+    }
     
-    # Crée la signature
-    print(f"[+] Creating signature...")
-    signature = create_signature(firmware_data)
+    for result in results:
+        summary['total'] += 1
+        if result['valid']:
+            summary['passed'] += 1
+            continue
+        
+        summary['failed'] += 1
+        failed_checks = [n for n, status in result['checks'].items()
+                         if status in ('fail', 'unverified')] or ['io']
+        for name in failed_checks:
+            summary['failures_by_check'][name] = summary['failures_by_check'].get(name, 0) + 1
+    
+    summary['files_per_s'] = round(summary['total'] / elapsed, 1) if elapsed else None
+    return summary
+
+
+def main_verify_many(argv):
+    """firmware_signer.py verify-many PATH... : rapport JSON lines"""
+    parser = argparse.ArgumentParser(
+        prog='firmware_signer.py verify-many',
+        description='Verify many signed firmware packages in parallel (JSON lines report)'
+    )
     
-    # Reference hash (pour vérification bootloader)
-    reference_hash = sha256 + (b'\x00' * (32))  # Pad à 64 bytes si besoin
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        help='Signed packages, directories (searched recursively) or globs'
+    )
     
-    # Package tout ensemble
-    final_package = firmware_padded + metadata + signature + reference_hash
+    parser.add_argument(
+        '--pattern',
+        default=VERIFY_MANY_PATTERN,
+        help=f'File pattern inside directories (default: {VERIFY_MANY_PATTERN})'
+    )
     
-    # Écrit le package
-    print(f"[+] Writing signed firmware: {output_path}")
-    with open(output_path, 'wb') as f:
-        f.write(final_package)
-    
-    # Sauvegarde les infos
-    metadata_json = {
-        "magic": f"0x{FIRMWARE_MAGIC:08X}",
-        "version": version,
-        "size": len(firmware_data),
-        "crc32": f"0x{crc32:08X}",
-        "sha256": sha256.hex(),
-        "timestamp": timestamp,
-        "timestamp_human": time.ctime(timestamp),
-        "signature_type": "double-sha256 (demo)",
-        "total_size": len(final_package)
-    }
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes (default: CPU count)'
+    )
     
-    json_path = output_path.replace('.bin', '_metadata.json')
-    with open(json_path, 'w') as f:
-        json.dump(metadata_json, f, indent=4)
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the JSON lines report to a file (default: stdout)'
+    )
     
-    print(f"[+] Metadata saved: {json_path}")
+    parser.add_argument(
+        '--public-key',
+        metavar='PATH',
+        default=os.environ.get(PUBLIC_KEY_ENV_VAR),
+        help=f'Ed25519 public key for signature checks (default: ${PUBLIC_KEY_ENV_VAR})'
+    )
     
-    # Sauvegarde le hash seul
-    hash_path = output_path.replace('.bin', '.sha256')
-    with open(hash_path, 'w') as f:
-        f.write(sha256.hex())
+    parser.add_argument(
+        '--mac-key',
+        metavar='PATH',
+        default=os.environ.get(MAC_KEY_ENV_VAR),
+        help=f'HMAC-SHA256 key for MAC checks (default: ${MAC_KEY_ENV_VAR})'
+    )
     
-    print(f"[+] SHA-256 saved: {hash_path}")
+    args = parser.parse_args(argv)
+    files = collect_signed_files(args.paths, args.pattern)
+    try:
+        public_key = load_key_file(args.public_key) if args.public_key else None
+        mac_key = load_key_file(args.mac_key) if args.mac_key else None
+    except (OSError, SignatureError) as e:
+        print(f"[!] {e}")
+        return 1
+    
+    out = open(args.output, 'w') if args.output else sys.stdout
+    results = []
+    start = time.perf_counter()
+    
+    try:
+        for result in verify_many(files, args.jobs, public_key, mac_key):
+            results.append(result)
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+        
+        summary = summarize_verification(results, time.perf_counter() - start)
+        out.write(json.dumps({'summary': summary}) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    return 0 if files and summary['failed'] == 0 else 1
+
+# ============================================================================
+# MISE À JOUR DELTA (diff / apply)
+# ============================================================================
+
+def main_diff(argv):
+    """firmware_signer.py diff OLD NEW : package delta (pages de 1KB modifiées)"""
+    parser = argparse.ArgumentParser(
+        prog='firmware_signer.py diff',
+        description='Create a page-granular delta between two signed packages'
+    )
     
-    print(f"\n[✓] Firmware signed successfully!")
-    print(f"    Total size: {len(final_package)} bytes")
-    print(f"    Ready to flash at 0x08002000")
+    parser.add_argument('old', help='Signed package currently on the device')
+    parser.add_argument('new', help='New signed package')
+    parser.add_argument(
+        '-o', '--output',
+        help='Delta package (default: <new>.delta)'
+    )
     
-    return True
+    parser.add_argument(
+        '--public-key',
+        metavar='PATH',
+        default=os.environ.get(PUBLIC_KEY_ENV_VAR),
+        help=f'Ed25519 public key for the signature check (default: ${PUBLIC_KEY_ENV_VAR})'
+    )
+    
+    parser.add_argument(
+        '--mac-key',
+        metavar='PATH',
+        default=os.environ.get(MAC_KEY_ENV_VAR),
+        help=f'HMAC-SHA256 key for the MAC check (default: ${MAC_KEY_ENV_VAR})'
+    )
+    
+    args = parser.parse_args(argv)
+    output = args.output or str(Path(args.new).with_suffix('.delta'))
+    
+    try:
+        public_key = load_key_file(args.public_key) if args.public_key else None
+        mac_key = load_key_file(args.mac_key) if args.mac_key else None
+    except (OSError, SignatureError) as e:
+        print(f"[!] {e}")
+        return 1
+    
+    with open(args.old, 'rb') as f:
+        old_package = f.read()
+    with open(args.new, 'rb') as f:
+        new_package = f.read()
+    
+    try:
+        delta = create_delta(old_package, new_package, public_key=public_key, mac_key=mac_key)
+    except DeltaError as e:
+        print(f"[!] {e}")
+        return 1
+    
+    header, entries = parse_delta(delta)
+    total_pages = -(-header.target_size // header.page_size)
+    
+    with open(output, 'wb') as f:
+        f.write(delta)
+    
+    print(f"[+] Pages changed: {header.count}/{total_pages} "
+          f"({', '.join(str(index) for index, _ in entries) or 'none'})")
+    print(f"[+] Delta: {len(delta)} bytes ({100 * len(delta) / len(new_package):.1f}% of full package)")
+    print(f"[✓] Delta saved: {output}")
+    return 0
+
+
+def main_apply(argv):
+    """firmware_signer.py apply OLD DELTA : reconstruit et vérifie le nouveau package"""
+    parser = argparse.ArgumentParser(
+        prog='firmware_signer.py apply',
+        description='Rebuild a signed package from the old package and a delta'
+    )
+    
+    parser.add_argument('old', help='Signed package the delta was made against')
+    parser.add_argument('delta', help='Delta package')
+    parser.add_argument(
+        '-o', '--output',
+        default='firmware_signed.bin',
+        help='Rebuilt signed package (default: firmware_signed.bin)'
+    )
+    
+    parser.add_argument(
+        '--public-key',
+        metavar='PATH',
+        default=os.environ.get(PUBLIC_KEY_ENV_VAR),
+        help=f'Ed25519 public key for the signature check (default: ${PUBLIC_KEY_ENV_VAR})'
+    )
+    
+    parser.add_argument(
+        '--mac-key',
+        metavar='PATH',
+        default=os.environ.get(MAC_KEY_ENV_VAR),
+        help=f'HMAC-SHA256 key for the MAC check (default: ${MAC_KEY_ENV_VAR})'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        public_key = load_key_file(args.public_key) if args.public_key else None
+        mac_key = load_key_file(args.mac_key) if args.mac_key else None
+    except (OSError, SignatureError) as e:
+        print(f"[!] {e}")
+        return 1
+    
+    with open(args.old, 'rb') as f:
+        old_package = f.read()
+    with open(args.delta, 'rb') as f:
+        delta = f.read()
+    
+    try:
+        new_package = apply_delta(old_package, delta, public_key, mac_key)
+    except DeltaError as e:
+        print(f"[!] {e}")
+        return 1
+    
+    with open(args.output, 'wb') as f:
+        f.write(new_package)
+    
+    print(f"[✓] Package rebuilt and verified: {args.output}")
+    return 0
 
 # ============================================================================
-# VÉRIFICATION
+# CLÉS Ed25519 / HMAC (keygen)
 # ============================================================================
 
-def verify_firmware(signed_firmware_path):
-    """Vérifie un firmware signé"""
+def main_keygen(argv):
+    """firmware_signer.py keygen -o PATH : graine privée (PATH) + clé publique (PATH.pub)"""
+    parser = argparse.ArgumentParser(
+        prog='firmware_signer.py keygen',
+        description='Generate an Ed25519 signing key pair or an HMAC-SHA256 key (hex files)'
+    )
     
-    print(f"[+] Verifying firmware: {signed_firmware_path}")
+    parser.add_argument(
+        '-o', '--output',
+        default=None,
+        help='Private key file; the public key goes to <output>.pub (default: signing_key, mac_key with --mac)'
+    )
     
-    with open(signed_firmware_path, 'rb') as f:
-        data = f.read()
+    parser.add_argument(
+        '--mac',
+        action='store_true',
+        help='Generate a 32-byte HMAC-SHA256 device key instead (no public key)'
+    )
     
-    # Extrait les composants
-    firmware = data[0:MAX_FIRMWARE_SIZE]
-    metadata_bytes = data[MAX_FIRMWARE_SIZE:MAX_FIRMWARE_SIZE + METADATA_SIZE]
-    signature = data[MAX_FIRMWARE_SIZE + METADATA_SIZE:MAX_FIRMWARE_SIZE + METADATA_SIZE + SIGNATURE_SIZE]
-    reference_hash = data[MAX_FIRMWARE_SIZE + METADATA_SIZE + SIGNATURE_SIZE:MAX_FIRMWARE_SIZE + METADATA_SIZE + SIGNATURE_SIZE + 32]
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Overwrite an existing key'
+    )
     
-    # Parse metadata
-    unpacked = struct.unpack('<I I I I 32s I 44s', metadata_bytes)
-    magic, version, size, crc32_stored, sha256_stored, timestamp, _ = unpacked
+    args = parser.parse_args(argv)
+    if args.output is None:
+        args.output = 'mac_key' if args.mac else 'signing_key'
+    
+    if os.path.exists(args.output) and not args.force:
+        print(f"[!] {args.output} already exists (use --force to overwrite)")
+        return 1
+    
+    if args.mac:
+        key = write_mac_key(args.output)
+        print(f"[+] MAC key: {args.output} (shared with the device, keep it out of git)")
+        print(f"    id {key.key_id}")
+        return 0
+    
+    try:
+        key = write_keypair(args.output)
+    except SignatureError as e:
+        print(f"[!] {e}")
+        return 1
+    
+    print(f"[+] Private key: {args.output} (keep it off the device and out of git)")
+    print(f"[+] Public key:  {args.output}.pub")
+    print(f"    {key.public_key.hex()}")
+    return 0
+
+# ============================================================================
+# PACKAGE COMPRESSÉ / SPARSE (expand)
+# ============================================================================
+
+def main_expand(argv):
+    """firmware_signer.py expand PACKAGE : package compressé ou sparse → package plat flashable"""
+    parser = argparse.ArgumentParser(
+        prog='firmware_signer.py expand',
+        description='Expand a compressed or sparse signed package into the flat flashable layout'
+    )
     
-    # Vérifie magic
-    if magic != FIRMWARE_MAGIC:
-        print(f"[!] INVALID MAGIC: 0x{magic:08X} (expected 0x{FIRMWARE_MAGIC:08X})")
-        return False
+    parser.add_argument('package', help='Compressed (--compress) or sparse (--sparse) signed package')
+    parser.add_argument(
+        '-o', '--output',
+        default='firmware_signed.bin',
+        help='Flat signed package (default: firmware_signed.bin)'
+    )
     
-    print(f"[✓] Magic OK")
+    parser.add_argument(
+        '--public-key',
+        metavar='PATH',
+        default=os.environ.get(PUBLIC_KEY_ENV_VAR),
+        help=f'Ed25519 public key for the signature check (default: ${PUBLIC_KEY_ENV_VAR})'
+    )
     
-    # Vérifie taille
-    firmware_actual = firmware[0:size]
+    parser.add_argument(
+        '--mac-key',
+        metavar='PATH',
+        default=os.environ.get(MAC_KEY_ENV_VAR),
+        help=f'HMAC-SHA256 key for the MAC check (default: ${MAC_KEY_ENV_VAR})'
+    )
     
-    # Recalcule CRC32
-    crc32_calc = calculate_crc32(firmware_actual)
-    if crc32_calc != crc32_stored:
-        print(f"[!] CRC32 MISMATCH: 0x{crc32_calc:08X} != 0x{crc32_stored:08X}")
-        return False
+    args = parser.parse_args(argv)
     
-    print(f"[✓] CRC32 OK: 0x{crc32_calc:08X}")
+    try:
+        public_key = load_key_file(args.public_key) if args.public_key else None
+        mac_key = load_key_file(args.mac_key) if args.mac_key else None
+    except (OSError, SignatureError) as e:
+        print(f"[!] {e}")
+        return 1
     
-    # Recalcule SHA-256
-    sha256_calc = calculate_sha256(firmware_actual)
-    if sha256_calc != sha256_stored:
-        print(f"[!] SHA-256 MISMATCH")
-        print(f"    Calculated: {sha256_calc.hex()}")
-        print(f"    Stored:     {sha256_stored.hex()}")
-        return False
+    with open(args.package, 'rb') as f:
+        package = f.read()
     
-    print(f"[✓] SHA-256 OK: {sha256_calc.hex()}")
+    if not (is_compressed_package(package) or is_sparse_package(package)):
+        print(f"[!] Not a compressed or sparse package: {args.package}")
+        return 1
     
-    # Vérifie signature
-    signature_calc = create_signature(firmware_actual)
-    if signature_calc != signature:
-        print(f"[!] SIGNATURE MISMATCH")
-        return False
+    try:
+        flat = expand_package(package)
+    except ValueError as e:
+        print(f"[!] {e}")
+        return 1
     
-    print(f"[✓] Signature OK")
+    result = check_package(flat, public_key, mac_key)
+    if not result['valid']:
+        print(f"[!] Expanded package is not valid: {result['error']}")
+        return 1
     
-    print(f"\n[✓✓✓] Firmware verification PASSED!")
-    print(f"      Version: {(version >> 16) & 0xFF}.{(version >> 8) & 0xFF}.{version & 0xFF}")
-    print(f"      Size: {size} bytes")
-    print(f"      Timestamp: {time.ctime(timestamp)}")
+    with open(args.output, 'wb') as f:
+        f.write(flat)
     
-    return True
+    print(f"[+] Expanded: {len(package)} → {len(flat)} bytes")
+    print(f"[✓] Package verified: {args.output}")
+    return 0
 
 # ============================================================================
 # MAIN
 # ============================================================================
 
-def main():
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    # Sous-commandes (firmware_signer.py <commande> ...)
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+    
     parser = argparse.ArgumentParser(
         description='Sign and package STM32 firmware for Secure Boot'
     )
     
     parser.add_argument(
         'firmware',
+        nargs='?',
         help='Input firmware binary (.bin)'
     )
     
@@ -312,16 +785,143 @@ def main():
         help='Verify an already signed firmware'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '--batch',
+        metavar='MANIFEST',
+        help='Sign every entry of a JSON/CSV manifest (input, output, version) in parallel'
+    )
+    
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes for --batch (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--batch-results',
+        metavar='PATH',
+        help='Batch result manifest (default: <manifest>_results.json)'
+    )
+    
+    parser.add_argument(
+        '--page-hashes',
+        action='store_true',
+        help='Append a per-1KB-page hash table (Merkle root in metadata) for partial verification'
+    )
+    
+    layout = parser.add_mutually_exclusive_group()
+    
+    layout.add_argument(
+        '--compress',
+        action='store_true',
+        help='LZ-compress the firmware (metadata first, streamable; expand before flashing)'
+    )
+    
+    layout.add_argument(
+        '--sparse',
+        action='store_true',
+        help='Drop the erased (0xFF) regions: segment table + data (expand before flashing)'
+    )
+    
+    parser.add_argument(
+        '--crc-mode',
+        choices=list(CRC_MODE_NAMES.values()),
+        default=CRC_MODE_NAMES[CRC_MODE_IEEE],
+        help='Metadata CRC32: ieee (software, zlib) or stm32 (bootloader CRC peripheral) (default: ieee)'
+    )
+    
+    parser.add_argument(
+        '--boot-profile',
+        choices=list(BOOT_PROFILE_NAMES.values()),
+        default=BOOT_PROFILE_NAMES[BOOT_PROFILE_DIAGNOSTIC],
+        help='Boot profile the application was built with (-DBOOT_PROFILE): production skips the LED delays (default: diagnostic)'
+    )
+    
+    parser.add_argument(
+        '--signing-key',
+        metavar='PATH',
+        default=os.environ.get(SIGNING_KEY_ENV_VAR),
+        help=f'Ed25519 private key: sign the metadata instead of the double-SHA placeholder (default: ${SIGNING_KEY_ENV_VAR})'
+    )
+    
+    parser.add_argument(
+        '--public-key',
+        metavar='PATH',
+        default=os.environ.get(PUBLIC_KEY_ENV_VAR),
+        help=f'Ed25519 public key used by --verify (default: ${PUBLIC_KEY_ENV_VAR})'
+    )
+    
+    parser.add_argument(
+        '--mac-key',
+        metavar='PATH',
+        default=os.environ.get(MAC_KEY_ENV_VAR),
+        help=f'HMAC-SHA256 device key: MAC the metadata, or check the MAC with --verify (default: ${MAC_KEY_ENV_VAR})'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        default=os.environ.get(CACHE_ENV_VAR),
+        help=f'Reuse packages already signed for the same firmware/version (default: ${CACHE_ENV_VAR}, disabled if unset)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f'Always re-sign, even if --cache-dir / ${CACHE_ENV_VAR} is set'
+    )
+    
+    args = parser.parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+    
+    if args.signing_key and args.mac_key and not args.verify:
+        parser.error('--signing-key and --mac-key are mutually exclusive')
+    
+    crc_mode = {name: mode for mode, name in CRC_MODE_NAMES.items()}[args.crc_mode]
+    boot_profile = {name: profile for profile, name in BOOT_PROFILE_NAMES.items()}[args.boot_profile]
+    
+    if args.batch:
+        # Mode lot: mêmes options de layout pour toutes les entrées
+        success = run_batch(args.batch, args.batch_results, args.jobs, cache_dir, args.signing_key,
+                            args.mac_key, page_hashes=args.page_hashes, compressed=args.compress,
+                            sparse=args.sparse, crc_mode=crc_mode, boot_profile=boot_profile)
+        return 0 if success else 1
+    
+    if not args.firmware:
+        parser.error('firmware is required (or use --batch)')
     
     if args.verify:
         # Mode vérification
-        success = verify_firmware(args.firmware)
+        try:
+            public_key = load_key_file(args.public_key) if args.public_key else None
+            mac_key = load_mac_key(args.mac_key) if args.mac_key else None
+        except (OSError, SignatureError) as e:
+            print(f"[!] {e}")
+            return 1
+        success = verify_firmware(args.firmware, public_key, mac_key)
         return 0 if success else 1
     else:
         # Mode signature
-        success = package_firmware(args.firmware, args.output, args.version)
+        cache = SigningCache(cache_dir) if cache_dir else None
+        try:
+            signing_key = load_signing_key(args.signing_key) if args.signing_key else None
+            mac_key = load_mac_key(args.mac_key) if args.mac_key else None
+        except (OSError, SignatureError) as e:
+            print(f"[!] {e}")
+            return 1
+        success = package_firmware(args.firmware, args.output, args.version, cache,
+                                   args.page_hashes, args.compress, args.sparse, signing_key,
+                                   mac_key, crc_mode, boot_profile)
         return 0 if success else 1
 
+SUBCOMMANDS = {
+    'verify-many': main_verify_many,
+    'diff': main_diff,
+    'apply': main_apply,
+    'expand': main_expand,
+    'keygen': main_keygen,
+}
+
 if __name__ == '__main__':
     exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+FLASH PLANNER - Reprogrammation minimale de l'application (par page)
+============================================================================
+
+`st-flash write firmware_signed.bin 0x08002000` efface et reprogramme les
+49 pages du package à chaque déploiement. Le planner compare le nouveau
+package au contenu actuel de la flash, page par page (1KB), et ne garde
+que les plages de pages modifiées: une commande st-flash par plage.
+
+Contenu actuel de la flash, au choix:
+    - une relecture du device:  st-flash read app_dump.bin 0x08002000 49568
+    - l'image du dernier flash réussi (.pio/last_flashed.bin, mise à jour
+      par --execute)
+    - une flash effacée (--erased, après st-flash erase): seules les pages
+      non 0xFF sont écrites
+Les pages absentes de la relecture (dump plus court) sont réécrites.
+Un package compressé ou sparse est développé avant la planification.
+
+Usage:
+    python3 tools/flash_planner.py firmware_signed.bin --current app_dump.bin
+    python3 tools/flash_planner.py firmware_signed.bin --execute
+============================================================================
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+from delta_package import diff_pages
+from firmware_image import expand_package, is_compressed_package, is_sparse_package
+from page_hashes import FLASH_PAGE_SIZE
+
+__all__ = [
+    'APPLICATION_ADDRESS', 'LAST_FLASHED_PATH', 'PLAN_DIR', 'FlashWrite',
+    'plan_flash', 'write_plan', 'execute_plan',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+APPLICATION_ADDRESS = 0x08002000
+LAST_FLASHED_PATH = os.path.join('.pio', 'last_flashed.bin')
+PLAN_DIR = os.path.join('.pio', 'flash_plan')
+
+# Plage à écrire: pages [first_page, first_page + page_count) du package
+FlashWrite = namedtuple('FlashWrite', ['address', 'offset', 'length', 'first_page', 'page_count'])
+
+# ============================================================================
+# PLANIFICATION
+# ============================================================================
+
+def plan_flash(image, current=None, address=APPLICATION_ADDRESS,
+               page_size=FLASH_PAGE_SIZE, max_gap=0, erased=False):
+    """
+    Plages de pages à reprogrammer pour passer de `current` à `image`
+    
+    current=None (contenu inconnu): tout le package est écrit, sauf si
+    erased=True (flash effacée: les pages entièrement 0xFF sont déjà bonnes).
+    max_gap: fusionne deux plages séparées par au plus max_gap pages
+    inchangées (une invocation st-flash coûte plus cher qu'une page).
+    """
+    if address % page_size:
+        raise ValueError(f"address 0x{address:08X} is not page aligned")
+    
+    if current is None and erased:
+        current = b'\xFF' * len(image)
+    
+    if current is None:
+        pages = list(range(-(-len(image) // page_size)))
+    else:
+        pages = diff_pages(current, image, page_size)
+    
+    # Regroupe les pages consécutives (ou presque, selon max_gap)
+    ranges = []
+    for page in pages:
+        if ranges and page - ranges[-1][1] <= max_gap + 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    
+    writes = []
+    for first, last in ranges:
+        offset = first * page_size
+        length = min((last + 1) * page_size, len(image)) - offset
+        writes.append(FlashWrite(address + offset, offset, length, first, last - first + 1))
+    
+    return writes
+
+
+def write_plan(image, writes, plan_dir=PLAN_DIR, st_flash='st-flash'):
+    """
+    Écrit un fichier .bin par plage et retourne les commandes st-flash
+    
+    Les fichiers d'un plan précédent sont supprimés.
+    """
+    plan_dir = Path(plan_dir)
+    plan_dir.mkdir(parents=True, exist_ok=True)
+    for stale in plan_dir.glob('write_0x*.bin'):
+        stale.unlink()
+    
+    view = memoryview(image)
+    commands = []
+    
+    for write in writes:
+        chunk_path = plan_dir / f"write_0x{write.address:08X}.bin"
+        chunk_path.write_bytes(view[write.offset:write.offset + write.length])
+        commands.append([st_flash, 'write', str(chunk_path), f"0x{write.address:08X}"])
+    
+    return commands
+
+
+def execute_plan(commands, image_path, last_flashed=LAST_FLASHED_PATH):
+    """
+    Exécute les commandes st-flash dans l'ordre
+    
+    Après un succès, le package devient la référence du prochain plan
+    (last_flashed). En cas d'échec, la référence est supprimée: la flash
+    est dans un état inconnu, le prochain plan réécrira tout.
+    """
+    for command in commands:
+        if subprocess.run(command).returncode != 0:
+            if os.path.exists(last_flashed):
+                os.remove(last_flashed)
+            return False
+    
+    os.makedirs(os.path.dirname(last_flashed) or '.', exist_ok=True)
+    shutil.copyfile(image_path, last_flashed)
+    return True
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Plan (and run) page-minimal st-flash writes for the application'
+    )
+    
+    parser.add_argument(
+        'image',
+        help='Signed package to flash (firmware_signed.bin)'
+    )
+    
+    parser.add_argument(
+        '--current',
+        metavar='DUMP',
+        help='Current flash content read back from the device (default: --last-flashed image)'
+    )
+    
+    parser.add_argument(
+        '--last-flashed',
+        metavar='PATH',
+        default=LAST_FLASHED_PATH,
+        help=f'Reference image updated by --execute (default: {LAST_FLASHED_PATH})'
+    )
+    
+    parser.add_argument(
+        '--erased',
+        action='store_true',
+        help='Flash was erased (st-flash erase): skip all-0xFF pages when no current content is known'
+    )
+    
+    parser.add_argument(
+        '--address',
+        type=lambda value: int(value, 0),
+        default=APPLICATION_ADDRESS,
+        help=f'Flash address of the package (default: 0x{APPLICATION_ADDRESS:08X})'
+    )
+    
+    parser.add_argument(
+        '--max-gap',
+        type=int,
+        default=0,
+        help='Merge ranges separated by at most N unchanged pages (default: 0)'
+    )
+    
+    parser.add_argument(
+        '-o', '--plan-dir',
+        default=PLAN_DIR,
+        help=f'Directory for the per-range .bin files (default: {PLAN_DIR})'
+    )
+    
+    parser.add_argument(
+        '--st-flash',
+        default='st-flash',
+        help='st-flash executable (default: st-flash)'
+    )
+    
+    parser.add_argument(
+        '--execute',
+        action='store_true',
+        help='Run the st-flash commands and record the image as last flashed'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    with open(args.image, 'rb') as f:
+        image = f.read()
+    
+    image_path = args.image
+    if is_compressed_package(image) or is_sparse_package(image):
+        image = expand_package(image)
+        image_path = os.path.join(args.plan_dir, 'expanded.bin')
+        os.makedirs(args.plan_dir, exist_ok=True)
+        with open(image_path, 'wb') as f:
+            f.write(image)
+        print(f"[+] Expanded {args.image}: {len(image)} bytes")
+    
+    current_path = args.current or args.last_flashed
+    current = None
+    if os.path.exists(current_path):
+        with open(current_path, 'rb') as f:
+            current = f.read()
+        print(f"[+] Current flash content: {current_path} ({len(current)} bytes)")
+    elif args.erased:
+        print(f"[+] Erased flash: all-0xFF pages skipped")
+    else:
+        print(f"[!] No current flash content ({current_path}): full write")
+    
+    writes = plan_flash(image, current, args.address, max_gap=args.max_gap, erased=args.erased)
+    commands = write_plan(image, writes, args.plan_dir, args.st_flash)
+    
+    total_pages = -(-len(image) // FLASH_PAGE_SIZE)
+    written_pages = sum(write.page_count for write in writes)
+    print(f"[+] Pages to write: {written_pages}/{total_pages} in {len(writes)} range(s)")
+    for command in commands:
+        print('    ' + ' '.join(command))
+    
+    if not args.execute:
+        return 0
+    
+    if not execute_plan(commands, image_path, args.last_flashed):
+        print("[!] st-flash failed: next plan will rewrite everything")
+        return 1
+    
+    print(f"[✓] Flashed {written_pages} page(s), reference saved: {args.last_flashed}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
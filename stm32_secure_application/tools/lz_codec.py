@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+LZ CODEC - Compression LZSS à petite fenêtre (style heatshrink)
+============================================================================
+
+Codec pensé pour être décodé sur le STM32 (20KB de SRAM): le décodeur ne
+garde que la fenêtre glissante (2^window_bits bytes, 1KB par défaut) et
+quelques bits d'état; il consomme l'entrée par morceaux de n'importe
+quelle taille (UART, OTA) et produit la sortie au fil de l'eau.
+
+Flux de bits (MSB d'abord):
+    1 + byte[8]                        littéral
+    0 + offset-1[W] + longueur-MIN[L]  copie depuis la fenêtre (W bits / L bits)
+Les bits de bourrage du dernier octet sont ignorés: le décodeur s'arrête
+à la taille de sortie annoncée (metadata->size).
+
+Usage:
+    payload = compress(firmware)
+    decoder = LzDecoder(len(firmware))
+    for chunk in chunks(payload):
+        flash_writer(decoder.feed(chunk))
+============================================================================
+"""
+
+__all__ = [
+    'DEFAULT_WINDOW_BITS', 'DEFAULT_LOOKAHEAD_BITS', 'LzError', 'min_match',
+    'compress', 'LzDecoder', 'decompress',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+DEFAULT_WINDOW_BITS = 10  # Fenêtre 1KB = une page de flash
+DEFAULT_LOOKAHEAD_BITS = 4  # Copies de MIN à MIN + 15 bytes
+MAX_CHAIN = 16  # Candidats examinés par position (compromis vitesse / ratio)
+
+WINDOW_BITS_RANGE = range(4, 16)
+LOOKAHEAD_BITS_RANGE = range(3, 9)
+
+
+class LzError(ValueError):
+    """Flux compressé invalide ou tronqué"""
+
+
+def min_match(window_bits, lookahead_bits):
+    """Plus petite copie rentable: moins de bits que les littéraux équivalents"""
+    backref_bits = 1 + window_bits + lookahead_bits
+    length = 1
+    while 9 * length <= backref_bits:
+        length += 1
+    return length
+
+
+def _check_params(window_bits, lookahead_bits):
+    if window_bits not in WINDOW_BITS_RANGE or lookahead_bits not in LOOKAHEAD_BITS_RANGE:
+        raise ValueError(f"unsupported LZ parameters: window_bits={window_bits}, "
+                         f"lookahead_bits={lookahead_bits}")
+
+# ============================================================================
+# COMPRESSION (hôte)
+# ============================================================================
+
+def compress(data, window_bits=DEFAULT_WINDOW_BITS, lookahead_bits=DEFAULT_LOOKAHEAD_BITS):
+    """Compresse `data`; recherche gloutonne par chaînes de hash"""
+    _check_params(window_bits, lookahead_bits)
+    data = bytes(data)
+    window = 1 << window_bits
+    minimum = min_match(window_bits, lookahead_bits)
+    maximum = minimum + (1 << lookahead_bits) - 1
+    
+    out = bytearray()
+    acc = 0
+    nbits = 0
+    heads = {}  # préfixe de `minimum` bytes → positions (plus récente en dernier)
+    size = len(data)
+    i = 0
+    
+    while i < size:
+        best_length = 0
+        best_offset = 0
+        limit = min(maximum, size - i)
+        
+        if limit >= minimum:
+            candidates = heads.get(data[i:i + minimum])
+            if candidates:
+                for position in reversed(candidates[-MAX_CHAIN:]):
+                    offset = i - position
+                    if offset > window:
+                        break
+                    length = minimum
+                    while length < limit and data[position + length] == data[i + length]:
+                        length += 1
+                    if length > best_length:
+                        best_length, best_offset = length, offset
+                        if length == limit:
+                            break
+        
+        if best_length:
+            acc = (acc << (1 + window_bits + lookahead_bits)) \
+                | ((best_offset - 1) << lookahead_bits) | (best_length - minimum)
+            nbits += 1 + window_bits + lookahead_bits
+            step = best_length
+        else:
+            acc = (acc << 9) | 0x100 | data[i]
+            nbits += 9
+            step = 1
+        
+        while nbits >= 8:
+            nbits -= 8
+            out.append((acc >> nbits) & 0xFF)
+        acc &= (1 << nbits) - 1
+        
+        for position in range(i, min(i + step, size - minimum + 1)):
+            chain = heads.setdefault(data[position:position + minimum], [])
+            chain.append(position)
+            if len(chain) > 2 * MAX_CHAIN:
+                del chain[:-MAX_CHAIN]
+        i += step
+    
+    if nbits:
+        out.append((acc << (8 - nbits)) & 0xFF)
+    
+    return bytes(out)
+
+# ============================================================================
+# DÉCOMPRESSION (modèle du décodeur embarqué)
+# ============================================================================
+
+class LzDecoder:
+    """
+    Décodeur en flux à mémoire bornée
+    
+    État = fenêtre circulaire (2^window_bits bytes) + accumulateur de bits
+    (< 32 bits) + compteurs: c'est tout ce qu'un décodeur C doit garder
+    entre deux morceaux d'entrée (voir ram_bytes).
+    """
+    
+    def __init__(self, output_size, window_bits=DEFAULT_WINDOW_BITS,
+                 lookahead_bits=DEFAULT_LOOKAHEAD_BITS):
+        _check_params(window_bits, lookahead_bits)
+        self.output_size = output_size
+        self.window_bits = window_bits
+        self.lookahead_bits = lookahead_bits
+        self.minimum = min_match(window_bits, lookahead_bits)
+        self.produced = 0
+        
+        self._window = bytearray(1 << window_bits)
+        self._mask = (1 << window_bits) - 1
+        self._acc = 0
+        self._nbits = 0
+    
+    @property
+    def done(self):
+        return self.produced == self.output_size
+    
+    @property
+    def ram_bytes(self):
+        """Empreinte RAM équivalente en C: fenêtre + acc/nbits + compteurs (u32)"""
+        return len(self._window) + 4 * 4
+    
+    def feed(self, chunk):
+        """Consomme un morceau de flux compressé; retourne les bytes décodés"""
+        out = bytearray()
+        window = self._window
+        mask = self._mask
+        backref_bits = 1 + self.window_bits + self.lookahead_bits
+        # Copie plus courte qu'un littéral possible (fenêtre 4 bits, lookahead 3 bits: 8 bits)
+        token_bits = min(9, backref_bits)
+        acc, nbits = self._acc, self._nbits
+        
+        for byte in bytes(chunk):
+            if self.done:
+                raise LzError("trailing data after end of stream")
+            
+            acc = (acc << 8) | byte
+            nbits += 8
+            
+            while not self.done and nbits >= token_bits:
+                if (acc >> (nbits - 1)) & 1:
+                    if nbits < 9:
+                        break
+                    nbits -= 9
+                    value = (acc >> nbits) & 0xFF
+                    window[self.produced & mask] = value
+                    out.append(value)
+                    self.produced += 1
+                else:
+                    if nbits < backref_bits:
+                        break
+                    nbits -= backref_bits
+                    token = (acc >> nbits) & ((1 << (backref_bits - 1)) - 1)
+                    offset = (token >> self.lookahead_bits) + 1
+                    length = (token & ((1 << self.lookahead_bits) - 1)) + self.minimum
+                    
+                    if offset > self.produced:
+                        raise LzError(f"back-reference before start of stream at byte {self.produced}")
+                    if self.produced + length > self.output_size:
+                        raise LzError("back-reference past end of output")
+                    
+                    for _ in range(length):
+                        value = window[(self.produced - offset) & mask]
+                        window[self.produced & mask] = value
+                        out.append(value)
+                        self.produced += 1
+                
+                acc &= (1 << nbits) - 1
+        
+        self._acc, self._nbits = acc, nbits
+        return bytes(out)
+
+
+def decompress(payload, output_size, window_bits=DEFAULT_WINDOW_BITS,
+               lookahead_bits=DEFAULT_LOOKAHEAD_BITS):
+    """Décompresse un flux complet; lève LzError s'il est tronqué ou invalide"""
+    decoder = LzDecoder(output_size, window_bits, lookahead_bits)
+    data = decoder.feed(payload)
+    
+    if not decoder.done:
+        raise LzError(f"truncated stream: {decoder.produced}/{output_size} bytes decoded")
+    
+    return data
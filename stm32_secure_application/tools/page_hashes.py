@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+PAGE HASHES - Table de hash par page de flash (arbre de Merkle)
+============================================================================
+
+Le firmware est découpé en pages de 1KB (taille d'une page de flash
+STM32F103). Chaque page a son hash (feuille), et les feuilles sont
+combinées en arbre de Merkle dont la racine est stockée dans les
+métadonnées. Un vérificateur peut alors:
+    - s'arrêter à la première page corrompue (sans hasher tout le firmware)
+    - ne re-vérifier que les pages réécrites après une mise à jour partielle
+
+Hash (séparation de domaine, pas de confusion feuille / nœud):
+    feuille = SHA-256(0x00 || page)
+    nœud    = SHA-256(0x01 || gauche || droite)
+    un nœud sans frère remonte tel quel au niveau supérieur
+
+Table sérialisée (ajoutée après le Reference Hash du package):
+    [magic 'PGHT' u32] [page_size u16] [count u16] [count × 32 bytes]
+============================================================================
+"""
+
+import hashlib
+import struct
+
+__all__ = [
+    'FLASH_PAGE_SIZE', 'PAGE_HASH_SIZE', 'PAGE_TABLE_MAGIC', 'PAGE_TABLE_HEADER',
+    'PAGE_TABLE_HEADER_SIZE', 'page_count', 'page_table_size', 'iter_pages',
+    'hash_page', 'hash_pages', 'merkle_root', 'pack_page_table', 'parse_page_table',
+    'first_bad_page', 'changed_pages',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+FLASH_PAGE_SIZE = 1024  # STM32F103C8: pages de 1KB
+PAGE_HASH_SIZE = 32  # SHA-256
+PAGE_TABLE_MAGIC = 0x54484750  # 'PGHT' (little-endian)
+PAGE_TABLE_HEADER = '<I H H'  # magic, page_size, count
+PAGE_TABLE_HEADER_SIZE = struct.calcsize(PAGE_TABLE_HEADER)  # 8 bytes
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def page_count(size, page_size=FLASH_PAGE_SIZE):
+    """Nombre de pages couvertes par `size` bytes (dernière page partielle comprise)"""
+    return (size + page_size - 1) // page_size
+
+
+def page_table_size(count):
+    """Taille de la table sérialisée pour `count` pages"""
+    return PAGE_TABLE_HEADER_SIZE + count * PAGE_HASH_SIZE
+
+# ============================================================================
+# HASH DES PAGES
+# ============================================================================
+
+def iter_pages(data, page_size=FLASH_PAGE_SIZE):
+    """Découpe `data` en pages (memoryviews, sans copie); la dernière peut être partielle"""
+    view = memoryview(data).cast('B')
+    for offset in range(0, len(view), page_size):
+        yield view[offset:offset + page_size]
+
+
+def hash_page(page):
+    """Feuille de l'arbre pour une page"""
+    digest = hashlib.sha256(_LEAF_PREFIX)
+    digest.update(page)
+    return digest.digest()
+
+
+def hash_pages(data, page_size=FLASH_PAGE_SIZE):
+    """Liste des feuilles (une par page)"""
+    return [hash_page(page) for page in iter_pages(data, page_size)]
+
+
+def merkle_root(leaves):
+    """Racine de l'arbre de Merkle des feuilles (SHA-256 vide si aucune page)"""
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+    
+    level = list(leaves)
+    while len(level) > 1:
+        parents = [
+            hashlib.sha256(_NODE_PREFIX + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            parents.append(level[-1])  # Nœud sans frère: remonte tel quel
+        level = parents
+    
+    return level[0]
+
+# ============================================================================
+# SÉRIALISATION
+# ============================================================================
+
+def pack_page_table(leaves, page_size=FLASH_PAGE_SIZE):
+    """Sérialise la table: en-tête + feuilles"""
+    return struct.pack(PAGE_TABLE_HEADER, PAGE_TABLE_MAGIC, page_size, len(leaves)) + b''.join(leaves)
+
+
+def parse_page_table(buffer, offset=0):
+    """
+    Parse une table sérialisée
+    
+    Retourne (page_size, [feuilles]) ou None si absente / tronquée.
+    """
+    if len(buffer) - offset < PAGE_TABLE_HEADER_SIZE:
+        return None
+    
+    magic, page_size, count = struct.unpack_from(PAGE_TABLE_HEADER, buffer, offset)
+    start = offset + PAGE_TABLE_HEADER_SIZE
+    end = start + count * PAGE_HASH_SIZE
+    
+    if magic != PAGE_TABLE_MAGIC or page_size == 0 or len(buffer) < end:
+        return None
+    
+    leaves = [bytes(buffer[i:i + PAGE_HASH_SIZE]) for i in range(start, end, PAGE_HASH_SIZE)]
+    return page_size, leaves
+
+# ============================================================================
+# VÉRIFICATION
+# ============================================================================
+
+def first_bad_page(data, leaves, pages=None, page_size=FLASH_PAGE_SIZE):
+    """
+    Index de la première page dont le hash ne correspond pas, ou None
+    
+    `pages` limite la vérification à certaines pages (ex: celles réécrites
+    par une mise à jour partielle). La vérification s'arrête à la première
+    page corrompue.
+    """
+    view = memoryview(data).cast('B')
+    indices = range(len(leaves)) if pages is None else sorted(pages)
+    
+    for index in indices:
+        if not 0 <= index < len(leaves):
+            raise IndexError(f"page {index} out of range (0..{len(leaves) - 1})")
+        
+        # Une page tronquée a forcément un autre hash
+        if hash_page(view[index * page_size:(index + 1) * page_size]) != leaves[index]:
+            return index
+    
+    return None
+
+
+def changed_pages(old_leaves, new_leaves):
+    """Pages dont le hash diffère entre deux tables (pages ajoutées ou retirées comprises)"""
+    count = max(len(old_leaves), len(new_leaves))
+    return [
+        index for index in range(count)
+        if index >= len(old_leaves) or index >= len(new_leaves)
+        or old_leaves[index] != new_leaves[index]
+    ]
@@ -3,12 +3,22 @@
 ============================================================================
 Post-Build Script - Signature Automatique du Firmware
 Version Corrigée - Chemins Absolus
+
+La signature se fait dans le process SCons (import de firmware_image),
+sans relancer d'interpréteur Python. Un firmware.bin identique au build
+précédent est servi par le cache de signature (.pio/signing_cache, ou
+le dossier partagé $FIRMWARE_SIGN_CACHE).
+
+Mêmes options que firmware_signer.py, par variables d'environnement:
+$FIRMWARE_SIGNING_KEY (Ed25519), $FIRMWARE_MAC_KEY (HMAC-SHA256) et
+$FIRMWARE_CRC_MODE (ieee ou stm32); toutes font partie de la clé du cache.
 ============================================================================
 """
 
 import os
 import subprocess
 import sys
+import time
 
 # Import PlatformIO environment
 try:
@@ -17,6 +27,109 @@ except:
     print("⚠️  Erreur: Ce script doit être exécuté par PlatformIO")
     sys.exit(1)
 
+# Bibliothèque de signature (tools/firmware_image.py), importée une seule fois
+TOOLS_DIR = os.path.join(env['PROJECT_DIR'], "tools")
+if TOOLS_DIR not in sys.path:
+    sys.path.insert(0, TOOLS_DIR)
+
+try:
+    from firmware_image import (
+        BOOT_PROFILE_DIAGNOSTIC, CRC_MODE_ENV_VAR, CRC_MODE_IEEE, CRC_MODE_NAMES, MAX_FIRMWARE_SIZE,
+        write_package_files,
+    )
+    from signature_backend import MAC_KEY_ENV_VAR, SIGNING_KEY_ENV_VAR, load_mac_key, load_signing_key
+    from signing_cache import CACHE_ENV_VAR, SigningCache
+except ImportError as e:
+    SigningCache = None
+    MAX_FIRMWARE_SIZE = 48 * 1024
+    BOOT_PROFILE_DIAGNOSTIC = 0
+    print(f"⚠️  firmware_image.py / signing_cache.py non importables ({e}): signature désactivée")
+
+# Attente du .bin: délai max et intervalle de polling initial
+BIN_WAIT_TIMEOUT = 2.0
+BIN_WAIT_POLL = 0.001
+
+
+def wait_for_file(path, newer_than=0.0, timeout=BIN_WAIT_TIMEOUT):
+    """
+    Attend qu'un fichier soit prêt: présent, non vide, plus récent que
+    `newer_than` (mtime de l'ELF) et de taille stable entre deux lectures.
+    
+    Retourne la taille du fichier, ou None si le délai est dépassé.
+    """
+    deadline = time.perf_counter() + timeout
+    poll = BIN_WAIT_POLL
+    last_size = None
+    
+    while True:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            st = None
+        
+        if st is not None and st.st_size > 0 and st.st_mtime >= newer_than:
+            if st.st_size == last_size:
+                return st.st_size
+            last_size = st.st_size
+        else:
+            last_size = None
+        
+        if time.perf_counter() >= deadline:
+            return None
+        
+        time.sleep(poll)
+        poll = min(poll * 2, 0.05)
+
+
+def build_boot_profile(env):
+    """
+    Profil de boot du build (-DBOOT_PROFILE=N de build_flags), enregistré
+    dans reserved[41] des métadonnées; diagnostic si non défini.
+    """
+    for define in env.get('CPPDEFINES') or []:
+        if isinstance(define, (tuple, list)):
+            name, value = define[0], (define[1] if len(define) > 1 else None)
+        else:
+            name, _, value = str(define).partition('=')
+        if name == 'BOOT_PROFILE' and value not in (None, ''):
+            return int(value)
+    return BOOT_PROFILE_DIAGNOSTIC
+
+
+def build_crc_mode():
+    """
+    Mode CRC des métadonnées ($FIRMWARE_CRC_MODE, comme --crc-mode de
+    firmware_signer.py); ieee si non défini.
+    """
+    name = os.environ.get(CRC_MODE_ENV_VAR)
+    if not name:
+        return CRC_MODE_IEEE
+    
+    modes = {mode_name: mode for mode, mode_name in CRC_MODE_NAMES.items()}
+    if name not in modes:
+        raise ValueError(f"${CRC_MODE_ENV_VAR}: unknown CRC mode {name!r} "
+                         f"(expected {', '.join(modes)})")
+    return modes[name]
+
+
+class StepTimer:
+    """Mesure la durée de chaque étape du post-build"""
+    
+    def __init__(self):
+        self.steps = []
+        self._start = time.perf_counter()
+        self._last = self._start
+    
+    def lap(self, name):
+        now = time.perf_counter()
+        self.steps.append((name, (now - self._last) * 1000))
+        self._last = now
+    
+    def report(self):
+        total = (time.perf_counter() - self._start) * 1000
+        details = " | ".join(f"{name} {ms:.1f} ms" for name, ms in self.steps)
+        print(f"\n⏱  Post-build: {details} | total {total:.1f} ms")
+
 def sign_firmware_callback(source, target, env):
     """
     Callback exécuté après la compilation
@@ -30,7 +143,8 @@ def sign_firmware_callback(source, target, env):
     elf_path = str(target[0])
     bin_path = os.path.join(build_dir, "firmware.bin")
     signed_path = os.path.join(project_dir, "firmware_signed.bin")
-    signer_script = os.path.join(project_dir, "tools", "firmware_signer.py")
+    version = os.environ.get("FIRMWARE_VERSION", "1.0.0")
+    timer = StepTimer()
     
     print("\n" + "="*70)
     print("🔐 POST-BUILD: Signature du firmware")
@@ -55,6 +169,7 @@ def sign_firmware_callback(source, target, env):
     
     try:
         result = subprocess.run(objcopy_cmd, capture_output=True, text=True)
+        timer.lap("objcopy")
         
         if result.returncode != 0:
             print(f"❌ Erreur lors de la conversion:")
@@ -64,15 +179,6 @@ def sign_firmware_callback(source, target, env):
             return
         
         print(f"✅ Firmware binaire créé: {bin_path}")
-        
-        # Vérifie la taille
-        if os.path.exists(bin_path):
-            bin_size = os.path.getsize(bin_path)
-            print(f"   Taille: {bin_size} bytes ({bin_size/1024:.1f} KB)")
-            
-            if bin_size > 48 * 1024:
-                print(f"⚠️  ATTENTION: Firmware > 48KB (limite: 48KB)")
-                print(f"   Le bootloader occupe 8KB, il reste 48KB pour l'application")
     
     except Exception as e:
         print(f"❌ Erreur lors de la conversion: {e}")
@@ -81,80 +187,91 @@ def sign_firmware_callback(source, target, env):
         print(f"   python3 tools/firmware_signer.py .pio/build/{env['PIOENV']}/firmware.bin -o firmware_signed.bin -v 1.0.0")
         return
     
-    # Étape 2: Vérifie que le script de signature existe
-    print(f"\n[2/3] Vérification du script de signature...")
+    # Étape 2: Attend que firmware.bin soit complet (pas de délai fixe)
+    print(f"\n[2/3] Attente de {os.path.basename(bin_path)}...")
     
-    if not os.path.exists(signer_script):
-        print(f"❌ Script de signature introuvable: {signer_script}")
-        print(f"   Télécharge firmware_signer.py dans tools/")
-        return
-    
-    print(f"✅ Script trouvé: {signer_script}")
-    
-    # Attends que le fichier soit bien fermé
-    import time
-    time.sleep(0.1)
+    elf_mtime = os.path.getmtime(elf_path) if os.path.exists(elf_path) else 0.0
+    bin_size = wait_for_file(bin_path, newer_than=elf_mtime)
+    timer.lap("attente .bin")
     
-    # Vérifie que le fichier existe
-    if not os.path.exists(bin_path):
-        print(f"⚠️  Le fichier {bin_path} n'existe pas encore")
+    if bin_size is None:
+        print(f"⚠️  Le fichier {bin_path} n'est pas prêt après {BIN_WAIT_TIMEOUT:.1f}s")
         print(f"   PlatformIO le créera après ce script")
         print(f"\n⚠️  Signe-le manuellement:")
-        print(f"   python3 tools/firmware_signer.py .pio/build/{env['PIOENV']}/firmware.bin -o firmware_signed.bin -v 1.0.0")
+        print(f"   python3 tools/firmware_signer.py .pio/build/{env['PIOENV']}/firmware.bin -o firmware_signed.bin -v {version}")
         return
     
-    # Étape 3: Signe le firmware
-    print(f"\n[3/3] Signature du firmware...")
+    print(f"✅ Prêt: {bin_size} bytes ({bin_size/1024:.1f} KB)")
     
-    sign_cmd = [
-        sys.executable,
-        signer_script,
-        bin_path,
-        "-o", signed_path,
-        "-v", "1.0.0"
-    ]
+    if bin_size > MAX_FIRMWARE_SIZE:
+        print(f"⚠️  ATTENTION: Firmware > 48KB (limite: 48KB)")
+        print(f"   Le bootloader occupe 8KB, il reste 48KB pour l'application")
+        return
+    
+    # Étape 3: Signe le firmware (dans ce process)
+    print(f"\n[3/3] Signature du firmware (v{version})...")
+    
+    if SigningCache is None:
+        print(f"❌ tools/firmware_image.py ou tools/signing_cache.py introuvable: signature impossible")
+        return
     
     try:
-        result = subprocess.run(sign_cmd, capture_output=True, text=True)
+        cache_dir = os.environ.get(CACHE_ENV_VAR) or os.path.join(project_dir, ".pio", "signing_cache")
+        cache = SigningCache(cache_dir)
         
-        if result.returncode != 0:
-            print(f"❌ Erreur lors de la signature:")
-            print(result.stderr)
-            if result.stdout:
-                print("Output:")
-                print(result.stdout)
-            return
+        with open(bin_path, 'rb') as f:
+            firmware_data = f.read()
         
-        # Affiche l'output du script de signature
-        if result.stdout:
-            print(result.stdout)
+        # Clé Ed25519 optionnelle ($FIRMWARE_SIGNING_KEY), sinon placeholder double SHA-256
+        key_path = os.environ.get(SIGNING_KEY_ENV_VAR)
+        signing_key = load_signing_key(key_path) if key_path else None
         
-        # Vérifie que le fichier signé existe
-        if os.path.exists(signed_path):
-            signed_size = os.path.getsize(signed_path)
-            print(f"\n✅ Firmware signé créé: {signed_path}")
-            print(f"   Taille: {signed_size} bytes ({signed_size/1024:.1f} KB)")
-            
-            print("\n" + "="*70)
-            print("🎉 SIGNATURE RÉUSSIE !")
-            print("="*70)
-            print("\nProchaine étape:")
-            print(f"  st-flash write firmware_signed.bin 0x08002000")
-            print("\nOu avec OpenOCD:")
-            print(f"  openocd -f interface/stlink.cfg -f target/stm32f1x.cfg \\")
-            print(f"      -c \"init\" \\")
-            print(f"      -c \"reset halt\" \\")
-            print(f"      -c \"flash write_image erase firmware_signed.bin 0x08002000\" \\")
-            print(f"      -c \"reset run\" \\")
-            print(f"      -c \"shutdown\"")
-            print("\n" + "="*70 + "\n")
-        else:
-            print(f"❌ Fichier signé non créé: {signed_path}")
+        # Clé HMAC du device optionnelle ($FIRMWARE_MAC_KEY)
+        mac_key_path = os.environ.get(MAC_KEY_ENV_VAR)
+        mac_key = load_mac_key(mac_key_path) if mac_key_path else None
+        
+        final_package, metadata_json, hit = cache.build(firmware_data, version,
+                                                        signing_key=signing_key,
+                                                        mac_key=mac_key,
+                                                        crc_mode=build_crc_mode(),
+                                                        boot_profile=build_boot_profile(env))
+        write_package_files(signed_path, final_package, metadata_json)
+        timer.lap("signature (cache)" if hit else "signature")
+        
+        if hit:
+            print(f"    ♻️  Binaire inchangé: package repris du cache ({cache_dir})")
+        print(f"    CRC32:     {metadata_json['crc32']} ({metadata_json['crc_mode']})")
+        print(f"    SHA-256:   {metadata_json['sha256']}")
+        print(f"    Signature: {metadata_json['signature_type']}")
+        if mac_key is not None:
+            print(f"    MAC key:   id {metadata_json['mac_key_id']}")
+        print(f"    Boot:      {metadata_json['boot_profile']}")
+        
+        signed_size = os.path.getsize(signed_path)
+        print(f"\n✅ Firmware signé créé: {signed_path}")
+        print(f"   Taille: {signed_size} bytes ({signed_size/1024:.1f} KB)")
+        
+        print("\n" + "="*70)
+        print("🎉 SIGNATURE RÉUSSIE !")
+        print("="*70)
+        print("\nProchaine étape:")
+        print(f"  st-flash write firmware_signed.bin 0x08002000")
+        print("\nOu avec OpenOCD:")
+        print(f"  openocd -f interface/stlink.cfg -f target/stm32f1x.cfg \\")
+        print(f"      -c \"init\" \\")
+        print(f"      -c \"reset halt\" \\")
+        print(f"      -c \"flash write_image erase firmware_signed.bin 0x08002000\" \\")
+        print(f"      -c \"reset run\" \\")
+        print(f"      -c \"shutdown\"")
+        print("\n" + "="*70)
     
     except Exception as e:
         print(f"❌ Erreur lors de la signature: {e}")
         import traceback
         traceback.print_exc()
+    
+    finally:
+        timer.report()
 
 # Ajoute le callback post-build
 env.AddPostAction("$BUILD_DIR/${PROGNAME}.elf", sign_firmware_callback)
@@ -63,9 +63,21 @@ def check_vtor_configuration():
         
         return True  # Continue quand même (warning, pas erreur)
 
+# CLI de signature et modules qu'elle importe
+SIGNER_MODULES = (
+    'firmware_signer.py',
+    'firmware_image.py',
+    'page_hashes.py',
+    'signing_cache.py',
+    'delta_package.py',
+    'lz_codec.py',
+    'sparse_image.py',
+    'signature_backend.py',
+)
+
 def check_signer_script():
     """
-    Vérifie que firmware_signer.py existe
+    Vérifie que firmware_signer.py (CLI) et ses modules (tools/) existent
     """
     print("[Pre-Build] Vérification du script de signature...")
     
@@ -74,13 +86,16 @@ def check_signer_script():
     else:
         project_dir = os.getcwd()
     
-    signer_path = os.path.join(project_dir, 'tools', 'firmware_signer.py')
+    missing = [
+        name for name in SIGNER_MODULES
+        if not os.path.exists(os.path.join(project_dir, 'tools', name))
+    ]
     
-    if os.path.exists(signer_path):
-        print("✅ firmware_signer.py trouvé")
+    if not missing:
+        print("✅ firmware_signer.py + modules de signature trouvés")
         return True
     else:
-        print("⚠️  firmware_signer.py manquant dans tools/")
+        print(f"⚠️  {', '.join(missing)} manquant(s) dans tools/")
         print("   La signature automatique ne fonctionnera pas")
         return False
 
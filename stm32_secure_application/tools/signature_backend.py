@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SIGNATURE BACKEND - Signature Ed25519 des packages (remplace le double SHA)
+============================================================================
+
+Le slot Signature[256] du package contenait un double SHA-256 du
+firmware: n'importe qui peut le recalculer. Ed25519 (RFC 8032) signe
+les 96 bytes de métadonnées (qui contiennent le SHA-256 du firmware, sa
+taille, sa version et la racine des pages): la signature (64 bytes) est
+stockée en tête du slot, le reste à zéro, et le type de signature dans
+metadata.reserved (sig_type).
+
+Moteurs:
+    - 'cryptography' (OpenSSL) si le paquet est installé
+    - 'python': implémentation de référence, sans dépendance
+
+La signature exige 'cryptography': le moteur python n'est pas à temps
+constant (la graine fuit par le temps de calcul). Il reste utilisé pour
+la vérification, qui ne manipule que des données publiques. Seuls les
+tests l'autorisent pour signer (FIRMWARE_INSECURE_PYTHON_SIGNING=1).
+
+Coût (moteur python): les clés parsées et leurs tables de multiples
+précalculés sont gardées en cache, une vérification coûte alors ~130
+additions de points, sans doublement. sign_batch() et verify_batch()
+partagent en plus une seule inversion modulaire pour tout le lot
+(astuce de Montgomery).
+
+Clés (fichiers texte, hex): graine privée 32 bytes / clé publique 32 bytes
+    python3 tools/firmware_signer.py keygen -o signing_key
+
+Mode MAC (sig_type hmac-sha256): HMAC-SHA256 des métadonnées avec une
+clé symétrique partagée avec le device (32 bytes, premiers bytes du
+slot). MacKey garde les états SHA-256 après (K ⊕ ipad) et (K ⊕ opad):
+chaque MAC copie ces états au lieu de recompresser les deux blocs de
+clé, comme hmac_sha256_init_key() de crypto_light.c.
+    python3 tools/firmware_signer.py keygen --mac -o mac_key
+============================================================================
+"""
+
+import hashlib
+import hmac
+import os
+from functools import lru_cache
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+        Ed25519PrivateKey, Ed25519PublicKey,
+    )
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+    ENGINE = 'cryptography'
+except ImportError:
+    ENGINE = 'python'
+
+__all__ = [
+    'ENGINE', 'SIG_TYPE_DOUBLE_SHA256', 'SIG_TYPE_ED25519', 'SIG_TYPE_HMAC_SHA256',
+    'SIG_TYPE_NAMES', 'KEY_SIZE', 'ED25519_SIGNATURE_SIZE', 'HMAC_SIZE',
+    'SIGNING_KEY_ENV_VAR', 'PUBLIC_KEY_ENV_VAR', 'MAC_KEY_ENV_VAR', 'INSECURE_SIGNING_ENV_VAR',
+    'SignatureError', 'SigningKey', 'VerifyKey', 'MacKey', 'signing_key', 'verify_key',
+    'mac_key', 'generate_seed', 'load_key_file', 'load_signing_key', 'load_verify_key',
+    'load_mac_key', 'write_keypair', 'write_mac_key', 'sign_batch', 'verify_batch',
+    'mac_batch',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+SIG_TYPE_DOUBLE_SHA256 = 0  # Placeholder historique (démo, falsifiable)
+SIG_TYPE_ED25519 = 1
+SIG_TYPE_HMAC_SHA256 = 2  # Clé symétrique partagée avec le device
+
+SIG_TYPE_NAMES = {
+    SIG_TYPE_DOUBLE_SHA256: 'double-sha256 (demo)',
+    SIG_TYPE_ED25519: 'ed25519',
+    SIG_TYPE_HMAC_SHA256: 'hmac-sha256',
+}
+
+KEY_SIZE = 32
+ED25519_SIGNATURE_SIZE = 64
+HMAC_SIZE = 32
+
+SIGNING_KEY_ENV_VAR = 'FIRMWARE_SIGNING_KEY'
+PUBLIC_KEY_ENV_VAR = 'FIRMWARE_PUBLIC_KEY'
+MAC_KEY_ENV_VAR = 'FIRMWARE_MAC_KEY'
+INSECURE_SIGNING_ENV_VAR = 'FIRMWARE_INSECURE_PYTHON_SIGNING'  # Tests seulement
+
+KEY_CACHE_SIZE = 64  # Clés parsées (et tables) gardées en mémoire
+
+_SHA256_BLOCK_SIZE = 64
+_IPAD = bytes(x ^ 0x36 for x in range(256))  # Tables pour bytes.translate (K ⊕ ipad)
+_OPAD = bytes(x ^ 0x5C for x in range(256))
+
+
+class SignatureError(ValueError):
+    """Clé ou signature mal formée"""
+
+# ============================================================================
+# COURBE Ed25519 (coordonnées étendues, RFC 8032 §5.1)
+# ============================================================================
+
+_P = 2 ** 255 - 19
+_L = 2 ** 252 + 27742317777372353535851937790883648493  # Ordre du groupe
+_D = -121665 * pow(121666, _P - 2, _P) % _P
+_SQRT_M1 = pow(2, (_P - 1) // 4, _P)
+
+_IDENTITY = (0, 1, 1, 0)
+
+_WINDOW_BITS = 4
+_WINDOWS = 256 // _WINDOW_BITS
+
+
+def _add(p, q):
+    x1, y1, z1, t1 = p
+    x2, y2, z2, t2 = q
+    a = (y1 - x1) * (y2 - x2) % _P
+    b = (y1 + x1) * (y2 + x2) % _P
+    c = 2 * t1 * t2 * _D % _P
+    d = 2 * z1 * z2 % _P
+    e, f, g, h = b - a, d - c, d + c, b + a
+    return (e * f % _P, g * h % _P, f * g % _P, e * h % _P)
+
+
+def _double(p):
+    x1, y1, z1, _ = p
+    a = x1 * x1 % _P
+    b = y1 * y1 % _P
+    c = 2 * z1 * z1 % _P
+    h = a + b
+    e = h - (x1 + y1) * (x1 + y1) % _P
+    g = a - b
+    f = c + g
+    return (e * f % _P, g * h % _P, f * g % _P, e * h % _P)
+
+
+def _negate(p):
+    x, y, z, t = p
+    return (-x % _P, y, z, -t % _P)
+
+
+def _recover_x(y, sign):
+    if y >= _P:
+        return None
+    x2 = (y * y - 1) * pow(_D * y * y + 1, _P - 2, _P) % _P
+    if x2 == 0:
+        return None if sign else 0
+    
+    x = pow(x2, (_P + 3) // 8, _P)
+    if (x * x - x2) % _P:
+        x = x * _SQRT_M1 % _P
+    if (x * x - x2) % _P:
+        return None
+    if (x & 1) != sign:
+        x = _P - x
+    return x
+
+
+def _decode_point(data):
+    """32 bytes → point (ou SignatureError si hors courbe)"""
+    if len(data) != KEY_SIZE:
+        raise SignatureError(f"invalid point encoding: {len(data)} bytes")
+    
+    y = int.from_bytes(data, 'little')
+    sign = y >> 255
+    y &= (1 << 255) - 1
+    
+    x = _recover_x(y, sign)
+    if x is None:
+        raise SignatureError("point is not on the curve")
+    return (x, y, 1, x * y % _P)
+
+
+def _encode_points(points):
+    """Encode plusieurs points avec une seule inversion (astuce de Montgomery)"""
+    prefix = []
+    acc = 1
+    for _, _, z, _ in points:
+        prefix.append(acc)
+        acc = acc * z % _P
+    
+    inverse = pow(acc, _P - 2, _P)
+    encoded = [None] * len(points)
+    
+    for index in range(len(points) - 1, -1, -1):
+        x, y, z, _ = points[index]
+        z_inverse = inverse * prefix[index] % _P
+        inverse = inverse * z % _P
+        x, y = x * z_inverse % _P, y * z_inverse % _P
+        encoded[index] = (y | ((x & 1) << 255)).to_bytes(KEY_SIZE, 'little')
+    
+    return encoded
+
+
+def _window_table(point):
+    """
+    Multiples précalculés: table[i][j] = j · 16^i · point
+    
+    64 × 16 points: une multiplication scalaire devient 64 additions,
+    sans aucun doublement.
+    """
+    table = []
+    for _ in range(_WINDOWS):
+        row = [_IDENTITY, point]
+        for _ in range(2, 1 << _WINDOW_BITS):
+            row.append(_add(row[-1], point))
+        table.append(row)
+        point = _add(row[-1], point)  # 16 · point
+    return table
+
+
+def _table_multiply(table, scalar):
+    acc = _IDENTITY
+    for row in table:
+        digit = scalar & 0x0F
+        if digit:
+            acc = _add(acc, row[digit])
+        scalar >>= _WINDOW_BITS
+    return acc
+
+
+@lru_cache(maxsize=1)
+def _base_table():
+    y = 4 * pow(5, _P - 2, _P) % _P
+    x = _recover_x(y, 0)
+    return _window_table((x, y, 1, x * y % _P))
+
+
+def _hash_int(*parts):
+    return int.from_bytes(hashlib.sha512(b''.join(parts)).digest(), 'little')
+
+# ============================================================================
+# CLÉS
+# ============================================================================
+
+class SigningKey:
+    """
+    Clé privée Ed25519 (graine de 32 bytes), parsée une fois
+    
+    Créer via signing_key(seed): l'instance (scalaire, préfixe, clé
+    publique) est gardée en cache pour toute la durée du run.
+    
+    Lève SignatureError sans 'cryptography', sauf si
+    FIRMWARE_INSECURE_PYTHON_SIGNING=1 (tests).
+    """
+    
+    __slots__ = ('seed', 'public_key', '_scalar', '_prefix', '_native')
+    
+    def __init__(self, seed):
+        seed = bytes(seed)
+        if len(seed) != KEY_SIZE:
+            raise SignatureError(f"signing key must be {KEY_SIZE} bytes, got {len(seed)}")
+        
+        self.seed = seed
+        self._scalar = self._prefix = None
+        
+        if ENGINE == 'cryptography':
+            self._native = Ed25519PrivateKey.from_private_bytes(seed)
+            self.public_key = self._native.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+            return
+        
+        if os.environ.get(INSECURE_SIGNING_ENV_VAR) != '1':
+            raise SignatureError("Ed25519 signing requires the 'cryptography' package "
+                                 "(pip install cryptography): the pure-Python engine is not "
+                                 "constant-time")
+        
+        digest = hashlib.sha512(seed).digest()
+        scalar = int.from_bytes(digest[:32], 'little')
+        scalar &= (1 << 254) - 8
+        scalar |= 1 << 254
+        self._scalar = scalar
+        self._prefix = digest[32:]
+        self._native = None
+        self.public_key = _encode_points([_table_multiply(_base_table(), scalar)])[0]
+    
+    def __repr__(self):
+        return f"SigningKey(public={self.public_key.hex()[:16]}...)"
+    
+    def sign(self, message):
+        """Signature Ed25519 de 64 bytes"""
+        return self.sign_batch([message])[0]
+    
+    def sign_batch(self, messages):
+        """Signe plusieurs messages (une inversion pour tout le lot)"""
+        messages = [bytes(message) for message in messages]
+        if self._native is not None:
+            return [self._native.sign(message) for message in messages]
+        
+        nonces = [_hash_int(self._prefix, message) % _L for message in messages]
+        encoded_r = _encode_points([_table_multiply(_base_table(), r) for r in nonces])
+        
+        signatures = []
+        for message, r, r_bytes in zip(messages, nonces, encoded_r):
+            k = _hash_int(r_bytes, self.public_key, message) % _L
+            s = (r + k * self._scalar) % _L
+            signatures.append(r_bytes + s.to_bytes(32, 'little'))
+        return signatures
+
+
+class VerifyKey:
+    """
+    Clé publique Ed25519, parsée une fois avec sa table de multiples
+    
+    Créer via verify_key(public_key): la décompression du point et la
+    table (64 × 16 points) sont amorties sur toutes les vérifications.
+    """
+    
+    __slots__ = ('public_key', '_table', '_native')
+    
+    def __init__(self, public_key):
+        public_key = bytes(public_key)
+        point = _decode_point(public_key)
+        self.public_key = public_key
+        
+        if ENGINE == 'cryptography':
+            self._native = Ed25519PublicKey.from_public_bytes(public_key)
+            self._table = None
+        else:
+            self._native = None
+            self._table = _window_table(_negate(point))  # -A: R' = [S]B + [k](-A)
+    
+    def __repr__(self):
+        return f"VerifyKey({self.public_key.hex()[:16]}...)"
+    
+    def verify(self, message, signature):
+        """True si la signature (64 bytes) est valide pour ce message"""
+        return self.verify_batch([(message, signature)])[0]
+    
+    def verify_batch(self, items):
+        """Vérifie [(message, signature)]; retourne une liste de booléens"""
+        items = [(bytes(message), bytes(signature)) for message, signature in items]
+        
+        if self._native is not None:
+            results = []
+            for message, signature in items:
+                try:
+                    self._native.verify(signature, message)
+                    results.append(True)
+                except InvalidSignature:
+                    results.append(False)
+            return results
+        
+        # R' = [S]B - [k]A doit s'encoder exactement comme R
+        results = [False] * len(items)
+        candidates = []
+        points = []
+        
+        for index, (message, signature) in enumerate(items):
+            if len(signature) != ED25519_SIGNATURE_SIZE:
+                continue
+            s = int.from_bytes(signature[32:], 'little')
+            if s >= _L:
+                continue
+            
+            k = _hash_int(signature[:32], self.public_key, message) % _L
+            points.append(_add(_table_multiply(_base_table(), s), _table_multiply(self._table, k)))
+            candidates.append(index)
+        
+        for index, encoded in zip(candidates, _encode_points(points) if points else []):
+            results[index] = encoded == items[index][1][:32]
+        
+        return results
+
+
+class MacKey:
+    """
+    Clé HMAC-SHA256 avec ses deux états intermédiaires précalculés
+    
+    Créer via mac_key(key): SHA-256 de (K ⊕ ipad) et de (K ⊕ opad) est
+    compressé une seule fois; un MAC copie ces états, soit 2 compressions
+    de moins par message (même résultat que hmac.new(key, msg, 'sha256')).
+    """
+    
+    __slots__ = ('key_id', '_inner', '_outer')
+    
+    def __init__(self, key):
+        key = bytes(key)
+        if not key:
+            raise SignatureError("MAC key must not be empty")
+        
+        # Identifiant public de la clé (cache, metadata.json), pas la clé elle-même
+        self.key_id = hashlib.sha256(b'firmware-mac-key:' + key).digest()[:8].hex()
+        
+        if len(key) > _SHA256_BLOCK_SIZE:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(_SHA256_BLOCK_SIZE, b'\x00')
+        
+        self._inner = hashlib.sha256(key.translate(_IPAD))
+        self._outer = hashlib.sha256(key.translate(_OPAD))
+    
+    def __repr__(self):
+        return f"MacKey(id={self.key_id})"
+    
+    def mac(self, message):
+        """HMAC-SHA256 de 32 bytes"""
+        inner = self._inner.copy()
+        inner.update(message)
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.digest()
+    
+    def mac_batch(self, messages):
+        """MAC de plusieurs messages (mêmes états de départ)"""
+        inner_state, outer_state = self._inner, self._outer
+        tags = []
+        for message in messages:
+            inner = inner_state.copy()
+            inner.update(message)
+            outer = outer_state.copy()
+            outer.update(inner.digest())
+            tags.append(outer.digest())
+        return tags
+    
+    def verify(self, message, tag):
+        """True si le tag (32 bytes) est le MAC du message (comparaison à temps constant)"""
+        return hmac.compare_digest(self.mac(message), bytes(tag))
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _cached_signing_key(seed):
+    return SigningKey(seed)
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _cached_verify_key(public_key):
+    return VerifyKey(public_key)
+
+
+def signing_key(key):
+    """SigningKey (en cache) depuis une graine de 32 bytes ou une SigningKey"""
+    return key if isinstance(key, SigningKey) else _cached_signing_key(bytes(key))
+
+
+def verify_key(key):
+    """VerifyKey (en cache) depuis 32 bytes de clé publique ou une VerifyKey"""
+    return key if isinstance(key, VerifyKey) else _cached_verify_key(bytes(key))
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def _cached_mac_key(key):
+    return MacKey(key)
+
+
+def mac_key(key):
+    """MacKey (en cache, états ipad/opad précalculés) depuis des bytes ou une MacKey"""
+    return key if isinstance(key, MacKey) else _cached_mac_key(bytes(key))
+
+
+def generate_seed():
+    return os.urandom(KEY_SIZE)
+
+# ============================================================================
+# FICHIERS DE CLÉS
+# ============================================================================
+
+def load_key_file(path):
+    """Lit une clé de 32 bytes: fichier texte hex (64 caractères) ou binaire brut"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    if len(data) == KEY_SIZE:
+        return data
+    
+    try:
+        key = bytes.fromhex(data.decode('ascii').strip())
+    except (UnicodeDecodeError, ValueError):
+        raise SignatureError(f"{path}: not a hex or raw {KEY_SIZE}-byte key") from None
+    
+    if len(key) != KEY_SIZE:
+        raise SignatureError(f"{path}: key must be {KEY_SIZE} bytes, got {len(key)}")
+    return key
+
+
+def load_signing_key(path):
+    return signing_key(load_key_file(path))
+
+
+def load_verify_key(path):
+    return verify_key(load_key_file(path))
+
+
+def load_mac_key(path):
+    return mac_key(load_key_file(path))
+
+
+def _write_secret(path, key):
+    """Écrit une clé secrète en hex, lisible par le propriétaire seulement"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(key.hex() + '\n')
+
+
+def write_keypair(path, seed=None):
+    """
+    Écrit la graine privée (path, mode 0600) et la clé publique (path.pub)
+    
+    Retourne la SigningKey.
+    """
+    key = signing_key(seed if seed is not None else generate_seed())
+    _write_secret(path, key.seed)
+    
+    with open(f"{path}.pub", 'w') as f:
+        f.write(key.public_key.hex() + '\n')
+    
+    return key
+
+
+def write_mac_key(path, key=None):
+    """Écrit une clé MAC de 32 bytes (path, mode 0600); retourne la MacKey"""
+    key = bytes(key) if key is not None else generate_seed()
+    _write_secret(path, key)
+    return mac_key(key)
+
+# ============================================================================
+# LOTS
+# ============================================================================
+
+def sign_batch(key, messages):
+    """Signe une liste de messages avec la même clé"""
+    return signing_key(key).sign_batch(messages)
+
+
+def verify_batch(items):
+    """
+    Vérifie [(public_key, message, signature)] en regroupant par clé
+    
+    Retourne une liste de booléens (dans l'ordre des entrées). Une clé
+    publique mal formée invalide seulement ses propres entrées.
+    """
+    results = [False] * len(items)
+    groups = {}
+    for index, (public_key, message, signature) in enumerate(items):
+        key = public_key.public_key if isinstance(public_key, VerifyKey) else bytes(public_key)
+        groups.setdefault(key, []).append(index)
+    
+    for public_key, indices in groups.items():
+        try:
+            key = verify_key(public_key)
+        except SignatureError:
+            continue
+        
+        verdicts = key.verify_batch([items[index][1:] for index in indices])
+        for index, verdict in zip(indices, verdicts):
+            results[index] = verdict
+    
+    return results
+
+
+def mac_batch(key, messages):
+    """MAC HMAC-SHA256 d'une liste de messages avec la même clé"""
+    return mac_key(key).mac_batch(messages)
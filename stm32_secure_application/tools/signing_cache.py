@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SIGNING CACHE - Cache adressé par contenu des packages signés
+============================================================================
+
+Un build PlatformIO re-signe firmware.bin à chaque fois, même quand le
+binaire est identique octet pour octet au build précédent (changement de
+commentaire, de test...). Ce cache garde les packages déjà produits:
+
+    clé = SHA-256(firmware brut) + version + profil de layout (+ options)
+
+Un hit réécrit le package (et ses fichiers annexes) tel quel, avec le
+timestamp d'origine: le résultat est reproductible. Avant d'être servie,
+l'entrée est confrontée au firmware d'entrée (octets du firmware et
+bourrage, Reference Hash, JSON) puis vérifiée par check_package() avec
+la clé de vérification (signature Ed25519 / MAC): une entrée qui ne
+correspond pas (dossier partagé altéré, collision) est supprimée et
+compte comme un miss.
+
+Stockage (partageable entre nœuds de build via FIRMWARE_SIGN_CACHE):
+    <cache>/<2 premiers hex>/<clé>.bin   package signé complet
+    <cache>/<2 premiers hex>/<clé>.json  métadonnées (xxx_metadata.json)
+
+Éviction LRU: le mtime d'une entrée est rafraîchi à chaque hit; prune()
+supprime les entrées plus vieilles que max_age puis les moins récemment
+utilisées jusqu'à repasser sous max_bytes.
+
+Usage:
+    cache = SigningCache('.pio/signing_cache')
+    hit = cache.sign_file('firmware.bin', 'firmware_signed.bin', '1.0.0')
+============================================================================
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from firmware_image import (
+    BOOT_PROFILE_DIAGNOSTIC, BOOT_PROFILE_NAMES, CRC_MODE_IEEE, CRC_MODE_NAMES, METADATA_FORMAT,
+    MAX_FIRMWARE_SIZE, PACKAGE_SIZE, REFERENCE_HASH_OFFSET, REFERENCE_HASH_SIZE, FirmwareImage,
+    check_package, expand_package, is_compressed_package, is_sparse_package, parse_version,
+    write_package_files,
+)
+from signature_backend import mac_key as load_mac_key, signing_key as load_key
+
+__all__ = [
+    'CACHE_ENV_VAR', 'CACHE_FORMAT', 'DEFAULT_PROFILE',
+    'DEFAULT_MAX_BYTES', 'DEFAULT_MAX_AGE', 'PRUNE_EVERY',
+    'default_cache_dir', 'cache_key', 'SigningCache',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+CACHE_ENV_VAR = 'FIRMWARE_SIGN_CACHE'  # Dossier partagé (build farm)
+CACHE_FORMAT = 3  # À incrémenter si le contenu du package change à layout égal
+
+# Profil du layout actuel: un changement de format invalide toutes les clés
+DEFAULT_PROFILE = f"flat:{PACKAGE_SIZE}:{METADATA_FORMAT}"
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # ~5000 packages de 48KB
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 jours sans hit
+PRUNE_EVERY = 64  # prune() parcourt tout le dossier: pas à chaque miss
+
+
+def default_cache_dir():
+    """Dossier du cache: $FIRMWARE_SIGN_CACHE ou ~/.cache/stm32_firmware_signer"""
+    return os.environ.get(CACHE_ENV_VAR) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'stm32_firmware_signer')
+
+
+def cache_key(firmware_sha256, version, profile=DEFAULT_PROFILE):
+    """Clé d'une entrée (hex) à partir du SHA-256 du firmware brut"""
+    if isinstance(firmware_sha256, bytes):
+        firmware_sha256 = firmware_sha256.hex()
+    
+    parse_version(version)  # Valide "X.Y.Z" avant d'en faire une clé
+    material = f"{CACHE_FORMAT}\0{firmware_sha256}\0{version}\0{profile}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _matches_firmware(package, metadata_json, firmware_data, public_key=None, mac_key=None):
+    """
+    True si le package (plat, compressé ou sparse) a été signé pour `firmware_data`
+    
+    Compare le firmware et son bourrage 0xFF, le Reference Hash et le JSON,
+    puis vérifie le package complet (CRC, SHA-256, pages, signature).
+    """
+    digest = hashlib.sha256(firmware_data).digest()
+    if metadata_json.get('size') != len(firmware_data) or metadata_json.get('sha256') != digest.hex():
+        return False
+    
+    try:
+        flat = (expand_package(package)
+                if is_compressed_package(package) or is_sparse_package(package) else package)
+    except ValueError:
+        return False
+    
+    padding = MAX_FIRMWARE_SIZE - len(firmware_data)
+    reference_hash = digest + b'\x00' * (REFERENCE_HASH_SIZE - len(digest))
+    return (len(flat) >= PACKAGE_SIZE and padding >= 0
+            and flat[:len(firmware_data)] == firmware_data
+            and flat[len(firmware_data):MAX_FIRMWARE_SIZE] == b'\xFF' * padding
+            and flat[REFERENCE_HASH_OFFSET:PACKAGE_SIZE] == reference_hash
+            and check_package(flat, public_key, mac_key)['valid'])
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+class SigningCache:
+    """
+    Cache local (ou partagé) de packages signés
+    
+    Les écritures passent par un fichier temporaire + os.replace: plusieurs
+    process (pool --batch, nœuds de build) peuvent partager le même dossier.
+    """
+    
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE,
+                 profile=DEFAULT_PROFILE):
+        self.root = Path(root or default_cache_dir())
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.profile = profile
+        self.hits = 0
+        self.misses = 0
+        self._puts_before_prune = 0  # Premier put d'un process: prune
+    
+    def __repr__(self):
+        return f"SigningCache({str(self.root)!r}, hits={self.hits}, misses={self.misses})"
+    
+    def key(self, firmware_data, version, page_hashes=False, compressed=False, sparse=False,
+            public_key=None, mac_key_id=None, crc_mode=CRC_MODE_IEEE,
+            boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+        profile = (self.profile + ('+pages' if page_hashes else '') + ('+lz' if compressed else '')
+                   + ('+sparse' if sparse else '')
+                   + (f'+ed25519:{bytes(public_key).hex()}' if public_key is not None else '')
+                   + (f'+hmac:{mac_key_id}' if mac_key_id is not None else '')
+                   + (f'+crc:{CRC_MODE_NAMES[crc_mode]}' if crc_mode != CRC_MODE_IEEE else '')
+                   + (f'+boot:{BOOT_PROFILE_NAMES[boot_profile]}'
+                      if boot_profile != BOOT_PROFILE_DIAGNOSTIC else ''))
+        return cache_key(hashlib.sha256(firmware_data).digest(), version, profile)
+    
+    def _paths(self, key):
+        folder = self.root / key[:2]
+        return folder / f"{key}.bin", folder / f"{key}.json"
+    
+    def get(self, key, firmware_data=None, public_key=None, mac_key=None):
+        """
+        Retourne (package, metadata_json) ou None; un hit rafraîchit l'entrée
+        
+        Avec `firmware_data`, une entrée qui ne contient pas ce firmware ou
+        dont la vérification échoue (public_key / mac_key pour une
+        signature Ed25519 / HMAC) est supprimée et traitée comme un miss.
+        """
+        package_path, json_path = self._paths(key)
+        
+        try:
+            package = package_path.read_bytes()
+            with open(json_path) as f:
+                metadata_json = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if len(package) != metadata_json.get('total_size'):
+            return None  # Entrée tronquée
+        
+        if firmware_data is not None and not _matches_firmware(
+                package, metadata_json, firmware_data, public_key, mac_key):
+            self.remove(key)
+            return None
+        
+        now = time.time()
+        for path in (package_path, json_path):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        
+        return package, metadata_json
+    
+    def _write_atomic(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    
+    def put(self, key, package, metadata_json):
+        """Ajoute une entrée (le .json en dernier: il marque l'entrée complète)"""
+        package_path, json_path = self._paths(key)
+        package_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._write_atomic(package_path, bytes(package))
+        self._write_atomic(json_path, json.dumps(metadata_json, indent=4).encode())
+    
+    def entries(self):
+        """Liste [(last_used, size, key)] des entrées complètes"""
+        entries = []
+        if not self.root.is_dir():
+            return entries
+        
+        for json_path in self.root.glob('??/*.json'):
+            package_path = json_path.with_suffix('.bin')
+            try:
+                json_stat = json_path.stat()
+                size = json_stat.st_size + package_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((json_stat.st_mtime, size, json_path.stem))
+        
+        return entries
+    
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+    
+    def remove(self, key):
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def prune(self, now=None):
+        """Éviction par âge puis LRU par taille; retourne le nombre d'entrées supprimées"""
+        now = time.time() if now is None else now
+        entries = sorted(self.entries())  # Moins récemment utilisées d'abord
+        removed = 0
+        total = sum(size for _, size, _ in entries)
+        
+        for last_used, size, key in entries:
+            expired = self.max_age is not None and now - last_used > self.max_age
+            oversized = self.max_bytes is not None and total > self.max_bytes
+            if not (expired or oversized):
+                continue
+            
+            self.remove(key)
+            total -= size
+            removed += 1
+        
+        return removed
+    
+    def clear(self):
+        for _, _, key in self.entries():
+            self.remove(key)
+    
+    def build(self, firmware_data, version="1.0.0", page_hashes=False, compressed=False,
+              sparse=False, signing_key=None, mac_key=None, crc_mode=CRC_MODE_IEEE,
+              boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+        """
+        Package signé via le cache
+        
+        Les packages signés en Ed25519 sont indexés par clé publique, les
+        packages HMAC par identifiant de clé (MacKey.key_id), le mode CRC
+        et le profil de boot font partie du profil.
+        Retourne (final_package, metadata_json, hit)
+        """
+        if signing_key is not None:
+            signing_key = load_key(signing_key)
+        if mac_key is not None:
+            mac_key = load_mac_key(mac_key)
+        public_key = None if signing_key is None else signing_key.public_key
+        mac_key_id = None if mac_key is None else mac_key.key_id
+        key = self.key(firmware_data, version, page_hashes, compressed, sparse, public_key,
+                       mac_key_id, crc_mode, boot_profile)
+        cached = self.get(key, firmware_data, public_key, mac_key)
+        
+        if cached is not None:
+            self.hits += 1
+            return cached[0], cached[1], True
+        
+        self.misses += 1
+        image = FirmwareImage(firmware_data, version, page_hashes=page_hashes,
+                              compressed=compressed, sparse=sparse, signing_key=signing_key,
+                              mac_key=mac_key, crc_mode=crc_mode, boot_profile=boot_profile)
+        package, metadata_json = image.package(), image.metadata_json()
+        
+        try:
+            self.put(key, package, metadata_json)
+            
+            if self._puts_before_prune == 0:
+                self.prune()
+                self._puts_before_prune = PRUNE_EVERY
+            self._puts_before_prune -= 1
+        except OSError:
+            pass  # Cache en lecture seule / plein: on signe quand même
+        
+        return package, metadata_json, False
+    
+    def sign_file(self, firmware_path, output_path, version="1.0.0", page_hashes=False,
+                  compressed=False, sparse=False, signing_key=None, mac_key=None,
+                  crc_mode=CRC_MODE_IEEE, boot_profile=BOOT_PROFILE_DIAGNOSTIC):
+        """Signe firmware_path vers output_path; retourne True sur un hit"""
+        with open(firmware_path, 'rb') as f:
+            firmware_data = f.read()
+        
+        package, metadata_json, hit = self.build(firmware_data, version, page_hashes, compressed,
+                                                 sparse, signing_key, mac_key, crc_mode,
+                                                 boot_profile)
+        write_package_files(output_path, package, metadata_json)
+        return hit
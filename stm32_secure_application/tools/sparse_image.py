@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SPARSE IMAGE - Image de flash sans les zones effacées (table de segments)
+============================================================================
+
+Un package signé fait toujours 49568 bytes, même pour un firmware de
+16KB: le reste de la zone applicative est du bourrage 0xFF. Or une flash
+effacée se lit déjà 0xFF. Le format sparse ne garde que les segments
+utiles; les trous (0xFF) sont implicites et recréés à l'expansion.
+
+Format (little-endian):
+    [En-tête 12B]  magic 'FWSP' u32, format u16, count u16, image_size u32
+    [count × (offset u32, length u32)]   segments croissants, disjoints
+    [données des segments, concaténées]
+    [SHA-256 de l'image développée (32B)]
+
+Le SHA-256 final couvre l'image plate: une table ou des données
+corrompues sont détectées à l'expansion, quel que soit l'endroit.
+L'image développée ne dépasse jamais la zone applicative (56KB à partir
+de 0x08002000): l'en-tête est vérifié avant toute allocation.
+
+Usage:
+    sparse = create_sparse(open('firmware_signed.bin', 'rb').read())
+    flat = expand_sparse(sparse)
+============================================================================
+"""
+
+import hashlib
+import re
+import struct
+from collections import namedtuple
+
+__all__ = [
+    'SPARSE_MAGIC', 'SPARSE_FORMAT_VERSION', 'SPARSE_HEADER', 'SPARSE_HEADER_SIZE',
+    'SPARSE_SEGMENT', 'SPARSE_SEGMENT_SIZE', 'SPARSE_MIN_GAP', 'SPARSE_MAX_IMAGE_SIZE', 'ERASED_BYTE',
+    'SparseError', 'SparseHeader', 'find_segments', 'create_sparse', 'is_sparse',
+    'parse_sparse', 'expand_sparse',
+]
+
+# ============================================================================
+# CONSTANTES
+# ============================================================================
+
+SPARSE_MAGIC = 0x50535746  # 'FWSP' (little-endian)
+SPARSE_FORMAT_VERSION = 1
+SPARSE_HEADER = '<I H H I'  # magic, format, count, image_size
+SPARSE_HEADER_SIZE = struct.calcsize(SPARSE_HEADER)  # 12 bytes
+SPARSE_SEGMENT = '<I I'  # offset, length
+SPARSE_SEGMENT_SIZE = struct.calcsize(SPARSE_SEGMENT)
+SPARSE_DIGEST_SIZE = 32
+SPARSE_MAX_IMAGE_SIZE = 56 * 1024  # Zone FLASH du linker applicatif (package + table de pages)
+
+ERASED_BYTE = 0xFF
+SPARSE_MIN_GAP = 32  # Trou plus court: moins cher de garder les 0xFF qu'une entrée de table
+SEGMENT_ALIGN = 4  # Programmation flash par mots: segments alignés sur 4 bytes
+
+SparseHeader = namedtuple('SparseHeader', ['magic', 'format', 'count', 'image_size'])
+
+
+class SparseError(ValueError):
+    """Image sparse invalide, tronquée ou corrompue"""
+
+# ============================================================================
+# CRÉATION
+# ============================================================================
+
+def find_segments(image, min_gap=SPARSE_MIN_GAP, align=SEGMENT_ALIGN):
+    """
+    Segments non effacés de `image`: liste de (offset, length)
+    
+    Un trou est une suite d'au moins `min_gap` bytes 0xFF; ses bornes sont
+    ramenées sur `align` (les 0xFF hors alignement restent dans les segments).
+    """
+    image = bytes(image)
+    gaps = re.finditer(re.escape(bytes([ERASED_BYTE])) + b'{%d,}' % min_gap, image)
+    
+    segments = []
+    start = 0
+    for gap in gaps:
+        gap_start = -(-gap.start() // align) * align
+        gap_end = gap.end() // align * align if gap.end() < len(image) else gap.end()
+        if gap_end - gap_start < min_gap:
+            continue
+        if gap_start > start:
+            segments.append((start, gap_start - start))
+        start = gap_end
+    
+    if start < len(image):
+        segments.append((start, len(image) - start))
+    
+    return segments
+
+
+def create_sparse(image, min_gap=SPARSE_MIN_GAP, align=SEGMENT_ALIGN):
+    """Image plate → image sparse"""
+    view = memoryview(image).cast('B')
+    if len(view) > SPARSE_MAX_IMAGE_SIZE:
+        raise SparseError(f"image too large: {len(view)} > {SPARSE_MAX_IMAGE_SIZE} bytes")
+    segments = find_segments(view, min_gap, align)
+    
+    parts = [struct.pack(SPARSE_HEADER, SPARSE_MAGIC, SPARSE_FORMAT_VERSION,
+                         len(segments), len(view))]
+    parts.extend(struct.pack(SPARSE_SEGMENT, offset, length) for offset, length in segments)
+    parts.extend(view[offset:offset + length] for offset, length in segments)
+    parts.append(hashlib.sha256(view).digest())
+    
+    return b''.join(parts)
+
+# ============================================================================
+# EXPANSION
+# ============================================================================
+
+def is_sparse(buffer):
+    """True si le buffer commence par l'en-tête sparse"""
+    return (len(buffer) >= SPARSE_HEADER_SIZE
+            and struct.unpack_from('<I', buffer)[0] == SPARSE_MAGIC)
+
+
+def parse_sparse(sparse):
+    """
+    Vérifie la structure de l'image sparse et la découpe
+    
+    Retourne (SparseHeader, [(offset, memoryview des données)]). Le
+    SHA-256 de l'image est vérifié par expand_sparse().
+    """
+    sparse = memoryview(sparse).cast('B')
+    
+    if len(sparse) < SPARSE_HEADER_SIZE + SPARSE_DIGEST_SIZE:
+        raise SparseError(f"truncated sparse image: {len(sparse)} bytes")
+    
+    header = SparseHeader(*struct.unpack_from(SPARSE_HEADER, sparse))
+    if header.magic != SPARSE_MAGIC:
+        raise SparseError(f"invalid sparse magic: 0x{header.magic:08X}")
+    if header.format != SPARSE_FORMAT_VERSION:
+        raise SparseError(f"unsupported sparse format: {header.format}")
+    if header.image_size > SPARSE_MAX_IMAGE_SIZE:
+        raise SparseError(f"image too large: {header.image_size} > {SPARSE_MAX_IMAGE_SIZE} bytes")
+    
+    table_end = SPARSE_HEADER_SIZE + header.count * SPARSE_SEGMENT_SIZE
+    if table_end > len(sparse) - SPARSE_DIGEST_SIZE:
+        raise SparseError("truncated segment table")
+    
+    segments = []
+    data_offset = table_end
+    previous_end = 0
+    
+    for index in range(header.count):
+        offset, length = struct.unpack_from(
+            SPARSE_SEGMENT, sparse, SPARSE_HEADER_SIZE + index * SPARSE_SEGMENT_SIZE)
+        
+        if offset < previous_end or offset + length > header.image_size:
+            raise SparseError(f"invalid segment {index}: 0x{offset:X}+{length}")
+        if data_offset + length > len(sparse) - SPARSE_DIGEST_SIZE:
+            raise SparseError(f"truncated data for segment {index}")
+        
+        segments.append((offset, sparse[data_offset:data_offset + length]))
+        data_offset += length
+        previous_end = offset + length
+    
+    if data_offset != len(sparse) - SPARSE_DIGEST_SIZE:
+        raise SparseError("trailing data in sparse image")
+    
+    return header, segments
+
+
+def expand_sparse(sparse):
+    """
+    Image sparse → image plate (trous remplis de 0xFF)
+    
+    Lève SparseError si la structure est invalide ou si le SHA-256 de
+    l'image reconstruite ne correspond pas.
+    """
+    header, segments = parse_sparse(sparse)
+    
+    image = bytearray(bytes([ERASED_BYTE]) * header.image_size)
+    for offset, data in segments:
+        image[offset:offset + len(data)] = data
+    
+    if hashlib.sha256(image).digest() != memoryview(sparse).cast('B')[-SPARSE_DIGEST_SIZE:]:
+        raise SparseError("expanded image does not match its SHA-256")
+    
+    return bytes(image)
@@ -0,0 +1,55 @@
+/**
+ * ============================================================================
+ * CRC32 DU BOOTLOADER (partagé avec test/bindings/crypto_test.c)
+ * ============================================================================
+ */
+
+#include <string.h>
+#include "crc32.h"
+
+// Accès à l'unité CRC: registres du STM32F1, émulés par crc_unit_* en test
+#ifdef TEST_BUILD
+void crc_unit_reset(void);
+void crc_unit_write(uint32_t word);
+uint32_t crc_unit_read(void);
+#define CRC_UNIT_RESET()    crc_unit_reset()
+#define CRC_UNIT_WRITE(w)   crc_unit_write(w)
+#define CRC_UNIT_READ()     crc_unit_read()
+#else
+#include "stm32f1xx_hal.h"
+#define CRC_UNIT_RESET()    do { __HAL_RCC_CRC_CLK_ENABLE(); CRC->CR = CRC_CR_RESET; } while (0)
+#define CRC_UNIT_WRITE(w)   (CRC->DR = (w))
+#define CRC_UNIT_READ()     (CRC->DR)
+#endif
+
+uint32_t Calculate_CRC32(const uint8_t *data, uint32_t length) {
+    uint32_t crc = 0xFFFFFFFF;
+    for (uint32_t i = 0; i < length; i++) {
+        crc ^= data[i];
+        for (uint8_t j = 0; j < 8; j++) {
+            crc = (crc & 1) ? ((crc >> 1) ^ 0xEDB88320) : (crc >> 1);
+        }
+    }
+    return ~crc;
+}
+
+// Un mot par écriture dans CRC->DR (~4 cycles au lieu de ~8 par bit):
+// 1-3 bytes de fin complétés par 0xFF, comme une page effacée
+uint32_t Calculate_CRC32_HW(const uint8_t *data, uint32_t length) {
+    CRC_UNIT_RESET();
+    
+    uint32_t words = length / 4;
+    for (uint32_t i = 0; i < words; i++) {
+        uint32_t word;
+        memcpy(&word, data + 4 * i, 4);
+        CRC_UNIT_WRITE(word);
+    }
+    
+    if (length & 3) {
+        uint32_t last = 0xFFFFFFFF;
+        memcpy(&last, data + 4 * words, length & 3);
+        CRC_UNIT_WRITE(last);
+    }
+    
+    return CRC_UNIT_READ();
+}
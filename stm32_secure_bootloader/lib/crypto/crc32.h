@@ -0,0 +1,18 @@
+/**
+ * ============================================================================
+ * CRC32 DU BOOTLOADER (champ crc32 des métadonnées)
+ * ============================================================================
+ */
+
+#ifndef CRC32_H
+#define CRC32_H
+
+#include <stdint.h>
+
+// CRC_MODE_IEEE: logiciel, identique à zlib.crc32
+uint32_t Calculate_CRC32(const uint8_t *data, uint32_t length);
+
+// CRC_MODE_STM32: unité CRC matérielle (CRC-32/MPEG-2 par mots)
+uint32_t Calculate_CRC32_HW(const uint8_t *data, uint32_t length);
+
+#endif // CRC32_H
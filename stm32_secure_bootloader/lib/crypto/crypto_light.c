@@ -31,11 +31,26 @@ static const uint32_t k[64] = {
     0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
 };
 
+// Lecture d'un mot big-endian: avec GCC (little-endian), un seul LDR
+// (accès non aligné toléré par le Cortex-M3) + REV au lieu de 4 LDRB
+static inline uint32_t load_be32(const uint8_t *p) {
+#if defined(__GNUC__) && (__BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__)
+    uint32_t word;
+    memcpy(&word, p, 4);
+    return __builtin_bswap32(word);
+#else
+    return ((uint32_t)p[0] << 24) | ((uint32_t)p[1] << 16) | ((uint32_t)p[2] << 8) | p[3];
+#endif
+}
+
+#if SHA256_TRANSFORM == SHA256_TRANSFORM_SCHEDULE64
+
+// Planning m[64] calculé d'avance: 256 bytes de pile
 static void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
     uint32_t a, b, c, d, e, f, g, h, i, j, t1, t2, m[64];
     
     for (i = 0, j = 0; i < 16; ++i, j += 4)
-        m[i] = (data[j] << 24) | (data[j + 1] << 16) | (data[j + 2] << 8) | (data[j + 3]);
+        m[i] = load_be32(&data[j]);
     for (; i < 64; ++i)
         m[i] = SIG1(m[i - 2]) + m[i - 7] + SIG0(m[i - 15]) + m[i - 16];
     
@@ -71,6 +86,113 @@ static void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
     ctx->state[7] += h;
 }
 
+#elif SHA256_TRANSFORM == SHA256_TRANSFORM_RING16
+
+// Planning calculé au fil des rondes dans 16 mots: w[i & 15] contient
+// m[i - 16] avant d'être remplacé par m[i] (64 bytes de pile)
+static void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
+    uint32_t a, b, c, d, e, f, g, h, i, t1, t2, w[16];
+    
+    for (i = 0; i < 16; ++i)
+        w[i] = load_be32(&data[i * 4]);
+    
+    a = ctx->state[0];
+    b = ctx->state[1];
+    c = ctx->state[2];
+    d = ctx->state[3];
+    e = ctx->state[4];
+    f = ctx->state[5];
+    g = ctx->state[6];
+    h = ctx->state[7];
+    
+    for (i = 0; i < 64; ++i) {
+        if (i >= 16)
+            w[i & 15] += SIG1(w[(i - 2) & 15]) + w[(i - 7) & 15] + SIG0(w[(i - 15) & 15]);
+        t1 = h + EP1(e) + CH(e,f,g) + k[i] + w[i & 15];
+        t2 = EP0(a) + MAJ(a,b,c);
+        h = g;
+        g = f;
+        f = e;
+        e = d + t1;
+        d = c;
+        c = b;
+        b = a;
+        a = t1 + t2;
+    }
+    
+    ctx->state[0] += a;
+    ctx->state[1] += b;
+    ctx->state[2] += c;
+    ctx->state[3] += d;
+    ctx->state[4] += e;
+    ctx->state[5] += f;
+    ctx->state[6] += g;
+    ctx->state[7] += h;
+}
+
+#elif SHA256_TRANSFORM == SHA256_TRANSFORM_UNROLLED
+
+// Ronde j (0..15) du groupe de 16 commençant à la ronde i: les indices du
+// ring buffer sont des constantes, et les 8 variables tournent par
+// renommage au lieu d'être recopiées
+#define SHA256_ROUND(a,b,c,d,e,f,g,h,j) do { \
+    if (i > 0) \
+        w[j] += SIG1(w[((j) + 14) & 15]) + w[((j) + 9) & 15] + SIG0(w[((j) + 1) & 15]); \
+    t1 = (h) + EP1(e) + CH(e,f,g) + k[i + (j)] + w[j]; \
+    (d) += t1; \
+    (h) = t1 + EP0(a) + MAJ(a,b,c); \
+} while (0)
+
+// Ring buffer de 16 mots, 16 rondes déroulées par tour de boucle: plus
+// rapide, au prix de plusieurs fois la taille de code de RING16
+static void sha256_transform(SHA256_CTX *ctx, const uint8_t data[]) {
+    uint32_t a, b, c, d, e, f, g, h, i, t1, w[16];
+    
+    for (i = 0; i < 16; ++i)
+        w[i] = load_be32(&data[i * 4]);
+    
+    a = ctx->state[0];
+    b = ctx->state[1];
+    c = ctx->state[2];
+    d = ctx->state[3];
+    e = ctx->state[4];
+    f = ctx->state[5];
+    g = ctx->state[6];
+    h = ctx->state[7];
+    
+    for (i = 0; i < 64; i += 16) {
+        SHA256_ROUND(a, b, c, d, e, f, g, h, 0);
+        SHA256_ROUND(h, a, b, c, d, e, f, g, 1);
+        SHA256_ROUND(g, h, a, b, c, d, e, f, 2);
+        SHA256_ROUND(f, g, h, a, b, c, d, e, 3);
+        SHA256_ROUND(e, f, g, h, a, b, c, d, 4);
+        SHA256_ROUND(d, e, f, g, h, a, b, c, 5);
+        SHA256_ROUND(c, d, e, f, g, h, a, b, 6);
+        SHA256_ROUND(b, c, d, e, f, g, h, a, 7);
+        SHA256_ROUND(a, b, c, d, e, f, g, h, 8);
+        SHA256_ROUND(h, a, b, c, d, e, f, g, 9);
+        SHA256_ROUND(g, h, a, b, c, d, e, f, 10);
+        SHA256_ROUND(f, g, h, a, b, c, d, e, 11);
+        SHA256_ROUND(e, f, g, h, a, b, c, d, 12);
+        SHA256_ROUND(d, e, f, g, h, a, b, c, 13);
+        SHA256_ROUND(c, d, e, f, g, h, a, b, 14);
+        SHA256_ROUND(b, c, d, e, f, g, h, a, 15);
+    }
+    
+    ctx->state[0] += a;
+    ctx->state[1] += b;
+    ctx->state[2] += c;
+    ctx->state[3] += d;
+    ctx->state[4] += e;
+    ctx->state[5] += f;
+    ctx->state[6] += g;
+    ctx->state[7] += h;
+}
+
+#else
+#error "SHA256_TRANSFORM: SHA256_TRANSFORM_SCHEDULE64, _RING16 ou _UNROLLED"
+#endif
+
 void sha256_init(SHA256_CTX *ctx) {
     ctx->count[0] = 0;
     ctx->count[1] = 0;
@@ -85,16 +207,37 @@ void sha256_init(SHA256_CTX *ctx) {
 }
 
 void sha256_update(SHA256_CTX *ctx, const uint8_t *data, size_t len) {
-    uint32_t i;
+    size_t fill;
     
-    for (i = 0; i < len; ++i) {
-        ctx->buffer[ctx->count[0]] = data[i];
-        ctx->count[0]++;
-        if (ctx->count[0] == 64) {
-            sha256_transform(ctx, ctx->buffer);
-            ctx->count[1]++;
-            ctx->count[0] = 0;
+    // Complète d'abord un bloc partiel en attente dans ctx->buffer
+    if (ctx->count[0] != 0) {
+        fill = 64 - ctx->count[0];
+        if (len < fill) {
+            memcpy(&ctx->buffer[ctx->count[0]], data, len);
+            ctx->count[0] += (uint32_t)len;
+            return;
         }
+        memcpy(&ctx->buffer[ctx->count[0]], data, fill);
+        sha256_transform(ctx, ctx->buffer);
+        ctx->count[1]++;
+        ctx->count[0] = 0;
+        data += fill;
+        len -= fill;
+    }
+    
+    // Blocs complets: compressés directement depuis la source (flash),
+    // sans copie dans ctx->buffer
+    while (len >= 64) {
+        sha256_transform(ctx, data);
+        ctx->count[1]++;
+        data += 64;
+        len -= 64;
+    }
+    
+    // Reste (< 64 bytes) mis en attente
+    if (len > 0) {
+        memcpy(ctx->buffer, data, len);
+        ctx->count[0] = (uint32_t)len;
     }
 }
 
@@ -150,12 +293,17 @@ void sha256_hash(const uint8_t *data, size_t len, uint8_t hash[32]) {
 // HMAC-SHA256
 // ============================================================================
 
-void hmac_sha256(const uint8_t *key, size_t key_len,
-                 const uint8_t *data, size_t data_len,
-                 uint8_t hmac[32]) {
+// Effacement non supprimable par l'optimiseur (clés sur la pile)
+static void secure_zero(void *buf, size_t len) {
+    volatile uint8_t *p = (volatile uint8_t *)buf;
+    while (len--)
+        *p++ = 0;
+}
+
+void hmac_sha256_init_key(HMAC_SHA256_CTX *key_ctx,
+                          const uint8_t *key, size_t key_len) {
     uint8_t k_pad[64];
     uint8_t tk[32];
-    SHA256_CTX ctx;
     
     // Si la clé est trop longue, hash-la
     if (key_len > 64) {
@@ -168,30 +316,52 @@ void hmac_sha256(const uint8_t *key, size_t key_len,
     memset(k_pad, 0, sizeof(k_pad));
     memcpy(k_pad, key, key_len);
     
-    // HMAC = H((K ⊕ opad) || H((K ⊕ ipad) || message))
-    
-    // Inner hash: H((K ⊕ ipad) || message)
+    // Inner: bloc (K ⊕ ipad) compressé une seule fois
     for (int i = 0; i < 64; i++)
         k_pad[i] ^= 0x36;
     
-    sha256_init(&ctx);
-    sha256_update(&ctx, k_pad, 64);
-    sha256_update(&ctx, data, data_len);
-    sha256_final(&ctx, hmac);
-    
-    // Outer hash: H((K ⊕ opad) || inner_hash)
-    memset(k_pad, 0, sizeof(k_pad));
-    memcpy(k_pad, key, key_len);
+    sha256_init(&key_ctx->inner);
+    sha256_update(&key_ctx->inner, k_pad, 64);
     
+    // Outer: (K ⊕ opad) = (K ⊕ ipad) ⊕ (ipad ⊕ opad)
     for (int i = 0; i < 64; i++)
-        k_pad[i] ^= 0x5c;
+        k_pad[i] ^= 0x36 ^ 0x5c;
     
-    sha256_init(&ctx);
-    sha256_update(&ctx, k_pad, 64);
+    sha256_init(&key_ctx->outer);
+    sha256_update(&key_ctx->outer, k_pad, 64);
+    
+    secure_zero(k_pad, sizeof(k_pad));
+    secure_zero(tk, sizeof(tk));
+}
+
+void hmac_sha256_mac(const HMAC_SHA256_CTX *key_ctx,
+                     const uint8_t *data, size_t data_len,
+                     uint8_t hmac[32]) {
+    SHA256_CTX ctx;
+    
+    // HMAC = H((K ⊕ opad) || H((K ⊕ ipad) || message))
+    
+    // Inner hash: repart de l'état après le bloc (K ⊕ ipad)
+    ctx = key_ctx->inner;
+    sha256_update(&ctx, data, data_len);
+    sha256_final(&ctx, hmac);
+    
+    // Outer hash: repart de l'état après le bloc (K ⊕ opad)
+    ctx = key_ctx->outer;
     sha256_update(&ctx, hmac, 32);
     sha256_final(&ctx, hmac);
 }
 
+void hmac_sha256(const uint8_t *key, size_t key_len,
+                 const uint8_t *data, size_t data_len,
+                 uint8_t hmac[32]) {
+    HMAC_SHA256_CTX key_ctx;
+    
+    hmac_sha256_init_key(&key_ctx, key, key_len);
+    hmac_sha256_mac(&key_ctx, data, data_len, hmac);
+    secure_zero(&key_ctx, sizeof(key_ctx));
+}
+
 // ============================================================================
 // XOR Cipher (Chiffrement simple et rapide)
 // ============================================================================
@@ -252,18 +422,24 @@ size_t base64_decode(const char *src, uint8_t *dst, size_t dst_len) {
         dtable[(uint8_t)base64_table[i]] = i;
     dtable['='] = 0;
     
+    // Groupes de 4 caractères complets seulement (pas de lecture après '\0')
     size_t src_len = strlen(src);
-    for (i = 0, j = 0; i < src_len && j < dst_len; ) {
-        uint32_t sextet_a = dtable[(uint8_t)src[i++]];
-        uint32_t sextet_b = dtable[(uint8_t)src[i++]];
-        uint32_t sextet_c = dtable[(uint8_t)src[i++]];
-        uint32_t sextet_d = dtable[(uint8_t)src[i++]];
+    src_len -= src_len % 4;
+    
+    for (i = 0, j = 0; i < src_len && j < dst_len; i += 4) {
+        uint32_t sextet_a = dtable[(uint8_t)src[i]];
+        uint32_t sextet_b = dtable[(uint8_t)src[i + 1]];
+        uint32_t sextet_c = dtable[(uint8_t)src[i + 2]];
+        uint32_t sextet_d = dtable[(uint8_t)src[i + 3]];
         
         uint32_t triple = (sextet_a << 18) + (sextet_b << 12) + (sextet_c << 6) + sextet_d;
         
+        // Padding: "xx==" → 1 byte, "xxx=" → 2 bytes
+        size_t count = (src[i + 2] == '=') ? 1 : (src[i + 3] == '=') ? 2 : 3;
+        
         if (j < dst_len) dst[j++] = (triple >> 16) & 0xFF;
-        if (j < dst_len) dst[j++] = (triple >> 8) & 0xFF;
-        if (j < dst_len) dst[j++] = triple & 0xFF;
+        if (count > 1 && j < dst_len) dst[j++] = (triple >> 8) & 0xFF;
+        if (count > 2 && j < dst_len) dst[j++] = triple & 0xFF;
     }
     
     return j;
@@ -21,6 +21,17 @@
 // SHA-256 (Implémentation légère)
 // ============================================================================
 
+// Variante de sha256_transform, choisie à la compilation
+// (-DSHA256_TRANSFORM=...): pile et flash contre vitesse, voir
+// test/tools/sha256_transform_bench.py
+#define SHA256_TRANSFORM_SCHEDULE64  0  // Planning m[64]: 256 bytes de pile
+#define SHA256_TRANSFORM_RING16      1  // Ring buffer de 16 mots: 64 bytes de pile
+#define SHA256_TRANSFORM_UNROLLED    2  // Ring buffer + 16 rondes déroulées
+
+#ifndef SHA256_TRANSFORM
+#define SHA256_TRANSFORM SHA256_TRANSFORM_SCHEDULE64
+#endif
+
 typedef struct {
     uint32_t state[8];
     uint32_t count[2];
@@ -42,6 +53,21 @@ void hmac_sha256(const uint8_t *key, size_t key_len,
                  const uint8_t *data, size_t data_len,
                  uint8_t hmac[32]);
 
+// Clé précalculée: états SHA-256 après les blocs (K ⊕ ipad) et (K ⊕ opad).
+// Pour MAC-er beaucoup de messages avec la même clé: 2 compressions de
+// moins par message. Le contexte équivaut à la clé (à effacer après usage).
+typedef struct {
+    SHA256_CTX inner;
+    SHA256_CTX outer;
+} HMAC_SHA256_CTX;
+
+void hmac_sha256_init_key(HMAC_SHA256_CTX *key_ctx,
+                          const uint8_t *key, size_t key_len);
+
+void hmac_sha256_mac(const HMAC_SHA256_CTX *key_ctx,
+                     const uint8_t *data, size_t data_len,
+                     uint8_t hmac[32]);
+
 // ============================================================================
 // XOR Cipher Simple (Chiffrement léger)
 // ============================================================================
@@ -7,6 +7,8 @@
 #include "stm32f1xx_hal.h"
 #include <string.h>
 #include "crypto_light.h"
+#include "crc32.h"
+#include "boot_trace.h"
 
 #define APPLICATION_ADDRESS  0x08002000
 #define APPLICATION_MAX_SIZE 0xC000
@@ -14,6 +16,14 @@
 #define LED_PORT GPIOC
 #define LED_PIN  GPIO_PIN_13
 
+// reserved[3]: algorithme du champ crc32 (firmware_signer.py --crc-mode)
+#define METADATA_CRC_MODE    3
+#define CRC_MODE_IEEE        0  // Calculate_CRC32 logiciel (zlib.crc32)
+#define CRC_MODE_STM32       1  // Unité CRC matérielle (CRC-32/MPEG-2 par mots)
+
+// reserved[41]: profil de l'application signée (firmware_signer.py --boot-profile)
+#define METADATA_BOOT_PROFILE 41
+
 typedef struct {
     uint32_t magic;
     uint32_t version;
@@ -21,7 +31,7 @@ typedef struct {
     uint32_t crc32;
     uint8_t  sha256[32];
     uint32_t timestamp;
-    uint8_t  reserved[32];
+    uint8_t  reserved[44];
 } __attribute__((packed)) FirmwareMetadata_t;
 
 void SystemClock_Config(void);
@@ -30,22 +40,41 @@ void LED_Blink(uint32_t count, uint32_t on_ms, uint32_t off_ms);
 void LED_Error_Loop(uint32_t pattern);
 uint8_t Verify_Firmware(void);
 void Jump_To_Application(void) __attribute__((noreturn));
-uint32_t Calculate_CRC32(const uint8_t *data, uint32_t length);
+
+volatile BootTrace_t boot_trace BOOT_TRACE_NOINIT;
 
 int main(void) {
+    boot_trace_start();
+    boot_trace_stamp(BOOT_STAGE_RESET);
+    
     HAL_Init();
+    boot_trace_stamp(BOOT_STAGE_HAL_INIT);
     SystemClock_Config();
     GPIO_Init();
+    boot_trace_stamp(BOOT_STAGE_CLOCK_GPIO);
     
+#if BOOT_PROFILE == BOOT_PROFILE_DIAGNOSTIC
     HAL_GPIO_WritePin(LED_PORT, LED_PIN, GPIO_PIN_SET);
-    HAL_Delay(100);
+    HAL_Delay(BOOT_SPLASH_ON_MS);
     
-    LED_Blink(2, 100, 100);
-    HAL_Delay(500);
+    LED_Blink(BOOT_SPLASH_BLINKS, BOOT_SPLASH_BLINK_MS, BOOT_SPLASH_BLINK_MS);
+    HAL_Delay(BOOT_SPLASH_PAUSE_MS);
+#else
+    // LED allumée pendant la vérification, éteinte par l'application
+    HAL_GPIO_WritePin(LED_PORT, LED_PIN, GPIO_PIN_RESET);
+#endif
+    boot_trace_stamp(BOOT_STAGE_SPLASH);
     
     if (Verify_Firmware()) {
-        LED_Blink(3, 200, 200);
-        HAL_Delay(200);
+#if BOOT_PROFILE == BOOT_PROFILE_DIAGNOSTIC
+        // Application signée en production: pas de blink de confirmation
+        const FirmwareMetadata_t *metadata = (const FirmwareMetadata_t*)METADATA_ADDR;
+        if (metadata->reserved[METADATA_BOOT_PROFILE] != BOOT_PROFILE_PRODUCTION) {
+            LED_Blink(BOOT_OK_BLINKS, BOOT_OK_BLINK_MS, BOOT_OK_BLINK_MS);
+            HAL_Delay(BOOT_OK_PAUSE_MS);
+        }
+#endif
+        boot_trace_stamp(BOOT_STAGE_OK_BLINK);
         Jump_To_Application();
     }
     
@@ -71,14 +100,28 @@ uint8_t Verify_Firmware(void) {
         LED_Error_Loop(5);
         return 0;
     }
+    boot_trace_stamp(BOOT_STAGE_CHECKS);
     
     uint8_t *firmware = (uint8_t*)APPLICATION_ADDRESS;
-    uint32_t calculated_crc = Calculate_CRC32(firmware, metadata->size);
+    uint32_t calculated_crc;
+    
+    switch (metadata->reserved[METADATA_CRC_MODE]) {
+        case CRC_MODE_IEEE:
+            calculated_crc = Calculate_CRC32(firmware, metadata->size);
+            break;
+        case CRC_MODE_STM32:
+            calculated_crc = Calculate_CRC32_HW(firmware, metadata->size);
+            break;
+        default:
+            LED_Error_Loop(2);
+            return 0;
+    }
     
     if (calculated_crc != metadata->crc32) {
         LED_Error_Loop(2);
         return 0;
     }
+    boot_trace_stamp(BOOT_STAGE_CRC);
     
     uint8_t calculated_hash[32];
     sha256_hash(firmware, metadata->size, calculated_hash);
@@ -87,6 +130,7 @@ uint8_t Verify_Firmware(void) {
         LED_Error_Loop(3);
         return 0;
     }
+    boot_trace_stamp(BOOT_STAGE_SHA256);
     
     return 1;
 }
@@ -111,6 +155,7 @@ void Jump_To_Application(void) {
     
     uint32_t app_stack = *(__IO uint32_t*)APPLICATION_ADDRESS;
     uint32_t app_reset = *(__IO uint32_t*)(APPLICATION_ADDRESS + 4);
+    boot_trace_stamp(BOOT_STAGE_JUMP);
     
     __set_MSP(app_stack);
     __DSB();
@@ -122,17 +167,6 @@ void Jump_To_Application(void) {
     while(1);
 }
 
-uint32_t Calculate_CRC32(const uint8_t *data, uint32_t length) {
-    uint32_t crc = 0xFFFFFFFF;
-    for (uint32_t i = 0; i < length; i++) {
-        crc ^= data[i];
-        for (uint8_t j = 0; j < 8; j++) {
-            crc = (crc & 1) ? ((crc >> 1) ^ 0xEDB88320) : (crc >> 1);
-        }
-    }
-    return ~crc;
-}
-
 void LED_Blink(uint32_t count, uint32_t on_ms, uint32_t off_ms) {
     for (uint32_t i = 0; i < count; i++) {
         HAL_GPIO_WritePin(LED_PORT, LED_PIN, GPIO_PIN_RESET);
@@ -7,8 +7,10 @@ echo "🔨 Compilation des bindings C du bootloader..."
 echo ""
 
 # Compile crypto_test.c en bibliothèque partagée
+# (SHA256_TRANSFORM=0|1|2 bash build.sh: variante de sha256_transform)
 gcc -shared -fPIC -O2 \
     -DTEST_BUILD \
+    -DSHA256_TRANSFORM=${SHA256_TRANSFORM:-0} \
     -I../../lib/crypto \
     -o libbootloader.so \
     crypto_test.c \
@@ -32,7 +34,11 @@ try:
     # Vérifie les fonctions
     lib.Calculate_CRC32
     lib.sha256_hash
-    print("✅ Fonctions trouvées: Calculate_CRC32, sha256_hash")
+    lib.hmac_sha256_init_key
+    lib.hmac_sha256_mac
+    lib.sha256_update_bytewise
+    lib.Calculate_CRC32_HW
+    print("✅ Fonctions trouvées: Calculate_CRC32, sha256_hash, hmac_sha256_init_key, hmac_sha256_mac, sha256_update_bytewise, Calculate_CRC32_HW")
 except Exception as e:
     print(f"❌ Erreur: {e}")
     exit(1)
@@ -3,10 +3,15 @@ Configuration pytest globale pour tests bootloader
 Fixtures réutilisables pour tous les tests
 """
 
-import pytest
-import ctypes
+import sys
 from pathlib import Path
 
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / 'tools'))
+
+from bootloader_bindings import BootloaderLib, HMAC_SHA256_CTX, SHA256_CTX  # noqa: E402,F401
+
 
 # ============================================================================
 # Fixture: Bibliothèque Bootloader Compilée
@@ -15,32 +20,20 @@ from pathlib import Path
 @pytest.fixture(scope="session")
 def bootloader_lib():
     """
-    Charge la bibliothèque bootloader compilée (.so)
+    Charge la bibliothèque bootloader compilée (.so), bindings typés
+    sans copie (tools/bootloader_bindings.py)
     
     Usage:
         def test_crc32(bootloader_lib):
             result = bootloader_lib.Calculate_CRC32(data, len(data))
+            assert bootloader_lib.crc32(data) == result
     """
     lib_path = Path(__file__).parent / 'bindings' / 'libbootloader.so'
     
     if not lib_path.exists():
         pytest.skip(f"Bibliothèque non trouvée: {lib_path}")
     
-    lib = ctypes.CDLL(str(lib_path))
-    
-    # Configure CRC32
-    lib.Calculate_CRC32.argtypes = [ctypes.POINTER(ctypes.c_uint8), ctypes.c_uint32]
-    lib.Calculate_CRC32.restype = ctypes.c_uint32
-    
-    # Configure SHA-256
-    lib.sha256_hash.argtypes = [
-        ctypes.POINTER(ctypes.c_uint8),
-        ctypes.c_size_t,
-        ctypes.POINTER(ctypes.c_uint8)
-    ]
-    lib.sha256_hash.restype = None
-    
-    return lib
+    return BootloaderLib(lib_path)
 
 
 # ============================================================================
@@ -127,12 +120,3 @@ def bootloader_constants():
         'RAM_START': 0x20000000,
         'RAM_END': 0x20005000,
     }
-
-
-# ============================================================================
-# Helper Functions
-# ============================================================================
-
-def bytes_to_c_array(data: bytes):
-    """Convertit bytes Python en tableau C uint8_t[]"""
-    return (ctypes.c_uint8 * len(data))(*data)
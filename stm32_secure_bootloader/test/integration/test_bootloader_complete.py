@@ -5,7 +5,6 @@ Tests du workflow complet de boot
 
 import pytest
 import struct
-import ctypes
 
 
 # ============================================================================
@@ -14,16 +13,12 @@ import ctypes
 
 def calculate_crc32_c(bootloader_lib, data: bytes) -> int:
     """Appelle la fonction C Calculate_CRC32"""
-    data_array = (ctypes.c_uint8 * len(data))(*data)
-    return bootloader_lib.Calculate_CRC32(data_array, len(data))
+    return bootloader_lib.Calculate_CRC32(data, len(data))
 
 
 def calculate_sha256_c(bootloader_lib, data: bytes) -> bytes:
     """Appelle la fonction C sha256_hash"""
-    data_array = (ctypes.c_uint8 * len(data))(*data)
-    hash_array = (ctypes.c_uint8 * 32)()
-    bootloader_lib.sha256_hash(data_array, len(data), hash_array)
-    return bytes(hash_array)
+    return bootloader_lib.sha256(data)
 
 
 # ============================================================================
@@ -167,6 +162,28 @@ class TestFirmwareSigning:
         except ImportError:
             pytest.skip("firmware_signer.py non disponible")
 
+    
+    def test_crc32_backends_match_c(self, bootloader_lib):
+        """Test que chaque backend CRC32 Python == Calculate_CRC32 C"""
+        import os
+        import sys
+        from pathlib import Path
+        
+        tools_path = Path(__file__).parent.parent / 'tools'
+        sys.path.insert(0, str(tools_path))
+        
+        try:
+            from firmware_signer import CRC32_BACKENDS
+        except ImportError:
+            pytest.skip("firmware_signer.py non disponible")
+        
+        for length in (0, 1, 9, 1000, 48 * 1024):
+            data = os.urandom(length)
+            crc_c = calculate_crc32_c(bootloader_lib, data)
+            
+            for name, func in CRC32_BACKENDS.items():
+                assert func(data) == crc_c, f"CRC32 {name} != C (len={length})"
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
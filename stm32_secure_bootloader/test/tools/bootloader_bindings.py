@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+BOOTLOADER BINDINGS - Bindings ctypes typés de libbootloader.so
+============================================================================
+
+Un seul module pour charger les bindings de test (bindings/build.sh):
+toutes les fonctions exportées ont leurs argtypes / restype déclarés, et
+les buffers sont passés SANS COPIE (pas de (c_uint8 * n)(*data), qui
+crée un argument Python par byte):
+
+    bytes                         → pointeur sur le buffer interne
+    bytearray, memoryview, mmap   → pointeur via le buffer protocol, export
+                                    gardé jusqu'au retour de l'appel
+    numpy.ndarray (contigu)       → arr.ctypes.data
+    tableaux / structures ctypes  → tels quels
+
+Sha256Ctx / HmacCtx enveloppent l'API incrémentale C (sha256_init /
+update / final) avec l'interface de hashlib: un fichier ou un dump flash
+de plusieurs MB se hache par morceaux, en mémoire constante.
+
+Usage:
+    lib = BootloaderLib()            # ou BootloaderLib('path/libbootloader.so')
+    lib.crc32(firmware)              # == zlib.crc32
+    lib.sha256(memoryview(flash)[0x2000:])
+    lib.sha256_file('flash_dump.bin')      # == hashlib.file_digest(f, 'sha256')
+    lib.Calculate_CRC32(data, len(data))   # fonctions C brutes, typées
+============================================================================
+"""
+
+import ctypes
+from pathlib import Path
+
+__all__ = ['DEFAULT_LIBRARY', 'SHA256_CTX', 'HMAC_SHA256_CTX', 'BufferExport', 'InBuffer',
+           'OutBuffer', 'buffer_size', 'load', 'Sha256Ctx', 'HmacCtx', 'BootloaderLib']
+
+DEFAULT_LIBRARY = Path(__file__).resolve().parents[1] / 'bindings' / 'libbootloader.so'
+
+CHUNK_SIZE = 1024 * 1024  # Lecture des fichiers par morceaux de 1MB
+
+# ============================================================================
+# STRUCTURES C (crypto_light.h)
+# ============================================================================
+
+class SHA256_CTX(ctypes.Structure):
+    _fields_ = [
+        ('state', ctypes.c_uint32 * 8),
+        ('count', ctypes.c_uint32 * 2),
+        ('buffer', ctypes.c_uint8 * 64),
+    ]
+
+
+class HMAC_SHA256_CTX(ctypes.Structure):
+    """États SHA-256 après les blocs (K ⊕ ipad) et (K ⊕ opad)"""
+    _fields_ = [
+        ('inner', SHA256_CTX),
+        ('outer', SHA256_CTX),
+    ]
+
+# ============================================================================
+# BUFFERS SANS COPIE
+# ============================================================================
+
+class _Py_buffer(ctypes.Structure):
+    _fields_ = [
+        ('buf', ctypes.c_void_p),
+        ('obj', ctypes.py_object),
+        ('len', ctypes.c_ssize_t),
+        ('itemsize', ctypes.c_ssize_t),
+        ('readonly', ctypes.c_int),
+        ('ndim', ctypes.c_int),
+        ('format', ctypes.c_char_p),
+        ('shape', ctypes.c_void_p),
+        ('strides', ctypes.c_void_p),
+        ('suboffsets', ctypes.c_void_p),
+        ('internal', ctypes.c_void_p),
+    ]
+
+
+_PyBUF_SIMPLE = 0
+_PyBUF_WRITABLE = 1
+
+_get_buffer = ctypes.pythonapi.PyObject_GetBuffer
+_get_buffer.argtypes = [ctypes.py_object, ctypes.POINTER(_Py_buffer), ctypes.c_int]
+_get_buffer.restype = ctypes.c_int
+
+_release_buffer = ctypes.pythonapi.PyBuffer_Release
+_release_buffer.argtypes = [ctypes.POINTER(_Py_buffer)]
+_release_buffer.restype = None
+
+
+class BufferExport(ctypes.c_void_p):
+    """
+    Pointeur sur le buffer contigu de `obj` (buffer protocol, sans copie)
+    
+    L'export est gardé jusqu'à release() (ou la sortie du bloc with, ou la
+    destruction): pendant ce temps `obj` ne peut être ni redimensionné ni
+    fermé (BufferError). Retourné par from_param, il vit jusqu'au retour
+    de l'appel C, puis ctypes le libère et l'export est relâché.
+    """
+    
+    def __init__(self, obj, writable=False):
+        self._view = _Py_buffer()
+        self._exported = False
+        _get_buffer(obj, ctypes.byref(self._view), _PyBUF_WRITABLE if writable else _PyBUF_SIMPLE)
+        self._exported = True
+        super().__init__(self._view.buf)
+    
+    def release(self):
+        if self._exported:
+            self._exported = False
+            _release_buffer(ctypes.byref(self._view))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.release()
+    
+    def __del__(self):
+        if getattr(self, '_exported', False):
+            self.release()
+
+
+class InBuffer:
+    """Type d'argument `const uint8_t *`: tout objet buffer, passé sans copie"""
+    
+    _writable = False
+    
+    @classmethod
+    def from_param(cls, obj):
+        if obj is None:
+            return None
+        if isinstance(obj, bytes):
+            if cls._writable:
+                raise TypeError("bytes is read-only, use a bytearray for output buffers")
+            return obj
+        if isinstance(obj, (ctypes.Array, ctypes.Structure)):
+            return ctypes.byref(obj)
+        if hasattr(obj, '__array_interface__'):
+            if not obj.flags['C_CONTIGUOUS']:
+                raise TypeError("NumPy array must be C-contiguous")
+            if cls._writable and not obj.flags['WRITEABLE']:
+                raise TypeError("NumPy array is read-only")
+            return obj.ctypes.data_as(ctypes.c_void_p)
+        
+        return BufferExport(obj, cls._writable)  # Export relâché au retour de l'appel
+
+
+class OutBuffer(InBuffer):
+    """Type d'argument `uint8_t *` (sortie): buffer inscriptible, sans copie"""
+    
+    _writable = True
+
+
+def buffer_size(obj):
+    """Taille en bytes de n'importe quel objet buffer"""
+    if isinstance(obj, bytes):
+        return len(obj)
+    with memoryview(obj) as view:
+        return view.nbytes
+
+# ============================================================================
+# CHARGEMENT
+# ============================================================================
+
+_SHA256_CTX_P = ctypes.POINTER(SHA256_CTX)
+_HMAC_SHA256_CTX_P = ctypes.POINTER(HMAC_SHA256_CTX)
+
+# nom: (argtypes, restype) pour chaque fonction exportée par crypto_test.c
+SIGNATURES = {
+    'Calculate_CRC32': ([InBuffer, ctypes.c_uint32], ctypes.c_uint32),
+    'Calculate_CRC32_HW': ([InBuffer, ctypes.c_uint32], ctypes.c_uint32),
+    'crc_unit_reset': ([], None),
+    'crc_unit_write': ([ctypes.c_uint32], None),
+    'crc_unit_read': ([], ctypes.c_uint32),
+    'sha256_init': ([_SHA256_CTX_P], None),
+    'sha256_update': ([_SHA256_CTX_P, InBuffer, ctypes.c_size_t], None),
+    'sha256_update_bytewise': ([_SHA256_CTX_P, InBuffer, ctypes.c_size_t], None),
+    'sha256_final': ([_SHA256_CTX_P, OutBuffer], None),
+    'sha256_hash': ([InBuffer, ctypes.c_size_t, OutBuffer], None),
+    'hmac_sha256': ([InBuffer, ctypes.c_size_t, InBuffer, ctypes.c_size_t, OutBuffer], None),
+    'hmac_sha256_init_key': ([_HMAC_SHA256_CTX_P, InBuffer, ctypes.c_size_t], None),
+    'hmac_sha256_mac': ([_HMAC_SHA256_CTX_P, InBuffer, ctypes.c_size_t, OutBuffer], None),
+    'base64_encode': ([InBuffer, ctypes.c_size_t, OutBuffer], ctypes.c_size_t),
+    'base64_decode': ([InBuffer, OutBuffer, ctypes.c_size_t], ctypes.c_size_t),
+    'HAL_GetTick': ([], ctypes.c_uint32),
+}
+
+
+def load(path=DEFAULT_LIBRARY):
+    """Charge libbootloader.so et déclare argtypes / restype de chaque fonction"""
+    lib = ctypes.CDLL(str(path))
+    
+    for name, (argtypes, restype) in SIGNATURES.items():
+        function = getattr(lib, name)
+        function.argtypes = argtypes
+        function.restype = restype
+    
+    return lib
+
+
+# ============================================================================
+# CONTEXTES INCRÉMENTAUX
+# ============================================================================
+
+class Sha256Ctx:
+    """
+    SHA256_CTX C avec l'interface de hashlib (update / digest / copy)
+    
+    digest() finalise une copie du contexte: on peut continuer à appeler
+    update() ensuite, comme avec hashlib.
+    """
+    
+    name = 'sha256'
+    digest_size = 32
+    block_size = 64
+    
+    def __init__(self, lib, data=None):
+        self._lib = lib
+        self.ctx = SHA256_CTX()
+        lib.sha256_init(self.ctx)
+        if data is not None:
+            self.update(data)
+    
+    def update(self, data):
+        """Ajoute `data` (tout objet buffer, y compris un mmap entier)"""
+        self._lib.sha256_update(self.ctx, data, buffer_size(data))
+    
+    def update_file(self, file, chunk_size=CHUNK_SIZE):
+        """
+        Ajoute le contenu d'un fichier (chemin ou objet binaire ouvert)
+        
+        Un seul buffer de chunk_size bytes est réutilisé (readinto):
+        la mémoire ne dépend pas de la taille du fichier. Retourne le
+        nombre de bytes lus.
+        """
+        if isinstance(file, (str, Path)):
+            with open(file, 'rb') as f:
+                return self.update_file(f, chunk_size)
+        
+        chunk = bytearray(chunk_size)
+        view = memoryview(chunk)
+        total = 0
+        while True:
+            size = file.readinto(chunk)
+            if not size:
+                return total
+            self.update(view[:size])
+            total += size
+    
+    @classmethod
+    def _resume(cls, lib, ctx):
+        """Contexte qui reprend une copie de l'état C `ctx`"""
+        resumed = cls.__new__(cls)
+        resumed._lib = lib
+        resumed.ctx = SHA256_CTX.from_buffer_copy(ctx)
+        return resumed
+    
+    def copy(self):
+        return Sha256Ctx._resume(self._lib, self.ctx)
+    
+    def digest(self):
+        ctx = SHA256_CTX.from_buffer_copy(self.ctx)
+        out = ctypes.create_string_buffer(32)
+        self._lib.sha256_final(ctx, out)
+        return out.raw
+    
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+class HmacCtx:
+    """
+    HMAC-SHA256 incrémental sur la clé précalculée (hmac_sha256_init_key)
+    
+    Le hachage interne reprend la copie de l'état (K ⊕ ipad); digest()
+    termine sur une copie de l'état (K ⊕ opad), sans repasser par la clé.
+    """
+    
+    name = 'hmac-sha256'
+    digest_size = 32
+    block_size = 64
+    
+    def __init__(self, lib, key, data=None):
+        self._lib = lib
+        self.key_ctx = HMAC_SHA256_CTX()
+        lib.hmac_sha256_init_key(self.key_ctx, key, buffer_size(key))
+        
+        self.inner = Sha256Ctx._resume(lib, self.key_ctx.inner)
+        if data is not None:
+            self.update(data)
+    
+    def update(self, data):
+        self.inner.update(data)
+    
+    def update_file(self, file, chunk_size=CHUNK_SIZE):
+        return self.inner.update_file(file, chunk_size)
+    
+    def copy(self):
+        clone = HmacCtx.__new__(HmacCtx)
+        clone._lib = self._lib
+        clone.key_ctx = self.key_ctx  # Lecture seule après init_key
+        clone.inner = self.inner.copy()
+        return clone
+    
+    def digest(self):
+        outer = Sha256Ctx._resume(self._lib, self.key_ctx.outer)
+        outer.update(self.inner.digest())
+        return outer.digest()
+    
+    def hexdigest(self):
+        return self.digest().hex()
+
+# ============================================================================
+# API PYTHON
+# ============================================================================
+
+class BootloaderLib:
+    """
+    libbootloader.so avec une API Python (bytes en sortie)
+    
+    Les fonctions C restent accessibles telles quelles (lib.sha256_hash,
+    lib.Calculate_CRC32, ...) avec leurs argtypes.
+    """
+    
+    def __init__(self, path=DEFAULT_LIBRARY):
+        self.path = Path(path)
+        self.lib = load(path)
+    
+    def __getattr__(self, name):
+        return getattr(self.lib, name)
+    
+    def __repr__(self):
+        return f"BootloaderLib({str(self.path)!r})"
+    
+    def crc32(self, data):
+        """Calculate_CRC32 (CRC-32 IEEE, == zlib.crc32)"""
+        return self.lib.Calculate_CRC32(data, buffer_size(data))
+    
+    def crc32_hw(self, data):
+        """Calculate_CRC32_HW (unité CRC émulée, == firmware_image.crc32_stm32)"""
+        return self.lib.Calculate_CRC32_HW(data, buffer_size(data))
+    
+    def sha256(self, data):
+        out = ctypes.create_string_buffer(32)
+        self.lib.sha256_hash(data, buffer_size(data), out)
+        return out.raw
+    
+    def hmac_sha256(self, key, data):
+        out = ctypes.create_string_buffer(32)
+        self.lib.hmac_sha256(key, buffer_size(key), data, buffer_size(data), out)
+        return out.raw
+    
+    def sha256_ctx(self, data=None):
+        return Sha256Ctx(self.lib, data)
+    
+    def hmac_ctx(self, key, data=None):
+        return HmacCtx(self.lib, key, data)
+    
+    def sha256_file(self, path, chunk_size=CHUNK_SIZE):
+        """SHA-256 d'un fichier lu par morceaux (mémoire constante)"""
+        ctx = Sha256Ctx(self.lib)
+        ctx.update_file(path, chunk_size)
+        return ctx.digest()
+    
+    def base64_encode(self, data):
+        size = buffer_size(data)
+        out = ctypes.create_string_buffer(4 * ((size + 2) // 3) + 1)
+        length = self.lib.base64_encode(data, size, out)
+        return out.raw[:length]
+    
+    def base64_decode(self, text, max_len=None):
+        """Décode `text` (bytes ASCII); max_len borne la sortie (dst_len)"""
+        text = bytes(text)
+        max_len = 3 * (len(text) // 4) if max_len is None else max_len
+        out = ctypes.create_string_buffer(max_len + 1)
+        length = self.lib.base64_decode(text, out, max_len)
+        return out.raw[:length]
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+BOOTLOADER MODEL - Modèle hôte de Verify_Firmware() (src/main.c)
+============================================================================
+
+Rejoue sur une image de flash 64KB les vérifications du bootloader, dans
+le même ordre et avec les mêmes codes LED (LED_Error_Loop):
+
+    magic (1) → taille (2) → stack pointer (5) → CRC32 (2) → SHA-256 (3)
+
+Par défaut, verify() fait exactement ce que fait Verify_Firmware() sur
+la carte, rien de plus.
+
+Le CRC32 suit reserved.crc_mode comme Verify_Firmware(): CRC IEEE logiciel
+ou unité CRC matérielle (crc32_stm32); un mode inconnu échoue en code 2.
+
+Le bootloader C n'utilise pas encore la table de hash par page
+(firmware_signer --page-hashes). verify(page_check=True) la vérifie
+avant le CRC: le modèle s'arrête à la première page corrompue (code 3,
+comme un SHA-256 faux) et, après une mise à jour partielle (program()),
+reverify_pages() ne re-vérifie que les pages réécrites. Cet ordre et ce
+code ne sont pas ceux de la carte, qui signale la même image en CRC32
+(code 2).
+
+Une image de flash complète (st-flash read flash.bin 0x08000000 65536,
+images candidates générées par un outil) s'ouvre par mmap, sans copie
+(BootloaderModel.open). Avec `lib` (BootloaderLib, bindings/build.sh),
+CRC32 et SHA-256 sont calculés par le code C du bootloader
+(Calculate_CRC32, Calculate_CRC32_HW, sha256_hash) au lieu de zlib /
+hashlib: verify_images() et la CLI valident des milliers d'images par
+minute avant le passage sur carte.
+
+Usage:
+    model = BootloaderModel.from_package(open('firmware_signed.bin', 'rb').read())
+    model.verify().led_code   # 0 = saut vers l'application
+    
+    with BootloaderModel.open('flash.bin', BootloaderLib()) as model:
+        model.verify()
+    
+    python3 test/tools/bootloader_model.py candidates/*.bin -o results.json
+============================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bootloader_bindings import DEFAULT_LIBRARY, BootloaderLib  # noqa: E402
+
+APPLICATION_TOOLS_DIR = (
+    Path(__file__).resolve().parents[3] / 'stm32_secure_application' / 'tools'
+)
+
+if str(APPLICATION_TOOLS_DIR) not in sys.path:
+    sys.path.insert(0, str(APPLICATION_TOOLS_DIR))
+
+from firmware_image import (  # noqa: E402
+    CRC_MODE_IEEE, CRC_MODE_STM32, FIRMWARE_MAGIC, FLAG_PAGE_HASHES, PACKAGE_SIZE,
+    calculate_crc32, crc32_stm32, parse_metadata, parse_reserved,
+)
+from page_hashes import first_bad_page, merkle_root, page_count, parse_page_table  # noqa: E402
+
+# ============================================================================
+# CONSTANTES (src/main.c, linker script)
+# ============================================================================
+
+FLASH_BASE = 0x08000000
+FLASH_SIZE = 64 * 1024
+FLASH_PAGE_SIZE = 1024
+APPLICATION_ADDRESS = 0x08002000
+APPLICATION_MAX_SIZE = 0xC000
+METADATA_ADDR = 0x0800E000
+PAGE_TABLE_ADDR = APPLICATION_ADDRESS + PACKAGE_SIZE  # Juste après le Reference Hash
+
+STACK_POINTER_MASK = 0x2FFE0000
+STACK_POINTER_EXPECTED = 0x20000000
+
+# Codes de LED_Error_Loop (0 = firmware valide, saut vers l'application)
+LED_OK = 0
+LED_BAD_MAGIC = 1
+LED_BAD_SIZE = 2
+LED_BAD_STACK = 5
+LED_BAD_CRC = 2
+LED_BAD_SHA = 3
+LED_BAD_PAGE = LED_BAD_SHA  # Hash de page faux: même signal qu'un SHA-256 faux
+
+# reserved.crc_mode → Calculate_CRC32 / Calculate_CRC32_HW
+CRC_FUNCTIONS = {
+    CRC_MODE_IEEE: calculate_crc32,
+    CRC_MODE_STM32: crc32_stm32,
+}
+
+BootResult = namedtuple('BootResult', ['led_code', 'stage', 'bad_page'])
+
+
+def flash_offset(address):
+    return address - FLASH_BASE
+
+
+def sha256(data):
+    return hashlib.sha256(data).digest()
+
+
+def crypto_functions(lib=None):
+    """
+    ({crc_mode: CRC32}, SHA-256) de Verify_Firmware()
+    
+    Sans `lib`: zlib / crc32_stm32 / hashlib. Avec une BootloaderLib: le
+    code C du bootloader (Calculate_CRC32, Calculate_CRC32_HW, sha256_hash).
+    """
+    if lib is None:
+        return CRC_FUNCTIONS, sha256
+    return {CRC_MODE_IEEE: lib.crc32, CRC_MODE_STM32: lib.crc32_hw}, lib.sha256
+
+# ============================================================================
+# MODÈLE
+# ============================================================================
+
+class BootloaderModel:
+    """
+    Image de flash + décision de Verify_Firmware()
+    
+    `flash` est une image de 64KB à partir de 0x08000000 (bytes, bytearray,
+    mmap). program() la copie en bytearray au premier écrit. `lib`
+    (BootloaderLib) fait calculer CRC32 et SHA-256 par le code C.
+    """
+    
+    def __init__(self, flash, lib=None):
+        if len(flash) < FLASH_SIZE:
+            raise ValueError(f"flash image too small ({len(flash)} bytes < {FLASH_SIZE})")
+        self.flash = flash
+        self.lib = lib
+        self.dirty_pages = set()
+        self._crc_functions, self._sha256 = crypto_functions(lib)
+        self._mmap = None
+    
+    @classmethod
+    def open(cls, path, lib=None):
+        """
+        Image de flash (fichier de 64KB ou plus) projetée en lecture seule
+        
+        À fermer (close() ou `with`) sans vue encore ouverte sur la flash
+        (read(), firmware).
+        """
+        with open(path, 'rb') as f:
+            try:
+                flash = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Fichier vide: rien à projeter
+                raise ValueError(f"flash image too small (0 bytes < {FLASH_SIZE})") from None
+        
+        try:
+            model = cls(flash, lib)
+        except ValueError:
+            flash.close()
+            raise
+        model._mmap = flash
+        return model
+    
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @classmethod
+    def from_package(cls, package, erased=b'\xFF'):
+        """Flash vierge (0xFF) + package signé écrit à 0x08002000"""
+        flash = bytearray(erased * FLASH_SIZE)
+        start = flash_offset(APPLICATION_ADDRESS)
+        flash[start:start + len(package)] = package
+        return cls(flash)
+    
+    def read(self, address, length):
+        offset = flash_offset(address)
+        return memoryview(self.flash)[offset:offset + length]
+    
+    def program(self, address, data):
+        """Écrit en flash et note les pages applicatives modifiées"""
+        if not isinstance(self.flash, bytearray):
+            self.flash = bytearray(self.flash)
+        
+        offset = flash_offset(address)
+        self.flash[offset:offset + len(data)] = data
+        
+        first = (address - APPLICATION_ADDRESS) // FLASH_PAGE_SIZE
+        last = (address + len(data) - 1 - APPLICATION_ADDRESS) // FLASH_PAGE_SIZE
+        self.dirty_pages.update(page for page in range(first, last + 1) if page >= 0)
+    
+    @property
+    def metadata(self):
+        return parse_metadata(self.flash, flash_offset(METADATA_ADDR))
+    
+    @property
+    def firmware(self):
+        return self.read(APPLICATION_ADDRESS, self.metadata.size)
+    
+    def page_table(self):
+        """Feuilles de la table de hash par page, ou None (absente ou racine fausse)"""
+        metadata = self.metadata
+        reserved = parse_reserved(metadata.reserved)
+        if not reserved.flags & FLAG_PAGE_HASHES:
+            return None
+        
+        table = parse_page_table(self.flash, flash_offset(PAGE_TABLE_ADDR))
+        if table is None:
+            return None
+        
+        page_size, leaves = table
+        if (page_size != FLASH_PAGE_SIZE
+                or len(leaves) != page_count(metadata.size, page_size)
+                or merkle_root(leaves) != reserved.page_root):
+            return None
+        return leaves
+    
+    def verify(self, page_check=False):
+        """
+        Verify_Firmware(): retourne BootResult(led_code, étape, page fautive)
+        
+        page_check=True ajoute la vérification de la table de hash par page
+        avant le CRC (extension hôte, absente du bootloader C).
+        """
+        metadata = self.metadata
+        
+        if metadata.magic != FIRMWARE_MAGIC:
+            return BootResult(LED_BAD_MAGIC, 'magic', None)
+        
+        if metadata.size == 0 or metadata.size > APPLICATION_MAX_SIZE:
+            return BootResult(LED_BAD_SIZE, 'size', None)
+        
+        stack_pointer, = struct.unpack_from('<I', self.flash, flash_offset(APPLICATION_ADDRESS))
+        if (stack_pointer & STACK_POINTER_MASK) != STACK_POINTER_EXPECTED:
+            return BootResult(LED_BAD_STACK, 'stack_pointer', None)
+        
+        firmware = self.firmware
+        reserved = parse_reserved(metadata.reserved)
+        
+        if page_check and reserved.flags & FLAG_PAGE_HASHES:
+            leaves = self.page_table()
+            if leaves is None:
+                return BootResult(LED_BAD_PAGE, 'pages', None)
+            
+            bad_page = first_bad_page(firmware, leaves)
+            if bad_page is not None:
+                return BootResult(LED_BAD_PAGE, 'pages', bad_page)
+        
+        calculate_crc = self._crc_functions.get(reserved.crc_mode)
+        if calculate_crc is None or calculate_crc(firmware) != metadata.crc32:
+            return BootResult(LED_BAD_CRC, 'crc32', None)
+        
+        if self._sha256(firmware) != metadata.sha256:
+            return BootResult(LED_BAD_SHA, 'sha256', None)
+        
+        self.dirty_pages.clear()
+        return BootResult(LED_OK, 'ok', None)
+    
+    def reverify_pages(self, pages=None):
+        """
+        Re-vérifie seulement les pages réécrites (dirty_pages si None)
+        
+        Suppose que le reste du firmware a déjà été vérifié par verify().
+        Sans table de hash par page, retombe sur verify(page_check=True).
+        """
+        leaves = self.page_table()
+        if leaves is None:
+            return self.verify(page_check=True)
+        
+        pages = self.dirty_pages if pages is None else set(pages)
+        if any(page >= APPLICATION_MAX_SIZE // FLASH_PAGE_SIZE for page in pages):
+            return self.verify(page_check=True)  # Métadonnées / table réécrites: tout revérifier
+        
+        pages = [page for page in pages if page < len(leaves)]  # Padding 0xFF ignoré
+        
+        bad_page = first_bad_page(self.firmware, leaves, pages)
+        if bad_page is not None:
+            return BootResult(LED_BAD_PAGE, 'pages', bad_page)
+        
+        self.dirty_pages.clear()
+        return BootResult(LED_OK, 'ok', None)
+
+# ============================================================================
+# LOTS D'IMAGES
+# ============================================================================
+
+def verify_image(path, lib=None, page_check=False):
+    """Verify_Firmware() sur un fichier image de flash (mmap) → BootResult"""
+    with BootloaderModel.open(path, lib) as model:
+        return model.verify(page_check)
+
+
+def verify_images(paths, lib=None, page_check=False):
+    """
+    Itère (chemin, BootResult ou exception) sur des images de flash
+    
+    Une image illisible ou trop courte ne stoppe pas le lot: son erreur
+    (OSError / ValueError) remplace le BootResult.
+    """
+    for path in paths:
+        try:
+            yield path, verify_image(path, lib, page_check)
+        except (OSError, ValueError) as e:
+            yield path, e
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run the bootloader Verify_Firmware() checks over 64KB flash images'
+    )
+    
+    parser.add_argument(
+        'images',
+        nargs='+',
+        help='Flash images starting at 0x08000000 (st-flash read flash.bin 0x08000000 65536)'
+    )
+    
+    parser.add_argument(
+        '--library',
+        default=str(DEFAULT_LIBRARY),
+        help='Compiled bindings used for CRC32 / SHA-256 (default: test/bindings/libbootloader.so)'
+    )
+    
+    parser.add_argument(
+        '--python',
+        action='store_true',
+        help='Use zlib / hashlib instead of the bootloader C code'
+    )
+    
+    parser.add_argument(
+        '--page-check',
+        action='store_true',
+        help='Also check the per-page hash table before the CRC (host-only, not done by the bootloader)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the per-image results to a JSON file'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        lib = None if args.python else BootloaderLib(args.library)
+    except OSError as e:
+        print(f"[!] {e} (build it with test/bindings/build.sh, or use --python)")
+        return 1
+    
+    results = []
+    start = time.perf_counter()
+    for path, result in verify_images(args.images, lib, args.page_check):
+        if isinstance(result, Exception):
+            results.append({'image': path, 'error': str(result)})
+            print(f"[!] {path}: {result}")
+        else:
+            results.append({'image': path, **result._asdict()})
+            if result.led_code != LED_OK:
+                page = '' if result.bad_page is None else f", page {result.bad_page}"
+                print(f"[-] {path}: LED {result.led_code} ({result.stage}{page})")
+    elapsed = time.perf_counter() - start
+    
+    booting = sum(1 for result in results if result.get('led_code') == LED_OK)
+    rate = len(results) / elapsed * 60 if elapsed else float('inf')
+    print(f"[+] {booting}/{len(results)} image(s) boot, {elapsed:.2f} s ({rate:.0f} images/min, "
+          f"{'python' if lib is None else 'C'} crypto)")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"[+] Results saved: {args.output}")
+    
+    return 0 if booting == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+CRYPTO FUZZER - Fuzzing différentiel de crypto_light (libbootloader.so)
+============================================================================
+
+Compare le code C des bindings de test aux implémentations de référence
+Python, sur des entrées aléatoires (longueurs autour des bords de bloc et
+de padding, découpages aléatoires des update()):
+
+    crc32          Calculate_CRC32               ↔ zlib.crc32
+    sha256         sha256_hash                   ↔ hashlib.sha256
+    sha256_stream  sha256_init/update/final      ↔ hashlib.sha256
+    hmac           hmac_sha256                   ↔ hmac.new(..., 'sha256')
+    hmac_key       hmac_sha256_init_key / _mac   ↔ hmac.new(..., 'sha256')
+    base64_encode  base64_encode                 ↔ base64.b64encode
+    base64_decode  base64_decode (dst_len borné) ↔ base64.b64decode
+
+Les cas sont générés par lots (graine, index de lot) sur un pool de
+process: un run est reproductible avec la même --seed. Une entrée en
+échec est minimisée (suppression de tranches puis mise à zéro des bytes)
+avant d'être rapportée.
+
+Usage:
+    python3 test/tools/crypto_fuzzer.py --cases 1000000 -j 8 -o fuzz_report.json
+    python3 test/tools/crypto_fuzzer.py --targets sha256_stream,hmac --seed 42
+============================================================================
+"""
+
+import argparse
+import base64
+import ctypes
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bootloader_bindings import DEFAULT_LIBRARY, HMAC_SHA256_CTX, SHA256_CTX  # noqa: E402
+from bootloader_bindings import load as load_library  # noqa: E402
+
+DEFAULT_CASES = 100000
+DEFAULT_MAX_LEN = 4096
+BATCH_SIZE = 2000  # Cas par tâche du pool
+
+# Longueurs sensibles: bords du padding SHA-256 (55/56) et des blocs de 64
+EDGE_LENGTHS = [0, 1, 2, 3, 4, 55, 56, 57, 63, 64, 65, 119, 120, 127, 128, 129, 191, 192, 193]
+
+MAX_FAILURES_PER_TARGET = 5  # Cas minimisés gardés par cible
+
+Target = namedtuple('Target', ['name', 'generate', 'check'])
+
+# ============================================================================
+# GÉNÉRATION DES CAS
+# ============================================================================
+
+def random_length(rng, max_len):
+    """Longueur biaisée vers les bords de bloc, parfois jusqu'à max_len"""
+    roll = rng.random()
+    if roll < 0.4:
+        return min(rng.choice(EDGE_LENGTHS), max_len)
+    if roll < 0.8:
+        return rng.randrange(min(max_len, 256) + 1)
+    return rng.randrange(max_len + 1)
+
+
+def random_data(rng, max_len):
+    length = random_length(rng, max_len)
+    if rng.random() < 0.1:
+        return bytes([rng.choice((0x00, 0xFF))]) * length  # Flash effacée / zéros
+    return rng.randbytes(length)
+
+
+def random_chunks(rng):
+    """Tailles des update() successifs (cycliques, voir split_chunks)"""
+    return [rng.choice((0, 1, 3, 55, 63, 64, 65, rng.randrange(1, 200)))
+            for _ in range(rng.randrange(1, 6))]
+
+
+def split_chunks(data, chunks):
+    """Découpe data en appliquant les tailles de chunks en boucle (0 = update vide)"""
+    if not any(chunks):
+        return [b'', data]
+    
+    pieces = []
+    offset = index = 0
+    while offset < len(data):
+        size = chunks[index % len(chunks)]
+        pieces.append(data[offset:offset + size])
+        offset += size
+        index += 1
+    return pieces
+
+# ============================================================================
+# CIBLES
+# ============================================================================
+
+def _mismatch(got, expected):
+    return None if got == expected else f"C {got!r} != reference {expected!r}"
+
+
+def check_crc32(lib, case):
+    data = case['data']
+    return _mismatch(lib.Calculate_CRC32(data, len(data)), zlib.crc32(data))
+
+
+def check_sha256(lib, case):
+    data = case['data']
+    out = ctypes.create_string_buffer(32)
+    lib.sha256_hash(data, len(data), out)
+    return _mismatch(out.raw, hashlib.sha256(data).digest())
+
+
+def check_sha256_stream(lib, case):
+    data = case['data']
+    ctx = SHA256_CTX()
+    lib.sha256_init(ctx)
+    for piece in split_chunks(data, case['chunks']):
+        lib.sha256_update(ctx, piece, len(piece))
+    out = ctypes.create_string_buffer(32)
+    lib.sha256_final(ctx, out)
+    return _mismatch(out.raw, hashlib.sha256(data).digest())
+
+
+def check_hmac(lib, case):
+    key, data = case['key'], case['data']
+    out = ctypes.create_string_buffer(32)
+    lib.hmac_sha256(key, len(key), data, len(data), out)
+    return _mismatch(out.raw, hmac.new(key, data, 'sha256').digest())
+
+
+def check_hmac_key(lib, case):
+    key, data = case['key'], case['data']
+    key_ctx = HMAC_SHA256_CTX()
+    lib.hmac_sha256_init_key(key_ctx, key, len(key))
+    
+    out = ctypes.create_string_buffer(32)
+    expected = hmac.new(key, data, 'sha256').digest()
+    for _ in range(2):  # La clé précalculée ne doit pas être modifiée par un MAC
+        lib.hmac_sha256_mac(key_ctx, data, len(data), out)
+        mismatch = _mismatch(out.raw, expected)
+        if mismatch:
+            return mismatch
+    return None
+
+
+def check_base64_encode(lib, case):
+    data = case['data']
+    out = ctypes.create_string_buffer(4 * ((len(data) + 2) // 3) + 1)
+    length = lib.base64_encode(data, len(data), out)
+    return _mismatch(out.raw[:length + 1], base64.b64encode(data) + b'\x00')
+
+
+def check_base64_decode(lib, case):
+    data = case['data']
+    dst_len = min(case['dst_len'], len(data))
+    out = ctypes.create_string_buffer(len(data) + 1)
+    length = lib.base64_decode(base64.b64encode(data), out, dst_len)
+    return _mismatch(out.raw[:length], data[:dst_len])
+
+
+def _data_case(rng, max_len):
+    return {'data': random_data(rng, max_len)}
+
+
+def _stream_case(rng, max_len):
+    return {'data': random_data(rng, max_len), 'chunks': random_chunks(rng)}
+
+
+def _keyed_case(rng, max_len):
+    key_len = rng.choice((0, 1, 16, 32, 63, 64, 65, 100, rng.randrange(200)))
+    return {'key': rng.randbytes(key_len), 'data': random_data(rng, max_len)}
+
+
+def _decode_case(rng, max_len):
+    data = random_data(rng, max_len)
+    dst_len = len(data) if rng.random() < 0.7 else rng.randrange(len(data) + 1)
+    return {'data': data, 'dst_len': dst_len}
+
+
+TARGETS = {target.name: target for target in [
+    Target('crc32', _data_case, check_crc32),
+    Target('sha256', _data_case, check_sha256),
+    Target('sha256_stream', _stream_case, check_sha256_stream),
+    Target('hmac', _keyed_case, check_hmac),
+    Target('hmac_key', _keyed_case, check_hmac_key),
+    Target('base64_encode', _data_case, check_base64_encode),
+    Target('base64_decode', _decode_case, check_base64_decode),
+]}
+
+# ============================================================================
+# MINIMISATION
+# ============================================================================
+
+def minimize(check, lib, case):
+    """
+    Réduit un cas en échec en gardant l'échec
+    
+    Pour chaque champ bytes: suppression de tranches de taille décroissante
+    (delta debugging), puis remplacement des bytes par 0x00.
+    """
+    def fails(candidate):
+        try:
+            return check(lib, candidate) is not None
+        except Exception:
+            return True
+    
+    case = dict(case)
+    for field in [name for name, value in case.items() if isinstance(value, bytes)]:
+        size = max(len(case[field]) // 2, 1)
+        while size >= 1 and case[field]:
+            offset = 0
+            while offset < len(case[field]):
+                value = case[field]
+                candidate = dict(case, **{field: value[:offset] + value[offset + size:]})
+                if fails(candidate):
+                    case = candidate
+                else:
+                    offset += size
+            size //= 2
+        
+        for offset in range(len(case[field])):
+            value = case[field]
+            if value[offset]:
+                candidate = dict(case, **{field: value[:offset] + b'\x00' + value[offset + 1:]})
+                if fails(candidate):
+                    case = candidate
+    
+    return case
+
+
+def case_to_json(case):
+    return {name: value.hex() if isinstance(value, bytes) else value for name, value in case.items()}
+
+
+def case_from_json(data):
+    return {name: bytes.fromhex(value) if isinstance(value, str) else value
+            for name, value in data.items()}
+
+# ============================================================================
+# EXÉCUTION (pool de process)
+# ============================================================================
+
+_worker_lib = None
+
+
+def _init_worker(library):
+    global _worker_lib
+    _worker_lib = load_library(library)
+
+
+def run_batch(task, lib=None):
+    """
+    Exécute un lot (target, seed, batch, count, max_len)
+    
+    Retourne (target, cas exécutés, [échecs minimisés])
+    """
+    name, seed, batch, count, max_len = task
+    lib = lib or _worker_lib
+    target = TARGETS[name]
+    rng = random.Random(f"{seed}:{name}:{batch}")
+    failures = []
+    
+    for index in range(count):
+        case = target.generate(rng, max_len)
+        try:
+            detail = target.check(lib, case)
+        except Exception as e:
+            detail = f"{type(e).__name__}: {e}"
+        
+        if detail is not None and len(failures) < MAX_FAILURES_PER_TARGET:
+            minimized = minimize(target.check, lib, case)
+            failures.append({
+                'target': name,
+                'batch': batch,
+                'index': index,
+                'detail': detail,
+                'case': case_to_json(case),
+                'minimized': case_to_json(minimized),
+            })
+    
+    return name, count, failures
+
+
+def make_tasks(targets, cases, seed, max_len, batch_size=BATCH_SIZE):
+    """Découpe `cases` cas par cible en lots reproductibles"""
+    tasks = []
+    for name in targets:
+        for batch, start in enumerate(range(0, cases, batch_size)):
+            tasks.append((name, seed, batch, min(batch_size, cases - start), max_len))
+    return tasks
+
+
+def fuzz(targets=None, cases=DEFAULT_CASES, jobs=None, seed=0, max_len=DEFAULT_MAX_LEN,
+         library=DEFAULT_LIBRARY):
+    """
+    Lance le fuzzing différentiel
+    
+    `cases` est le nombre de cas par cible. Retourne le rapport (dict):
+    cases, elapsed_s, execs_per_s, targets {nom: {cases, failures}}, failures.
+    """
+    targets = list(targets or TARGETS)
+    unknown = [name for name in targets if name not in TARGETS]
+    if unknown:
+        raise ValueError(f"unknown target(s): {', '.join(unknown)}")
+    
+    jobs = jobs or os.cpu_count() or 1
+    tasks = make_tasks(targets, cases, seed, max_len)
+    
+    start = time.perf_counter()
+    if jobs == 1 or len(tasks) <= 1:
+        lib = load_library(library)
+        results = [run_batch(task, lib) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(str(library),)) as pool:
+            results = list(pool.map(run_batch, tasks))
+    elapsed = time.perf_counter() - start
+    
+    report = {
+        'seed': seed,
+        'jobs': jobs,
+        'max_len': max_len,
+        'cases': 0,
+        'targets': {name: {'cases': 0, 'failures': 0} for name in targets},
+        'failures': [],
+    }
+    for name, count, failures in results:
+        report['cases'] += count
+        report['targets'][name]['cases'] += count
+        report['targets'][name]['failures'] += len(failures)
+        report['failures'].extend(failures)
+    
+    report['elapsed_s'] = round(elapsed, 3)
+    report['execs_per_s'] = round(report['cases'] / elapsed, 1) if elapsed else None
+    return report
+
+
+def replay(path, library=DEFAULT_LIBRARY):
+    """Rejoue les cas minimisés d'un rapport; retourne [(target, detail ou None)]"""
+    with open(path) as f:
+        report = json.load(f)
+    
+    lib = load_library(library)
+    return [(failure['target'],
+             TARGETS[failure['target']].check(lib, case_from_json(failure['minimized'])))
+            for failure in report['failures']]
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Differential fuzzing of crypto_light (libbootloader.so) against hashlib/zlib/hmac/base64'
+    )
+    
+    parser.add_argument(
+        '-n', '--cases',
+        type=int,
+        default=DEFAULT_CASES,
+        help=f'Cases per target (default: {DEFAULT_CASES})'
+    )
+    
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed (default: random, printed in the report)'
+    )
+    
+    parser.add_argument(
+        '--targets',
+        default=','.join(TARGETS),
+        help=f'Comma-separated targets (default: {",".join(TARGETS)})'
+    )
+    
+    parser.add_argument(
+        '--max-len',
+        type=int,
+        default=DEFAULT_MAX_LEN,
+        help=f'Maximum input length in bytes (default: {DEFAULT_MAX_LEN})'
+    )
+    
+    parser.add_argument(
+        '--library',
+        default=str(DEFAULT_LIBRARY),
+        help='Compiled bindings (default: test/bindings/libbootloader.so)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the JSON report (failures with minimized inputs) to a file'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='REPORT',
+        help='Re-run the minimized failures of a previous report'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    if args.replay:
+        results = replay(args.replay, args.library)
+        for name, detail in results:
+            print(f"[{'!' if detail else '✓'}] {name}: {detail or 'fixed'}")
+        return 1 if any(detail for _, detail in results) else 0
+    
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    targets = [name.strip() for name in args.targets.split(',') if name.strip()]
+    
+    try:
+        report = fuzz(targets, args.cases, args.jobs, seed, args.max_len, args.library)
+    except (OSError, ValueError) as e:
+        print(f"[!] {e}")
+        return 1
+    
+    for name, stats in report['targets'].items():
+        status = '✓' if not stats['failures'] else '!'
+        print(f"[{status}] {name:<14} {stats['cases']:>10} cases, {stats['failures']} failure(s)")
+    
+    for failure in report['failures']:
+        print(f"[!] {failure['target']}: {failure['detail']}")
+        print(f"    minimized: {failure['minimized']}")
+    
+    print(f"\n[+] {report['cases']} cases in {report['elapsed_s']:.2f}s "
+          f"({report['execs_per_s']:.0f} execs/s, {report['jobs']} workers, seed {seed})")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"[+] Report saved: {args.output}")
+    
+    return 1 if report['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
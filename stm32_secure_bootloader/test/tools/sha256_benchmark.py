@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SHA256 BENCHMARK - Débit de sha256_update (libbootloader.so)
+============================================================================
+
+Mesure, via les bindings ctypes, le débit de sha256_update (chemin rapide:
+blocs complets compressés directement depuis la source) contre l'ancienne
+boucle byte par byte (sha256_update_bytewise, exportée par crypto_test.c
+uniquement) et contre hashlib. Chaque digest est vérifié contre hashlib.
+
+Scénarios: image de 48KB (taille de la zone application) et 1MB, en un
+seul update() puis découpée en morceaux de 256 bytes (page de lecture) et
+de 61 bytes (non alignés: le chemin bloc partiel + tail est exercé).
+
+Le rapport sur l'hôte ne donne pas les cycles Cortex-M3, mais le gain
+vient de la boucle supprimée (copie + test de bloc par byte), qui pèse
+relativement plus à 72 MHz sans cache.
+
+Usage:
+    python3 test/tools/sha256_benchmark.py
+    python3 test/tools/sha256_benchmark.py --sizes 49152 --chunks 0,64 -r 20
+============================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bootloader_bindings import DEFAULT_LIBRARY, SHA256_CTX, BootloaderLib  # noqa: E402
+
+DEFAULT_SIZES = [48 * 1024, 1024 * 1024]
+DEFAULT_CHUNKS = [0, 256, 61]  # 0 = un seul update()
+DEFAULT_REPEAT = 5
+
+# ============================================================================
+# MESURES
+# ============================================================================
+
+def hash_with(lib, update, data, chunk):
+    """sha256_init / `update` par morceaux / sha256_final → digest"""
+    ctx = SHA256_CTX()
+    lib.sha256_init(ctx)
+    
+    view = memoryview(data)
+    step = chunk or len(view) or 1
+    for start in range(0, len(view), step):
+        piece = view[start:start + step]
+        update(ctx, piece, len(piece))
+    
+    out = bytearray(32)
+    lib.sha256_final(ctx, out)
+    return bytes(out)
+
+
+def best_time(function, repeat):
+    """Meilleur temps sur `repeat` exécutions → (secondes, résultat)"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(lib, size, chunk=0, repeat=DEFAULT_REPEAT, data=None):
+    """
+    Mesure un scénario
+    
+    Returns:
+        dict: temps (s) et débit (MB/s) de chaque implémentation, speedup
+              du chemin rapide sur la boucle byte par byte, digests OK
+    """
+    data = os.urandom(size) if data is None else data
+    expected = hashlib.sha256(data).digest()
+    
+    fast_s, fast = best_time(lambda: hash_with(lib, lib.sha256_update, data, chunk), repeat)
+    bytewise_s, bytewise = best_time(
+        lambda: hash_with(lib, lib.sha256_update_bytewise, data, chunk), repeat)
+    hashlib_s, _ = best_time(lambda: hashlib.sha256(data).digest(), repeat)
+    
+    def mbps(seconds):
+        return size / seconds / 1e6 if seconds else float('inf')
+    
+    return {
+        'size': size,
+        'chunk': chunk,
+        'fast_s': fast_s,
+        'bytewise_s': bytewise_s,
+        'hashlib_s': hashlib_s,
+        'fast_mbps': mbps(fast_s),
+        'bytewise_mbps': mbps(bytewise_s),
+        'hashlib_mbps': mbps(hashlib_s),
+        'speedup': bytewise_s / fast_s if fast_s else float('inf'),
+        'ok': fast == expected and bytewise == expected,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, chunks=DEFAULT_CHUNKS, repeat=DEFAULT_REPEAT, library=DEFAULT_LIBRARY):
+    lib = BootloaderLib(library)
+    return [benchmark(lib, size, chunk, repeat) for size in sizes for chunk in chunks]
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def _int_list(text):
+    return [int(item, 0) for item in text.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark sha256_update (fast path vs byte loop vs hashlib) through ctypes'
+    )
+    
+    parser.add_argument(
+        '--sizes',
+        type=_int_list,
+        default=DEFAULT_SIZES,
+        help='Comma-separated input sizes in bytes (default: 48KB,1MB)'
+    )
+    
+    parser.add_argument(
+        '--chunks',
+        type=_int_list,
+        default=DEFAULT_CHUNKS,
+        help='Comma-separated update() sizes, 0 = single call (default: 0,256,61)'
+    )
+    
+    parser.add_argument(
+        '-r', '--repeat',
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f'Runs per measure, best time kept (default: {DEFAULT_REPEAT})'
+    )
+    
+    parser.add_argument(
+        '--library',
+        default=str(DEFAULT_LIBRARY),
+        help='Compiled bindings (default: test/bindings/libbootloader.so)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the JSON results to a file'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        results = run(args.sizes, args.chunks, args.repeat, args.library)
+    except OSError as e:
+        print(f"[!] {e}")
+        return 1
+    
+    print(f"{'size':>9} {'chunk':>6} {'fast MB/s':>10} {'byte MB/s':>10} "
+          f"{'hashlib MB/s':>13} {'speedup':>8}")
+    for result in results:
+        print(f"{result['size']:>9} {result['chunk'] or 'all':>6} {result['fast_mbps']:>10.1f} "
+              f"{result['bytewise_mbps']:>10.1f} {result['hashlib_mbps']:>13.1f} "
+              f"{result['speedup']:>7.2f}x {'✓' if result['ok'] else '! DIGEST MISMATCH'}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"[+] Results saved: {args.output}")
+    
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
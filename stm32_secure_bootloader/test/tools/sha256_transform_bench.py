@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SHA256 TRANSFORM BENCH - Pile, taille de code et débit par variante
+============================================================================
+
+Compile bindings/crypto_test.c une fois par variante de sha256_transform
+(-DSHA256_TRANSFORM=..., voir crypto_light.h) et rapporte pour chacune:
+
+    stack     pile de la chaîne sha256_hash → update/final → transform
+              (frames de -fstack-usage, -Os comme le bootloader)
+    code      taille de sha256_transform (nm -S, même compilation)
+    MB/s      débit de sha256_hash via ctypes, digest vérifié contre hashlib
+
+Le compilateur hôte donne des tailles x86/ARM64, pas Thumb-2: les chiffres
+servent à comparer les variantes entre elles. Avec --cc
+arm-none-eabi-gcc --cflags="-mcpu=cortex-m3 -mthumb -Os", pile et code
+sont ceux de la cible (le débit n'est alors pas mesurable).
+
+Usage:
+    python3 test/tools/sha256_transform_bench.py
+    python3 test/tools/sha256_transform_bench.py --cflags=-O2 -o transform.json
+============================================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bootloader_bindings import BootloaderLib  # noqa: E402
+
+SOURCE = Path(__file__).resolve().parents[1] / 'bindings' / 'crypto_test.c'
+CRYPTO_DIR = Path(__file__).resolve().parents[2] / 'lib' / 'crypto'
+
+# Valeurs de SHA256_TRANSFORM (crypto_light.h)
+VARIANTS = {
+    'schedule64': 0,
+    'ring16': 1,
+    'unrolled': 2,
+}
+
+DEFAULT_CFLAGS = '-Os'  # build_flags du bootloader (platformio.ini)
+DEFAULT_SIZE = 48 * 1024
+DEFAULT_REPEAT = 5
+
+# chemin/fichier.c:ligne:colonne:fonction<TAB>bytes<TAB>qualificatifs
+_SU_LINE = re.compile(r'^.*:(?P<function>\w+)\t(?P<bytes>\d+)\t(?P<kind>[\w,]+)$')
+
+# ============================================================================
+# COMPILATION
+# ============================================================================
+
+def parse_stack_usage(text):
+    """Fichier .su de -fstack-usage → {fonction: bytes}"""
+    frames = {}
+    for line in text.splitlines():
+        match = _SU_LINE.match(line.strip())
+        if match:
+            frames[match.group('function')] = int(match.group('bytes'))
+    return frames
+
+
+def symbol_sizes(obj, nm='nm'):
+    """Taille des symboles de code d'un objet (nm -S) → {symbole: bytes}"""
+    output = subprocess.run([nm, '-S', str(obj)], check=True, capture_output=True,
+                            text=True).stdout
+    sizes = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 4 and fields[2] in 'tT':
+            sizes[fields[3]] = int(fields[1], 16)
+    return sizes
+
+
+def hash_stack(frames):
+    """
+    Pile de sha256_hash: sa frame + la plus profonde de update / final,
+    + la frame de sha256_transform si elle n'a pas été inlinée
+    """
+    callee = max(frames.get('sha256_update', 0), frames.get('sha256_final', 0))
+    return frames.get('sha256_hash', 0) + callee + frames.get('sha256_transform', 0)
+
+
+def build_variant(variant, workdir, cc='gcc', cflags=DEFAULT_CFLAGS, nm='nm', link=True):
+    """
+    Compile crypto_test.c pour une variante
+    
+    Returns:
+        dict: frames (pile par fonction), stack (chaîne sha256_hash),
+              code (bytes de sha256_transform), library (.so ou None)
+    """
+    workdir = Path(workdir)
+    obj = workdir / f'sha256_{variant}.o'
+    command = [cc, '-c', '-fPIC', *shlex.split(cflags), '-fstack-usage', '-DTEST_BUILD',
+               f'-DSHA256_TRANSFORM={VARIANTS[variant]}', f'-I{CRYPTO_DIR}',
+               '-o', str(obj), str(SOURCE)]
+    subprocess.run(command, check=True, capture_output=True, text=True)
+    
+    frames = parse_stack_usage(obj.with_suffix('.su').read_text())
+    library = None
+    if link:
+        library = workdir / f'libsha256_{variant}.so'
+        subprocess.run([cc, '-shared', '-o', str(library), str(obj)], check=True,
+                       capture_output=True, text=True)
+    
+    return {
+        'variant': variant,
+        'frames': frames,
+        'stack': hash_stack(frames),
+        'code': symbol_sizes(obj, nm).get('sha256_transform'),
+        'library': library,
+    }
+
+# ============================================================================
+# MESURES
+# ============================================================================
+
+def throughput(library, size=DEFAULT_SIZE, repeat=DEFAULT_REPEAT, data=None):
+    """Débit de sha256_hash (MB/s, meilleur temps) et digest == hashlib"""
+    lib = BootloaderLib(library)
+    data = os.urandom(size) if data is None else data
+    
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        digest = lib.sha256(data)
+        best = min(best, time.perf_counter() - start)
+    
+    return len(data) / best / 1e6, digest == hashlib.sha256(data).digest()
+
+
+def run(variants=VARIANTS, cc='gcc', cflags=DEFAULT_CFLAGS, nm='nm', size=DEFAULT_SIZE,
+        repeat=DEFAULT_REPEAT, measure=True):
+    """Compile et mesure chaque variante → liste de résultats"""
+    results = []
+    data = os.urandom(size)
+    
+    with tempfile.TemporaryDirectory(prefix='sha256_transform_') as workdir:
+        for variant in variants:
+            result = build_variant(variant, workdir, cc, cflags, nm, link=measure)
+            if measure:
+                result['mbps'], result['ok'] = throughput(result['library'], size, repeat, data)
+            result['library'] = None  # Supprimée avec le répertoire temporaire
+            results.append(result)
+    
+    return results
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Stack use, code size and throughput of each sha256_transform variant'
+    )
+    
+    parser.add_argument(
+        '--variants',
+        default=','.join(VARIANTS),
+        help=f'Comma-separated variants (default: {",".join(VARIANTS)})'
+    )
+    
+    parser.add_argument(
+        '--cc',
+        default='gcc',
+        help='C compiler (default: gcc)'
+    )
+    
+    parser.add_argument(
+        '--cflags',
+        default=DEFAULT_CFLAGS,
+        help=f'Compiler flags (default: {DEFAULT_CFLAGS}, as the bootloader build)'
+    )
+    
+    parser.add_argument(
+        '--nm',
+        default='nm',
+        help='nm for the code size (default: nm)'
+    )
+    
+    parser.add_argument(
+        '--size',
+        type=int,
+        default=DEFAULT_SIZE,
+        help=f'Bytes hashed per measure (default: {DEFAULT_SIZE})'
+    )
+    
+    parser.add_argument(
+        '-r', '--repeat',
+        type=int,
+        default=DEFAULT_REPEAT,
+        help=f'Runs per measure, best time kept (default: {DEFAULT_REPEAT})'
+    )
+    
+    parser.add_argument(
+        '--no-measure',
+        action='store_true',
+        help='Only compile (cross-compiler: stack and code size only)'
+    )
+    
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the JSON results to a file'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    variants = [name.strip() for name in args.variants.split(',') if name.strip()]
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        print(f"[!] Unknown variant(s): {', '.join(unknown)}")
+        return 1
+    
+    try:
+        results = run(variants, args.cc, args.cflags, args.nm, args.size, args.repeat,
+                      measure=not args.no_measure)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"[!] {e}")
+        if getattr(e, 'stderr', None):
+            print(e.stderr)
+        return 1
+    
+    print(f"{'variant':<11} {'stack':>6} {'transform':>10} {'code':>6} {'MB/s':>8}")
+    for result in results:
+        measured = (f"{result['mbps']:>8.1f} {'✓' if result['ok'] else '! DIGEST MISMATCH'}"
+                    if 'mbps' in result else '')
+        print(f"{result['variant']:<11} {result['stack']:>6} "
+              f"{result['frames'].get('sha256_transform', 0):>10} {result['code'] or 0:>6} {measured}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"[+] Results saved: {args.output}")
+    
+    return 0 if all(result.get('ok', True) for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
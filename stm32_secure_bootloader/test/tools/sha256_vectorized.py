@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+SHA256 VECTORISÉ - Modèle de référence SHA-256 multi-messages (NumPy)
+============================================================================
+
+Hash N messages de même longueur en parallèle: chaque mot de l'état et
+du message schedule est un tableau uint32 de N éléments (axe des
+messages), les 64 rondes avancent toutes les lignes en même temps. Les
+additions uint32 de NumPy bouclent modulo 2^32 comme en C.
+
+Sert de référence pour la conformité de crypto_light.c (sha256_hash et
+sha256_init/update/final) sur de gros corpus aléatoires, sans boucle
+Python par message:
+
+    digests = sha256_many(np.random.randint(0, 256, (4096, 100), np.uint8))
+    states = block_states(corpus)   # état après chaque bloc de 64 bytes
+
+Entrées: liste de bytes de même longueur, ou tableau uint8 (N, longueur).
+============================================================================
+"""
+
+import numpy as np
+
+__all__ = ['BLOCK_SIZE', 'DIGEST_SIZE', 'as_corpus', 'pad_messages', 'compress',
+           'block_states', 'sha256_many', 'digests']
+
+BLOCK_SIZE = 64
+DIGEST_SIZE = 32
+
+K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.uint32)
+
+H0 = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+    0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.uint32)
+
+# ============================================================================
+# PRIMITIVES (vectorisées sur l'axe des messages)
+# ============================================================================
+
+def _rotr(x, n):
+    return (x >> np.uint32(n)) | (x << np.uint32(32 - n))
+
+
+def _ep0(x):
+    return _rotr(x, 2) ^ _rotr(x, 13) ^ _rotr(x, 22)
+
+
+def _ep1(x):
+    return _rotr(x, 6) ^ _rotr(x, 11) ^ _rotr(x, 25)
+
+
+def _sig0(x):
+    return _rotr(x, 7) ^ _rotr(x, 18) ^ (x >> np.uint32(3))
+
+
+def _sig1(x):
+    return _rotr(x, 17) ^ _rotr(x, 19) ^ (x >> np.uint32(10))
+
+
+def as_corpus(messages):
+    """Tableau uint8 (N, longueur) depuis une liste de bytes de même longueur"""
+    if isinstance(messages, np.ndarray):
+        if messages.ndim != 2 or messages.dtype != np.uint8:
+            raise ValueError(f"expected a 2-D uint8 array, got {messages.dtype} {messages.shape}")
+        return messages
+    
+    messages = [bytes(message) for message in messages]
+    lengths = {len(message) for message in messages}
+    if len(lengths) > 1:
+        raise ValueError(f"messages must have the same length, got {sorted(lengths)}")
+    
+    length = lengths.pop() if lengths else 0
+    return np.frombuffer(b''.join(messages), dtype=np.uint8).reshape(len(messages), length)
+
+
+def _words(blocks):
+    """(N, B*64) uint8 → (B, 16, N) mots big-endian"""
+    count = blocks.shape[0]
+    words = blocks.reshape(count, -1, 16, 4).astype(np.uint32)
+    words = (words[..., 0] << 24) | (words[..., 1] << 16) | (words[..., 2] << 8) | words[..., 3]
+    return np.ascontiguousarray(words.transpose(1, 2, 0))
+
+
+def pad_messages(messages):
+    """Padding SHA-256 (0x80, zéros, longueur en bits) → mots (B, 16, N)"""
+    corpus = as_corpus(messages)
+    count, length = corpus.shape
+    
+    # Même longueur pour toutes les lignes: une seule queue de padding
+    tail_size = (55 - length) % BLOCK_SIZE + 9
+    tail = np.zeros(tail_size, dtype=np.uint8)
+    tail[0] = 0x80
+    tail[-8:] = np.frombuffer((length * 8).to_bytes(8, 'big'), dtype=np.uint8)
+    
+    padded = np.empty((count, length + tail_size), dtype=np.uint8)
+    padded[:, :length] = corpus
+    padded[:, length:] = tail
+    return _words(padded)
+
+
+def compress(state, block):
+    """
+    Une compression SHA-256 pour toutes les lignes
+    
+    state: (8, N) uint32, block: (16, N) uint32 → nouvel état (8, N)
+    """
+    w = list(block)
+    for i in range(16, 64):
+        w.append(_sig1(w[i - 2]) + w[i - 7] + _sig0(w[i - 15]) + w[i - 16])
+    
+    a, b, c, d, e, f, g, h = state
+    for i in range(64):
+        t1 = h + _ep1(e) + ((e & f) ^ (~e & g)) + K[i] + w[i]
+        t2 = _ep0(a) + ((a & b) ^ (a & c) ^ (b & c))
+        h, g, f, e, d, c, b, a = g, f, e, d + t1, c, b, a, t1 + t2
+    
+    return state + np.stack([a, b, c, d, e, f, g, h])
+
+
+def _initial_state(count):
+    return np.repeat(H0[:, None], count, axis=1)
+
+# ============================================================================
+# API
+# ============================================================================
+
+def block_states(messages):
+    """
+    États intermédiaires: (blocs complets + 1, 8, N) uint32
+    
+    L'index i est l'état après les i premiers blocs de 64 bytes du
+    message (sans padding), soit SHA256_CTX.state quand count[1] == i.
+    """
+    corpus = as_corpus(messages)
+    count, length = corpus.shape
+    full = length // BLOCK_SIZE
+    
+    states = np.empty((full + 1, 8, count), dtype=np.uint32)
+    states[0] = _initial_state(count)
+    if full:
+        words = _words(corpus[:, :full * BLOCK_SIZE])
+        for i, block in enumerate(words):
+            states[i + 1] = compress(states[i], block)
+    return states
+
+
+def sha256_many(messages):
+    """SHA-256 de N messages de même longueur → tableau uint8 (N, 32)"""
+    words = pad_messages(messages)
+    state = _initial_state(words.shape[2])
+    for block in words:
+        state = compress(state, block)
+    
+    return np.ascontiguousarray(state.T, dtype='>u4').view(np.uint8).reshape(-1, DIGEST_SIZE)
+
+
+def digests(messages):
+    """SHA-256 de N messages → liste de bytes"""
+    return [row.tobytes() for row in sha256_many(messages)]
+
+
+if __name__ == '__main__':
+    import hashlib
+    import time
+    
+    rng = np.random.default_rng()
+    corpus = rng.integers(0, 256, (8192, 200), dtype=np.uint8)
+    
+    start = time.perf_counter()
+    result = sha256_many(corpus)
+    elapsed = time.perf_counter() - start
+    
+    assert all(row.tobytes() == hashlib.sha256(message.tobytes()).digest()
+               for row, message in zip(result, corpus))
+    print(f"{len(corpus)} × {corpus.shape[1]} bytes in {elapsed:.3f}s "
+          f"({len(corpus) / elapsed:.0f} messages/s)")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+============================================================================
+STM32 CRC UNIT - Émulateur registre par registre de l'unité CRC (STM32F1)
+============================================================================
+
+Référence pour Calculate_CRC32_HW() (lib/crypto/crc32.c): chaque écriture de DR
+fait avancer le CRC-32/MPEG-2 d'un mot (polynôme 0x04C11DB7, MSB d'abord,
+sans réflexion ni XOR final); CR = CR_RESET remet DR à 0xFFFFFFFF.
+IDR est un octet libre, non touché par le reset.
+
+firmware_image.crc32_stm32 (signeur) et le binding Calculate_CRC32_HW
+doivent donner le même résultat que calculate_crc32_hw() ci-dessous.
+
+Usage:
+    unit = Stm32CrcUnit()
+    unit.CR = CR_RESET
+    unit.DR = 0x12345678
+    hex(unit.DR)   # 0xdf8a8a2b
+============================================================================
+"""
+
+import struct
+
+CRC_POLY = 0x04C11DB7
+CRC_RESET_VALUE = 0xFFFFFFFF
+CR_RESET = 0x00000001
+TAIL_PAD = b'\xFF'  # 1-3 bytes de fin complétés comme une flash effacée
+
+
+class Stm32CrcUnit:
+    """Registres DR, IDR, CR de l'unité CRC"""
+    
+    def __init__(self):
+        self._dr = CRC_RESET_VALUE
+        self.IDR = 0
+    
+    @property
+    def DR(self):
+        return self._dr
+    
+    @DR.setter
+    def DR(self, word):
+        crc = self._dr ^ (word & 0xFFFFFFFF)
+        for _ in range(32):
+            if crc & 0x80000000:
+                crc = ((crc << 1) ^ CRC_POLY) & 0xFFFFFFFF
+            else:
+                crc = (crc << 1) & 0xFFFFFFFF
+        self._dr = crc
+    
+    @property
+    def CR(self):
+        return 0  # RESET se relit à 0
+    
+    @CR.setter
+    def CR(self, value):
+        if value & CR_RESET:
+            self._dr = CRC_RESET_VALUE
+
+
+def calculate_crc32_hw(data, unit=None):
+    """Calculate_CRC32_HW(): mots little-endian lus en flash, fin complétée par 0xFF"""
+    unit = Stm32CrcUnit() if unit is None else unit
+    unit.CR = CR_RESET
+    
+    data = bytes(data)
+    words = len(data) // 4
+    for word in struct.unpack_from(f'<{words}I', data):
+        unit.DR = word
+    
+    tail = data[4 * words:]
+    if tail:
+        unit.DR, = struct.unpack('<I', tail + TAIL_PAD * (4 - len(tail)))
+    
+    return unit.DR
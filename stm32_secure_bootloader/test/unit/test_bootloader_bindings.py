@@ -0,0 +1,205 @@
+"""
+Tests Unitaires - Bindings ctypes (test/tools/bootloader_bindings.py)
+Passage sans copie de bytes / bytearray / memoryview / mmap / numpy
+"""
+
+import base64
+import ctypes
+import hashlib
+import hmac
+import mmap
+import time
+import tracemalloc
+import zlib
+
+import pytest
+
+from bootloader_bindings import BufferExport, InBuffer
+from conftest import SHA256_CTX
+
+
+@pytest.fixture
+def payload():
+    return bytes(range(256)) * 257  # 65792 bytes, pas un multiple de 64
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestInputBuffers:
+    """Tests des types d'entrée acceptés sans copie"""
+    
+    def test_bytes(self, bootloader_lib, payload):
+        """Test: bytes passé directement"""
+        assert bootloader_lib.crc32(payload) == zlib.crc32(payload)
+        assert bootloader_lib.sha256(payload) == hashlib.sha256(payload).digest()
+    
+    def test_bytearray_and_memoryview_slice(self, bootloader_lib, payload):
+        """Test: bytearray et tranche de memoryview (adresse décalée)"""
+        data = bytearray(payload)
+        
+        assert bootloader_lib.crc32(data) == zlib.crc32(payload)
+        assert bootloader_lib.sha256(memoryview(data)[0x2000:]) == \
+            hashlib.sha256(payload[0x2000:]).digest()
+    
+    def test_mmap(self, bootloader_lib, payload, tmp_path):
+        """Test: image flash mappée en mémoire"""
+        image = tmp_path / 'flash.bin'
+        image.write_bytes(payload)
+        
+        with open(image, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as flash:
+            assert bootloader_lib.crc32(flash) == zlib.crc32(payload)
+            assert bootloader_lib.sha256(memoryview(flash)[5:]) == hashlib.sha256(payload[5:]).digest()
+    
+    def test_numpy(self, bootloader_lib, payload):
+        """Test: tableau NumPy contigu, refus d'une vue non contiguë"""
+        np = pytest.importorskip('numpy')
+        array = np.frombuffer(payload, dtype=np.uint8)
+        
+        assert bootloader_lib.crc32(array) == zlib.crc32(payload)
+        with pytest.raises(ctypes.ArgumentError):
+            bootloader_lib.Calculate_CRC32(array[::2], array[::2].size)
+    
+    def test_ctypes_array(self, bootloader_lib):
+        """Test: les tableaux ctypes restent acceptés"""
+        data = (ctypes.c_uint8 * 9)(*b'123456789')
+        assert bootloader_lib.Calculate_CRC32(data, 9) == 0xCBF43926
+
+    
+    def test_export_held_during_call(self, tmp_path):
+        """Test: le buffer reste exporté (ni redimensionné ni fermé) jusqu'au retour de l'appel"""
+        data = bytearray(16)
+        pointer = InBuffer.from_param(data)
+        assert pointer.value == ctypes.addressof(ctypes.c_char.from_buffer(data))
+        with pytest.raises(BufferError):
+            data.extend(b'\x00')
+        del pointer
+        data.extend(b'\x00')
+        
+        image = tmp_path / 'flash.bin'
+        image.write_bytes(bytes(64))
+        with open(image, 'rb') as f:
+            flash = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with BufferExport(flash):
+                with pytest.raises(BufferError):
+                    flash.close()
+            flash.close()
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestOutputBuffers:
+    """Tests des buffers de sortie"""
+    
+    def test_bytes_output_refused(self, bootloader_lib):
+        """Test: un bytes (immuable) ne peut pas recevoir le digest"""
+        ctx = SHA256_CTX()
+        bootloader_lib.sha256_init(ctx)
+        
+        with pytest.raises(ctypes.ArgumentError):
+            bootloader_lib.sha256_final(ctx, bytes(32))
+    
+    def test_bytearray_output(self, bootloader_lib):
+        """Test: digest écrit directement dans une tranche de bytearray"""
+        out = bytearray(40)
+        bootloader_lib.sha256_hash(b'abc', 3, memoryview(out)[8:])
+        
+        assert out[:8] == bytes(8)
+        assert bytes(out[8:]) == hashlib.sha256(b'abc').digest()
+    
+    def test_wrappers(self, bootloader_lib, payload):
+        """Test: HMAC et base64 via l'API Python"""
+        assert bootloader_lib.hmac_sha256(b'k', payload) == hmac.new(b'k', payload, 'sha256').digest()
+        assert bootloader_lib.base64_encode(payload[:100]) == base64.b64encode(payload[:100])
+        assert bootloader_lib.base64_decode(base64.b64encode(payload[:100])) == payload[:100]
+        assert bootloader_lib.base64_decode(b'YWJjZA==', max_len=2) == b'ab'
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestStreaming:
+    """Tests de Sha256Ctx / HmacCtx (sha256_init / update / final)"""
+    
+    @pytest.mark.parametrize('chunk', [1, 55, 63, 64, 65, 1000])
+    def test_chunk_boundaries(self, bootloader_lib, payload, chunk):
+        """Test: découpage en morceaux de taille fixe == hashlib"""
+        ctx = bootloader_lib.sha256_ctx()
+        view = memoryview(payload)[:5000]
+        for start in range(0, len(view), chunk):
+            ctx.update(view[start:start + chunk])
+        
+        assert ctx.digest() == hashlib.sha256(payload[:5000]).digest()
+    
+    def test_digest_does_not_finalize(self, bootloader_lib):
+        """Test: digest() puis update(), et copy() indépendant (comme hashlib)"""
+        ctx = bootloader_lib.sha256_ctx(b'ab')
+        snapshot = ctx.copy()
+        assert ctx.digest() == hashlib.sha256(b'ab').digest()
+        
+        ctx.update(b'c')
+        assert ctx.hexdigest() == hashlib.sha256(b'abc').hexdigest()
+        assert snapshot.digest() == hashlib.sha256(b'ab').digest()
+    
+    def test_file_constant_memory(self, bootloader_lib, tmp_path):
+        """Test: fichier de 4MB haché par morceaux de 64KB, mémoire bornée"""
+        image = tmp_path / 'flash_dump.bin'
+        image.write_bytes(bytes(range(251)) * (4 * 1024 * 1024 // 251))
+        
+        tracemalloc.start()
+        try:
+            digest = bootloader_lib.sha256_file(image, chunk_size=64 * 1024)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        assert digest == hashlib.sha256(image.read_bytes()).digest()
+        assert peak < 256 * 1024
+    
+    def test_mmap_flash_dump(self, bootloader_lib, payload, tmp_path):
+        """Test: dump flash mappé, haché par tranches de memoryview"""
+        image = tmp_path / 'flash.bin'
+        image.write_bytes(payload)
+        
+        ctx = bootloader_lib.sha256_ctx()
+        with open(image, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as flash:
+            with memoryview(flash) as view:
+                for start in range(0, len(view), 4096):
+                    ctx.update(view[start:start + 4096])
+        
+        assert ctx.digest() == hashlib.sha256(payload).digest()
+    
+    @pytest.mark.parametrize('key', [b'k', bytes(64), bytes(range(100))])
+    def test_hmac_streaming(self, bootloader_lib, payload, key, tmp_path):
+        """Test: HmacCtx == hmac (clé courte, 64 bytes, longue)"""
+        expected = hmac.new(key, payload, 'sha256').digest()
+        
+        ctx = bootloader_lib.hmac_ctx(key, payload[:100])
+        ctx.update(payload[100:])
+        assert ctx.digest() == expected
+        
+        image = tmp_path / 'firmware.bin'
+        image.write_bytes(payload)
+        from_file = bootloader_lib.hmac_ctx(key)
+        assert from_file.update_file(image, chunk_size=1000) == len(payload)
+        assert from_file.digest() == expected
+
+
+@pytest.mark.unit
+class TestZeroCopy:
+    """Tests du coût de l'appel"""
+    
+    def test_faster_than_c_array_copy(self, bootloader_lib, payload):
+        """Test: bytes direct nettement plus rapide que (c_uint8 * n)(*data)"""
+        def timed(call):
+            start = time.perf_counter()
+            for _ in range(5):
+                call()
+            return time.perf_counter() - start
+        
+        copy = timed(lambda: bootloader_lib.Calculate_CRC32(
+            (ctypes.c_uint8 * len(payload))(*payload), len(payload)))
+        direct = timed(lambda: bootloader_lib.crc32(payload))
+        
+        assert direct * 3 < copy
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
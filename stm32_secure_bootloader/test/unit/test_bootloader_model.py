@@ -0,0 +1,243 @@
+"""
+Tests Unitaires - Modèle hôte du bootloader (test/tools/bootloader_model.py)
+Ordre des vérifications de Verify_Firmware(), codes LED, images de flash (mmap, crypto C)
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import bootloader_model  # noqa: E402
+from bootloader_model import BootloaderModel  # noqa: E402
+from firmware_image import CRC_MODE_STM32, FirmwareImage, METADATA_OFFSET  # noqa: E402
+
+
+def make_package(firmware, page_hashes=False):
+    return FirmwareImage(firmware, "1.0.0", page_hashes=page_hashes).package()
+
+
+@pytest.fixture
+def firmware():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(6000)
+
+
+@pytest.mark.unit
+@pytest.mark.verification
+class TestVerifyOrder:
+    """Tests des codes LED, dans l'ordre de Verify_Firmware()"""
+    
+    def test_valid_image(self, firmware):
+        """Test qu'un package valide mène au saut vers l'application"""
+        result = BootloaderModel.from_package(make_package(firmware)).verify()
+        assert result == (bootloader_model.LED_OK, 'ok', None)
+    
+    def test_erased_flash(self):
+        """Test d'une flash vierge: magic invalide (LED 1)"""
+        model = BootloaderModel(b'\xFF' * bootloader_model.FLASH_SIZE)
+        assert model.verify().led_code == 1
+    
+    def test_bad_size(self, firmware):
+        """Test d'une taille > 48KB (LED 2)"""
+        package = bytearray(make_package(firmware))
+        struct.pack_into('<I', package, METADATA_OFFSET + 8, 0xC001)
+        
+        assert BootloaderModel.from_package(package).verify() == (2, 'size', None)
+    
+    def test_bad_stack_pointer(self):
+        """Test d'un stack pointer hors RAM (LED 5)"""
+        firmware = struct.pack('<II', 0x10005000, 0x08002101) + b'\x00' * 100
+        assert BootloaderModel.from_package(make_package(firmware)).verify() == (5, 'stack_pointer', None)
+    
+    def test_bad_crc_before_sha(self, firmware):
+        """Test qu'une corruption est vue par le CRC (LED 2) avant le SHA"""
+        package = bytearray(make_package(firmware))
+        package[1000] ^= 0xFF
+        
+        assert BootloaderModel.from_package(package).verify() == (2, 'crc32', None)
+    
+    def test_bad_sha(self, firmware):
+        """Test d'un SHA-256 stocké faux avec CRC correct (LED 3)"""
+        package = bytearray(make_package(firmware))
+        package[METADATA_OFFSET + 16] ^= 0xFF
+        
+        assert BootloaderModel.from_package(package).verify() == (3, 'sha256', None)
+
+
+@pytest.mark.unit
+@pytest.mark.verification
+class TestPageHashes:
+    """Tests de la vérification par page (arrêt anticipé, re-vérification partielle)"""
+    
+    def test_valid_with_pages(self, firmware):
+        """Test qu'un package avec table de pages est accepté"""
+        model = BootloaderModel.from_package(make_package(firmware, page_hashes=True))
+        assert model.verify().led_code == bootloader_model.LED_OK
+        assert model.verify(page_check=True).led_code == bootloader_model.LED_OK
+    
+    def test_first_bad_page(self, firmware):
+        """Test que la première page corrompue est signalée avant le CRC"""
+        package = bytearray(make_package(firmware, page_hashes=True))
+        package[3 * 1024 + 1] ^= 0xFF
+        package[5 * 1024 + 1] ^= 0xFF
+        
+        result = BootloaderModel.from_package(package).verify(page_check=True)
+        assert result == (bootloader_model.LED_BAD_PAGE, 'pages', 3)
+    
+    def test_default_matches_device(self, firmware):
+        """Test que par défaut la table de pages est ignorée, comme sur la carte"""
+        package = bytearray(make_package(firmware, page_hashes=True))
+        package[3 * 1024 + 1] ^= 0xFF
+        
+        assert BootloaderModel.from_package(package).verify() == (2, 'crc32', None)
+    
+    def test_reverify_only_programmed_pages(self, firmware):
+        """Test qu'après une écriture partielle seules les pages touchées sont revérifiées"""
+        model = BootloaderModel.from_package(make_package(firmware, page_hashes=True))
+        assert model.verify(page_check=True).led_code == 0
+        
+        page_2 = bootloader_model.APPLICATION_ADDRESS + 2 * 1024
+        original = bytes(model.read(page_2, 1024))
+        
+        model.program(page_2 + 10, b'\x00\x01')
+        assert model.dirty_pages == {2}
+        assert model.reverify_pages() == (bootloader_model.LED_BAD_PAGE, 'pages', 2)
+        
+        model.program(page_2, original)
+        assert model.reverify_pages().led_code == 0
+        assert model.dirty_pages == set()
+    
+    def test_metadata_rewrite_triggers_full_verify(self, firmware):
+        """Test qu'une écriture dans les métadonnées force la vérification complète"""
+        model = BootloaderModel.from_package(make_package(firmware, page_hashes=True))
+        model.program(bootloader_model.METADATA_ADDR, b'\x00\x00\x00\x00')
+        
+        assert model.reverify_pages() == (1, 'magic', None)
+
+
+
+def write_flash(path, package):
+    """Image de flash 64KB (0x08000000) contenant `package` à 0x08002000"""
+    path.write_bytes(bytes(BootloaderModel.from_package(package).flash))
+    return path
+
+
+# Une corruption par étape de Verify_Firmware(): (offset dans le package, code LED, étape)
+CORRUPTIONS = [
+    (METADATA_OFFSET, 1, 'magic'),
+    (METADATA_OFFSET + 10, 2, 'size'),
+    (3, 5, 'stack_pointer'),
+    (1000, 2, 'crc32'),
+    (METADATA_OFFSET + 16, 3, 'sha256'),
+]
+
+
+@pytest.mark.unit
+@pytest.mark.verification
+class TestFlashImages:
+    """Tests des images de flash 64KB ouvertes par mmap, crypto C des bindings"""
+    
+    def test_valid_image(self, firmware, tmp_path, bootloader_lib):
+        """Test d'une image valide vérifiée par le code C"""
+        path = write_flash(tmp_path / 'flash.bin', make_package(firmware))
+        
+        with BootloaderModel.open(path, bootloader_lib) as model:
+            assert model.verify() == (bootloader_model.LED_OK, 'ok', None)
+            assert model.lib is bootloader_lib
+    
+    @pytest.mark.parametrize('offset,led_code,stage', CORRUPTIONS,
+                             ids=[stage for _, _, stage in CORRUPTIONS])
+    def test_c_matches_python(self, firmware, tmp_path, bootloader_lib, offset, led_code, stage):
+        """Test: même code LED avec la crypto C et avec zlib / hashlib"""
+        package = bytearray(make_package(firmware))
+        package[offset] ^= 0xFF
+        path = write_flash(tmp_path / 'flash.bin', package)
+        
+        assert bootloader_model.verify_image(path, bootloader_lib) == (led_code, stage, None)
+        assert bootloader_model.verify_image(path) == (led_code, stage, None)
+    
+    def test_hw_crc_mode(self, firmware, tmp_path, bootloader_lib):
+        """Test d'un package crc_mode = stm32: Calculate_CRC32_HW du binding"""
+        package = FirmwareImage(firmware, crc_mode=CRC_MODE_STM32).package()
+        path = write_flash(tmp_path / 'flash.bin', package)
+        
+        assert bootloader_model.verify_image(path, bootloader_lib).led_code == 0
+    
+    def test_truncated_image(self, tmp_path):
+        """Test d'un dump plus court que la flash (et d'un fichier vide)"""
+        short = tmp_path / 'short.bin'
+        short.write_bytes(b'\xFF' * 1024)
+        empty = tmp_path / 'empty.bin'
+        empty.write_bytes(b'')
+        
+        for path in (short, empty):
+            with pytest.raises(ValueError, match='too small'):
+                BootloaderModel.open(path)
+    
+    def test_batch_keeps_going(self, firmware, tmp_path, bootloader_lib):
+        """Test qu'une image illisible ne stoppe pas le lot"""
+        good = write_flash(tmp_path / 'good.bin', make_package(firmware))
+        missing = tmp_path / 'missing.bin'
+        
+        results = dict(bootloader_model.verify_images([missing, good], bootloader_lib))
+        
+        assert isinstance(results[missing], OSError)
+        assert results[good].led_code == 0
+    
+    @pytest.mark.slow
+    def test_throughput(self, tmp_path, bootloader_lib):
+        """Test: plus de 2000 images de 48KB par minute (crypto C)"""
+        paths = []
+        for index in range(100):
+            firmware = struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(48 * 1024 - 8)
+            package = bytearray(make_package(firmware))
+            if index % 2:
+                package[index * 100] ^= 0x01  # Une image sur deux refusée par le CRC
+            paths.append(write_flash(tmp_path / f'candidate_{index}.bin', package))
+        
+        start = time.perf_counter()
+        results = [result for _, result in bootloader_model.verify_images(paths, bootloader_lib)]
+        elapsed = time.perf_counter() - start
+        
+        assert [result.led_code for result in results] == [0, 2] * 50
+        assert len(paths) / elapsed * 60 > 2000
+
+
+@pytest.mark.unit
+class TestCli:
+    """Tests de la ligne de commande"""
+    
+    def test_report(self, firmware, tmp_path, capsys, bootloader_lib):
+        """Test: lot d'images → codes LED, JSON et code de retour"""
+        good = write_flash(tmp_path / 'good.bin', make_package(firmware))
+        bad = bytearray(make_package(firmware))
+        bad[METADATA_OFFSET + 16] ^= 0xFF
+        bad = write_flash(tmp_path / 'bad.bin', bad)
+        output = tmp_path / 'results.json'
+        
+        assert bootloader_model.main([str(good), '--library', str(bootloader_lib.path)]) == 0
+        assert bootloader_model.main([str(good), str(bad), '-o', str(output),
+                                      '--library', str(bootloader_lib.path)]) == 1
+        
+        out = capsys.readouterr().out
+        assert 'bad.bin: LED 3 (sha256)' in out
+        assert '1/2 image(s) boot' in out and 'C crypto' in out
+        assert [entry['led_code'] for entry in json.loads(output.read_text())] == [0, 3]
+    
+    def test_missing_library(self, firmware, tmp_path, capsys):
+        """Test d'une bibliothèque absente: message, ou --python"""
+        good = write_flash(tmp_path / 'good.bin', make_package(firmware))
+        
+        assert bootloader_model.main([str(good), '--library', str(tmp_path / 'none.so')]) == 1
+        assert 'build.sh' in capsys.readouterr().out
+        assert bootloader_model.main([str(good), '--python']) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
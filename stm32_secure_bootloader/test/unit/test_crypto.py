@@ -14,9 +14,7 @@ class TestCRC32:
     
     def calculate_crc32(self, bootloader_lib, data: bytes) -> int:
         """Helper: Appelle la fonction C Calculate_CRC32"""
-        from conftest import bytes_to_c_array
-        data_array = bytes_to_c_array(data)
-        return bootloader_lib.Calculate_CRC32(data_array, len(data))
+        return bootloader_lib.Calculate_CRC32(data, len(data))
     
     def test_crc32_ieee_vector(self, bootloader_lib):
         """Test avec vecteur IEEE 802.3 standard"""
@@ -68,15 +66,7 @@ class TestSHA256:
     
     def calculate_sha256(self, bootloader_lib, data: bytes) -> bytes:
         """Helper: Appelle la fonction C sha256_hash"""
-        import ctypes
-        from conftest import bytes_to_c_array
-        
-        data_array = bytes_to_c_array(data)
-        hash_array = (ctypes.c_uint8 * 32)()
-        
-        bootloader_lib.sha256_hash(data_array, len(data), hash_array)
-        
-        return bytes(hash_array)
+        return bootloader_lib.sha256(data)
     
     def test_sha256_nist_abc(self, bootloader_lib):
         """Test avec vecteur NIST FIPS 180-4: 'abc'"""
@@ -157,5 +147,73 @@ class TestSHA256:
         assert diff_count > 10
 
 
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestHMAC:
+    """Tests de hmac_sha256 et de l'API à clé précalculée (hmac_sha256_init_key)"""
+    
+    def hmac_c(self, bootloader_lib, key: bytes, data: bytes) -> bytes:
+        """Helper: Appelle la fonction C hmac_sha256"""
+        return bootloader_lib.hmac_sha256(key, data)
+    
+    def init_key(self, bootloader_lib, key: bytes):
+        """Helper: Précalcule les états ipad/opad"""
+        from conftest import HMAC_SHA256_CTX
+        
+        key_ctx = HMAC_SHA256_CTX()
+        bootloader_lib.hmac_sha256_init_key(key_ctx, key, len(key))
+        return key_ctx
+    
+    def mac_c(self, bootloader_lib, key_ctx, data: bytes) -> bytes:
+        """Helper: MAC avec la clé précalculée"""
+        out = bytearray(32)
+        bootloader_lib.hmac_sha256_mac(key_ctx, data, len(data), out)
+        return bytes(out)
+    
+    def test_hmac_rfc4231_case2(self, bootloader_lib):
+        """Test avec vecteur RFC 4231 (cas 2: clé 'Jefe')"""
+        result = self.hmac_c(bootloader_lib, b'Jefe', b'what do ya want for nothing?')
+        
+        expected = bytes.fromhex(
+            '5bdcc146bf60754e6a042426089575c7'
+            '5a003f089d2739839dec58b964ec3843'
+        )
+        
+        assert result == expected
+    
+    @pytest.mark.parametrize('key_len', [1, 32, 64, 65, 131])
+    def test_hmac_matches_python_hmac(self, bootloader_lib, key_len):
+        """Test que HMAC C == hmac Python (clé courte, bloc exact, clé hashée)"""
+        import hmac
+        key = bytes(range(key_len))
+        data = b'metadata' * 20
+        
+        assert self.hmac_c(bootloader_lib, key, data) == hmac.new(key, data, 'sha256').digest()
+    
+    def test_precomputed_key_midstates(self, bootloader_lib):
+        """Test que le contexte contient les états après un bloc ipad / opad"""
+        key = b'device_key_32_bytes_for_testing!'
+        key_ctx = self.init_key(bootloader_lib, key)
+        
+        assert list(key_ctx.inner.count) == [0, 1]  # 1 bloc compressé, buffer vide
+        assert list(key_ctx.outer.count) == [0, 1]
+        assert list(key_ctx.inner.state) != list(key_ctx.outer.state)
+    
+    def test_precomputed_key_reused(self, bootloader_lib):
+        """Test que la même clé précalculée MAC plusieurs messages sans être modifiée"""
+        import hmac
+        key = b'device_key_32_bytes_for_testing!'
+        key_ctx = self.init_key(bootloader_lib, key)
+        snapshot = bytes(key_ctx)
+        
+        for data in (b'', b'a', b'x' * 55, b'y' * 64, b'z' * 1000):
+            assert self.mac_c(bootloader_lib, key_ctx, data) == hmac.new(key, data, 'sha256').digest()
+            assert self.mac_c(bootloader_lib, key_ctx, data) == self.hmac_c(bootloader_lib, key, data)
+        
+        assert bytes(key_ctx) == snapshot
+
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
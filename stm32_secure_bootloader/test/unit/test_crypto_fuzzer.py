@@ -0,0 +1,101 @@
+"""
+Tests Unitaires - Fuzzer différentiel (test/tools/crypto_fuzzer.py)
+Reproductibilité, pool de process, minimisation et rejeu des échecs
+"""
+
+import json
+import sys
+import zlib
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import crypto_fuzzer  # noqa: E402
+
+
+class CorruptedCrcLib:
+    """Faux binding: CRC32 faux dès que l'entrée dépasse 100 bytes"""
+    
+    @staticmethod
+    def Calculate_CRC32(data, length):
+        return zlib.crc32(data) ^ (1 if length > 100 else 0)
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestFuzzer:
+    """Tests du fuzzing contre libbootloader.so"""
+    
+    def test_all_targets_clean(self, bootloader_lib):
+        """Test: quelques centaines de cas par cible, aucun écart C ↔ Python"""
+        report = crypto_fuzzer.fuzz(cases=300, jobs=1, seed=1, max_len=512)
+        
+        assert report['failures'] == []
+        assert report['cases'] == 300 * len(crypto_fuzzer.TARGETS)
+        assert report['execs_per_s'] > 0
+    
+    def test_pool_same_cases(self, bootloader_lib):
+        """Test: le pool de process exécute exactement les mêmes lots"""
+        tasks = crypto_fuzzer.make_tasks(['sha256_stream'], 5000, seed=7, max_len=256)
+        assert sum(task[3] for task in tasks) == 5000
+        
+        report = crypto_fuzzer.fuzz(['sha256_stream', 'hmac_key'], cases=3000, jobs=2, seed=7,
+                                    max_len=256)
+        assert report['targets']['sha256_stream'] == {'cases': 3000, 'failures': 0}
+    
+    def test_unknown_target(self):
+        """Test: cible inconnue refusée"""
+        with pytest.raises(ValueError):
+            crypto_fuzzer.fuzz(['md5'], cases=1)
+
+
+@pytest.mark.unit
+class TestCases:
+    """Tests de la génération et de la minimisation"""
+    
+    def test_generation_reproducible(self):
+        """Test: même graine et même lot → mêmes cas"""
+        def cases(seed):
+            rng = crypto_fuzzer.random.Random(f"{seed}:hmac:0")
+            return [crypto_fuzzer.TARGETS['hmac'].generate(rng, 256) for _ in range(20)]
+        
+        assert cases(3) == cases(3)
+        assert cases(3) != cases(4)
+    
+    @pytest.mark.parametrize('chunks', [[1], [0, 64], [0], [63, 65, 3]])
+    def test_split_chunks(self, chunks):
+        """Test: le découpage couvre les données, sans boucle infinie sur 0"""
+        data = bytes(range(200))
+        assert b''.join(crypto_fuzzer.split_chunks(data, chunks)) == data
+    
+    def test_minimize_to_trigger(self):
+        """Test: un cas de 2KB se réduit au seul byte déclencheur"""
+        def check(lib, case):
+            return 'boom' if b'\x42' in case['data'] else None
+        
+        case = {'data': bytes(900) + b'\x42' + bytes(range(256)) * 4}
+        assert crypto_fuzzer.minimize(check, None, case) == {'data': b'\x42'}
+    
+    def test_failure_detected_and_minimized(self):
+        """Test: un binding faux est détecté, l'entrée minimisée garde la taille limite"""
+        task = ('crc32', 0, 0, 500, 1024)
+        name, count, failures = crypto_fuzzer.run_batch(task, CorruptedCrcLib)
+        
+        assert (name, count) == ('crc32', 500)
+        assert 0 < len(failures) <= crypto_fuzzer.MAX_FAILURES_PER_TARGET
+        assert failures[0]['minimized'] == {'data': '00' * 101}
+    
+    def test_replay_report(self, bootloader_lib, tmp_path):
+        """Test: rejeu d'un rapport avec le vrai binding → corrigé"""
+        _, _, failures = crypto_fuzzer.run_batch(('crc32', 0, 0, 200, 1024), CorruptedCrcLib)
+        report = tmp_path / 'fuzz_report.json'
+        report.write_text(json.dumps({'failures': failures}))
+        
+        assert crypto_fuzzer.main(['--replay', str(report)]) == 0
+        assert all(detail is None for _, detail in crypto_fuzzer.replay(str(report)))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
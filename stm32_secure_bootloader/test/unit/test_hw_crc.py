@@ -0,0 +1,107 @@
+"""
+Tests Unitaires - CRC32 matériel (Calculate_CRC32_HW, crc_mode = stm32)
+Signeur (crc32_stm32) == émulateur de l'unité CRC == binding C == modèle
+"""
+
+import os
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import bootloader_model  # noqa: E402
+from bootloader_model import BootloaderModel  # noqa: E402
+from firmware_image import (  # noqa: E402
+    CRC_MODE_STM32, FirmwareImage, METADATA_OFFSET, crc32_stm32, crc32_stm32_bitwise,
+)
+from stm32_crc_unit import CR_RESET, Stm32CrcUnit, calculate_crc32_hw  # noqa: E402
+
+LENGTHS = [0, 1, 2, 3, 4, 5, 7, 64, 1001, 48 * 1024 - 3]
+
+
+@pytest.fixture
+def firmware():
+    return struct.pack('<II', 0x20005000, 0x08002101) + os.urandom(6001)
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestCrcUnit:
+    """Tests de l'unité CRC et de ses implémentations"""
+    
+    def test_reference_vector(self, bootloader_lib):
+        """Test: DR = 0x12345678 après reset → 0xDF8A8A2B (valeur du manuel)"""
+        unit = Stm32CrcUnit()
+        unit.CR = CR_RESET
+        unit.DR = 0x12345678
+        assert unit.DR == 0xDF8A8A2B
+        
+        bootloader_lib.crc_unit_reset()
+        bootloader_lib.crc_unit_write(0x12345678)
+        assert bootloader_lib.crc_unit_read() == 0xDF8A8A2B
+        
+        assert crc32_stm32(struct.pack('<I', 0x12345678)) == 0xDF8A8A2B
+    
+    def test_reset(self):
+        """Test: CR_RESET remet DR à 0xFFFFFFFF sans toucher IDR"""
+        unit = Stm32CrcUnit()
+        unit.IDR = 0x5A
+        unit.DR = 0x12345678
+        unit.CR = CR_RESET
+        
+        assert unit.DR == 0xFFFFFFFF
+        assert unit.IDR == 0x5A
+    
+    @pytest.mark.parametrize('length', LENGTHS)
+    def test_implementations_agree(self, bootloader_lib, length):
+        """Test: signeur rapide == bit à bit == émulateur == Calculate_CRC32_HW"""
+        data = os.urandom(length)
+        expected = calculate_crc32_hw(data)
+        
+        assert crc32_stm32(data) == expected
+        assert crc32_stm32_bitwise(data) == expected
+        assert bootloader_lib.crc32_hw(data) == expected
+    
+    def test_tail_padded_with_erased_flash(self):
+        """Test: 1-3 bytes de fin complétés par 0xFF (comme la flash effacée)"""
+        data = os.urandom(10)
+        assert crc32_stm32(data) == crc32_stm32(data + b'\xFF\xFF')
+    
+    def test_chained(self):
+        """Test: calcul par morceaux multiples de 4 == calcul d'un bloc"""
+        data = os.urandom(1000)
+        assert crc32_stm32(data[400:], crc32_stm32(data[:400])) == crc32_stm32(data)
+
+
+@pytest.mark.unit
+@pytest.mark.verification
+class TestBootWithHwCrc:
+    """Tests de Verify_Firmware() sur un package crc_mode = stm32"""
+    
+    def test_valid_image(self, firmware):
+        """Test qu'un package stm32 valide mène au saut vers l'application"""
+        package = FirmwareImage(firmware, crc_mode=CRC_MODE_STM32).package()
+        result = BootloaderModel.from_package(package).verify()
+        
+        assert result == (bootloader_model.LED_OK, 'ok', None)
+    
+    def test_corruption_detected_by_crc(self, firmware):
+        """Test qu'une corruption est vue par le CRC matériel (LED 2)"""
+        package = bytearray(FirmwareImage(firmware, crc_mode=CRC_MODE_STM32).package())
+        package[len(firmware) - 1] ^= 0x01  # Dans le mot de fin complété
+        
+        assert BootloaderModel.from_package(package).verify() == (2, 'crc32', None)
+    
+    def test_unknown_crc_mode(self, firmware):
+        """Test qu'un crc_mode inconnu refuse de booter (LED 2)"""
+        package = bytearray(FirmwareImage(firmware).package())
+        package[METADATA_OFFSET + 52 + 3] = 0x7F  # reserved[3]
+        
+        assert BootloaderModel.from_package(package).verify() == (2, 'crc32', None)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
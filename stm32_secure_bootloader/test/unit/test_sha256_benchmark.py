@@ -0,0 +1,86 @@
+"""
+Tests Unitaires - Chemin rapide de sha256_update et benchmark
+(test/tools/sha256_benchmark.py)
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import sha256_benchmark  # noqa: E402
+from conftest import SHA256_CTX  # noqa: E402
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestFastPath:
+    """Tests du chemin rapide (blocs complets depuis la source)"""
+    
+    @pytest.mark.parametrize('chunks', [[64, 64], [3, 125], [63, 1, 64], [0, 200], [130]])
+    def test_same_state_as_bytewise(self, bootloader_lib, chunks):
+        """Test: même état C (state, count, bytes en attente) que la boucle byte par byte"""
+        data = os.urandom(sum(chunks))
+        fast, bytewise = SHA256_CTX(), SHA256_CTX()
+        bootloader_lib.sha256_init(fast)
+        bootloader_lib.sha256_init(bytewise)
+        
+        start = 0
+        for size in chunks:
+            piece = data[start:start + size]
+            bootloader_lib.sha256_update(fast, piece, size)
+            bootloader_lib.sha256_update_bytewise(bytewise, piece, size)
+            start += size
+            
+            assert list(fast.state) == list(bytewise.state)
+            assert list(fast.count) == list(bytewise.count)
+            tail = fast.count[0]
+            assert bytes(fast.buffer[:tail]) == bytes(bytewise.buffer[:tail])
+    
+    def test_unaligned_source(self, bootloader_lib):
+        """Test: blocs lus à une adresse non alignée sur 4"""
+        data = bytearray(os.urandom(4 * 64 + 3))
+        for offset in range(4):
+            view = memoryview(data)[offset:offset + 4 * 64]
+            assert bootloader_lib.sha256(view) == hashlib.sha256(view).digest()
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestBenchmark:
+    """Tests de l'outil de benchmark"""
+    
+    def test_digests_checked(self, bootloader_lib):
+        """Test: chaque scénario vérifie les deux implémentations contre hashlib"""
+        for size in [0, 1, 64, 1000]:
+            for chunk in [0, 61]:
+                result = sha256_benchmark.benchmark(bootloader_lib, size, chunk, repeat=1)
+                assert result['ok'], (size, chunk)
+    
+    def test_cli_report(self, bootloader_lib, tmp_path, capsys):
+        """Test: CLI → tableau et résultats JSON"""
+        output = tmp_path / 'bench.json'
+        
+        assert sha256_benchmark.main(['--sizes', '4096', '--chunks', '0,256', '-r', '1',
+                                      '-o', str(output)]) == 0
+        results = json.loads(output.read_text())
+        
+        assert [result['chunk'] for result in results] == [0, 256]
+        assert 'speedup' in capsys.readouterr().out
+    
+    @pytest.mark.slow
+    def test_fast_path_faster(self, bootloader_lib):
+        """Test: image de 1MB en un update(), chemin rapide plus rapide"""
+        result = sha256_benchmark.benchmark(bootloader_lib, 1024 * 1024, repeat=7)
+        
+        assert result['ok']
+        assert result['speedup'] > 1.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,119 @@
+"""
+Tests Unitaires - Conformité SHA-256 à grande échelle
+sha256_hash et sha256_init/update/final (C) contre le modèle NumPy
+multi-messages (test/tools/sha256_vectorized.py)
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import sha256_vectorized  # noqa: E402
+from conftest import SHA256_CTX  # noqa: E402
+
+# Longueurs autour des bords de padding (55/56) et de bloc (64)
+BOUNDARY_LENGTHS = [0, 1, 55, 56, 57, 63, 64, 65, 119, 120, 127, 128, 129, 1000]
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0x5EC0B007)
+
+
+def c_sha256_hash(lib, corpus):
+    """sha256_hash sur chaque ligne du corpus → tableau (N, 32)"""
+    out = np.empty((corpus.shape[0], 32), dtype=np.uint8)
+    length = corpus.shape[1]
+    for index in range(corpus.shape[0]):
+        lib.sha256_hash(corpus[index], length, out[index])  # Lignes contiguës, sans copie
+    return out
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestVectorizedModel:
+    """Tests du modèle de référence lui-même (contre hashlib)"""
+    
+    def test_nist_abc(self):
+        """Test avec vecteur NIST FIPS 180-4: 'abc'"""
+        assert sha256_vectorized.digests([b'abc'])[0] == bytes.fromhex(
+            'ba7816bf8f01cfea414140de5dae2223'
+            'b00361a396177a9cb410ff61f20015ad'
+        )
+    
+    @pytest.mark.parametrize('length', BOUNDARY_LENGTHS)
+    def test_matches_hashlib(self, rng, length):
+        """Test: chaque ligne == hashlib.sha256"""
+        corpus = rng.integers(0, 256, (64, length), dtype=np.uint8)
+        
+        expected = [hashlib.sha256(row.tobytes()).digest() for row in corpus]
+        assert sha256_vectorized.digests(corpus) == expected
+    
+    def test_block_states(self):
+        """Test: état initial H0 puis un état par bloc complet"""
+        states = sha256_vectorized.block_states([b'x' * 130, b'y' * 130])
+        
+        assert states.shape == (3, 8, 2)
+        assert states[0, 0, 0] == 0x6a09e667
+    
+    def test_unequal_lengths_refused(self):
+        """Test: messages de longueurs différentes refusés"""
+        with pytest.raises(ValueError):
+            sha256_vectorized.sha256_many([b'a', b'bc'])
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestSha256Conformance:
+    """Tests du code C sur des corpus aléatoires"""
+    
+    @pytest.mark.parametrize('length', BOUNDARY_LENGTHS)
+    def test_sha256_hash_corpus(self, bootloader_lib, rng, length):
+        """Test: sha256_hash C == modèle sur 512 messages par longueur"""
+        corpus = rng.integers(0, 256, (512, length), dtype=np.uint8)
+        
+        mismatches = np.flatnonzero(
+            (c_sha256_hash(bootloader_lib, corpus) != sha256_vectorized.sha256_many(corpus)).any(axis=1))
+        assert mismatches.size == 0, f"first mismatch: {corpus[mismatches[0]].tobytes().hex()}"
+    
+    def test_update_chunking(self, bootloader_lib, rng):
+        """Test: découpage aléatoire des update(), état C == état du modèle à chaque appel"""
+        corpus = rng.integers(0, 256, (256, 300), dtype=np.uint8)
+        states = sha256_vectorized.block_states(corpus)
+        expected = sha256_vectorized.sha256_many(corpus)
+        out = bytearray(32)
+        
+        for index, row in enumerate(corpus):
+            ctx = SHA256_CTX()
+            bootloader_lib.sha256_init(ctx)
+            cuts = sorted(rng.integers(0, row.size + 1, rng.integers(1, 8)).tolist())
+            
+            start = 0
+            for end in [*cuts, row.size]:
+                bootloader_lib.sha256_update(ctx, row[start:end], end - start)
+                start = end
+                
+                blocks, tail = divmod(end, 64)
+                assert (ctx.count[1], ctx.count[0]) == (blocks, tail)
+                assert list(ctx.state) == states[blocks, :, index].tolist()
+                assert bytes(ctx.buffer[:tail]) == row[blocks * 64:end].tobytes()
+            
+            bootloader_lib.sha256_final(ctx, out)
+            assert bytes(out) == expected[index].tobytes()
+    
+    @pytest.mark.slow
+    def test_large_random_corpus(self, bootloader_lib, rng):
+        """Test: 32768 messages, toutes les longueurs de 0 à 191 bytes"""
+        for length in range(192):
+            corpus = rng.integers(0, 256, (32768 // 192, length), dtype=np.uint8)
+            assert np.array_equal(c_sha256_hash(bootloader_lib, corpus),
+                                  sha256_vectorized.sha256_many(corpus)), f"length {length}"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,98 @@
+"""
+Tests Unitaires - Variantes de sha256_transform (SHA256_TRANSFORM)
+Chaque variante compilée et comparée à hashlib, pile mesurée par
+test/tools/sha256_transform_bench.py
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'tools'))
+
+import sha256_transform_bench  # noqa: E402
+from bootloader_bindings import BootloaderLib  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not (shutil.which('gcc') and shutil.which('nm')),
+                                reason="gcc / nm requis pour compiler les variantes")
+
+
+@pytest.fixture(scope='module')
+def variants(tmp_path_factory):
+    """Les trois variantes compilées en -Os → {nom: résultat de build_variant}"""
+    workdir = tmp_path_factory.mktemp('sha256_transform')
+    return {name: sha256_transform_bench.build_variant(name, workdir)
+            for name in sha256_transform_bench.VARIANTS}
+
+
+@pytest.mark.unit
+@pytest.mark.crypto
+class TestVariants:
+    """Tests de conformité de chaque variante"""
+    
+    @pytest.mark.parametrize('name', list(sha256_transform_bench.VARIANTS))
+    def test_matches_hashlib(self, variants, name):
+        """Test: sha256_hash et découpage en update() == hashlib"""
+        lib = BootloaderLib(variants[name]['library'])
+        
+        for length in [0, 55, 56, 64, 65, 1000, 48 * 1024]:
+            data = os.urandom(length)
+            assert lib.sha256(data) == hashlib.sha256(data).digest(), length
+        
+        data = os.urandom(1000)
+        ctx = lib.sha256_ctx()
+        for start in range(0, len(data), 61):
+            ctx.update(data[start:start + 61])
+        assert ctx.digest() == hashlib.sha256(data).digest()
+    
+    def test_ring_buffer_saves_stack(self, variants):
+        """Test: le ring buffer de 16 mots économise au moins 128 bytes de pile"""
+        schedule64 = variants['schedule64']['frames']['sha256_transform']
+        ring16 = variants['ring16']['frames']['sha256_transform']
+        
+        assert ring16 + 128 <= schedule64
+        assert variants['ring16']['stack'] < variants['schedule64']['stack']
+    
+    def test_unrolled_is_larger(self, variants):
+        """Test: la variante déroulée coûte de la taille de code"""
+        assert variants['unrolled']['code'] > variants['ring16']['code']
+
+
+@pytest.mark.unit
+class TestHarness:
+    """Tests de l'outil de mesure"""
+    
+    def test_parse_stack_usage(self):
+        """Test: lecture d'un fichier .su de GCC"""
+        text = ("crypto_light.c:47:13:sha256_transform\t224\tstatic\n"
+                "crypto_light.c:120:6:sha256_hash\t160\tstatic\n"
+                "main.c:10:5:Verify_Firmware\t48\tdynamic,bounded\n")
+        frames = sha256_transform_bench.parse_stack_usage(text)
+        
+        assert frames == {'sha256_transform': 224, 'sha256_hash': 160, 'Verify_Firmware': 48}
+        assert sha256_transform_bench.hash_stack(frames) == 384
+    
+    def test_cli_no_measure(self, tmp_path, capsys):
+        """Test: --no-measure (compilateur croisé) → pile et code seulement"""
+        output = tmp_path / 'transform.json'
+        
+        assert sha256_transform_bench.main(['--no-measure', '--variants', 'ring16',
+                                            '-o', str(output)]) == 0
+        result, = json.loads(output.read_text())
+        
+        assert result['variant'] == 'ring16' and 'mbps' not in result
+        assert result['stack'] > 0
+    
+    def test_cli_unknown_variant(self, capsys):
+        """Test: variante inconnue refusée"""
+        assert sha256_transform_bench.main(['--variants', 'fast']) == 1
+        assert 'fast' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
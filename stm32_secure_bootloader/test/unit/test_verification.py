@@ -5,7 +5,6 @@ Tests de la logique de Verify_Firmware() du bootloader
 
 import pytest
 import struct
-import ctypes
 
 
 # ============================================================================
@@ -14,16 +13,12 @@ import ctypes
 
 def calculate_crc32_c(bootloader_lib, data: bytes) -> int:
     """Appelle la fonction C Calculate_CRC32"""
-    data_array = (ctypes.c_uint8 * len(data))(*data)
-    return bootloader_lib.Calculate_CRC32(data_array, len(data))
+    return bootloader_lib.Calculate_CRC32(data, len(data))
 
 
 def calculate_sha256_c(bootloader_lib, data: bytes) -> bytes:
     """Appelle la fonction C sha256_hash"""
-    data_array = (ctypes.c_uint8 * len(data))(*data)
-    hash_array = (ctypes.c_uint8 * 32)()
-    bootloader_lib.sha256_hash(data_array, len(data), hash_array)
-    return bytes(hash_array)
+    return bootloader_lib.sha256(data)
 
 
 # ============================================================================